@@ -3,13 +3,27 @@ from flask_cors import CORS
 from app.config import Config
 from app.database import init_database
 from app.middleware import require_auth
+from app.scheduler import init_scheduler
+from app.log_storage import init_log_storage
+from app.reminder_scheduler import init_reminder_scheduler
+from app.http_cache import init_http_cache
+from app.imports import init_imports
+from app.outbox import init_outbox
+from app.counters import init_counters
+from app.change_tracking import init_change_tracking
+from app.deletion import init_deletion
+from app.query_plans import init_query_plans
+from app.reporting import init_reporting
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     app.url_map.strict_slashes = False
     
-    CORS(app, origins=['http://localhost:3000', 'http://localhost:8100', 'http://localhost:8082', 'http://localhost:5173'])
+    # Nagłówki odpowiedzi czytane przez klientów (kursory stronicowania, metadane eksportów i raportów)
+    CORS(app, origins=['http://localhost:3000', 'http://localhost:8100', 'http://localhost:8082', 'http://localhost:5173'],
+         expose_headers=['X-Next-Cursor', 'X-Export-Next-Since', 'X-Export-Next-Since-Id', 'X-Report-Generated-At',
+                         'X-Report-Source', 'X-Cache', 'ETag', 'Content-Disposition'])
     
     init_database(app)
     
@@ -36,6 +50,12 @@ def create_app():
     from app.controllers.payments import payments_bp
     from app.controllers.templates import templates_bp
     from app.controllers.calendar_events import calendar_events_bp
+    from app.controllers.schedules import schedules_bp
+    from app.controllers.me import me_bp
+    from app.controllers.sync import sync_bp
+    from app.controllers.batch import batch_bp
+    from app.controllers.imports import imports_bp
+    from app.controllers.deletions import deletions_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/Auth')
     app.register_blueprint(customers_bp, url_prefix='/api/Customers')
@@ -60,6 +80,25 @@ def create_app():
     app.register_blueprint(calendar_events_bp, url_prefix='/api/CalendarEvents')
     app.register_blueprint(payments_bp, url_prefix='/api/Payments')
     app.register_blueprint(templates_bp, url_prefix='/api/Templates')
+    app.register_blueprint(schedules_bp, url_prefix='/api/admin/schedules')
+    app.register_blueprint(me_bp, url_prefix='/api/me')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+    app.register_blueprint(imports_bp, url_prefix='/api/imports')
+    app.register_blueprint(deletions_bp, url_prefix='/api/deletions')
+    
+    # Harmonogram zadań w tle (po rejestracji blueprintów - typy zadań rejestrują kontrolery)
+    init_scheduler(app)
+    init_log_storage(app)
+    init_reminder_scheduler(app)
+    init_http_cache(app)
+    init_outbox(app)
+    init_counters(app)
+    init_change_tracking(app)
+    init_imports(app)
+    init_deletion(app)
+    init_query_plans(app)
+    init_reporting(app)
     
     @app.route('/')
     def index():
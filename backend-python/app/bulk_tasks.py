@@ -0,0 +1,214 @@
+"""
+Operacje zbiorcze na zadaniach (ukończenie, przepisanie, zmiana tagów, usuwanie).
+
+Zadania są wybierane listą Id albo filtrem (zawsze tylko zadania bieżącego użytkownika),
+a zmiana jest wykonywana jednym UPDATE/DELETE po liście Id (partiami po IN_CHUNK_SIZE).
+Skutki uboczne - aktywności, powiadomienia, log systemowy - trafiają do outboxa
+(app/outbox.py) i są zapisywane przy commit w tej samej transakcji; funkcje nie wykonują commit.
+
+Zapisy zbiorcze pomijają zdarzenia mapperów, więc liczniki plakietek (PendingTasks), agregaty
+zadań (TaskAggregates), dziennik synchronizacji i wersja tabeli TaskTags są aktualizowane jawnie.
+Różnice liczników są liczone z odczytanych wierszy, dlatego odczyt blokuje je do końca transakcji
+(SELECT ... FOR UPDATE), a UPDATE/DELETE powtarza warunek stanu - gdy liczba zmienionych wierszy
+nie zgadza się z odczytem, operacja kończy się BulkTaskConflict (wycofanie zamiast dryfu liczników).
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from app.change_tracking import record_changed_where, record_changes
+from app.counters import adjust_counter
+from app.database import db
+from app.http_cache import bump_table_version
+from app.models import Tag, Task, User
+from app.models.task import task_tags
+from app.outbox import add_activity, add_notification, add_system_log
+from app.task_analytics import TaskState, adjust_task_aggregates, merge_deltas, task_deltas
+
+IN_CHUNK_SIZE = 1000
+LOG_SOURCE = 'Python.Backend.TasksController'
+
+TASK_FILTERS = ('completed', 'customerId', 'tagId', 'dueBefore', 'dueAfter')
+
+
+class BulkTaskConflict(ValueError):
+    """Zadania zmieniły się między odczytem a zapisem operacji zbiorczej"""
+
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(str(value).replace('Z', ''))
+
+
+def parse_selection(data):
+    """Zwraca (ids, filtry) z treści żądania; wymagane jest jedno z pól ids lub filter"""
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if ids is None and not filters:
+        raise ValueError('Wymagane pole ids (lista Id zadań) lub niepusty filter')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(task_id, int) for task_id in ids):
+            raise ValueError('Pole ids musi być listą liczb całkowitych')
+    if filters:
+        if not isinstance(filters, dict):
+            raise ValueError('Pole filter musi być obiektem')
+        unknown = set(filters) - set(TASK_FILTERS)
+        if unknown:
+            raise ValueError(f"Nieznane pola filtra: {', '.join(sorted(unknown))}")
+    return ids, filters or {}
+
+
+def select_tasks(user_id, ids=None, filters=None):
+    """
+    Wybrane zadania użytkownika: lista (Id, Completed, CustomerId, Title, UserId, AssignedGroupId).
+    Wiersze są zablokowane do końca transakcji (FOR UPDATE; SQLite blokuje całą bazę przy zapisie).
+    """
+    query = select(Task.Id, Task.Completed, Task.CustomerId, Task.Title, Task.UserId, Task.AssignedGroupId) \
+        .where(Task.UserId == user_id).with_for_update()
+    filters = filters or {}
+    if 'completed' in filters:
+        query = query.where(Task.Completed.is_(bool(filters['completed'])))
+    if filters.get('customerId'):
+        query = query.where(Task.CustomerId == filters['customerId'])
+    if filters.get('dueBefore'):
+        query = query.where(Task.DueDate < _parse_date(filters['dueBefore']))
+    if filters.get('dueAfter'):
+        query = query.where(Task.DueDate >= _parse_date(filters['dueAfter']))
+    if filters.get('tagId'):
+        query = query.where(Task.Id.in_(select(task_tags.c.TaskId).where(task_tags.c.TagId == filters['tagId'])))
+
+    if ids is None:
+        return db.session.execute(query.order_by(Task.Id)).all()
+    rows = []
+    for chunk in _chunks(sorted(set(ids))):
+        rows.extend(db.session.execute(query.where(Task.Id.in_(chunk)).order_by(Task.Id)).all())
+    return rows
+
+
+def _write_chunks(ids, statement):
+    """Wykonuje statement(chunk) dla partii Id; błąd, gdy zmieniono inną liczbę wierszy niż odczytano"""
+    affected = 0
+    for chunk in _chunks(ids):
+        affected += db.session.execute(statement(chunk).execution_options(synchronize_session=False)).rowcount
+    if affected != len(ids):
+        raise BulkTaskConflict('Zadania zmieniły się w trakcie operacji zbiorczej - spróbuj ponownie')
+
+
+def _log(user_id, message, details):
+    add_system_log('Information', message, LOG_SOURCE, user_id, json.dumps(details, ensure_ascii=False))
+
+
+def _add_activities(user_id, rows, note):
+    for row in rows:
+        add_activity(user_id, note.format(title=row.Title or 'Bez tytułu'), row.CustomerId)
+
+
+def bulk_complete(user_id, rows, completed=True):
+    """Ustawia Completed; zwraca liczbę faktycznie zmienionych zadań"""
+    changed = [row for row in rows if bool(row.Completed) != completed]
+    ids = [row.Id for row in changed]
+    state = Task.Completed.isnot(True) if completed else Task.Completed.is_(True)
+    _write_chunks(ids, lambda chunk: update(Task).where(Task.Id.in_(chunk), Task.UserId == user_id, state)
+                  .values(Completed=completed))
+    if not ids:
+        return 0
+
+    connection = db.session.connection()
+    adjust_counter(connection, user_id, 'PendingTasks', -len(ids) if completed else len(ids))
+    adjust_task_aggregates(connection, merge_deltas(
+        task_deltas(changed, -1), task_deltas(changed, 1, pending_of=lambda row: not completed)))
+    record_changes('tasks', ids, 'upsert', user_id)
+    _add_activities(user_id, changed, 'Ukończono zadanie: {title}' if completed else 'Wznowiono zadanie: {title}')
+    _log(user_id, f"Zbiorczo {'ukończono' if completed else 'wznowiono'} zadania: {len(ids)}", {'taskIds': ids})
+    return len(ids)
+
+
+def bulk_reassign(user_id, rows, new_user_id):
+    """Przepisuje zadania na innego użytkownika; zwraca liczbę przepisanych zadań"""
+    if not db.session.get(User, new_user_id):
+        raise ValueError(f'Użytkownik o ID {new_user_id} nie istnieje')
+    changed = rows if new_user_id != user_id else []
+    ids = [row.Id for row in changed]
+    _write_chunks(ids, lambda chunk: update(Task).where(Task.Id.in_(chunk), Task.UserId == user_id)
+                  .values(UserId=new_user_id))
+    if not ids:
+        return 0
+
+    pending = sum(1 for row in changed if not row.Completed)
+    connection = db.session.connection()
+    adjust_counter(connection, user_id, 'PendingTasks', -pending)
+    adjust_counter(connection, new_user_id, 'PendingTasks', pending)
+    adjust_task_aggregates(connection, merge_deltas(task_deltas(changed, -1), task_deltas(
+        [TaskState(new_user_id, row.AssignedGroupId, row.Completed) for row in changed], 1)))
+    # Poprzedni właściciel dostaje nagrobki, nowy - pełne dane zadań
+    record_changes('tasks', ids, 'delete', user_id)
+    record_changes('tasks', ids, 'upsert', new_user_id)
+    _add_activities(user_id, changed, 'Przekazano zadanie: {title}')
+    # Jedno powiadomienie zamiast jednego na zadanie
+    add_notification(new_user_id, f'Przypisano Ci zadania: {len(ids)}')
+    _log(user_id, f'Zbiorczo przekazano zadania: {len(ids)}', {'taskIds': ids, 'userId': new_user_id})
+    return len(ids)
+
+
+def bulk_retag(user_id, rows, add=(), remove=()):
+    """Dodaje i usuwa tagi zadań; zwraca liczbę dodanych i usuniętych powiązań"""
+    tag_ids = set(add) | set(remove)
+    existing_tags = {tag_id for (tag_id,) in db.session.execute(select(Tag.Id).where(Tag.Id.in_(tag_ids))).all()}
+    missing = tag_ids - existing_tags
+    if missing:
+        raise ValueError(f"Nieznane tagi: {', '.join(str(tag_id) for tag_id in sorted(missing))}")
+
+    ids = [row.Id for row in rows]
+    added = removed = 0
+    for chunk in _chunks(ids):
+        changed = 0
+        if remove:
+            changed += db.session.execute(delete(task_tags).where(
+                task_tags.c.TaskId.in_(chunk), task_tags.c.TagId.in_(list(remove))
+            )).rowcount
+            removed += changed
+        if add:
+            present = set(db.session.execute(select(task_tags.c.TaskId, task_tags.c.TagId).where(
+                task_tags.c.TaskId.in_(chunk), task_tags.c.TagId.in_(list(add))
+            )).all())
+            links = [{'TaskId': task_id, 'TagId': tag_id} for task_id in chunk for tag_id in add
+                     if (task_id, tag_id) not in present]
+            if links:
+                db.session.execute(task_tags.insert(), links)
+                added += len(links)
+                changed += len(links)
+        # Zapisy TaskTags omijają zdarzenia mapperów - zmiana tagów trafia do dziennika synchronizacji jawnie
+        if changed:
+            record_changed_where('tasks', Task.Id.in_(chunk))
+
+    if added or removed:
+        bump_table_version('TaskTags')
+        _log(user_id, f'Zbiorczo zmieniono tagi zadań: {len(ids)}',
+             {'taskIds': ids, 'addTagIds': sorted(add), 'removeTagIds': sorted(remove)})
+    return added, removed
+
+
+def bulk_delete(user_id, rows):
+    """Usuwa zadania (razem z powiązaniami tagów); zwraca liczbę usuniętych zadań"""
+    ids = [row.Id for row in rows]
+    tags_removed = 0
+    for chunk in _chunks(ids):
+        tags_removed += db.session.execute(delete(task_tags).where(task_tags.c.TaskId.in_(chunk))).rowcount
+    _write_chunks(ids, lambda chunk: delete(Task).where(Task.Id.in_(chunk), Task.UserId == user_id))
+    if not ids:
+        return 0
+
+    connection = db.session.connection()
+    adjust_counter(connection, user_id, 'PendingTasks', -sum(1 for row in rows if not row.Completed))
+    adjust_task_aggregates(connection, task_deltas(rows, -1))
+    record_changes('tasks', ids, 'delete', user_id)
+    if tags_removed:
+        bump_table_version('TaskTags')
+    _log(user_id, f'Zbiorczo usunięto zadania: {len(ids)}', {'taskIds': ids})
+    return len(ids)
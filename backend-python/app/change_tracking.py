@@ -0,0 +1,400 @@
+"""
+Śledzenie zmian encji dla synchronizacji przyrostowej (GET /api/sync).
+
+Każdy zapis ORM śledzonych modeli dopisuje wiersz do tabeli ChangeLog w tej samej transakcji
+(zdarzenia mapperów after_insert / after_update / after_delete). Klient wysyła ostatnio
+otrzymany kursor i dostaje tylko encje zmienione później - aktualne dane (upserts) oraz
+identyfikatory usuniętych (deletes).
+
+Kursor to '<CommitSeq>_<Id>'. Id wpisu jest nadawany przy zapisie, a nie przy zatwierdzeniu -
+długa transakcja może zatwierdzić niższe Id po tym, jak klient minął już wyższe. Dlatego przy
+commit wpisy transakcji (wspólny TxnToken) dostają numer zatwierdzenia CommitSeq z licznika
+w TableVersions (wiersz 'ChangeLog'). Blokada wiersza licznika trwa do końca transakcji, więc
+numery są widoczne w kolejności zatwierdzeń i kursor nigdy nie przeskakuje wpisów.
+
+Klienci i faktury są zawężani do grup użytkownika (app/visibility.py) - encja przeniesiona do
+cudzej grupy trafia do deletes jak usunięta.
+
+Zmiany pozycji faktur i płatności są zapisywane jako zmiana faktury, bo wpływają na jej
+status i kwoty. Stare wpisy dziennika usuwa zadanie `prune_changelog`; klient ze starszym
+kursorem dostaje 410 i wykonuje pełną synchronizację (bez parametru since).
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import and_, event, func, inspect, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import get_history
+
+from app.database import db
+from app.models import (ChangeLog, Customer, Invoice, InvoiceItem, Payment, Task, Reminder,
+                        Notification, Setting, TableVersion)
+from app.scheduler import register_job_type
+from app.visibility import GROUP_COLUMNS, resolve_group_ids, visibility_scope
+
+PRUNED_SETTING_KEY = 'SyncPrunedThroughCursor'
+# Wiersz TableVersions z ostatnim numerem zatwierdzenia wpisów dziennika
+COMMIT_SEQUENCE_NAME = 'ChangeLog'
+TOKEN_KEY = 'changelog_token'
+
+SyncEntity = namedtuple('SyncEntity', ['model', 'owner', 'serialize'])
+
+# Typ encji w API -> model, kolumna właściciela (None - encja wspólna), serializacja
+SYNC_ENTITIES = {
+    'customers': SyncEntity(Customer, None, lambda customer: customer.to_dict()),
+    'invoices': SyncEntity(Invoice, None, lambda invoice: invoice.to_dict()),
+    'tasks': SyncEntity(Task, 'UserId', lambda task: task.to_dict()),
+    'reminders': SyncEntity(Reminder, 'UserId', lambda reminder: reminder.to_dict()),
+    'notifications': SyncEntity(Notification, 'UserId', lambda notification: notification.to_dict()),
+}
+
+# Modele podrzędne - ich zmiana oznacza zmianę encji nadrzędnej: model -> (typ, kolumna klucza)
+PARENT_ENTITIES = {
+    InvoiceItem: ('invoices', 'InvoiceId'),
+    Payment: ('invoices', 'InvoiceId'),
+}
+
+
+class SyncCursorExpired(Exception):
+    """Kursor wskazuje na wpisy usunięte z dziennika - wymagana pełna synchronizacja"""
+
+
+def encode_cursor(commit_seq, entry_id):
+    return f"{commit_seq}_{entry_id}"
+
+
+def parse_cursor(value):
+    """
+    Kursor '<CommitSeq>_<Id>' -> (commit_seq, id). Kursor z samym Id (sprzed numerów
+    zatwierdzeń) nie wyznacza pozycji w dzienniku - wymaga pełnej synchronizacji.
+    """
+    if value.isdigit():
+        raise SyncCursorExpired()
+    try:
+        commit_seq, entry_id = value.split('_', 1)
+        return int(commit_seq), int(entry_id)
+    except ValueError:
+        raise ValueError('Nieprawidłowy kursor synchronizacji')
+
+
+def encode_snapshot_cursor(cursor, entity_type, last_id):
+    return f"{cursor}_{entity_type}_{last_id}"
+
+
+def parse_snapshot_cursor(value):
+    """
+    Kursor strony pełnej synchronizacji '<CommitSeq>_<Id>_<typ>_<Id encji>' -> (kursor dziennika,
+    typ, ostatnie Id). Kursor dziennika jest ustalany na pierwszej stronie i zwracany na każdej.
+    """
+    try:
+        commit_seq, entry_id, entity_type, last_id = value.split('_', 3)
+        cursor = (int(commit_seq), int(entry_id))
+        last_id = int(last_id)
+    except ValueError:
+        raise ValueError('Nieprawidłowy kursor pełnej synchronizacji')
+    if entity_type not in SYNC_ENTITIES:
+        raise ValueError('Nieprawidłowy kursor pełnej synchronizacji')
+    return cursor, entity_type, last_id
+
+
+def _transaction_token(session):
+    """Znacznik wpisów dziennika bieżącej transakcji sesji (numer zatwierdzenia dostają przy commit)"""
+    token = session.info.get(TOKEN_KEY)
+    if token is None:
+        token = session.info[TOKEN_KEY] = uuid4().hex
+    return token
+
+
+def _record(connection, token, entity_type, entity_id, operation, owner_id=None):
+    if entity_id is None:
+        return
+    connection.execute(ChangeLog.__table__.insert().values(
+        EntityType=entity_type,
+        EntityId=entity_id,
+        Operation=operation,
+        OwnerUserId=owner_id,
+        ChangedAt=datetime.utcnow(),
+        TxnToken=token
+    ))
+
+
+def _has_column_changes(mapper, target):
+    """after_update jest wywoływane także dla obiektów bez faktycznych zmian kolumn"""
+    state = inspect(target)
+    return any(state.attrs[prop.key].history.has_changes() for prop in mapper.column_attrs)
+
+
+def _listener(entity_type, entity, operation, check_changes=False):
+    def listener(mapper, connection, target):
+        if check_changes and not _has_column_changes(mapper, target):
+            return
+        token = _transaction_token(object_session(target))
+        owner_id = getattr(target, entity.owner) if entity.owner else None
+        if check_changes and entity.owner:
+            # Encja przekazana innemu użytkownikowi - poprzedni właściciel dostaje nagrobek
+            previous_owner = get_history(target, entity.owner).deleted
+            if previous_owner and previous_owner[0] != owner_id:
+                _record(connection, token, entity_type, target.Id, 'delete', previous_owner[0])
+        _record(connection, token, entity_type, target.Id, operation, owner_id)
+    return listener
+
+
+def _parent_listener(entity_type, foreign_key, check_changes=False):
+    def listener(mapper, connection, target):
+        if check_changes and not _has_column_changes(mapper, target):
+            return
+        _record(connection, _transaction_token(object_session(target)), entity_type,
+                getattr(target, foreign_key), 'upsert')
+    return listener
+
+
+for _entity_type, _entity in SYNC_ENTITIES.items():
+    event.listen(_entity.model, 'after_insert', _listener(_entity_type, _entity, 'upsert'))
+    event.listen(_entity.model, 'after_update', _listener(_entity_type, _entity, 'upsert', check_changes=True))
+    event.listen(_entity.model, 'after_delete', _listener(_entity_type, _entity, 'delete'))
+
+for _model, (_entity_type, _foreign_key) in PARENT_ENTITIES.items():
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name,
+                     _parent_listener(_entity_type, _foreign_key, check_changes=_event_name == 'after_update'))
+
+
+def record_changes(entity_type, entity_ids, operation, owner_id=None):
+    """Dopisuje do dziennika wpisy dla operacji zbiorczych (UPDATE/DELETE po liście Id) - jednym executemany"""
+    now = datetime.utcnow()
+    token = _transaction_token(db.session())
+    rows = [{'EntityType': entity_type, 'EntityId': entity_id, 'Operation': operation,
+             'OwnerUserId': owner_id, 'ChangedAt': now, 'TxnToken': token} for entity_id in entity_ids]
+    if rows:
+        db.session.execute(ChangeLog.__table__.insert(), rows)
+
+
+def record_inserted(entity_type, rows, now=None):
+    """
+    Dopisuje wpisy 'upsert' dla encji wstawionych zbiorczo (executemany, INSERT ... SELECT pomijają
+    zdarzenia mapperów) - jednym executemany. rows - pary (Id, Id właściciela); dla encji wspólnych
+    właściciel None. Wywołujący wskazuje dokładnie wiersze swojej instrukcji, bez zakresu Id, który
+    objąłby wiersze równoległych transakcji.
+    """
+    now = now or datetime.utcnow()
+    token = _transaction_token(db.session())
+    entries = [{'EntityType': entity_type, 'EntityId': entity_id, 'Operation': 'upsert',
+                'OwnerUserId': owner_id, 'ChangedAt': now, 'TxnToken': token} for entity_id, owner_id in rows]
+    if entries:
+        db.session.execute(ChangeLog.__table__.insert(), entries)
+
+
+def record_changed_where(entity_type, condition, now=None):
+    """
+    Zapisy zbiorcze (executemany, UPDATE po warunku) pomijają zdarzenia mapperów - ten helper
+    dopisuje do dziennika wszystkie encje spełniające condition jednym INSERT ... SELECT
+    (dla encji z właścicielem razem z OwnerUserId).
+    """
+    entity = SYNC_ENTITIES[entity_type]
+    model = entity.model
+    table = ChangeLog.__table__
+    columns = [model.Id.label('EntityId'), literal(entity_type).label('EntityType'),
+               literal('upsert').label('Operation'), literal(now or datetime.utcnow()).label('ChangedAt'),
+               literal(_transaction_token(db.session())).label('TxnToken')]
+    targets = [table.c.EntityId, table.c.EntityType, table.c.Operation, table.c.ChangedAt, table.c.TxnToken]
+    if entity.owner:
+        columns.append(getattr(model, entity.owner).label('OwnerUserId'))
+        targets.append(table.c.OwnerUserId)
+    db.session.execute(table.insert().from_select(targets, select(*columns).where(condition)))
+
+
+def parse_types(types_param):
+    """Lista typów encji z parametru ?types= (domyślnie wszystkie)"""
+    if not types_param:
+        return list(SYNC_ENTITIES)
+    types = [name.strip() for name in types_param.split(',') if name.strip()]
+    unknown = [name for name in types if name not in SYNC_ENTITIES]
+    if unknown:
+        raise ValueError(f"Nieznany typ encji: {', '.join(unknown)}")
+    return types
+
+
+def _next_commit_sequence(connection):
+    """Zwiększa licznik zatwierdzeń; blokada jego wiersza trwa do końca transakcji"""
+    table = TableVersion.__table__
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(table).where(table.c.TableName == COMMIT_SEQUENCE_NAME)
+        .values(Version=table.c.Version + 1, UpdatedAt=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(TableName=COMMIT_SEQUENCE_NAME, Version=1, UpdatedAt=now))
+    return connection.execute(select(table.c.Version).where(table.c.TableName == COMMIT_SEQUENCE_NAME)).scalar()
+
+
+def _before_commit(session):
+    # Najpierw zmiany oczekujące w sesji - ich zdarzenia mapperów dopisują wpisy transakcji
+    session.flush()
+    token = session.info.pop(TOKEN_KEY, None)
+    if token is None:
+        return
+    connection = session.connection()
+    commit_seq = _next_commit_sequence(connection)
+    table = ChangeLog.__table__
+    connection.execute(update(table).where(table.c.TxnToken == token).values(CommitSeq=commit_seq))
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(TOKEN_KEY, None)
+
+
+def current_cursor():
+    last = db.session.execute(
+        select(ChangeLog.CommitSeq, ChangeLog.Id).where(ChangeLog.CommitSeq.isnot(None))
+        .order_by(ChangeLog.CommitSeq.desc(), ChangeLog.Id.desc()).limit(1)
+    ).first()
+    return encode_cursor(*last) if last else encode_cursor(0, 0)
+
+
+def _visible(query, entity, user_id):
+    """Encje użytkownika (kolumna właściciela) i tylko z jego grup (app/visibility.py)"""
+    if entity.owner:
+        query = query.filter(getattr(entity.model, entity.owner) == user_id)
+    if entity.model in GROUP_COLUMNS:
+        scope = visibility_scope(entity.model, resolve_group_ids(user_id))
+        if scope is not None:
+            query = query.filter(scope)
+    return query
+
+
+def full_snapshot(user_id, types, limit, after=None):
+    """
+    Pełna synchronizacja - widoczne encje stronicowane po (typ, Id), po limit encji na stronę.
+    after - kursor strony (parse_snapshot_cursor) z poprzedniej odpowiedzi; kursor dziennika
+    ustalony na pierwszej stronie wskazuje zmiany wprowadzone w trakcie pobierania stron.
+    """
+    if after:
+        cursor, after_type, after_id = after
+        if after_type not in types:
+            raise ValueError('Kursor pełnej synchronizacji nie pasuje do parametru types')
+        cursor = encode_cursor(*cursor)
+        # Typy przed typem kursora są już pobrane
+        types_left = types[types.index(after_type):]
+    else:
+        cursor, after_type, after_id = current_cursor(), None, 0
+        types_left = types
+
+    changes = {entity_type: {'upserts': [], 'deletes': []} for entity_type in types}
+    remaining = limit
+    snapshot_cursor = None
+    for entity_type in types_left:
+        entity = SYNC_ENTITIES[entity_type]
+        last_id = after_id if entity_type == after_type else 0
+        rows = _visible(entity.model.query.filter(entity.model.Id > last_id), entity, user_id) \
+            .order_by(entity.model.Id).limit(remaining + 1).all()
+        if len(rows) > remaining:
+            rows = rows[:remaining]
+            changes[entity_type]['upserts'] = [entity.serialize(row) for row in rows]
+            snapshot_cursor = encode_snapshot_cursor(cursor, entity_type, rows[-1].Id if rows else last_id)
+            break
+        changes[entity_type]['upserts'] = [entity.serialize(row) for row in rows]
+        remaining -= len(rows)
+    return {'full': True, 'cursor': cursor, 'hasMore': snapshot_cursor is not None,
+            'snapshotCursor': snapshot_cursor, 'changes': changes}
+
+
+def changes_since(user_id, since, types, limit):
+    """Zmiany po kursorze since = (CommitSeq, Id), w kolejności zatwierdzeń (stronicowane po limit wpisów)"""
+    pruned_through = Setting.query.filter_by(Key=PRUNED_SETTING_KEY).first()
+    if pruned_through and pruned_through.Value and since < parse_cursor(pruned_through.Value):
+        raise SyncCursorExpired()
+
+    commit_seq, entry_id = since
+    query = ChangeLog.query.filter(
+        or_(ChangeLog.CommitSeq > commit_seq, and_(ChangeLog.CommitSeq == commit_seq, ChangeLog.Id > entry_id)),
+        ChangeLog.EntityType.in_(types),
+        (ChangeLog.OwnerUserId.is_(None)) | (ChangeLog.OwnerUserId == user_id)
+    ).order_by(ChangeLog.CommitSeq, ChangeLog.Id)
+    entries = query.limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Tylko ostatnia operacja na encji w obrębie strony
+    latest = {}
+    for entry in entries:
+        latest[(entry.EntityType, entry.EntityId)] = entry.Operation
+
+    changes = {entity_type: {'upserts': [], 'deletes': []} for entity_type in types}
+    for entity_type in types:
+        entity = SYNC_ENTITIES[entity_type]
+        upsert_ids = [entity_id for (name, entity_id), operation in latest.items()
+                      if name == entity_type and operation == 'upsert']
+        deleted_ids = {entity_id for (name, entity_id), operation in latest.items()
+                       if name == entity_type and operation == 'delete'}
+
+        found_ids = set()
+        if upsert_ids:
+            rows = _visible(entity.model.query.filter(entity.model.Id.in_(upsert_ids)), entity, user_id) \
+                .order_by(entity.model.Id).all()
+            for row in rows:
+                found_ids.add(row.Id)
+                changes[entity_type]['upserts'].append(entity.serialize(row))
+        # Encje usunięte później lub przekazane innemu użytkownikowi - nagrobki
+        deleted_ids.update(set(upsert_ids) - found_ids)
+        changes[entity_type]['deletes'] = sorted(deleted_ids)
+
+    cursor = encode_cursor(entries[-1].CommitSeq, entries[-1].Id) if entries else encode_cursor(*since)
+    return {'full': False, 'cursor': cursor, 'hasMore': has_more, 'changes': changes}
+
+
+def prune_changelog(retention_days):
+    """
+    Usuwa wpisy dziennika starsze niż retention_days (całymi zatwierdzeniami) i zapamiętuje
+    kursor ostatniego usuniętego wpisu - starsze kursory wymagają pełnej synchronizacji.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    last_seq = db.session.query(func.max(ChangeLog.CommitSeq)).filter(ChangeLog.ChangedAt < cutoff).scalar()
+    # Wpisy bez numeru zatwierdzenia (sprzed jego wprowadzenia) nie są widoczne dla żadnego kursora
+    condition = and_(ChangeLog.CommitSeq.is_(None), ChangeLog.ChangedAt < cutoff)
+    last_id = None
+    if last_seq is not None:
+        last_id = db.session.query(func.max(ChangeLog.Id)).filter(ChangeLog.CommitSeq == last_seq).scalar()
+        condition = or_(condition, ChangeLog.CommitSeq <= last_seq)
+
+    deleted = ChangeLog.query.filter(condition).delete(synchronize_session=False)
+    if last_seq is not None:
+        setting = Setting.query.filter_by(Key=PRUNED_SETTING_KEY).first()
+        if not setting:
+            setting = Setting(Key=PRUNED_SETTING_KEY)
+            db.session.add(setting)
+        setting.Value = encode_cursor(last_seq, last_id)
+    db.session.commit()
+    return deleted
+
+
+@register_job_type('prune_changelog', 'Usuwanie starych wpisów dziennika zmian synchronizacji')
+def prune_changelog_job(params, job):
+    retention_days = int(params.get('retentionDays') or current_app.config.get('SYNC_CHANGELOG_RETENTION_DAYS', 30))
+    return {'deleted': prune_changelog(retention_days)}
+
+
+def init_change_tracking(app):
+    """
+    Rejestruje nadawanie numerów zatwierdzenia przy commit. Wywoływane po init_outbox -
+    wpisy dopisywane przez outbox przy commit muszą dostać numer tej samej transakcji.
+    """
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'before_commit', _before_commit):
+        event.listen(session_class, 'before_commit', _before_commit)
+        event.listen(session_class, 'after_soft_rollback', _after_soft_rollback)
+
+    # Wiersz licznika tworzony przy starcie - równoległe pierwsze zatwierdzenia nie wstawiają go naraz
+    with app.app_context():
+        try:
+            if db.session.get(TableVersion, COMMIT_SEQUENCE_NAME) is None:
+                db.session.add(TableVersion(TableName=COMMIT_SEQUENCE_NAME, Version=0, UpdatedAt=datetime.utcnow()))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Uwaga: Nie udało się zainicjalizować licznika zatwierdzeń dziennika zmian: {e}")
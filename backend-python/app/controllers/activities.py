@@ -23,8 +23,8 @@ def get_activities():
                 c.Name as CustomerName,
                 u.username as UserName
             FROM Activities a
-            LEFT JOIN Customers c ON a.CustomerId = c.Id
-            LEFT JOIN users u ON a.UserId = u.id
+            LEFT JOIN Customers c ON a.CustomerId = c.Id AND c.DeletedAt IS NULL
+            LEFT JOIN users u ON a.UserId = u.id AND u.DeletedAt IS NULL
             ORDER BY a.CreatedAt DESC
             LIMIT 50
         """)).fetchall()
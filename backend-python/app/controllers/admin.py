@@ -1,11 +1,27 @@
-from flask import Blueprint, request, jsonify
-from app.middleware import require_auth, get_current_user_role, get_current_user, get_current_user_id
+from flask import Blueprint, request, jsonify, current_app
+from app.middleware import require_auth, require_admin, get_current_user_role, get_current_user, get_current_user_id
 from app.database import db
-from app.models import User, Role
-from sqlalchemy import text
+from app.models import User, Role, TaskAggregate
+from app.http_cache import cached_response
+from app.deletion import schedule_deletion, start_deletion
+from app.task_analytics import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TaskQueryError, task_page, task_totals, workload
+from app.query_plans import DEFAULT_ADVISOR_LIMIT, advise, hot_query, missing_indexes, query_capture
+from app.reporting import reporting_backend
 
 admin_bp = Blueprint('admin', __name__)
 
+ADMIN_STATS_SQL = hot_query('admin.stats', """
+    SELECT
+        (SELECT COUNT(*) FROM users WHERE DeletedAt IS NULL) as total_users,
+        (SELECT COUNT(*) FROM Customers WHERE DeletedAt IS NULL) as total_customers,
+        (SELECT COUNT(*) FROM Invoices) as total_invoices,
+        (SELECT COUNT(*) FROM Invoices WHERE IsPaid = 1) as paid_invoices,
+        (SELECT COUNT(*) FROM Contracts) as total_contracts,
+        (SELECT COUNT(*) FROM Payments) as total_payments,
+        (SELECT COUNT(*) FROM SystemLogs) as total_logs,
+        (SELECT SUM(TotalAmount) FROM Invoices) as total_invoices_value
+""")
+
 @admin_bp.route('/dashboard', methods=['GET'])
 @require_auth
 def get_dashboard():
@@ -18,30 +34,16 @@ def get_dashboard():
         if user.role.name != 'Admin':
             return jsonify({'error': 'Brak uprawnień administratora'}), 403
         
-        stats = db.session.execute(text("""
-            SELECT 
-                (SELECT COUNT(*) FROM users) as total_users,
-                (SELECT COUNT(*) FROM Customers) as total_customers,
-                (SELECT COUNT(*) FROM Invoices) as total_invoices,
-                (SELECT COUNT(*) FROM Invoices WHERE IsPaid = 1) as paid_invoices,
-                (SELECT COUNT(*) FROM Tasks) as total_tasks,
-                (SELECT COUNT(*) FROM Tasks WHERE Completed = 0) as pending_tasks,
-                (SELECT COUNT(*) FROM Contracts) as total_contracts,
-                (SELECT COUNT(*) FROM Payments) as total_payments,
-                (SELECT COUNT(*) FROM SystemLogs) as total_logs,
-                (SELECT SUM(TotalAmount) FROM Invoices) as total_invoices_value
-        """)).fetchone()
-        
-        task_per_user = db.session.execute(text("""
-            SELECT 
-                u.username,
-                COUNT(t.Id) as task_count,
-                SUM(CASE WHEN t.Completed = 0 THEN 1 ELSE 0 END) as pending_count
-            FROM users u
-            LEFT JOIN Tasks t ON u.id = t.UserId
-            GROUP BY u.id, u.username
-            ORDER BY task_count DESC
-        """)).fetchall()
+        stats = db.session.execute(ADMIN_STATS_SQL).fetchone()
+        
+        # Zadania z agregatów (TaskAggregates) zamiast GROUP BY po całej tabeli Tasks
+        total_tasks, pending_tasks = task_totals()
+        task_per_user = db.session.query(
+            User.username,
+            db.func.coalesce(TaskAggregate.TotalTasks, 0),
+            db.func.coalesce(TaskAggregate.PendingTasks, 0)
+        ).outerjoin(TaskAggregate, (TaskAggregate.ScopeType == 'user') & (TaskAggregate.ScopeId == User.id)) \
+            .order_by(db.func.coalesce(TaskAggregate.TotalTasks, 0).desc()).all()
         
         task_per_user_data = []
         for row in task_per_user:
@@ -56,12 +58,12 @@ def get_dashboard():
             'totalCustomers': stats[1],
             'invoicesCount': stats[2],
             'paidInvoices': stats[3],
-            'tasksCount': stats[4],
-            'pendingTasks': stats[5],
-            'contractsCount': stats[6],
-            'paymentsCount': stats[7],
-            'systemLogsCount': stats[8],
-            'totalInvoicesValue': float(stats[9] or 0),
+            'tasksCount': total_tasks,
+            'pendingTasks': pending_tasks,
+            'contractsCount': stats[4],
+            'paymentsCount': stats[5],
+            'systemLogsCount': stats[6],
+            'totalInvoicesValue': float(stats[7] or 0),
             'taskPerUser': task_per_user_data
         }), 200
         
@@ -193,7 +195,7 @@ def update_user(user_id):
 @admin_bp.route('/Users/<int:user_id>', methods=['DELETE'])
 @require_auth
 def delete_user(user_id):
-    """Usuwa użytkownika (soft delete)"""
+    """Usuwa użytkownika (ukrycie od razu, usunięcie danych w tle)"""
     try:
         user = get_current_user()
         if not user:
@@ -209,11 +211,12 @@ def delete_user(user_id):
         if target_user.id == user.id:
             return jsonify({'error': 'Nie można usunąć samego siebie'}), 400
         
-        # Soft delete by updating role to inactive (or just remove the user)
-        db.session.delete(target_user)
+        # Użytkownik znika od razu, jego dane usuwa zadanie w tle
+        job = schedule_deletion(target_user, user.id)
         db.session.commit()
+        start_deletion(current_app._get_current_object(), job.Id)
         
-        return jsonify({'message': 'Użytkownik usunięty'}), 200
+        return jsonify({'message': 'Użytkownik usunięty', 'deletionJob': job.to_dict()}), 200
         
     except Exception as e:
         db.session.rollback()
@@ -257,6 +260,7 @@ def create_role():
 
 @admin_bp.route('/Roles', methods=['GET'])
 @require_auth
+@cached_response(tables=['Roles', 'users'], vary_user=True)
 def get_roles():
     """Pobiera listę ról"""
     try:
@@ -333,57 +337,66 @@ def delete_role(role_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _page_limit():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return min(limit, MAX_PAGE_SIZE) if limit and limit > 0 else DEFAULT_PAGE_SIZE
+
 @admin_bp.route('/tasks', methods=['GET'])
-@require_auth
+@require_admin
 def get_all_tasks():
-    """Pobiera wszystkie zadania (tylko dla administratora)"""
+    """
+    Pobiera zadania wszystkich użytkowników (tylko dla administratora), posortowane po terminie.
+    Filtry: ?userId=, ?groupId=, ?status=pending|completed|overdue, ?dueFrom=, ?dueTo=.
+    Stronicowanie kursorem: ?limit= (domyślnie 100, maks. 500), ?cursor= z nagłówka X-Next-Cursor.
+    """
     try:
-        user = get_current_user()
-        if not user:
-            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
-        
-        if user.role.name != 'Admin':
-            return jsonify({'error': 'Brak uprawnień administratora'}), 403
-        
-        tasks = db.session.execute(text("""
-            SELECT 
-                t.Id, t.Title, t.Description, t.DueDate, t.Completed,
-                u.username,
-                c.Name as customer_name
-            FROM Tasks t
-            LEFT JOIN users u ON t.UserId = u.id
-            LEFT JOIN Customers c ON t.CustomerId = c.Id
-            ORDER BY t.DueDate ASC, t.Id DESC
-        """)).fetchall()
+        items, next_cursor = task_page(request.args, _page_limit(), request.args.get('cursor'))
+        response = jsonify(items)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+        
+    except TaskQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/tasks/workload', methods=['GET'])
+@require_admin
+def get_task_workload():
+    """
+    Obciążenie zadaniami z agregatów: ?by=user (domyślnie) lub ?by=group,
+    najwięcej otwartych zadań pierwsze; ?limit=, ?offset=
+    """
+    try:
+        scope_type = request.args.get('by', 'user')
+        if scope_type not in ('user', 'group'):
+            return jsonify({'error': 'Parametr by musi mieć wartość user lub group'}), 400
+        offset = max(request.args.get('offset', 0, type=int) or 0, 0)
         
-        result = []
-        for row in tasks:
-            due_date_value = None
-            if row[3]:
-                if hasattr(row[3], 'isoformat'):
-                    due_date_value = row[3].isoformat()
-                else:
-                    due_date_value = str(row[3])
-            
-            result.append({
-                'id': row[0],
-                'title': row[1],
-                'description': row[2],
-                'dueDate': due_date_value,
-                'completed': bool(row[4]),
-                'user': {
-                    'username': row[5] if row[5] else 'Unknown'
-                },
-                'customer': {
-                    'name': row[6] if row[6] else None
-                } if row[6] else None
-            })
+        return jsonify(workload(scope_type, _page_limit(), offset)), 200
         
-        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/tasks/summary', methods=['GET'])
+@require_admin
+def get_task_summary():
+    """Łączna liczba zadań, otwartych i ukończonych (z agregatów)"""
+    try:
+        total, pending = task_totals()
+        return jsonify({'totalTasks': total, 'pendingTasks': pending, 'completedTasks': total - pending}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+ROLE_USERS_SQL = hot_query('admin.role_users', """
+    SELECT u.id, u.username, u.email
+    FROM users u
+    WHERE u.role_id = :role_id AND u.DeletedAt IS NULL
+    ORDER BY u.username ASC
+""", role_id=2)
+
 @admin_bp.route('/Roles/<int:role_id>/users', methods=['GET'])
 @require_auth
 def get_users_by_role(role_id):
@@ -400,12 +413,7 @@ def get_users_by_role(role_id):
         if not role:
             return jsonify({'error': 'Rola nie znaleziona'}), 404
         
-        users = db.session.execute(text("""
-            SELECT u.id, u.username, u.email
-            FROM users u
-            WHERE u.role_id = :role_id
-            ORDER BY u.username ASC
-        """), {'role_id': role_id}).fetchall()
+        users = db.session.execute(ROLE_USERS_SQL, {'role_id': role_id}).fetchall()
         
         result = []
         for row in users:
@@ -423,3 +431,66 @@ def get_users_by_role(role_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/query-capture', methods=['GET'])
+@require_admin
+def get_query_capture():
+    """
+    Najcięższe zapytania SELECT przechwycone w tym procesie (łączny czas, liczba wywołań,
+    ostatnie parametry) - eksport dla `flask indexes advise --capture`
+    """
+    try:
+        return jsonify(query_capture.snapshot()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/query-capture', methods=['DELETE'])
+@require_admin
+def clear_query_capture():
+    """Czyści przechwycone zapytania (np. przed pomiarem wybranego scenariusza)"""
+    try:
+        query_capture.clear()
+        return jsonify({'message': 'Przechwycone zapytania zostały wyczyszczone'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/index-advisor', methods=['GET'])
+@require_admin
+def get_index_advisor():
+    """
+    Doradca indeksów: EXPLAIN najcięższych przechwyconych zapytań, pełne skany dużych tabel
+    z propozycjami indeksów oraz indeksy zadeklarowane w modelach, których brakuje w bazie.
+    Parametry: ?limit= (domyślnie 20), ?minRows= (pomijaj mniejsze tabele)
+    """
+    try:
+        limit = request.args.get('limit', DEFAULT_ADVISOR_LIMIT, type=int)
+        min_rows = request.args.get('minRows', current_app.config['INDEX_ADVISOR_MIN_ROWS'], type=int)
+        report = advise(limit=min(max(limit or DEFAULT_ADVISOR_LIMIT, 1), query_capture.size), min_rows=min_rows)
+        
+        return jsonify({
+            'queries': report,
+            'missingIndexes': [{'table': index.table.name, 'name': index.name,
+                                'columns': [column.name for column in index.columns]}
+                               for index in missing_indexes()],
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/reporting-backend', methods=['GET'])
+@require_admin
+def get_reporting_backend():
+    """Backend raportów wybrany przy starcie i wynik wykrywania widoków i procedur bazy"""
+    try:
+        backend = reporting_backend()
+        return jsonify({
+            'backend': backend.name,
+            'mode': current_app.config.get('REPORTING_BACKEND', 'auto'),
+            'capabilities': backend.capabilities,
+            'rowsTransferred': backend.rows_transferred,
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
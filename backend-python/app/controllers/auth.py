@@ -1,8 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.database import db
 from app.models import User, LoginHistory
 from app.config import Config
 from app.middleware import require_auth
+from app.deletion import schedule_deletion, start_deletion
 import jwt
 from datetime import datetime, timedelta
 from werkzeug.security import check_password_hash
@@ -78,6 +79,7 @@ def login():
         device_info = get_device_info(request.headers.get('User-Agent', ''))
         
         try:
+            from app.outbox import add_system_log
             login_history = LoginHistory(
                 UserId=user.id,
                 LoginTime=datetime.now(),
@@ -86,21 +88,17 @@ def login():
                 Success=True
             )
             db.session.add(login_history)
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-        
-        try:
-            from app.controllers.logs import log_system_event
-            log_system_event(
+            # Historia logowania i log systemowy w jednej transakcji
+            add_system_log(
                 level='Information',
                 message=f'Użytkownik {username} zalogował się',
                 source='Python.Backend.AuthController',
                 user_id=user.id,
                 details=f'{{"device": "{device_info}", "ip": "{request.remote_addr}"}}'
             )
-        except Exception:
-            pass
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
         
         return jsonify({
             'token': token,
@@ -127,11 +125,11 @@ def register():
         if not username or not email or not password:
             return jsonify({'error': 'Brak wymaganych danych'}), 400
         
-        # Sprawdź czy użytkownik już istnieje
-        if User.query.filter_by(username=username).first():
+        # Sprawdź czy użytkownik już istnieje (także usuwany w tle - wiersz jeszcze istnieje)
+        if User.query.filter_by(username=username).execution_options(include_deleted=True).first():
             return jsonify({'error': 'Użytkownik o tej nazwie już istnieje'}), 400
         
-        if User.query.filter_by(email=email).first():
+        if User.query.filter_by(email=email).execution_options(include_deleted=True).first():
             return jsonify({'error': 'Użytkownik o tym emailu już istnieje'}), 400
         
         # Utwórz nowego użytkownika
@@ -238,11 +236,12 @@ def delete_account():
         if not check_password_hash(user.password_hash, password):
             return jsonify({'error': 'Nieprawidłowe hasło'}), 400
         
-        # Usuń użytkownika
-        db.session.delete(user)
+        # Konto znika od razu, dane użytkownika usuwa zadanie w tle
+        job = schedule_deletion(user, user.id)
         db.session.commit()
+        start_deletion(current_app._get_current_object(), job.Id)
         
-        return jsonify({'message': 'Konto zostało usunięte'}), 200
+        return jsonify({'message': 'Konto zostało usunięte', 'deletionJob': job.to_dict()}), 200
         
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,151 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from werkzeug.test import EnvironBuilder
+from concurrent.futures import ThreadPoolExecutor
+from app.middleware import require_auth, get_current_user
+from app.database import db
+import base64
+import json
+
+batch_bp = Blueprint('batch', __name__)
+
+# Nagłówki odpowiedzi częściowych przekazywane klientowi
+FORWARDED_RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Content-Disposition', 'Location')
+# Znacznik środowiska WSGI - ustawiany tylko przez dispatcher (klient nie może go podać nagłówkiem)
+BATCH_ENVIRON_KEY = 'crm.batch'
+
+def validate_subrequest(item, index):
+    """Sprawdza pojedyncze żądanie częściowe; zwraca komunikat błędu lub None"""
+    if not isinstance(item, dict):
+        return f'Żądanie {index}: oczekiwano obiektu'
+    path = item.get('path') or ''
+    if not path.startswith('/api/'):
+        return f'Żądanie {index}: ścieżka musi zaczynać się od /api/'
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        return f'Żądanie {index}: zagnieżdżone żądania batch są niedozwolone'
+    if (item.get('method') or 'GET').upper() not in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE'):
+        return f"Żądanie {index}: nieobsługiwana metoda {item.get('method')}"
+    return None
+
+def build_environ(item):
+    headers = {name: value for name, value in (item.get('headers') or {}).items()
+               if name.lower() != 'authorization'}
+    builder = EnvironBuilder(
+        path=item['path'],
+        method=(item.get('method') or 'GET').upper(),
+        headers=headers,
+        json=item['body'] if item.get('body') is not None else None
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    environ[BATCH_ENVIRON_KEY] = True
+    environ['REMOTE_ADDR'] = request.remote_addr
+    return environ
+
+def serialize_response(item_id, response):
+    """Zamienia odpowiedź Flask na element odpowiedzi zbiorczej"""
+    result = {
+        'id': item_id,
+        'status': response.status_code,
+        'headers': {name: response.headers[name] for name in FORWARDED_RESPONSE_HEADERS if name in response.headers}
+    }
+    data = response.get_data()
+    if response.is_json:
+        result['body'] = json.loads(data) if data else None
+    elif response.mimetype and response.mimetype.startswith('text/'):
+        result['body'] = data.decode(response.charset or 'utf-8')
+    elif data:
+        result['body'] = base64.b64encode(data).decode('ascii')
+        result['bodyEncoding'] = 'base64'
+    else:
+        result['body'] = None
+    return result
+
+def dispatch(app, item):
+    """
+    Wykonuje żądanie częściowe przez mapę URL aplikacji. Kontekst aplikacji (g, sesja bazy)
+    jest współdzielony z żądaniem zbiorczym, więc autoryzacja i sesja są wspólne.
+    """
+    item_id = item.get('id')
+    try:
+        with app.request_context(build_environ(item)):
+            response = app.full_dispatch_request()
+            return serialize_response(item_id, response)
+    except Exception as e:
+        db.session.rollback()
+        return {'id': item_id, 'status': 500, 'headers': {}, 'body': {'error': str(e)}}
+
+def dispatch_in_thread(app, user_id, item, environ_item):
+    """Wykonuje żądanie tylko do odczytu w osobnym kontekście aplikacji (własne połączenie z bazą)"""
+    with app.app_context():
+        g.user_id = user_id
+        g.batch_user_id = user_id
+        item_id = item.get('id')
+        try:
+            with app.request_context(environ_item):
+                return serialize_response(item_id, app.full_dispatch_request())
+        except Exception as e:
+            return {'id': item_id, 'status': 500, 'headers': {}, 'body': {'error': str(e)}}
+
+def run_concurrent_reads(app, user_id, items):
+    environs = [build_environ(item) for item in items]
+    workers = min(len(items), current_app.config.get('BATCH_MAX_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda pair: dispatch_in_thread(app, user_id, *pair), zip(items, environs)))
+
+@batch_bp.route('/', methods=['POST'])
+@require_auth
+def batch():
+    """
+    Wykonuje wiele żądań API w jednym połączeniu HTTP.
+    Body: {"requests": [{"id": "a", "method": "GET", "path": "/api/dashboard/user"}, ...],
+           "concurrent": true}
+    Żądania są wykonywane w podanej kolejności. Przy "concurrent": true kolejne żądania GET
+    (bez zapisów pomiędzy nimi) są wykonywane równolegle.
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+
+        data = request.get_json() or {}
+        items = data.get('requests')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Pole requests musi być niepustą listą'}), 400
+
+        max_requests = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+        if len(items) > max_requests:
+            return jsonify({'error': f'Maksymalna liczba żądań w batch: {max_requests}'}), 400
+
+        for index, item in enumerate(items):
+            error = validate_subrequest(item, index)
+            if error:
+                return jsonify({'error': error}), 400
+            item.setdefault('id', str(index))
+
+        app = current_app._get_current_object()
+        g.batch_user_id = user.id
+
+        responses = []
+        position = 0
+        while position < len(items):
+            item = items[position]
+            is_read = (item.get('method') or 'GET').upper() == 'GET'
+            if data.get('concurrent') and is_read:
+                # Grupa kolejnych odczytów - wykonywana równolegle
+                end = position
+                while end < len(items) and (items[end].get('method') or 'GET').upper() == 'GET':
+                    end += 1
+                group = items[position:end]
+                responses.extend(run_concurrent_reads(app, user.id, group) if len(group) > 1
+                                 else [dispatch(app, group[0])])
+                position = end
+            else:
+                responses.append(dispatch(app, item))
+                position += 1
+
+        return jsonify({'responses': responses}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -4,7 +4,8 @@ from app.database import db
 from app.models import Contract, Customer, User, Template, Setting, Service
 from app.models.contract import contract_services
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import text, select
+from app.visibility import is_visible, visibility_scope
 from decimal import Decimal
 import os
 import tempfile
@@ -16,16 +17,19 @@ contracts_bp = Blueprint('contracts', __name__)
 @contracts_bp.route('/', methods=['GET'])
 @require_auth
 def get_contracts():
-    """Pobiera listę kontraktów"""
+    """Pobiera listę kontraktów widocznych dla użytkownika (app/visibility.py)"""
     try:
-        # Użyj SQL query z join żeby pobrać nazwy klientów
-        contracts = db.session.execute(text("""
-            SELECT c.Id, c.Title, c.ContractNumber, c.CustomerId, c.NetAmount, 
-                   c.SignedAt, c.StartDate, c.EndDate, cu.Name as CustomerName
-            FROM Contracts c
-            LEFT JOIN Customers cu ON c.CustomerId = cu.Id
-            ORDER BY c.Id DESC
-        """)).fetchall()
+        # Zapytanie z join żeby pobrać nazwy klientów
+        stmt = (
+            select(Contract.Id, Contract.Title, Contract.ContractNumber, Contract.CustomerId, Contract.NetAmount,
+                   Contract.SignedAt, Contract.StartDate, Contract.EndDate, Customer.Name.label('CustomerName'))
+            .outerjoin(Customer, Contract.CustomerId == Customer.Id)
+            .order_by(Contract.Id.desc())
+        )
+        scope = visibility_scope(Contract)
+        if scope is not None:
+            stmt = stmt.where(scope)
+        contracts = db.session.execute(stmt).fetchall()
         
         contracts_list = []
         for contract in contracts:
@@ -119,7 +123,9 @@ def create_contract():
 def get_contract(contract_id):
     """Pobiera pojedynczy kontrakt"""
     try:
-        contract = Contract.query.get_or_404(contract_id)
+        contract = Contract.query.get(contract_id)
+        if not contract or not is_visible(contract):
+            return jsonify({'error': 'Kontrakt nie został znaleziony'}), 404
         
         # Użyj metody to_dict() z modelu i dodaj customerName
         contract_data = contract.to_dict()
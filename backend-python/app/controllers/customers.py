@@ -1,18 +1,77 @@
-from flask import Blueprint, request, jsonify
-from app.middleware import require_auth, get_current_user_id
+from flask import Blueprint, request, jsonify, current_app
+from app.middleware import require_auth, require_admin, get_current_user_id
 from app.database import db
-from app.models import Customer
-from sqlalchemy import text
+from app.models import Customer, User, Tag
+from app.models.customer import customer_tags
+from app.list_query import ListField, ListQuerySpec, ListQueryError, list_response, run_list_query
+from app.visibility import is_visible, visibility_scope
+from app.deletion import schedule_deletion, start_deletion
+from app.dedup import MIN_SCORE, CustomerMergeError, dismiss_pair, duplicate_page, merge_customers
+from sqlalchemy import text, select
+from sqlalchemy.orm import joinedload, selectinload
 
 customers_bp = Blueprint('customers', __name__)
 
+def _load_representatives(rows, name):
+    """Ładuje opiekunów klientów jednym zapytaniem dla całej listy"""
+    user_ids = {row['representativeUserId'] for row in rows if row['representativeUserId']}
+    users = {}
+    if user_ids:
+        users = {user.id: user.to_dict() for user in
+                 User.query.options(joinedload(User.role)).filter(User.id.in_(user_ids)).all()}
+    for row in rows:
+        row[name] = users.get(row['representativeUserId'])
+
+def _load_customer_tags(rows, name):
+    """Ładuje tagi klientów jednym zapytaniem dla całej listy"""
+    tags_by_customer = {row['id']: [] for row in rows}
+    stmt = (
+        select(customer_tags.c.CustomerId, Tag.Id, Tag.Name, Tag.Color, Tag.Description)
+        .join(Tag, Tag.Id == customer_tags.c.TagId)
+        .where(customer_tags.c.CustomerId.in_(list(tags_by_customer)))
+    )
+    for customer_id, tag_id, tag_name, color, description in db.session.execute(stmt):
+        tags_by_customer[customer_id].append({
+            'tagId': tag_id,
+            'tag': {'id': tag_id, 'name': tag_name, 'color': color, 'description': description}
+        })
+    for row in rows:
+        row[name] = tags_by_customer[row['id']]
+
+CUSTOMER_LIST_SPEC = ListQuerySpec(
+    Customer,
+    fields={
+        'id': ListField(Customer.Id),
+        'name': ListField(Customer.Name),
+        'email': ListField(Customer.Email),
+        'phone': ListField(Customer.Phone),
+        'company': ListField(Customer.Company),
+        'address': ListField(Customer.Address),
+        'nip': ListField(Customer.NIP),
+        'representativeUserId': ListField(Customer.RepresentativeUserId),
+        'representative': ListField(loader=(['representativeUserId'], _load_representatives)),
+        'createdAt': ListField(Customer.CreatedAt),
+        'assignedGroupId': ListField(Customer.AssignedGroupId),
+        'assignedUserId': ListField(Customer.AssignedUserId),
+        'customerTags': ListField(loader=(['id'], _load_customer_tags)),
+    },
+    default_sort='-id',
+    full_options=[selectinload(Customer.tags), joinedload(Customer.representative_user)]
+)
+
 @customers_bp.route('/', methods=['GET'])
 @require_auth
 def get_customers():
-    """Pobiera listę klientów, posortowaną od najnowszych (malejąco według ID)"""
+    """
+    Pobiera listę klientów widocznych dla użytkownika (app/visibility.py), domyślnie posortowaną
+    od najnowszych (malejąco według ID).
+    Obsługuje ?fields=, ?filter[pole][operator]=, ?sort= oraz ?limit=/?cursor= (patrz app/list_query.py)
+    """
     try:
-        customers = Customer.query.order_by(Customer.Id.desc()).all()
-        return jsonify([customer.to_dict() for customer in customers]), 200
+        scope = visibility_scope(Customer)
+        return list_response(run_list_query(CUSTOMER_LIST_SPEC, request.args, scope=scope))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -49,7 +108,7 @@ def get_customer(customer_id):
     """Pobiera szczegóły klienta"""
     try:
         customer = Customer.query.get(customer_id)
-        if not customer:
+        if not customer or not is_visible(customer):
             return jsonify({'error': 'Klient nie znaleziony'}), 404
         
         return jsonify(customer.to_dict()), 200
@@ -62,7 +121,7 @@ def update_customer(customer_id):
     """Aktualizuje klienta wraz z tagami"""
     try:
         customer = Customer.query.get(customer_id)
-        if not customer:
+        if not customer or not is_visible(customer):
             return jsonify({'error': 'Klient nie znaleziony'}), 404
         
         data = request.get_json()
@@ -113,16 +172,78 @@ def update_customer(customer_id):
 @customers_bp.route('/<int:customer_id>', methods=['DELETE'])
 @require_auth
 def delete_customer(customer_id):
-    """Usuwa klienta"""
+    """Usuwa klienta - od razu ukrywa go w zapytaniach, zależne dane usuwa zadanie w tle"""
     try:
         customer = Customer.query.get(customer_id)
-        if not customer:
+        if not customer or not is_visible(customer):
+            return jsonify({'error': 'Klient nie znaleziony'}), 404
+        
+        job = schedule_deletion(customer, get_current_user_id())
+        db.session.commit()
+        start_deletion(current_app._get_current_object(), job.Id)
+        
+        return jsonify({'message': 'Klient usunięty', 'deletionJob': job.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@customers_bp.route('/duplicates', methods=['GET'])
+@require_admin
+def get_duplicates():
+    """
+    Podejrzane duplikaty klientów (tylko administrator) od najwyższej oceny.
+    Parametry: ?minScore= (domyślnie 0.5), ?status=Open|Dismissed, ?limit= (maks. 500), ?offset=
+    """
+    try:
+        status = request.args.get('status', 'Open')
+        if status not in ('Open', 'Dismissed'):
+            return jsonify({'error': 'Parametr status musi mieć wartość Open lub Dismissed'}), 400
+        min_score = request.args.get('minScore', MIN_SCORE, type=float)
+        limit = min(max(request.args.get('limit', 100, type=int) or 100, 1), 500)
+        offset = max(request.args.get('offset', 0, type=int) or 0, 0)
+        
+        return jsonify(duplicate_page(min_score, status, limit, offset)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@customers_bp.route('/duplicates/<int:customer_id>/<int:duplicate_id>/dismiss', methods=['POST'])
+@require_admin
+def dismiss_duplicate(customer_id, duplicate_id):
+    """Oznacza parę klientów jako niebędącą duplikatem (nie wróci na listę)"""
+    try:
+        if not dismiss_pair(customer_id, duplicate_id):
+            return jsonify({'error': 'Para duplikatów nie znaleziona'}), 404
+        db.session.commit()
+        
+        return jsonify({'message': 'Para oznaczona jako różni klienci'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@customers_bp.route('/<int:customer_id>/merge', methods=['POST'])
+@require_admin
+def merge_customer(customer_id):
+    """
+    Scala klientów {"sourceIds": [...]} w kliencie customer_id (tylko administrator):
+    faktury, zadania, notatki, kontrakty, spotkania, aktywności i tagi są przepinane,
+    puste pola uzupełniane, a klienci źródłowi usuwani.
+    """
+    try:
+        if not Customer.query.get(customer_id):
             return jsonify({'error': 'Klient nie znaleziony'}), 404
         
-        db.session.delete(customer)
+        data = request.get_json() or {}
+        source_ids = data.get('sourceIds')
+        if not isinstance(source_ids, list) or not all(isinstance(i, int) for i in source_ids):
+            return jsonify({'error': 'Pole sourceIds musi być listą identyfikatorów'}), 400
+        
+        customer, moved = merge_customers(customer_id, source_ids)
         db.session.commit()
         
-        return jsonify({'message': 'Klient usunięty'}), 200
+        return jsonify({'customer': customer.to_dict(), 'mergedIds': sorted(set(source_ids)), 'moved': moved}), 200
+    except CustomerMergeError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,10 +1,25 @@
 from flask import Blueprint, request, jsonify
 from app.middleware import require_auth, get_current_user
 from app.database import db
-from sqlalchemy import text
+from app.query_plans import hot_query
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+USER_DASHBOARD_STATS_SQL = hot_query('dashboard.user_stats', """
+    SELECT
+        (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 0) as pending_tasks,
+        (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 1) as completed_tasks,
+        (SELECT COUNT(*) FROM Reminders WHERE UserId = :user_id) as reminders_count,
+        (SELECT COUNT(*) FROM Messages WHERE RecipientUserId = :user_id AND IsRead = 0) as unread_messages_count
+""", user_id=1)
+LOGIN_HISTORY_SQL = hot_query('dashboard.login_history', """
+    SELECT LoginTime, IpAddress
+    FROM LoginHistory
+    WHERE UserId = :user_id
+    ORDER BY LoginTime DESC
+    LIMIT 5
+""", user_id=1)
+
 @dashboard_bp.route('/user', methods=['GET'])
 @require_auth
 def get_user_dashboard():
@@ -15,22 +30,10 @@ def get_user_dashboard():
             return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
         
         # Pobierz podstawowe statystyki użytkownika
-        stats = db.session.execute(text("""
-            SELECT 
-                (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 0) as pending_tasks,
-                (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 1) as completed_tasks,
-                (SELECT COUNT(*) FROM Reminders WHERE UserId = :user_id) as reminders_count,
-                (SELECT COUNT(*) FROM Messages WHERE RecipientUserId = :user_id AND IsRead = 0) as unread_messages_count
-        """), {'user_id': user.id}).fetchone()
+        stats = db.session.execute(USER_DASHBOARD_STATS_SQL, {'user_id': user.id}).fetchone()
 
         # Pobierz historię logowań
-        login_history = db.session.execute(text("""
-            SELECT LoginTime, IpAddress
-            FROM LoginHistory
-            WHERE UserId = :user_id
-            ORDER BY LoginTime DESC
-            LIMIT 5
-        """), {'user_id': user.id}).fetchall()
+        login_history = db.session.execute(LOGIN_HISTORY_SQL, {'user_id': user.id}).fetchall()
 
         login_history_data = []
         for entry in login_history:
@@ -49,6 +52,15 @@ def get_user_dashboard():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+DASHBOARD_STATS_SQL = hot_query('dashboard.stats', """
+    SELECT
+        (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 0) as pending_tasks,
+        (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 1) as completed_tasks,
+        (SELECT COUNT(*) FROM Reminders WHERE UserId = :user_id) as reminders_count,
+        (SELECT COUNT(*) FROM Messages WHERE RecipientUserId = :user_id AND IsRead = 0) as unread_messages_count,
+        (SELECT COUNT(*) FROM Notes WHERE UserId = :user_id) as notes_count
+""", user_id=1)
+
 @dashboard_bp.route('/', methods=['GET'])
 @require_auth
 def get_dashboard():
@@ -59,23 +71,10 @@ def get_dashboard():
             return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
         
         # Pobierz statystyki użytkownika - liczba zadań, przypomnień, wiadomości i notatek
-        stats = db.session.execute(text("""
-            SELECT 
-                (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 0) as pending_tasks,
-                (SELECT COUNT(*) FROM Tasks WHERE UserId = :user_id AND completed = 1) as completed_tasks,
-                (SELECT COUNT(*) FROM Reminders WHERE UserId = :user_id) as reminders_count,
-                (SELECT COUNT(*) FROM Messages WHERE RecipientUserId = :user_id AND IsRead = 0) as unread_messages_count,
-                (SELECT COUNT(*) FROM Notes WHERE UserId = :user_id) as notes_count
-        """), {'user_id': user.id}).fetchone()
+        stats = db.session.execute(DASHBOARD_STATS_SQL, {'user_id': user.id}).fetchone()
 
         # Pobierz historię logowań
-        login_history = db.session.execute(text("""
-            SELECT LoginTime, IpAddress
-            FROM LoginHistory
-            WHERE UserId = :user_id
-            ORDER BY LoginTime DESC
-            LIMIT 5
-        """), {'user_id': user.id}).fetchall()
+        login_history = db.session.execute(LOGIN_HISTORY_SQL, {'user_id': user.id}).fetchall()
 
         login_history_data = []
         for entry in login_history:
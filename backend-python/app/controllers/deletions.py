@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify
+from app.middleware import require_auth, get_current_user
+from app.database import db
+from app.models import DeletionJob
+from app.deletion import ENTITY_MODELS, JOB_STATUSES
+
+deletions_bp = Blueprint('deletions', __name__)
+
+def is_admin(user):
+    return bool(user.role and user.role.name == 'Admin')
+
+@deletions_bp.route('/', methods=['GET'])
+@require_auth
+def get_deletions():
+    """
+    Lista usuwań w tle (najnowsze pierwsze) - administrator widzi wszystkie, pozostali własne.
+    Parametry: ?status=, ?entityType=customer|user
+    """
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+        
+        query = DeletionJob.query
+        if not is_admin(user):
+            query = query.filter(DeletionJob.RequestedByUserId == user.id)
+        
+        status = request.args.get('status')
+        if status:
+            if status not in JOB_STATUSES:
+                return jsonify({'error': f"Parametr status musi mieć jedną z wartości: {', '.join(JOB_STATUSES)}"}), 400
+            query = query.filter(DeletionJob.Status == status)
+        
+        entity_type = request.args.get('entityType')
+        if entity_type:
+            if entity_type not in ENTITY_MODELS:
+                return jsonify({'error': 'Parametr entityType musi mieć wartość customer lub user'}), 400
+            query = query.filter(DeletionJob.EntityType == entity_type)
+        
+        jobs = query.order_by(DeletionJob.Id.desc()).limit(100).all()
+        return jsonify([job.to_dict() for job in jobs]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@deletions_bp.route('/<int:job_id>', methods=['GET'])
+@require_auth
+def get_deletion(job_id):
+    """Status i postęp usuwania (krok, usunięte wiersze, procent)"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+        
+        job = db.session.get(DeletionJob, job_id)
+        if not job:
+            return jsonify({'error': 'Usuwanie nie znalezione'}), 404
+        if not is_admin(user) and job.RequestedByUserId != user.id:
+            return jsonify({'error': 'Brak uprawnień do tego usuwania'}), 403
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
 from app.middleware import require_auth
 from app.database import db
 from app.models import Group
+from app.http_cache import bump_table_version, cached_response
+from app.query_plans import hot_query
+from app.reporting import reporting_backend
+from app.visibility import is_group_visible
 
 groups_bp = Blueprint('groups', __name__)
 
 @groups_bp.route('/', methods=['GET'])
 @require_auth
+@cached_response(tables=['Groups'])
 def get_groups():
     """Pobiera listę grup, posortowaną od najnowszych (malejąco według ID)"""
     try:
@@ -36,6 +42,28 @@ def create_group():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+GROUP_MEMBERS_SQL = hot_query('groups.members', """
+    SELECT u.id, u.username, u.email
+    FROM users u
+    INNER JOIN UserGroups ug ON u.id = ug.UserId
+    WHERE ug.GroupId = :group_id AND u.DeletedAt IS NULL
+""", group_id=1)
+GROUP_CUSTOMERS_SQL = hot_query('groups.customers', """
+    SELECT c.Id, c.Name, c.Email
+    FROM Customers c
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+""", group_id=1)
+GROUP_COUNTS_SQL = hot_query('groups.counts', """
+    SELECT
+        (SELECT COUNT(*) FROM UserGroups ug JOIN users u ON ug.UserId = u.id
+         WHERE ug.GroupId = :group_id AND u.DeletedAt IS NULL) as member_count,
+        (SELECT COUNT(*) FROM Customers c WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL) as customer_count,
+        (SELECT COUNT(*) FROM Tasks WHERE AssignedGroupId = :group_id) as task_count,
+        (SELECT COUNT(*) FROM Contracts WHERE ResponsibleGroupId = :group_id) as contract_count,
+        (SELECT COUNT(*) FROM Invoices WHERE AssignedGroupId = :group_id) as invoice_count,
+        (SELECT COUNT(*) FROM Meetings WHERE AssignedGroupId = :group_id) as meeting_count
+""", group_id=1)
+
 @groups_bp.route('/<int:group_id>', methods=['GET'])
 @require_auth
 def get_group(group_id):
@@ -44,41 +72,19 @@ def get_group(group_id):
         group = Group.query.get(group_id)
         if not group:
             return jsonify({'error': 'Grupa nie znaleziona'}), 404
+        if not is_group_visible(group_id):
+            return jsonify({'error': 'Brak dostępu do grupy'}), 403
         
         # Pobierz członków grupy z tabeli UserGroups
-        from sqlalchemy import text
-        members_query = text("""
-            SELECT u.id, u.username, u.email 
-            FROM users u 
-            INNER JOIN UserGroups ug ON u.id = ug.UserId 
-            WHERE ug.GroupId = :group_id
-        """)
-        
-        members_result = db.session.execute(members_query, {'group_id': group_id}).fetchall()
+        members_result = db.session.execute(GROUP_MEMBERS_SQL, {'group_id': group_id}).fetchall()
         members = [{'id': row[0], 'username': row[1], 'email': row[2]} for row in members_result]
         
         # Pobierz przypisanych klientów
-        customers_query = text("""
-            SELECT c.Id, c.Name, c.Email 
-            FROM Customers c 
-            WHERE c.AssignedGroupId = :group_id
-        """)
-        
-        customers_result = db.session.execute(customers_query, {'group_id': group_id}).fetchall()
+        customers_result = db.session.execute(GROUP_CUSTOMERS_SQL, {'group_id': group_id}).fetchall()
         assigned_customers = [{'id': row[0], 'name': row[1], 'email': row[2]} for row in customers_result]
         
         # Pobierz statystyki
-        stats_query = text("""
-            SELECT 
-                (SELECT COUNT(*) FROM UserGroups WHERE GroupId = :group_id) as member_count,
-                (SELECT COUNT(*) FROM Customers WHERE AssignedGroupId = :group_id) as customer_count,
-                (SELECT COUNT(*) FROM Tasks WHERE AssignedGroupId = :group_id) as task_count,
-                (SELECT COUNT(*) FROM Contracts WHERE ResponsibleGroupId = :group_id) as contract_count,
-                (SELECT COUNT(*) FROM Invoices WHERE AssignedGroupId = :group_id) as invoice_count,
-                (SELECT COUNT(*) FROM Meetings WHERE AssignedGroupId = :group_id) as meeting_count
-        """)
-        
-        stats_result = db.session.execute(stats_query, {'group_id': group_id}).fetchone()
+        stats_result = db.session.execute(GROUP_COUNTS_SQL, {'group_id': group_id}).fetchone()
         
         # Przygotuj odpowiedź
         group_data = group.to_dict()
@@ -163,6 +169,7 @@ def add_group_member(group_id, user_id):
         # Dodaj użytkownika do grupy
         insert_query = text("INSERT INTO UserGroups (UserId, GroupId) VALUES (:user_id, :group_id)")
         db.session.execute(insert_query, {'user_id': user_id, 'group_id': group_id})
+        bump_table_version('UserGroups')
         db.session.commit()
         
         return jsonify({'message': f'Użytkownik {user.username} został dodany do grupy {group.Name}'}), 200
@@ -191,6 +198,7 @@ def remove_group_member(group_id, user_id):
         # Usuń użytkownika z grupy
         delete_query = text("DELETE FROM UserGroups WHERE UserId = :user_id AND GroupId = :group_id")
         db.session.execute(delete_query, {'user_id': user_id, 'group_id': group_id})
+        bump_table_version('UserGroups')
         db.session.commit()
         
         return jsonify({'message': 'Użytkownik został usunięty z grupy'}), 200
@@ -210,7 +218,7 @@ def add_group_customer(group_id, customer_id):
         
         # Sprawdź czy klient istnieje
         from sqlalchemy import text
-        customer_query = text("SELECT Id, Name FROM Customers WHERE Id = :customer_id")
+        customer_query = text("SELECT Id, Name FROM Customers WHERE Id = :customer_id AND DeletedAt IS NULL")
         customer_result = db.session.execute(customer_query, {'customer_id': customer_id}).fetchone()
         
         if not customer_result:
@@ -225,8 +233,8 @@ def add_group_customer(group_id, customer_id):
             return jsonify({'message': f'Klient {customer_result[1]} już jest przypisany do grupy {group.Name}'}), 200
         
         # Przypisz klienta do grupy (nadpisuje poprzednie przypisanie)
-        update_query = text("UPDATE Customers SET AssignedGroupId = :group_id WHERE Id = :customer_id")
-        db.session.execute(update_query, {'group_id': group_id, 'customer_id': customer_id})
+        update_query = text("UPDATE Customers SET AssignedGroupId = :group_id, UpdatedAt = :now WHERE Id = :customer_id")
+        db.session.execute(update_query, {'group_id': group_id, 'customer_id': customer_id, 'now': datetime.utcnow()})
         db.session.commit()
         
         # Zwróć odpowiednią wiadomość w zależności od tego, czy klient był wcześniej w innej grupie
@@ -261,8 +269,8 @@ def remove_group_customer(group_id, customer_id):
             return jsonify({'error': 'Klient nie jest przypisany do tej grupy'}), 400
         
         # Usuń przypisanie klienta do grupy
-        update_query = text("UPDATE Customers SET AssignedGroupId = NULL WHERE Id = :customer_id")
-        db.session.execute(update_query, {'customer_id': customer_id})
+        update_query = text("UPDATE Customers SET AssignedGroupId = NULL, UpdatedAt = :now WHERE Id = :customer_id")
+        db.session.execute(update_query, {'customer_id': customer_id, 'now': datetime.utcnow()})
         db.session.commit()
         
         return jsonify({'message': 'Klient został usunięty z grupy'}), 200
@@ -271,48 +279,41 @@ def remove_group_customer(group_id, customer_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+GROUP_UPCOMING_MEETINGS_SQL = hot_query('groups.upcoming_meetings', """
+    SELECT COUNT(*) FROM Meetings WHERE AssignedGroupId = :group_id AND ScheduledAt > :now
+""", group_id=1, now='2030-01-01 00:00:00')
+
 @groups_bp.route('/<int:group_id>/statistics', methods=['GET'])
 @require_auth
 def get_group_statistics(group_id):
-    """Pobiera szczegółowe statystyki grupy"""
+    """Pobiera szczegółowe statystyki grupy (backend raportów - v_group_statistics albo zapytanie aplikacji)"""
     try:
-        group = Group.query.get(group_id)
-        if not group:
+        if not is_group_visible(group_id):
+            return jsonify({'error': 'Brak dostępu do grupy'}), 403
+        stats = reporting_backend().group_statistics(group_id)
+        if not stats:
             return jsonify({'error': 'Grupa nie znaleziona'}), 404
         
-        from app.database import db
-        from sqlalchemy import text
-        
-        # Pobierz szczegółowe statystyki dla grupy
-        stats = db.session.execute(text("""
-            SELECT 
-                (SELECT COUNT(*) FROM UserGroups WHERE GroupId = :group_id) as total_members,
-                (SELECT COUNT(*) FROM Customers WHERE AssignedGroupId = :group_id) as total_customers,
-                (SELECT COUNT(*) FROM Tasks WHERE AssignedGroupId = :group_id) as total_tasks,
-                (SELECT COUNT(*) FROM Tasks WHERE AssignedGroupId = :group_id AND Completed = 1) as completed_tasks,
-                (SELECT COUNT(*) FROM Tasks WHERE AssignedGroupId = :group_id AND Completed = 0) as pending_tasks,
-                (SELECT COUNT(*) FROM Contracts WHERE ResponsibleGroupId = :group_id) as total_contracts,
-                (SELECT COUNT(*) FROM Invoices WHERE AssignedGroupId = :group_id) as total_invoices,
-                (SELECT COUNT(*) FROM Invoices WHERE AssignedGroupId = :group_id AND IsPaid = 1) as paid_invoices,
-                (SELECT COUNT(*) FROM Invoices WHERE AssignedGroupId = :group_id AND IsPaid = 0) as unpaid_invoices,
-                (SELECT COUNT(*) FROM Meetings WHERE AssignedGroupId = :group_id) as total_meetings,
-                (SELECT COUNT(*) FROM Meetings WHERE AssignedGroupId = :group_id AND ScheduledAt > NOW()) as upcoming_meetings
-        """), {'group_id': group_id}).fetchone()
+        # Nadchodzące spotkania względem czasu aplikacji - parametr zamiast NOW(), które nie istnieje w SQLite
+        upcoming_meetings = db.session.execute(
+            GROUP_UPCOMING_MEETINGS_SQL, {'group_id': group_id, 'now': datetime.now()}
+        ).scalar()
         
         return jsonify({
             'groupId': group_id,
-            'groupName': group.Name,
-            'totalMembers': stats[0] if stats else 0,
-            'totalCustomers': stats[1] if stats else 0,
-            'totalTasks': stats[2] if stats else 0,
-            'completedTasks': stats[3] if stats else 0,
-            'pendingTasks': stats[4] if stats else 0,
-            'totalContracts': stats[5] if stats else 0,
-            'totalInvoices': stats[6] if stats else 0,
-            'paidInvoices': stats[7] if stats else 0,
-            'unpaidInvoices': stats[8] if stats else 0,
-            'totalMeetings': stats[9] if stats else 0,
-            'upcomingMeetings': stats[10] if stats else 0
+            'groupName': stats['groupName'],
+            'totalMembers': stats['totalMembers'],
+            'totalCustomers': stats['totalCustomers'],
+            'totalTasks': stats['totalTasks'],
+            'completedTasks': stats['completedTasksCount'],
+            'pendingTasks': stats['pendingTasksCount'],
+            'totalContracts': stats['totalContracts'],
+            'totalInvoices': stats['totalInvoices'],
+            'totalInvoiceValue': float(stats['totalInvoiceValue']),
+            'paidInvoices': stats['paidInvoicesCount'],
+            'unpaidInvoices': stats['unpaidInvoicesCount'],
+            'totalMeetings': stats['totalMeetings'],
+            'upcomingMeetings': upcoming_meetings
         }), 200
         
     except Exception as e:
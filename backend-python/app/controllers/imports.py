@@ -0,0 +1,105 @@
+from flask import Blueprint, request, jsonify, current_app, send_file
+from werkzeug.utils import secure_filename
+from app.middleware import require_auth, require_admin, get_current_user
+from app.database import db
+from app.models import ImportJob
+from app.imports import IMPORTERS, ImportFileError, detect_format, get_import_dir, get_importers, start_import
+from datetime import datetime
+import os
+
+imports_bp = Blueprint('imports', __name__)
+
+@imports_bp.route('/entities', methods=['GET'])
+@require_auth
+def get_import_entities():
+    """Lista obsługiwanych typów importu z kolumnami pliku"""
+    return jsonify(get_importers()), 200
+
+@imports_bp.route('/', methods=['POST'])
+@require_admin
+def create_import():
+    """
+    Przesyła plik CSV/XLSX i kolejkuje import (multipart/form-data).
+    Pola: file, entityType (customers / services / invoices), batchSize (opcjonalnie),
+    dryRun=true - tylko walidacja i raport błędów, bez zapisu.
+    """
+    try:
+        entity_type = request.form.get('entityType')
+        if entity_type not in IMPORTERS:
+            return jsonify({'error': f"Nieznany typ importu. Dozwolone: {', '.join(sorted(IMPORTERS))}"}), 400
+
+        file = request.files.get('file')
+        if not file or file.filename == '':
+            return jsonify({'error': 'Brak pliku'}), 400
+
+        try:
+            file_format = detect_format(file.filename)
+        except ImportFileError as e:
+            return jsonify({'error': str(e)}), 400
+
+        batch_size = request.form.get('batchSize', type=int)
+        if batch_size is not None and not 1 <= batch_size <= current_app.config.get('IMPORT_MAX_BATCH_SIZE', 10000):
+            return jsonify({'error': 'Nieprawidłowy rozmiar partii'}), 400
+
+        filename = secure_filename(file.filename) or f'import.{file_format}'
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filepath = os.path.join(get_import_dir(), f'{timestamp}_{filename}')
+        file.save(filepath)
+
+        job = ImportJob(
+            EntityType=entity_type,
+            FileName=filename,
+            FilePath=filepath,
+            FileFormat=file_format,
+            Status='queued',
+            BatchSize=batch_size,
+            DryRun=request.form.get('dryRun', 'false').lower() == 'true',
+            CreatedByUserId=get_current_user().id,
+            CreatedAt=datetime.now()
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        start_import(current_app._get_current_object(), job.Id)
+        return jsonify(ImportJob.query.get(job.Id).to_dict()), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@imports_bp.route('/', methods=['GET'])
+@require_admin
+def get_imports():
+    """Lista importów (najnowsze pierwsze)"""
+    try:
+        jobs = ImportJob.query.order_by(ImportJob.Id.desc()).limit(100).all()
+        return jsonify([job.to_dict() for job in jobs]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@imports_bp.route('/<int:job_id>', methods=['GET'])
+@require_admin
+def get_import(job_id):
+    """Status i postęp importu"""
+    try:
+        job = ImportJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Import nie znaleziony'}), 404
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@imports_bp.route('/<int:job_id>/errors', methods=['GET'])
+@require_admin
+def get_import_errors(job_id):
+    """Raport błędów importu (CSV: wiersz, błąd, oryginalne wartości)"""
+    try:
+        job = ImportJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Import nie znaleziony'}), 404
+        if not job.ErrorReportPath or not os.path.exists(job.ErrorReportPath):
+            return jsonify({'error': 'Import nie ma raportu błędów'}), 404
+
+        return send_file(job.ErrorReportPath, mimetype='text/csv', as_attachment=True,
+                         download_name=f'import_{job.Id}_bledy.csv')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,7 +1,11 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, g
 from app.middleware import require_auth
 from app.database import db
-from app.models import Invoice
+from app.models import Invoice, Customer
+from app.dunning import get_last_run_metrics
+from app.list_query import ListField, ListQuerySpec, ListQueryError, list_response, run_list_query
+from app.visibility import is_visible, visibility_scope
+from app.money import MoneyVector, format_money, from_grosze, line_amounts, split_gross, to_grosze
 from sqlalchemy.orm import joinedload
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -82,7 +86,7 @@ def create_invoice_pdf(invoice):
     elements.append(Paragraph(f"<b>Data wystawienia:</b> {invoice.IssuedAt.strftime('%d.%m.%Y') if invoice.IssuedAt else 'Brak daty'}", normal_style))
     elements.append(Paragraph(f"<b>Termin płatności:</b> {invoice.DueDate.strftime('%d.%m.%Y') if invoice.DueDate else 'Brak daty'}", normal_style))
     elements.append(Paragraph(f"<b>Status:</b> {'OPŁACONA' if invoice.IsPaid else 'OCZEKUJĄCA NA PŁATNOŚĆ'}", normal_style))
-    elements.append(Paragraph(f"<b>Kwota faktury:</b> {float(invoice.TotalAmount):.2f} PLN" if invoice.TotalAmount else "0.00 PLN", normal_style))
+    elements.append(Paragraph(f"<b>Kwota faktury:</b> {format_money(invoice.TotalAmount)} PLN", normal_style))
     
     elements.append(Spacer(1, 20))
     
@@ -102,7 +106,7 @@ def create_invoice_pdf(invoice):
     if invoice.invoice_items:
         for item in invoice.invoice_items:
             service_name = item.service.Name if item.service else 'Usługa'
-            elements.append(Paragraph(f"• {service_name} - Ilość: {item.Quantity} - Cena: {float(item.UnitPrice):.2f} PLN", normal_style))
+            elements.append(Paragraph(f"• {service_name} - Ilość: {item.Quantity} - Cena: {format_money(item.UnitPrice)} PLN", normal_style))
     else:
         elements.append(Paragraph("Brak pozycji", normal_style))
     
@@ -111,17 +115,85 @@ def create_invoice_pdf(invoice):
     buffer.seek(0)
     return buffer
 
+def _invoice_split(row):
+    """Kwota netto i VAT faktury (23%) w groszach"""
+    return split_gross(to_grosze(row['totalAmount']) or 0)
+
+INVOICE_LIST_SPEC = ListQuerySpec(
+    Invoice,
+    fields={
+        'id': ListField(Invoice.Id),
+        'number': ListField(Invoice.Number),
+        'invoiceNumber': ListField(Invoice.Number),
+        'customerId': ListField(Invoice.CustomerId),
+        'customerName': ListField(Customer.Name, join=(Customer, Customer.Id == Invoice.CustomerId)),
+        'issuedAt': ListField(Invoice.IssuedAt),
+        'dueDate': ListField(Invoice.DueDate),
+        'isPaid': ListField(Invoice.IsPaid),
+        # Status utrzymywany przy zapisie i przez zadanie overdue_invoices (app/dunning.py)
+        'status': ListField(Invoice.Status),
+        'overdueSince': ListField(Invoice.OverdueSince),
+        'amount': ListField(Invoice.TotalAmount),
+        'totalAmount': ListField(Invoice.TotalAmount),
+        # Kwoty netto i VAT (23%) liczone tak samo jak w Invoice.to_dict
+        'netAmount': ListField(compute=(['totalAmount'], lambda row: _invoice_split(row)[0] / 100)),
+        'taxAmount': ListField(compute=(['totalAmount'], lambda row: _invoice_split(row)[1] / 100)),
+        'assignedGroupId': ListField(Invoice.AssignedGroupId),
+        'createdByUserId': ListField(Invoice.CreatedByUserId),
+    },
+    default_sort='-id',
+    full_options=[joinedload(Invoice.customer)]
+)
+
 @invoices_bp.route('/', methods=['GET'])
 @require_auth
 def get_invoices():
-    """Pobiera listę faktur, posortowaną od najnowszych (malejąco według ID)"""
+    """
+    Pobiera listę faktur widocznych dla użytkownika (app/visibility.py), domyślnie posortowaną
+    od najnowszych (malejąco według ID).
+    Obsługuje ?fields=, ?filter[pole][operator]=, ?sort= oraz ?limit=/?cursor= (patrz app/list_query.py)
+    """
     try:
-        # Pobierz faktury z danymi klienta, sortując od najnowszych (największe ID na początku)
-        invoices = Invoice.query.options(joinedload(Invoice.customer)).order_by(Invoice.Id.desc()).all()
+        scope = visibility_scope(Invoice)
+        return list_response(run_list_query(INVOICE_LIST_SPEC, request.args, scope=scope))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@invoices_bp.route('/overdue', methods=['GET'])
+@require_auth
+def get_overdue_invoices():
+    """
+    Lista przeterminowanych faktur (najdłużej zaległe pierwsze) - wyszukiwanie po indeksie
+    (Status, DueDate). Opcjonalnie ?groupId= oraz ?limit= (domyślnie 100, maks. 1000).
+    """
+    try:
+        limit = min(request.args.get('limit', 100, type=int) or 100, 1000)
+        query = Invoice.query.options(joinedload(Invoice.customer)).filter(Invoice.Status == 'Overdue')
+        scope = visibility_scope(Invoice)
+        if scope is not None:
+            query = query.filter(scope)
+        group_id = request.args.get('groupId', type=int)
+        if group_id:
+            query = query.filter(Invoice.AssignedGroupId == group_id)
+        invoices = query.order_by(Invoice.DueDate, Invoice.Id).limit(limit).all()
         return jsonify([invoice.to_dict() for invoice in invoices]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@invoices_bp.route('/overdue/metrics', methods=['GET'])
+@require_auth
+def get_overdue_metrics():
+    """Metryki ostatniego przebiegu zadania overdue_invoices"""
+    try:
+        metrics = get_last_run_metrics()
+        if metrics is None:
+            return jsonify({'error': 'Zadanie wykrywania przeterminowanych faktur nie było jeszcze uruchomione'}), 404
+        return jsonify(metrics), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @invoices_bp.route('/', methods=['POST'])
 @require_auth
 def create_invoice():
@@ -137,7 +209,7 @@ def create_invoice():
 
         # Oblicz totalAmount na podstawie items
         items_data = data.get('items', [])
-        total_amount = Decimal(0)
+        total_grosze = 0
 
         for item_data in items_data:
             service_id = item_data.get('serviceId')
@@ -151,12 +223,8 @@ def create_invoice():
             quantity = item_data.get('quantity', 1)
             tax_rate = service.TaxRate if service.TaxRate is not None else Decimal('0.23')
             
-            unit_price = Decimal(str(service.Price))
-            net_amount = unit_price * quantity
-            tax_amount = net_amount * tax_rate
-            gross_amount = net_amount + tax_amount
-
-            total_amount += gross_amount
+            # Kwoty w groszach - suma pozycji równa kwocie faktury co do grosza
+            total_grosze += line_amounts(service.Price, quantity, tax_rate)[2]
 
         # Oblicz datę płatności (domyślnie 14 dni od wystawienia)
         due_date = None
@@ -169,7 +237,7 @@ def create_invoice():
 
         new_invoice = Invoice(
             Number=data.get('invoiceNumber'),
-            TotalAmount=total_amount,  # Obliczona kwota
+            TotalAmount=from_grosze(total_grosze),  # Obliczona kwota
             IsPaid=data.get('isPaid', False),
             DueDate=due_date,
             CustomerId=data.get('customerId'),
@@ -190,9 +258,7 @@ def create_invoice():
                 unit_price = service.Price  # Zapisz cenę z momentu utworzenia
                 quantity = item_data.get('quantity', 1)
                 
-                net_amount = unit_price * quantity
-                tax_amount = net_amount * tax_rate
-                gross_amount = net_amount + tax_amount
+                net_amount, tax_amount, gross_amount = map(from_grosze, line_amounts(unit_price, quantity, tax_rate))
 
                 invoice_item = InvoiceItem(
                     InvoiceId=new_invoice.Id,
@@ -221,7 +287,7 @@ def get_invoice(invoice_id):
     try:
         from app.models import Payment
         invoice = Invoice.query.options(joinedload(Invoice.customer)).get(invoice_id)
-        if not invoice:
+        if not invoice or not is_visible(invoice):
             return jsonify({'error': 'Faktura nie znaleziona'}), 404
 
         # Pobierz dane faktury
@@ -230,16 +296,13 @@ def get_invoice(invoice_id):
         # Pobierz wszystkie płatności dla tej faktury
         payments = Payment.query.filter_by(InvoiceId=invoice_id).order_by(Payment.PaidAt.desc()).all()
         
-        # Oblicz sumę zapłaconych kwot
-        paid_amount = sum(float(payment.Amount) for payment in payments) if payments else 0.0
-        
-        # Oblicz pozostałą kwotę do zapłaty
-        total_amount = float(invoice.TotalAmount) if invoice.TotalAmount else 0.0
-        remaining_amount = total_amount - paid_amount
+        # Suma zapłaconych kwot i pozostała kwota do zapłaty - w groszach
+        paid_grosze = MoneyVector.from_amounts(payment.Amount for payment in payments).total()
+        remaining_grosze = (to_grosze(invoice.TotalAmount) or 0) - paid_grosze
         
         # Dodaj informacje o płatnościach do odpowiedzi
-        invoice_data['paidAmount'] = paid_amount
-        invoice_data['remainingAmount'] = remaining_amount
+        invoice_data['paidAmount'] = paid_grosze / 100
+        invoice_data['remainingAmount'] = remaining_grosze / 100
         invoice_data['payments'] = [payment.to_dict() for payment in payments]
 
         return jsonify(invoice_data), 200
@@ -252,7 +315,7 @@ def update_invoice(invoice_id):
     """Aktualizuje fakturę wraz z pozycjami"""
     try:
         invoice = Invoice.query.options(joinedload(Invoice.invoice_items)).get(invoice_id)
-        if not invoice:
+        if not invoice or not is_visible(invoice):
             return jsonify({'error': 'Faktura nie znaleziona'}), 404
         
         data = request.get_json()
@@ -277,7 +340,7 @@ def update_invoice(invoice_id):
             InvoiceItem.query.filter_by(InvoiceId=invoice_id).delete()
             db.session.flush()
 
-            new_total_amount = Decimal(0)
+            new_total_grosze = 0
             # Dodaj nowe pozycje faktury i przelicz TotalAmount
             for item_data in data['items']:
                 service = Service.query.get(item_data['serviceId'])
@@ -286,9 +349,8 @@ def update_invoice(invoice_id):
                     unit_price = Decimal(str(service.Price))
                     tax_rate = service.TaxRate if service.TaxRate is not None else Decimal('0.23')
 
-                    net_amount = unit_price * quantity
-                    tax_amount = net_amount * tax_rate
-                    gross_amount = net_amount + tax_amount
+                    net_grosze, tax_grosze, gross_grosze = line_amounts(unit_price, quantity, tax_rate)
+                    net_amount, tax_amount, gross_amount = map(from_grosze, (net_grosze, tax_grosze, gross_grosze))
 
                     invoice_item = InvoiceItem(
                         InvoiceId=invoice.Id,
@@ -302,12 +364,12 @@ def update_invoice(invoice_id):
                         GrossAmount=gross_amount
                     )
                     db.session.add(invoice_item)
-                    new_total_amount += gross_amount
+                    new_total_grosze += gross_grosze
                 else:
                     db.session.rollback()
                     return jsonify({'error': f'Usługa o ID {item_data["serviceId"]} nie znaleziona.'}), 400
             
-            invoice.TotalAmount = new_total_amount
+            invoice.TotalAmount = from_grosze(new_total_grosze)
 
         db.session.commit()
         
@@ -322,7 +384,7 @@ def delete_invoice(invoice_id):
     """Usuwa fakturę"""
     try:
         invoice = Invoice.query.get(invoice_id)
-        if not invoice:
+        if not invoice or not is_visible(invoice):
             return jsonify({'error': 'Faktura nie znaleziona'}), 404
         
         db.session.delete(invoice)
@@ -354,6 +416,8 @@ def generate_invoice_pdf(invoice_id):
 
             if not user_id:
                 return jsonify({'error': 'Token nieprawidłowy'}), 401
+            # Jak w require_auth - widoczność faktury liczona dla użytkownika z tokenu
+            g.user_id = user_id
 
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token wygasł'}), 401
@@ -369,7 +433,7 @@ def generate_invoice_pdf(invoice_id):
             joinedload(Invoice.customer),
             joinedload(Invoice.invoice_items).joinedload(InvoiceItem.service)
         ).get(invoice_id)
-        if not invoice:
+        if not invoice or not is_visible(invoice):
             return jsonify({'error': 'Faktura nie znaleziona'}), 404
 
         # Generuj PDF
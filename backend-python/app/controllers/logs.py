@@ -1,13 +1,37 @@
 from flask import Blueprint, request, jsonify, make_response
 from app.middleware import require_auth, get_current_user
 from app.database import db
-from app.models import SystemLog
+from app.log_storage import query_logs, iter_logs, run_maintenance
 import xlsxwriter
 import io
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logs_bp = Blueprint('logs', __name__)
 
+def parse_range_args(args):
+    """
+    Odczytuje zakres dat ?from=&to= (ISO). Data bez godziny w 'to' obejmuje cały dzień.
+    Zwraca (od, do) - do jest wyłączne.
+    """
+    date_from = datetime.fromisoformat(args['from']) if args.get('from') else None
+    date_to = None
+    if args.get('to'):
+        date_to = datetime.fromisoformat(args['to'])
+        if len(args['to']) == 10:
+            date_to += timedelta(days=1)
+    return date_from, date_to
+
+def log_row_to_dict(row):
+    return {
+        'id': row['Id'],
+        'level': row['Level'],
+        'message': row['Message'],
+        'source': row['Source'],
+        'details': row['Details'],
+        'timestamp': row['Timestamp'].isoformat() if row['Timestamp'] else None,
+        'userId': row['UserId']
+    }
+
 @logs_bp.route('/', methods=['GET'])
 @require_auth
 def get_logs():
@@ -21,8 +45,15 @@ def get_logs():
         if user.role.name != 'Admin':
             return jsonify({'error': 'Brak uprawnień administratora'}), 403
         
-        logs = SystemLog.query.order_by(SystemLog.Timestamp.desc()).limit(100).all()
-        return jsonify([log.to_dict() for log in logs]), 200
+        try:
+            date_from, date_to = parse_range_args(request.args)
+            limit = min(int(request.args.get('limit', 100)), 1000)
+        except ValueError:
+            return jsonify({'error': 'Nieprawidłowy parametr from, to lub limit'}), 400
+        
+        filters = {'Level': request.args['level']} if request.args.get('level') else None
+        logs = query_logs('SystemLogs', date_from, date_to, filters, limit)
+        return jsonify([log_row_to_dict(log) for log in logs]), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -40,8 +71,14 @@ def export_logs():
         if user.role.name != 'Admin':
             return jsonify({'error': 'Brak uprawnień administratora'}), 403
         
-        # Pobierz wszystkie logi
-        logs = SystemLog.query.order_by(SystemLog.Timestamp.desc()).all()
+        try:
+            date_from, date_to = parse_range_args(request.args)
+        except ValueError:
+            return jsonify({'error': 'Nieprawidłowy parametr from lub to'}), 400
+        
+        # Logi z zakresu czytane paczkami - tylko z pasujących partycji
+        filters = {'Level': request.args['level']} if request.args.get('level') else None
+        logs = iter_logs('SystemLogs', date_from, date_to, filters)
         
         # Utwórz plik Excel w pamięci
         output = io.BytesIO()
@@ -61,6 +98,11 @@ def export_logs():
             'text_wrap': True
         })
         
+        date_format = workbook.add_format({
+            'border': 1,
+            'num_format': 'yyyy-mm-dd hh:mm:ss'
+        })
+        
         # Nagłówki
         headers = ['ID', 'Poziom', 'Wiadomość', 'Źródło', 'Użytkownik', 'Szczegóły', 'Data']
         for col, header in enumerate(headers):
@@ -68,13 +110,16 @@ def export_logs():
         
         # Dane
         for row, log in enumerate(logs, 1):
-            worksheet.write(row, 0, log.Id, cell_format)
-            worksheet.write(row, 1, log.Level, cell_format)
-            worksheet.write(row, 2, log.Message, cell_format)
-            worksheet.write(row, 3, log.Source, cell_format)
-            worksheet.write(row, 4, log.UserId or 'System', cell_format)
-            worksheet.write(row, 5, log.Details or '', cell_format)
-            worksheet.write(row, 6, log.Timestamp.strftime('%Y-%m-%d %H:%M:%S') if log.Timestamp else '', cell_format)
+            worksheet.write_number(row, 0, log['Id'], cell_format)
+            worksheet.write_string(row, 1, log['Level'] or '', cell_format)
+            worksheet.write_string(row, 2, log['Message'] or '', cell_format)
+            worksheet.write_string(row, 3, log['Source'] or '', cell_format)
+            worksheet.write(row, 4, log['UserId'] or 'System', cell_format)
+            worksheet.write_string(row, 5, log['Details'] or '', cell_format)
+            if log['Timestamp']:
+                worksheet.write_datetime(row, 6, log['Timestamp'], date_format)
+            else:
+                worksheet.write_blank(row, 6, None, cell_format)
         
         # Dostosuj szerokość kolumn
         worksheet.set_column('A:A', 8)   # ID
@@ -98,19 +143,28 @@ def export_logs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def log_system_event(level, message, source, user_id=None, details=None):
-    """Funkcja pomocnicza do logowania zdarzeń systemowych"""
+@logs_bp.route('/maintenance', methods=['POST'])
+@require_auth
+def logs_maintenance():
+    """Rotuje partycje logów i archiwizuje miesiące starsze niż okres retencji"""
     try:
-        log_entry = SystemLog(
-            Level=level,
-            Message=message,
-            Source=source,
-            UserId=user_id,
-            Details=details
-        )
-        
-        db.session.add(log_entry)
-        db.session.commit()
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+        
+        if user.role.name != 'Admin':
+            return jsonify({'error': 'Brak uprawnień administratora'}), 403
+        
+        return jsonify(run_maintenance()), 200
+        
     except Exception as e:
-        print(f"Błąd przy logowaniu zdarzenia: {e}")
-        db.session.rollback()
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def log_system_event(level, message, source, user_id=None, details=None):
+    """
+    Funkcja pomocnicza do logowania zdarzeń systemowych.
+    Wpis jest zapisywany przy najbliższym commit, w tej samej transakcji (app/outbox.py).
+    """
+    from app.outbox import add_system_log
+    add_system_log(level, message, source, user_id, details)
\ No newline at end of file
@@ -0,0 +1,28 @@
+from flask import Blueprint, request, jsonify
+from app.middleware import require_auth, get_current_user_id
+from app.counters import get_counters
+
+me_bp = Blueprint('me', __name__)
+
+@me_bp.route('/counters', methods=['GET'])
+@require_auth
+def get_my_counters():
+    """
+    Pobiera liczniki plakietek bieżącego użytkownika.
+    Odpowiedź ma nagłówek ETag - niezmienione liczniki zwracają 304 (If-None-Match).
+    """
+    try:
+        counter = get_counters(int(get_current_user_id()))
+        etag = counter.etag()
+        
+        if request.if_none_match.contains(etag):
+            response = jsonify()
+            response.status_code = 304
+        else:
+            response = jsonify(counter.to_dict())
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
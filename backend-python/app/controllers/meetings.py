@@ -4,11 +4,26 @@ from app.database import db
 from app.models import Meeting
 from app.models.user import User
 from app.models.role import Role
+from app.list_query import ListField, ListQuerySpec, ListQueryError, list_response, run_list_query
+from app.visibility import is_visible, visibility_scope
 from datetime import datetime
 from functools import wraps
 
 meetings_bp = Blueprint('meetings', __name__)
 
+MEETING_LIST_SPEC = ListQuerySpec(
+    Meeting,
+    fields={
+        'id': ListField(Meeting.Id),
+        'topic': ListField(Meeting.Topic),
+        'scheduledAt': ListField(Meeting.ScheduledAt),
+        'customerId': ListField(Meeting.CustomerId),
+        'assignedGroupId': ListField(Meeting.AssignedGroupId),
+        'createdByUserId': ListField(Meeting.CreatedByUserId),
+    },
+    default_sort='-scheduledAt'
+)
+
 def conditional_auth(f):
     """Dekorator sprawdzający autoryzację tylko dla GET/POST, nie dla OPTIONS"""
     @wraps(f)
@@ -23,14 +38,16 @@ def conditional_auth(f):
 @meetings_bp.route('/api/Meetings/', methods=['GET', 'OPTIONS'])
 @conditional_auth
 def get_meetings():
-    """Pobiera listę spotkań"""
+    """Pobiera listę spotkań widocznych dla użytkownika (obsługuje ?fields=, ?filter[...]=, ?sort= oraz ?limit=/?cursor=)"""
     try:
         # Obsługa żądań OPTIONS dla CORS preflight
         if request.method == 'OPTIONS':
             return '', 200
             
-        meetings = Meeting.query.order_by(Meeting.ScheduledAt.desc()).all()
-        return jsonify([meeting.to_dict() for meeting in meetings]), 200
+        scope = visibility_scope(Meeting)
+        return list_response(run_list_query(MEETING_LIST_SPEC, request.args, scope=scope))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -77,7 +94,7 @@ def handle_single_meeting(meeting_id):
         
         if request.method == 'GET':
             meeting = Meeting.query.get(meeting_id)
-            if not meeting:
+            if not meeting or not is_visible(meeting):
                 return jsonify({'error': 'Spotkanie nie znalezione'}), 404
             
             return jsonify(meeting.to_dict()), 200
@@ -2,40 +2,119 @@ from flask import Blueprint, request, jsonify
 from app.middleware import require_auth, get_current_user_id
 from app.database import db
 from app.models import Message, User
-from datetime import datetime
+from app.messaging import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MessageCursorError, inbox_condition, mark_read,
+                           message_page, participant_condition, sent_condition, thread_condition)
+from sqlalchemy import and_
+
+MAX_BULK_READ = 1000
 
 messages_bp = Blueprint('messages', __name__)
 
+def _page_args():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if not limit or limit < 1:
+        limit = DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE), request.args.get('cursor')
+
+def _page_response(items, next_cursor):
+    """Lista wiadomości; kursor następnej strony w nagłówku X-Next-Cursor"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
 @messages_bp.route('/inbox', methods=['GET'])
 @require_auth
 def get_inbox():
-    """Pobiera wiadomości otrzymane"""
+    """
+    Pobiera wiadomości otrzymane (najnowsze pierwsze), stronicowane kursorem:
+    ?limit= (domyślnie 50), ?cursor= z nagłówka X-Next-Cursor, ?unread=true - tylko nieprzeczytane
+    """
     try:
         user_id = get_current_user_id()
-        
-        messages = Message.query.filter_by(RecipientUserId=user_id).order_by(Message.SentAt.desc()).all()
-        return jsonify([message.to_dict() for message in messages]), 200
-        
+        limit, cursor = _page_args()
+        unread_only = request.args.get('unread', 'false').lower() == 'true'
+
+        return _page_response(*message_page(inbox_condition(user_id, unread_only), limit, cursor))
+
+    except MessageCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @messages_bp.route('/sent', methods=['GET'])
 @require_auth
 def get_sent():
-    """Pobiera wiadomości wysłane"""
+    """Pobiera wiadomości wysłane (najnowsze pierwsze), stronicowane jak /inbox"""
     try:
         user_id = get_current_user_id()
-        
-        messages = Message.query.filter_by(SenderUserId=user_id).order_by(Message.SentAt.desc()).all()
-        return jsonify([message.to_dict() for message in messages]), 200
-        
+        limit, cursor = _page_args()
+
+        return _page_response(*message_page(sent_condition(user_id), limit, cursor))
+
+    except MessageCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@messages_bp.route('/threads/<int:thread_id>', methods=['GET'])
+@require_auth
+def get_thread(thread_id):
+    """Wiadomości wątku widoczne dla użytkownika (od najstarszej), stronicowane jak /inbox"""
+    try:
+        user_id = get_current_user_id()
+        limit, cursor = _page_args()
+
+        items, next_cursor = message_page(
+            and_(thread_condition(thread_id), participant_condition(user_id)),
+            limit, cursor, newest_first=False
+        )
+        if not items and not cursor:
+            return jsonify({'error': 'Wątek nie znaleziony'}), 404
+        return _page_response(items, next_cursor)
+
+    except MessageCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@messages_bp.route('/read', methods=['PUT'])
+@require_auth
+def mark_many_as_read():
+    """
+    Oznacza zbiorczo wiadomości odebrane jako przeczytane.
+    Treść: {"ids": [...]} albo {"threadId": n} albo {"all": true}
+    """
+    try:
+        user_id = get_current_user_id()
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        thread_id = data.get('threadId')
+
+        if ids is None and thread_id is None and data.get('all') is not True:
+            return jsonify({'error': 'Wymagane pole ids, threadId lub all'}), 400
+        if ids is not None and (not isinstance(ids, list) or len(ids) > MAX_BULK_READ
+                                or not all(isinstance(message_id, int) for message_id in ids)):
+            return jsonify({'error': f'Pole ids musi być listą do {MAX_BULK_READ} liczb całkowitych'}), 400
+        if thread_id is not None and not isinstance(thread_id, int):
+            return jsonify({'error': 'Pole threadId musi być liczbą całkowitą'}), 400
+
+        updated = mark_read(user_id, ids=ids, thread_id=thread_id)
+        db.session.commit()
+
+        return jsonify({'updated': updated}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @messages_bp.route('/', methods=['POST'])
 @require_auth
 def send_message():
-    """Wysyła wiadomość"""
+    """
+    Wysyła wiadomość. Opcjonalne replyToId - odpowiedź w wątku wiadomości, na którą
+    odpowiada użytkownik (domyślny temat "Re: ...").
+    """
     try:
         sender_id = get_current_user_id()
         data = request.get_json()
@@ -46,39 +125,44 @@ def send_message():
         
         if not sender or not recipient:
             return jsonify({'error': 'Użytkownik nie znaleziony'}), 404
+
+        subject = data.get('subject')
+        thread_id = parent_id = None
+        if data.get('replyToId') is not None:
+            parent = Message.query.filter(
+                (Message.Id == data.get('replyToId')) &
+                ((Message.SenderUserId == sender_id) | (Message.RecipientUserId == sender_id))
+            ).first()
+            if not parent:
+                return jsonify({'error': 'Wiadomość nie znaleziona'}), 404
+            thread_id, parent_id = parent.ThreadId or parent.Id, parent.Id
+            if not subject:
+                subject = parent.Subject if parent.Subject.startswith('Re: ') else f'Re: {parent.Subject}'
         
         new_message = Message(
-            Subject=data.get('subject'),
+            Subject=subject,
             Body=data.get('body'),
             SenderUserId=sender_id,
-            RecipientUserId=data.get('recipientUserId')
+            RecipientUserId=data.get('recipientUserId'),
+            ThreadId=thread_id,
+            ParentMessageId=parent_id
         )
         
         db.session.add(new_message)
-        db.session.commit()
         
-        # Dodaj powiadomienie dla odbiorcy
-        try:
-            from app.controllers.notifications import create_notification
-            create_notification(
-                user_id=data.get('recipientUserId'),
-                message=f'Nowa wiadomość od {sender.username}: {data.get("subject")}'
-            )
-        except Exception as e:
-            print(f"Błąd przy tworzeniu powiadomienia: {e}")
-        
-        # Dodaj log systemowy
-        try:
-            from app.controllers.logs import log_system_event
-            log_system_event(
-                level='Information',
-                message=f'Wiadomość została wysłana',
-                source='Python.Backend.MessagesController',
-                user_id=sender_id,
-                details=f'{{"recipient": "{recipient.username}", "subject": "{data.get("subject")}"}}'
-            )
-        except Exception as e:
-            print(f"Błąd przy tworzeniu logu: {e}")
+        # Powiadomienie dla odbiorcy i log systemowy - w tej samej transakcji co wiadomość
+        from app.outbox import add_notification, add_system_log
+        add_notification(data.get('recipientUserId'),
+                         f'Nowa wiadomość od {sender.username}: {subject}')
+        add_system_log(
+            level='Information',
+            message='Wiadomość została wysłana',
+            source='Python.Backend.MessagesController',
+            user_id=sender_id,
+            details=f'{{"recipient": "{recipient.username}", "subject": "{subject}"}}'
+        )
+        
+        db.session.commit()
         
         return jsonify(new_message.to_dict()), 201
         
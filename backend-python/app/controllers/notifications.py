@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from app.middleware import require_auth, get_current_user_id
 from app.database import db
 from app.models import Notification
+from app.push import event_stream
+from app.counters import get_counters
 
 notifications_bp = Blueprint('notifications', __name__)
 
@@ -18,6 +20,16 @@ def get_user_notifications():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@notifications_bp.route('/stream', methods=['GET'])
+@require_auth
+def stream_notifications():
+    """Strumień nowych powiadomień użytkownika (Server-Sent Events)"""
+    user_id = int(get_current_user_id())
+    response = Response(event_stream(user_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @notifications_bp.route('/unread-count', methods=['GET'])
 @require_auth
 def get_unread_count():
@@ -25,7 +37,8 @@ def get_unread_count():
     try:
         user_id = get_current_user_id()
         
-        count = Notification.query.filter_by(UserId=user_id, IsRead=False).count()
+        # Licznik utrzymywany przyrostowo - bez zliczania wierszy przy każdym odpytaniu
+        count = get_counters(int(user_id)).UnreadNotifications
         return jsonify({'count': count}), 200
         
     except Exception as e:
@@ -92,15 +105,51 @@ def mark_notification_as_read_post(notification_id):
         return jsonify({'error': str(e)}), 500
 
 def create_notification(user_id, message):
-    """Funkcja pomocnicza do tworzenia powiadomień"""
+    """
+    Funkcja pomocnicza do tworzenia powiadomień.
+    Powiadomienie jest zapisywane przy najbliższym commit, w tej samej transakcji (app/outbox.py).
+    """
+    from app.outbox import add_notification
+    add_notification(user_id, message)
+
+@notifications_bp.route('/broadcast', methods=['POST'])
+@require_auth
+def broadcast_notification():
+    """
+    Wysyła powiadomienie do wielu użytkowników (tylko Admin).
+    Body: {"message": "...", "groupIds": [1], "roles": ["User"], "userIds": [2], "all": false}
+    """
     try:
-        notification = Notification(
-            Message=message,
-            UserId=user_id
-        )
-        
-        db.session.add(notification)
+        from app.middleware import get_current_user
+        from app.fanout import fan_out_notification
+
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+        if not user.role or user.role.name != 'Admin':
+            return jsonify({'error': 'Brak uprawnień administratora'}), 403
+
+        data = request.get_json() or {}
+        message = (data.get('message') or '').strip()
+        if not message:
+            return jsonify({'error': 'Treść powiadomienia jest wymagana'}), 400
+        for field in ('groupIds', 'userIds'):
+            if not all(isinstance(value, int) for value in data.get(field) or []):
+                return jsonify({'error': f'Pole {field} musi być listą liczb całkowitych'}), 400
+
+        try:
+            recipients = fan_out_notification(
+                message,
+                group_ids=data.get('groupIds'),
+                role_names=data.get('roles'),
+                user_ids=data.get('userIds'),
+                all_users=bool(data.get('all'))
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         db.session.commit()
+        return jsonify({'recipients': recipients}), 201
     except Exception as e:
-        print(f"Błąd przy tworzeniu powiadomienia: {e}")
-        db.session.rollback()
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,31 +1,45 @@
 from flask import Blueprint, request, jsonify
 from app.middleware import require_auth
 from app.database import db
-from app.models import Payment
+from app.models import Payment, Invoice
+from app.list_query import ListField, ListQuerySpec, ListQueryError, list_response, run_list_query
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 
 payments_bp = Blueprint('payments', __name__)
 
+PAYMENT_LIST_SPEC = ListQuerySpec(
+    Payment,
+    fields={
+        'id': ListField(Payment.Id),
+        'invoiceId': ListField(Payment.InvoiceId),
+        'invoiceNumber': ListField(Invoice.Number, join=(Invoice, Invoice.Id == Payment.InvoiceId)),
+        'paidAt': ListField(Payment.PaidAt),
+        'paymentDate': ListField(Payment.PaidAt),
+        'createdAt': ListField(Payment.PaidAt),
+        'amount': ListField(Payment.Amount),
+        'method': ListField(compute=([], lambda row: 'Transfer')),
+        'status': ListField(compute=([], lambda row: 'Completed')),
+    },
+    default_sort='-paidAt',
+    full_options=[joinedload(Payment.invoice)]
+)
+
 @payments_bp.route('/', methods=['GET'])
 @require_auth
 def get_payments():
-    """Pobiera listę płatności, opcjonalnie filtrowaną według invoiceId"""
+    """
+    Pobiera listę płatności, opcjonalnie filtrowaną według invoiceId.
+    Obsługuje ?fields=, ?filter[pole][operator]=, ?sort= oraz ?limit=/?cursor= (patrz app/list_query.py)
+    """
     try:
         # Pobierz parametr invoiceId z query string
         invoice_id = request.args.get('invoiceId', type=int)
+        scope = Payment.InvoiceId == invoice_id if invoice_id is not None else None
         
-        # Rozpocznij zapytanie z joinedload dla relacji invoice
-        query = Payment.query.options(joinedload(Payment.invoice))
-        
-        # Jeśli podano invoiceId, filtruj według niego
-        if invoice_id is not None:
-            query = query.filter_by(InvoiceId=invoice_id)
-        
-        # Sortuj i pobierz wyniki
-        payments = query.order_by(Payment.PaidAt.desc()).all()
-        
-        return jsonify([payment.to_dict() for payment in payments]), 200
+        return list_response(run_list_query(PAYMENT_LIST_SPEC, request.args, scope=scope))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app.middleware import require_auth, get_current_user, get_current_user_id
 from app.database import db
-from app.models import User, LoginHistory
+from app.models import User
+from app.models.login_history import login_row_to_dict
+from app.log_storage import query_recent_logs
 from werkzeug.security import generate_password_hash, check_password_hash
 
 profile_bp = Blueprint('profile', __name__)
@@ -82,12 +84,10 @@ def get_login_history():
         if not user:
             return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
         
-        # Pobierz ostatnie 50 logowań
-        login_history = LoginHistory.query.filter_by(UserId=current_user_id)\
-                                        .order_by(LoginHistory.LoginTime.desc())\
-                                        .limit(50).all()
+        # Pobierz ostatnie 50 logowań - od bieżącego miesiąca, starsze partycje tylko w razie potrzeby
+        login_history = query_recent_logs('LoginHistory', filters={'UserId': current_user_id}, limit=50)
         
-        return jsonify([login.to_dict() for login in login_history]), 200
+        return jsonify([login_row_to_dict(login) for login in login_history]), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
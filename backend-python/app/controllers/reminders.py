@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.middleware import require_auth, get_current_user
 from app.database import db
 from app.models import Reminder
+from app.reminder_scheduler import reminder_changed, reminder_removed
 from datetime import datetime
 
 reminders_bp = Blueprint('reminders', __name__)
@@ -9,14 +10,20 @@ reminders_bp = Blueprint('reminders', __name__)
 @reminders_bp.route('/', methods=['GET'])
 @require_auth
 def get_reminders():
-    """Pobiera listę przypomnień użytkownika, posortowaną od najnowszych (malejąco według ID)"""
+    """
+    Pobiera listę przypomnień użytkownika, posortowaną od najnowszych (malejąco według ID).
+    ?pending=true zwraca tylko przypomnienia, które nie zostały jeszcze wysłane.
+    """
     try:
         user = get_current_user()
         if not user:
             return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
         
         # Pobierz przypomnienia, sortując od najnowszych (największe ID na początku)
-        reminders = Reminder.query.filter_by(UserId=user.id).order_by(Reminder.Id.desc()).all()
+        query = Reminder.query.filter_by(UserId=user.id)
+        if request.args.get('pending', '').lower() == 'true':
+            query = query.filter(Reminder.FiredAt.is_(None))
+        reminders = query.order_by(Reminder.Id.desc()).all()
         return jsonify([reminder.to_dict() for reminder in reminders]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -55,6 +62,7 @@ def create_reminder():
         
         db.session.add(new_reminder)
         db.session.commit()
+        reminder_changed(new_reminder)
         
         return jsonify(new_reminder.to_dict()), 201
     except Exception as e:
@@ -108,11 +116,15 @@ def update_reminder(reminder_id):
                     # Data już jest w czasie lokalnym
                     local_datetime = datetime.fromisoformat(remind_at_value)
                 
+                if local_datetime != reminder.RemindAt:
+                    # Nowy termin - przypomnienie zostanie wysłane ponownie
+                    reminder.FiredAt = None
                 reminder.RemindAt = local_datetime
             else:
                 return jsonify({'error': 'Pole RemindAt nie może być puste'}), 400
         
         db.session.commit()
+        reminder_changed(reminder)
         
         return jsonify(reminder.to_dict()), 200
     except Exception as e:
@@ -134,6 +146,7 @@ def delete_reminder(reminder_id):
         
         db.session.delete(reminder)
         db.session.commit()
+        reminder_removed(reminder_id)
         
         return jsonify({'message': 'Przypomnienie usunięte'}), 200
     except Exception as e:
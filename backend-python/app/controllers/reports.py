@@ -1,32 +1,58 @@
 from flask import Blueprint, request, jsonify, make_response
 from app.middleware import require_auth
 from app.database import db
-from sqlalchemy import text
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
-import io
-import csv
-import xlsxwriter
-from datetime import datetime
+from datetime import date, datetime
+from app.export_schema import (
+    get_schema, format_value, write_csv, write_xlsx, write_arrow,
+    parse_since, CursorTracker, COLUMNAR_FORMATS
+)
+from app.report_store import register_report, serve_report
+from app.pdf_tables import build_pdf, build_table_pdf, table_flowables, title_flowables
+from app.money import GROSZE_SQL, MoneyVector, format_money
+from app.query_plans import hot_query
+from app.reporting import ReportingError, jsonable, reporting_backend
+from app.visibility import current_group_ids, visibility_params, visibility_sql
+from xml.sax.saxutils import escape
 
 reports_bp = Blueprint('reports', __name__)
 
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+EXPORT_EXTENSIONS = {
+    'arrow': 'arrows',
+}
+
+# Przykładowe parametry widoczności (visibility_sql) do EXPLAIN zapytań raportów tagów
+SAMPLE_VISIBILITY = {'visible_all': 0, 'visible_user_id': 1}
+
+GROUP_CUSTOMERS_SQL = hot_query('reports.group_customers', """
+    SELECT Id, Name, Email, Phone, Company, Address, AssignedGroupId
+    FROM Customers
+    WHERE AssignedGroupId = :group_id AND DeletedAt IS NULL
+""", group_id=1)
+
 @reports_bp.route('/groups/<int:group_id>/customers', methods=['GET'])
 @require_auth
 def get_group_customers(group_id):
     """Pobiera klientów przypisanych do grupy"""
     try:
-        query = text("""
-            SELECT Id, Name, Email, Phone, Company, Address, AssignedGroupId
-            FROM Customers 
-            WHERE AssignedGroupId = :group_id
-        """)
-        result = db.session.execute(query, {'group_id': group_id})
+        error = report_scope_error(group_id)
+        if error:
+            return error
+        result = db.session.execute(GROUP_CUSTOMERS_SQL, {'group_id': group_id})
         customers = []
         for row in result:
             customers.append({
@@ -42,34 +68,38 @@ def get_group_customers(group_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+GROUP_SALES_SQL = hot_query('reports.group_sales', """
+    SELECT COUNT(*) as totalInvoices,
+           COALESCE(SUM(TotalAmount), 0) as totalAmount,
+           COALESCE(SUM(CASE WHEN IsPaid = 1 THEN TotalAmount ELSE 0 END), 0) as paidAmount,
+           COALESCE(SUM(CASE WHEN IsPaid = 0 THEN TotalAmount ELSE 0 END), 0) as unpaidAmount,
+           SUM(CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END) as paidCount,
+           SUM(CASE WHEN IsPaid = 0 THEN 1 ELSE 0 END) as unpaidCount
+    FROM Invoices i
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+""", group_id=1)
+GROUP_INVOICES_SQL = hot_query('reports.group_invoices', """
+    SELECT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
+    FROM Invoices i
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+    ORDER BY i.IssuedAt DESC
+""", group_id=1)
+
 @reports_bp.route('/groups/<int:group_id>/sales', methods=['GET'])
 @require_auth
 def get_group_sales(group_id):
     """Pobiera dane sprzedażowe dla grupy"""
     try:
+        error = report_scope_error(group_id)
+        if error:
+            return error
         # Liczba faktur dla klientów w grupie
-        invoices_query = text("""
-            SELECT COUNT(*) as totalInvoices, 
-                   COALESCE(SUM(TotalAmount), 0) as totalAmount,
-                   COALESCE(SUM(CASE WHEN IsPaid = 1 THEN TotalAmount ELSE 0 END), 0) as paidAmount,
-                   COALESCE(SUM(CASE WHEN IsPaid = 0 THEN TotalAmount ELSE 0 END), 0) as unpaidAmount,
-                   SUM(CASE WHEN IsPaid = 1 THEN 1 ELSE 0 END) as paidCount,
-                   SUM(CASE WHEN IsPaid = 0 THEN 1 ELSE 0 END) as unpaidCount
-            FROM Invoices i
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-        """)
-        result = db.session.execute(invoices_query, {'group_id': group_id}).fetchone()
+        result = db.session.execute(GROUP_SALES_SQL, {'group_id': group_id}).fetchone()
         
         # Lista faktur
-        invoices_list_query = text("""
-            SELECT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
-            FROM Invoices i
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-            ORDER BY i.IssuedAt DESC
-        """)
-        invoices_result = db.session.execute(invoices_list_query, {'group_id': group_id})
+        invoices_result = db.session.execute(GROUP_INVOICES_SQL, {'group_id': group_id})
         invoices = []
         for row in invoices_result:
             invoices.append({
@@ -93,31 +123,35 @@ def get_group_sales(group_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+GROUP_TASK_STATS_SQL = hot_query('reports.group_task_stats', """
+    SELECT COUNT(*) as totalTasks,
+           SUM(CASE WHEN Completed = 1 THEN 1 ELSE 0 END) as completedTasks,
+           SUM(CASE WHEN Completed = 0 THEN 1 ELSE 0 END) as pendingTasks
+    FROM Tasks t
+    INNER JOIN Customers c ON t.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+""", group_id=1)
+GROUP_TASKS_SQL = hot_query('reports.group_tasks', """
+    SELECT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
+    FROM Tasks t
+    INNER JOIN Customers c ON t.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+    ORDER BY t.DueDate ASC
+""", group_id=1)
+
 @reports_bp.route('/groups/<int:group_id>/tasks', methods=['GET'])
 @require_auth
 def get_group_tasks(group_id):
     """Pobiera zadania dla grupy"""
     try:
+        error = report_scope_error(group_id)
+        if error:
+            return error
         # Statystyki zadań
-        stats_query = text("""
-            SELECT COUNT(*) as totalTasks,
-                   SUM(CASE WHEN Completed = 1 THEN 1 ELSE 0 END) as completedTasks,
-                   SUM(CASE WHEN Completed = 0 THEN 1 ELSE 0 END) as pendingTasks
-            FROM Tasks t
-            INNER JOIN Customers c ON t.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-        """)
-        result = db.session.execute(stats_query, {'group_id': group_id}).fetchone()
+        result = db.session.execute(GROUP_TASK_STATS_SQL, {'group_id': group_id}).fetchone()
         
         # Lista zadań
-        tasks_list_query = text("""
-            SELECT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
-            FROM Tasks t
-            INNER JOIN Customers c ON t.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-            ORDER BY t.DueDate ASC
-        """)
-        tasks_result = db.session.execute(tasks_list_query, {'group_id': group_id})
+        tasks_result = db.session.execute(GROUP_TASKS_SQL, {'group_id': group_id})
         tasks = []
         for row in tasks_result:
             tasks.append({
@@ -141,6 +175,95 @@ def get_group_tasks(group_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Raporty przekrojowe - backend raportów (app/reporting.py): sumy w Pythonie albo w widokach
+# i procedurze MySQL. Użytkownik bez roli administratora podaje groupId jednej ze swoich grup.
+def report_scope_error(group_id):
+    """Odpowiedź 403, jeśli raport wykracza poza grupy bieżącego użytkownika"""
+    group_ids = current_group_ids()
+    if group_ids is None or (group_id is not None and group_id in group_ids):
+        return None
+    return jsonify({'error': 'Brak dostępu - podaj groupId jednej ze swoich grup'}), 403
+
+def parse_report_date(name):
+    """Data z parametru zapytania (RRRR-MM-DD)"""
+    value = request.args.get(name)
+    if not value:
+        raise ReportingError(f'Brak parametru {name} (RRRR-MM-DD)')
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ReportingError(f'Nieprawidłowa data {name}: {value} (RRRR-MM-DD)')
+
+@reports_bp.route('/sales', methods=['GET'])
+@require_auth
+def get_sales_report():
+    """Raport sprzedaży za okres (?from=&to= RRRR-MM-DD włącznie, ?groupId= - grupa faktury)"""
+    try:
+        group_id = request.args.get('groupId', type=int)
+        error = report_scope_error(group_id)
+        if error:
+            return error
+        date_from, date_to = parse_report_date('from'), parse_report_date('to')
+        
+        backend = reporting_backend()
+        invoices = backend.sales_report(date_from, date_to, group_id)
+        total = MoneyVector.from_amounts(row['totalAmount'] for row in invoices)
+        paid = MoneyVector.from_amounts(row['paidAmount'] for row in invoices)
+        return jsonify({
+            'dateFrom': date_from.isoformat(),
+            'dateTo': date_to.isoformat(),
+            'groupId': group_id,
+            'backend': backend.name,
+            'totalInvoices': len(invoices),
+            'totalAmount': total.total_float(),
+            'paidAmount': paid.total_float(),
+            'remainingAmount': (total.total() - paid.total()) / 100,
+            'invoices': [jsonable(row) for row in invoices]
+        })
+    except ReportingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/customers/summary', methods=['GET'])
+@require_auth
+def get_customer_summaries():
+    """Podsumowanie faktur, kontraktów i zadań klientów (?groupId= - grupa klienta)"""
+    try:
+        group_id = request.args.get('groupId', type=int)
+        error = report_scope_error(group_id)
+        if error:
+            return error
+        
+        backend = reporting_backend()
+        return jsonify({
+            'groupId': group_id,
+            'backend': backend.name,
+            'customers': [jsonable(row) for row in backend.customer_summaries(group_id)]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/invoices/details', methods=['GET'])
+@require_auth
+def get_invoice_details():
+    """Faktury z wpłatami, pozostałą kwotą i statusem płatności (?groupId= - grupa faktury, ?customerId=)"""
+    try:
+        group_id = request.args.get('groupId', type=int)
+        error = report_scope_error(group_id)
+        if error:
+            return error
+        
+        backend = reporting_backend()
+        invoices = backend.invoice_details(request.args.get('customerId', type=int), group_id)
+        return jsonify({
+            'groupId': group_id,
+            'backend': backend.name,
+            'invoices': [jsonable(row) for row in invoices]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 def register_polish_fonts():
     """Rejestruje polskie czcionki dla PDF"""
     try:
@@ -158,209 +281,11 @@ def register_polish_fonts():
 
 POLISH_FONT = register_polish_fonts()
 
-def truncate_text(text, max_length=20):
-    """Skraca długi tekst do określonej długości"""
-    if text is None:
-        return ''
-    text_str = str(text)
-    if len(text_str) <= max_length:
-        return text_str
-    return text_str[:max_length-3] + '...'
-
-def create_multi_part_pdf_table(data, headers, title):
-    """Tworzy PDF z tabelą podzieloną na części"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                          leftMargin=15, rightMargin=15, 
-                          topMargin=20, bottomMargin=20)
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=POLISH_FONT,
-        fontSize=18,
-        spaceAfter=25,
-        alignment=1,
-        textColor=colors.darkblue
-    )
-    
-    # Style dla nagłówków sekcji
-    section_title_style = ParagraphStyle(
-        'SectionTitle',
-        parent=styles['Heading2'],
-        fontName=POLISH_FONT,
-        fontSize=14,
-        spaceAfter=15,
-        spaceBefore=20,
-        alignment=0,
-        textColor=colors.darkblue,
-        borderWidth=1,
-        borderColor=colors.darkblue,
-        borderPadding=8
-    )
-    
-    # Style dla tabeli
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=9,
-        textColor=colors.white,
-        alignment=1,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    cell_style = ParagraphStyle(
-        'CellStyle',
-        parent=styles['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=8,
-        textColor=colors.black,
-        alignment=0,
-        spaceAfter=4,
-        spaceBefore=4,
-        leftIndent=6,
-        rightIndent=6
-    )
-    
-    elements = []
-    elements.append(Paragraph(title, title_style))
-    elements.append(Spacer(1, 20))
-    
-    # Podziel kolumny na części
-    num_cols = len(headers)
-    if num_cols <= 12:
-        # Podziel na 2 części
-        mid_point = num_cols // 2
-        part1_headers = headers[:mid_point]
-        part2_headers = headers[mid_point:]
-        
-        # Część 1 - podstawowe informacje
-        elements.append(Paragraph("📋 Podstawowe informacje", section_title_style))
-        elements.append(create_single_table(data, part1_headers, range(len(part1_headers))))
-        elements.append(Spacer(1, 20))
-        
-        # Część 2 - dodatkowe informacje  
-        elements.append(Paragraph("📊 Szczegóły i dodatkowe dane", section_title_style))
-        elements.append(create_single_table(data, part2_headers, range(len(part1_headers), len(headers))))
-        
-    else:
-        # Podziel na 3 części
-        part_size = num_cols // 3
-        part1_headers = headers[:part_size]
-        part2_headers = headers[part_size:part_size*2]
-        part3_headers = headers[part_size*2:]
-        
-        # Część 1
-        elements.append(Paragraph("📋 Podstawowe informacje", section_title_style))
-        elements.append(create_single_table(data, part1_headers, range(part_size)))
-        elements.append(Spacer(1, 20))
-        
-        # Część 2
-        elements.append(Paragraph("📊 Szczegóły finansowe", section_title_style))
-        elements.append(create_single_table(data, part2_headers, range(part_size, part_size*2)))
-        elements.append(Spacer(1, 20))
-        
-        # Część 3
-        elements.append(Paragraph("🏷️ Dodatkowe informacje", section_title_style))
-        elements.append(create_single_table(data, part3_headers, range(part_size*2, len(headers))))
-    
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
-def create_single_table(data, headers, column_indices):
-    """Tworzy pojedynczą tabelę z określonymi kolumnami"""
-    page_width = landscape(A4)[0] - 30
-    num_cols = len(headers)
-    
-    # Oblicz szerokości kolumn
-    col_widths = [page_width / num_cols] * num_cols
-    
-    # Style
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=getSampleStyleSheet()['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=9,
-        textColor=colors.white,
-        alignment=1,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    cell_style = ParagraphStyle(
-        'CellStyle',
-        parent=getSampleStyleSheet()['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=8,
-        textColor=colors.black,
-        alignment=0,
-        spaceAfter=4,
-        spaceBefore=4,
-        leftIndent=6,
-        rightIndent=6
-    )
-    
-    # Przygotuj dane tabeli
-    table_data = []
-    
-    # Nagłówki
-    header_row = []
-    for header in headers:
-        header_row.append(Paragraph(header, header_style))
-    table_data.append(header_row)
-    
-    # Dane
-    for row in data:
-        data_row = []
-        for i, header in enumerate(headers):
-            col_index = list(column_indices)[i] if i < len(column_indices) else i
-            cell_text = str(row[col_index]) if col_index < len(row) and row[col_index] is not None else ''
-            # Skróć długie teksty
-            if len(cell_text) > 25:
-                cell_text = cell_text[:22] + '...'
-            data_row.append(Paragraph(cell_text, cell_style))
-        table_data.append(data_row)
-    
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    
-    # Styl tabeli
-    table_style = [
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), POLISH_FONT),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 1), (-1, -1), POLISH_FONT),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-        ('TOPPADDING', (0, 1), (-1, -1), 6),
-        
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.darkblue),
-    ]
-    
-    # Alternujące kolory wierszy
-    for i in range(1, len(table_data)):
-        if i % 2 == 0:
-            table_style.append(('BACKGROUND', (0, i), (-1, i), colors.lightgrey))
-    
-    table.setStyle(TableStyle(table_style))
-    return table
-
-
-
-def create_section_table(data, headers, page_width, header_style, cell_style):
-    """Tworzy tabelę dla pojedynczej sekcji raportu"""
+def create_section_table(data, headers, page_width):
+    """
+    Tabele dla pojedynczej sekcji raportu - lista fragmentów po CHUNK_ROWS wierszy
+    (style nagłówków i komórek ustala app/pdf_tables.py)
+    """
     num_cols = len(headers)
     
     # Oblicz szerokości kolumn - dostosuj do liczby kolumn
@@ -371,63 +296,99 @@ def create_section_table(data, headers, page_width, header_style, cell_style):
     else:
         col_widths = [page_width / num_cols] * num_cols
     
-    # Przygotuj dane tabeli
-    table_data = []
+    return list(table_flowables(data, headers, POLISH_FONT, col_widths=col_widths, font_size=9))
+
+def create_pdf_table(data, headers, title):
+    """
+    Tworzy PDF z tytułem i tabelą (data - lista lub iterator wierszy, np. kursor).
+    Wiersze są renderowane strumieniowo fragmentami, a przy wielu kolumnach dzielone na części.
+    """
+    return build_table_pdf(data, headers, title, POLISH_FONT)
+
+GROUP_SQL = hot_query('reports.group', """
+    SELECT g.Id, g.Name, g.Description
+    FROM Groups g
+    WHERE g.Id = :group_id
+""", group_id=1)
+GROUP_USERS_SQL = hot_query('reports.group_users', """
+    SELECT u.Id, u.Username, u.Email
+    FROM users u
+    JOIN UserGroups ug ON u.Id = ug.UserId
+    WHERE ug.GroupId = :group_id AND u.DeletedAt IS NULL
+""", group_id=1)
+GROUP_PDF_CUSTOMERS_SQL = hot_query('reports.group_pdf_customers', """
+    SELECT c.Id, c.Name, c.Email, c.Phone, c.Company, c.Address
+    FROM Customers c
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+""", group_id=1)
+GROUP_PDF_INVOICES_SQL = hot_query('reports.group_pdf_invoices', f"""
+    SELECT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName,
+           {GROSZE_SQL.format(column='i.TotalAmount')} as TotalGrosze
+    FROM Invoices i
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+    ORDER BY i.IssuedAt DESC
+""", group_id=1)
+GROUP_PDF_PAYMENTS_SQL = hot_query('reports.group_pdf_payments', f"""
+    SELECT p.Id, p.Amount, p.PaidAt, i.Number as InvoiceNumber, c.Name as CustomerName,
+           {GROSZE_SQL.format(column='p.Amount')} as AmountGrosze
+    FROM Payments p
+    INNER JOIN Invoices i ON p.InvoiceId = i.Id
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE c.AssignedGroupId = :group_id AND c.DeletedAt IS NULL
+    ORDER BY p.PaidAt DESC
+""", group_id=1)
+
+def build_group_pdf(group_id):
+    """
+    Generuje szczegółowy raport PDF dla grupy z wszystkimi danymi.
+    Zwraca (zawartość, content_type, nazwa_pliku) lub None, jeśli grupa nie istnieje.
+    """
+    # Pobierz dane grupy
+    group_result = db.session.execute(GROUP_SQL, {'group_id': group_id})
+    group_data = group_result.fetchone()
     
-    # Nagłówki
-    header_row = []
-    for header in headers:
-        if header:  # Pomiń puste nagłówki
-            header_row.append(Paragraph(header, header_style))
-        else:
-            header_row.append(Paragraph("", header_style))
-    table_data.append(header_row)
+    if not group_data:
+        return None
     
-    # Dane
-    for row in data:
-        data_row = []
-        for i, cell in enumerate(row):
-            if i < len(headers):
-                cell_text = str(cell) if cell is not None else ''
-                data_row.append(Paragraph(cell_text, cell_style))
-        # Uzupełnij brakujące kolumny
-        while len(data_row) < num_cols:
-            data_row.append(Paragraph("", cell_style))
-        table_data.append(data_row)
+    # Pobierz użytkowników w grupie
+    users_result = db.session.execute(GROUP_USERS_SQL, {'group_id': group_id})
+    users_data = users_result.fetchall()
     
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
+    # Pobierz klientów w grupie
+    customers_result = db.session.execute(GROUP_PDF_CUSTOMERS_SQL, {'group_id': group_id})
+    customers_data = customers_result.fetchall()
     
-    # Styl tabeli
-    table_style = [
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), POLISH_FONT),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 1), (-1, -1), POLISH_FONT),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-        ('TOPPADDING', (0, 1), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.darkblue),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-    ]
+    # Pobierz faktury dla klientów w grupie
+    invoices_result = db.session.execute(GROUP_PDF_INVOICES_SQL, {'group_id': group_id})
+    invoices_data = invoices_result.fetchall()
     
-    table.setStyle(TableStyle(table_style))
-    return table
-
-def create_pdf_table(data, headers, title):
-    """Tworzy tabelę PDF z polskimi znakami - dzieli na części jeśli za dużo kolumn"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                          leftMargin=15, rightMargin=15, 
-                          topMargin=20, bottomMargin=20)
+    # Pobierz zadania dla klientów w grupie
+    tasks_result = db.session.execute(GROUP_TASKS_SQL, {'group_id': group_id})
+    tasks_data = tasks_result.fetchall()
+    
+    # Pobierz płatności dla faktur w grupie
+    payments_result = db.session.execute(GROUP_PDF_PAYMENTS_SQL, {'group_id': group_id})
+    payments_data = payments_result.fetchall()
+    
+    # Oblicz statystyki
+    total_invoices = len(invoices_data)
+    paid_invoices = sum(1 for inv in invoices_data if inv[3])  # IsPaid
+    unpaid_invoices = total_invoices - paid_invoices
+    # Sumy kwot na kolumnach groszy z SQL (app/money.py) - bez konwersji Decimal/float wiersz po wierszu
+    invoice_amounts = MoneyVector.from_grosze(inv[6] for inv in invoices_data)
+    total_invoice_value = invoice_amounts.total_decimal()
+    paid_value = invoice_amounts.total_decimal(mask=(bool(inv[3]) for inv in invoices_data))
+    unpaid_value = total_invoice_value - paid_value
+    
+    total_tasks = len(tasks_data)
+    completed_tasks = sum(1 for task in tasks_data if task[3])  # Completed
+    pending_tasks = total_tasks - completed_tasks
     
+    total_payments = len(payments_data)
+    total_paid_amount = MoneyVector.from_grosze(p[5] for p in payments_data).total_decimal()
+    
+    # Utwórz PDF z osobnymi tabelami dla każdej sekcji
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle(
         'CustomTitle',
@@ -439,520 +400,168 @@ def create_pdf_table(data, headers, title):
         textColor=colors.darkblue
     )
     
-    # Oblicz optymalne szerokości kolumn
-    num_cols = len(headers)
-    
-    # Jeśli za dużo kolumn (więcej niż 8), podziel na części
-    if num_cols > 8:
-        return create_multi_part_pdf_table(data, headers, title)
-    
-    # Style dla nagłówków tabeli - dynamiczne rozmiary czcionek
-    header_font_size = 10
-    if num_cols >= 12:
-        header_font_size = 4
-    elif num_cols >= 10:
-        header_font_size = 5
-    elif num_cols >= 8:
-        header_font_size = 6
-    elif num_cols >= 6:
-        header_font_size = 7
-
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=header_font_size,
-        textColor=colors.white,
-        alignment=1,
-        spaceAfter=3,
-        spaceBefore=3
-    )
-    
-    # Style dla danych w tabeli - dynamiczne rozmiary czcionek
-    cell_font_size = 9
-    if num_cols >= 12:
-        cell_font_size = 4
-    elif num_cols >= 10:
-        cell_font_size = 5
-    elif num_cols >= 8:
-        cell_font_size = 6
-    elif num_cols >= 6:
-        cell_font_size = 7
-
-    cell_style = ParagraphStyle(
-        'CellStyle',
-        parent=styles['Normal'],
-        fontName=POLISH_FONT,
-        fontSize=cell_font_size,
-        textColor=colors.black,
-        alignment=0,  # Left align
-        spaceAfter=4,
-        spaceBefore=4,
-        leftIndent=6,
-        rightIndent=6
-    )
-    
-    # Style dla nagłówków sekcji
-    section_header_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Normal'],
+    section_title_style = ParagraphStyle(
+        'SectionTitle',
+        parent=styles['Heading2'],
         fontName=POLISH_FONT,
-        fontSize=11,
-        textColor=colors.darkblue,
-        alignment=0,  # Left align
-        spaceAfter=8,
-        spaceBefore=12,
-        leftIndent=6,
-        rightIndent=6,
-        borderWidth=1,
-        borderColor=colors.darkblue,
-        borderPadding=4
+        fontSize=14,
+        spaceAfter=10,
+        spaceBefore=20,
+        alignment=0,
+        textColor=colors.darkblue
     )
     
     elements = []
-    elements.append(Paragraph(title, title_style))
-    elements.append(Spacer(1, 20))
-    page_width = landscape(A4)[0] - 20  # Dostępna szerokość minus marginesy (10+10)
-    
-    # Inteligentne szerokości kolumn w zależności od liczby i typu kolumn
-    if num_cols == 1:
-        col_widths = [page_width * 0.9]
-    elif num_cols == 2:
-        col_widths = [page_width * 0.4, page_width * 0.5]
-    elif num_cols == 3:
-        col_widths = [page_width * 0.25, page_width * 0.35, page_width * 0.35]
-    elif num_cols == 4:
-        col_widths = [page_width * 0.2, page_width * 0.25, page_width * 0.25, page_width * 0.25]
-    elif num_cols == 5:
-        col_widths = [page_width * 0.15, page_width * 0.2, page_width * 0.2, page_width * 0.2, page_width * 0.2]
-    elif num_cols == 6:
-        col_widths = [page_width * 0.12, page_width * 0.16, page_width * 0.16, page_width * 0.16, page_width * 0.16, page_width * 0.2]
-    elif num_cols == 7:
-        col_widths = [page_width * 0.1, page_width * 0.13, page_width * 0.13, page_width * 0.13, page_width * 0.13, page_width * 0.13, page_width * 0.15]
-    elif num_cols == 8:
-        col_widths = [page_width * 0.08, page_width * 0.11, page_width * 0.11, page_width * 0.11, page_width * 0.11, page_width * 0.11, page_width * 0.11, page_width * 0.13]
-    elif num_cols == 9:
-        col_widths = [page_width * 0.07, page_width * 0.1, page_width * 0.1, page_width * 0.1, page_width * 0.1, page_width * 0.1, page_width * 0.1, page_width * 0.1, page_width * 0.12]
-    elif num_cols == 10:
-        # Specjalne szerokości dla raportu faktur (10 kolumn)
-        col_widths = [page_width * 0.06, page_width * 0.08, page_width * 0.08, page_width * 0.08, page_width * 0.08, 
-                     page_width * 0.06, page_width * 0.08, page_width * 0.08, page_width * 0.08, page_width * 0.08]
-    elif num_cols == 11:
-        col_widths = [page_width * 0.06, page_width * 0.07, page_width * 0.07, page_width * 0.07, page_width * 0.07, 
-                     page_width * 0.07, page_width * 0.07, page_width * 0.07, page_width * 0.07, page_width * 0.07, page_width * 0.07]
-    elif num_cols == 12:
-        # Specjalne szerokości dla raportu faktur z tags i items (12 kolumn)
-        col_widths = [page_width * 0.04, page_width * 0.06, page_width * 0.06, page_width * 0.06, page_width * 0.06, 
-                     page_width * 0.04, page_width * 0.06, page_width * 0.06, page_width * 0.06, page_width * 0.06, 
-                     page_width * 0.06, page_width * 0.06]
-    else:
-        # Dla więcej niż 12 kolumn - bardzo małe równe szerokości
-        col_widths = [page_width / num_cols] * num_cols
     
-    # Przygotuj dane tabeli z Paragraph objects dla lepszego formatowania
-    table_data = []
-    
-    # Nagłówki
-    header_row = []
-    for header in headers:
-        header_row.append(Paragraph(header, header_style))
-    table_data.append(header_row)
-    
-    # Dane
-    for row in data:
-        data_row = []
-        is_section_header = False
-        
-        for i, cell in enumerate(row):
-            # Upewnij się, że cell jest stringiem
-            if cell is None:
-                cell_text = ''
-            elif isinstance(cell, (int, float)):
-                cell_text = str(cell)
-            else:
-                cell_text = str(cell) if cell is not None else ''
-            
-            # Sprawdź czy to nagłówek sekcji (zawiera duże litery i dwukropek lub jest w całości dużymi literami)
-            if (cell_text.isupper() and len(cell_text) > 3) or cell_text.endswith(':'):
-                is_section_header = True
-                data_row.append(Paragraph(cell_text, section_header_style))
-            else:
-                # Skróć tekst w zależności od liczby kolumn
-                if num_cols >= 10:
-                    cell_text = truncate_text(cell_text, 15)
-                elif num_cols >= 8:
-                    cell_text = truncate_text(cell_text, 20)
-                elif num_cols >= 6:
-                    cell_text = truncate_text(cell_text, 25)
-                
-                data_row.append(Paragraph(cell_text, cell_style))
-        
-        table_data.append(data_row)
+    # Tytuł raportu
+    report_title = f"Raport grupy: {group_data[1]}"
+    if group_data[2]:
+        report_title += f" - {group_data[2]}"
+    report_title += f" (wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')})"
+    elements.append(Paragraph(report_title, title_style))
+    elements.append(Spacer(1, 20))
     
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
+    page_width = landscape(A4)[0] - 30
     
-    # Styl tabeli - podstawowy
-    table_style = [
-        # Nagłówek tabeli
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), POLISH_FONT),
-        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 4 if num_cols >= 12 else 6),
-        ('TOPPADDING', (0, 0), (-1, 0), 4 if num_cols >= 12 else 6),
-        
-        # Dane - domyślne style
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 1), (-1, -1), POLISH_FONT),
-        ('FONTSIZE', (0, 1), (-1, -1), cell_font_size),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 2 if num_cols >= 12 else 4),
-        ('TOPPADDING', (0, 1), (-1, -1), 2 if num_cols >= 12 else 4),
-        
-        # Ramki
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.darkblue),
-        
-        # Wyrównanie dla pierwszej kolumny (ID)
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+    # 1. STATYSTYKI OGÓLNE
+    stats_data = [
+        ["Liczba członków grupy", f"{len(users_data)}", ""],
+        ["Liczba klientów", f"{len(customers_data)}", ""],
+        ["Liczba faktur", f"{total_invoices}", ""],
+        ["  - Opłacone", f"{paid_invoices}", ""],
+        ["  - Nieopłacone", f"{unpaid_invoices}", ""],
+        ["Wartość wszystkich faktur", f"{total_invoice_value:.2f} PLN", ""],
+        ["  - Opłacone", f"{paid_value:.2f} PLN", ""],
+        ["  - Nieopłacone", f"{unpaid_value:.2f} PLN", ""],
+        ["Liczba zadań", f"{total_tasks}", ""],
+        ["  - Ukończone", f"{completed_tasks}", ""],
+        ["  - W trakcie", f"{pending_tasks}", ""],
+        ["Liczba płatności", f"{total_payments}", ""],
+        ["Łączna kwota płatności", f"{total_paid_amount:.2f} PLN", ""]
     ]
+    elements.append(Paragraph("STATYSTYKI OGÓLNE", section_title_style))
+    elements.extend(create_section_table(stats_data, ["Kategoria", "Wartość", "Dodatkowe informacje"], page_width))
+    elements.append(Spacer(1, 20))
+    
+    # 2. CZŁONKOWIE GRUPY
+    if users_data:
+        members_data = []
+        for user in users_data:
+            members_data.append([f"Użytkownik: {user[1]}", f"Email: {user[2]}", ""])
+        elements.append(Paragraph("CZŁONKOWIE GRUPY", section_title_style))
+        elements.extend(create_section_table(members_data, ["Użytkownik", "Email", ""], page_width))
+        elements.append(Spacer(1, 20))
+    else:
+        elements.append(Paragraph("CZŁONKOWIE GRUPY", section_title_style))
+        elements.extend(create_section_table([["Brak członków", "", ""]], ["Użytkownik", "Email", ""], page_width))
+        elements.append(Spacer(1, 20))
     
-    # Dodaj style dla nagłówków sekcji - znajdź wiersze z nagłówkami sekcji
-    for row_idx, row in enumerate(table_data):
-        if row_idx > 0:  # Pomijamy nagłówek tabeli
-            # Pobierz tekst z pierwszego Paragraph object
-            first_cell = row[0]
-            if isinstance(first_cell, Paragraph):
-                first_cell_text = first_cell.getPlainText()
-            else:
-                first_cell_text = str(first_cell)
-            
-            # Sprawdź czy to nagłówek sekcji (zawiera duże litery i dwukropek lub jest w całości dużymi literami)
-            if (first_cell_text.isupper() and len(first_cell_text) > 3) or first_cell_text.endswith(':'):
-                # To jest nagłówek sekcji - zastosuj specjalne style
-                table_style.extend([
-                    ('BACKGROUND', (0, row_idx), (-1, row_idx), colors.lightblue),
-                    ('TEXTCOLOR', (0, row_idx), (-1, row_idx), colors.darkblue),
-                    ('FONTNAME', (0, row_idx), (-1, row_idx), POLISH_FONT),
-                    ('FONTSIZE', (0, row_idx), (-1, row_idx), max(cell_font_size, 7)),
-                    ('BOTTOMPADDING', (0, row_idx), (-1, row_idx), 6),
-                    ('TOPPADDING', (0, row_idx), (-1, row_idx), 6),
-                    ('LINEBELOW', (0, row_idx), (-1, row_idx), 1, colors.darkblue),
-                ])
+    # 3. KLIENCI W GRUPIE
+    if customers_data:
+        customers_table_data = []
+        for customer in customers_data:
+            company_info = f" ({customer[4]})" if customer[4] else ""
+            phone_info = f" | Tel: {customer[3]}" if customer[3] else ""
+            customers_table_data.append([
+                f"{customer[1]}{company_info}",
+                f"Email: {customer[2]}{phone_info}",
+                ""
+            ])
+        elements.append(Paragraph("KLIENCI W GRUPIE", section_title_style))
+        elements.extend(create_section_table(customers_table_data, ["Klient", "Kontakt", ""], page_width))
+        elements.append(Spacer(1, 20))
+    else:
+        elements.append(Paragraph("KLIENCI W GRUPIE", section_title_style))
+        elements.extend(create_section_table([["Brak klientów", "", ""]], ["Klient", "Kontakt", ""], page_width))
+        elements.append(Spacer(1, 20))
     
-    # Alternujące kolory wierszy - tylko dla wierszy danych (nie nagłówków sekcji)
-    data_rows = []
-    for row_idx, row in enumerate(table_data):
-        if row_idx > 0:  # Pomijamy nagłówek tabeli
-            # Pobierz tekst z pierwszego Paragraph object
-            first_cell = row[0]
-            if isinstance(first_cell, Paragraph):
-                first_cell_text = first_cell.getPlainText()
-            else:
-                first_cell_text = str(first_cell)
-            
-            # Sprawdź czy to NIE jest nagłówek sekcji
-            if not ((first_cell_text.isupper() and len(first_cell_text) > 3) or first_cell_text.endswith(':')):
-                data_rows.append(row_idx)
+    # 4. FAKTURY
+    if invoices_data:
+        invoices_table_data = []
+        for invoice in invoices_data:
+            status = "OPŁACONA" if invoice[3] else "NIEOFŁACONA"
+            date_str = invoice[4].strftime('%d.%m.%Y') if invoice[4] else 'Brak daty'
+            invoices_table_data.append([
+                f"{invoice[1]} - {invoice[5]}",
+                f"{format_money(invoice[2])} PLN",
+                f"{status} | {date_str}"
+            ])
+        elements.append(Paragraph("FAKTURY", section_title_style))
+        elements.extend(create_section_table(invoices_table_data, ["Faktura", "Kwota", "Status i data"], page_width))
+        elements.append(Spacer(1, 20))
+    else:
+        elements.append(Paragraph("FAKTURY", section_title_style))
+        elements.extend(create_section_table([["Brak faktur", "", ""]], ["Faktura", "Kwota", "Status i data"], page_width))
+        elements.append(Spacer(1, 20))
     
-    # Zastosuj alternujące kolory tylko do wierszy danych
-    if len(data_rows) > 1:
-        table_style.append(('ROWBACKGROUNDS', (0, data_rows[0]), (-1, data_rows[-1]), 
-                           [colors.white, colors.lightgrey]))
+    # 5. ZADANIA
+    if tasks_data:
+        tasks_table_data = []
+        for task in tasks_data:
+            status = "UKOŃCZONE" if task[3] else "W TRAKCIE"
+            due_date = task[4].strftime('%d.%m.%Y') if task[4] else 'Brak terminu'
+            tasks_table_data.append([
+                f"{task[1]} - {task[5]}",
+                status,
+                f"Termin: {due_date}"
+            ])
+        elements.append(Paragraph("ZADANIA", section_title_style))
+        elements.extend(create_section_table(tasks_table_data, ["Zadanie", "Status", "Termin"], page_width))
+        elements.append(Spacer(1, 20))
+    else:
+        elements.append(Paragraph("ZADANIA", section_title_style))
+        elements.extend(create_section_table([["Brak zadań", "", ""]], ["Zadanie", "Status", "Termin"], page_width))
+        elements.append(Spacer(1, 20))
     
-    table.setStyle(TableStyle(table_style))
+    # 6. PŁATNOŚCI
+    if payments_data:
+        payments_table_data = []
+        for payment in payments_data:
+            date_str = payment[2].strftime('%d.%m.%Y %H:%M') if payment[2] else 'Brak daty'
+            payments_table_data.append([
+                f"{payment[3]} - {payment[4]}",
+                f"{format_money(payment[1])} PLN",
+                date_str
+            ])
+        elements.append(Paragraph("PŁATNOŚCI", section_title_style))
+        elements.extend(create_section_table(payments_table_data, ["Faktura", "Kwota", "Data płatności"], page_width))
+    else:
+        elements.append(Paragraph("PŁATNOŚCI", section_title_style))
+        elements.extend(create_section_table([["Brak płatności", "", ""]], ["Faktura", "Kwota", "Data płatności"], page_width))
     
-    elements.append(table)
-    doc.build(elements)
+    buffer = build_pdf(elements)
     
-    buffer.seek(0)
-    return buffer
+    safe_group_name = group_data[1].replace('ą', 'a').replace('ć', 'c').replace('ę', 'e').replace('ł', 'l').replace('ń', 'n').replace('ó', 'o').replace('ś', 's').replace('ź', 'z').replace('ż', 'z')
+    return buffer.getvalue(), 'application/pdf', f'raport_grupy_{group_id}_{safe_group_name}.pdf'
 
 @reports_bp.route('/groups/<int:group_id>/pdf', methods=['GET'])
 @require_auth
 def get_group_pdf_report(group_id):
-    """Generuje szczegółowy raport PDF dla grupy z wszystkimi danymi"""
+    """Zwraca raport PDF grupy - ostatnio wygenerowany w tle lub na żywo (?live=true)"""
     try:
-        # Pobierz dane grupy
-        group_query = text("""
-            SELECT g.Id, g.Name, g.Description
-            FROM Groups g
-            WHERE g.Id = :group_id
-        """)
-        
-        group_result = db.session.execute(group_query, {'group_id': group_id})
-        group_data = group_result.fetchone()
-        
-        if not group_data:
-            return jsonify({'error': 'Grupa nie znaleziona'}), 404
-        
-        # Pobierz użytkowników w grupie
-        users_query = text("""
-            SELECT u.Id, u.Username, u.Email
-            FROM users u
-            JOIN UserGroups ug ON u.Id = ug.UserId
-            WHERE ug.GroupId = :group_id
-        """)
-        users_result = db.session.execute(users_query, {'group_id': group_id})
-        users_data = users_result.fetchall()
-        
-        # Pobierz klientów w grupie
-        customers_query = text("""
-            SELECT c.Id, c.Name, c.Email, c.Phone, c.Company, c.Address
-            FROM Customers c
-            WHERE c.AssignedGroupId = :group_id
-        """)
-        customers_result = db.session.execute(customers_query, {'group_id': group_id})
-        customers_data = customers_result.fetchall()
-        
-        # Pobierz faktury dla klientów w grupie
-        invoices_query = text("""
-            SELECT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
-            FROM Invoices i
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-            ORDER BY i.IssuedAt DESC
-        """)
-        invoices_result = db.session.execute(invoices_query, {'group_id': group_id})
-        invoices_data = invoices_result.fetchall()
-        
-        # Pobierz zadania dla klientów w grupie
-        tasks_query = text("""
-            SELECT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
-            FROM Tasks t
-            INNER JOIN Customers c ON t.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-            ORDER BY t.DueDate ASC
-        """)
-        tasks_result = db.session.execute(tasks_query, {'group_id': group_id})
-        tasks_data = tasks_result.fetchall()
-        
-        # Pobierz płatności dla faktur w grupie
-        payments_query = text("""
-            SELECT p.Id, p.Amount, p.PaidAt, i.Number as InvoiceNumber, c.Name as CustomerName
-            FROM Payments p
-            INNER JOIN Invoices i ON p.InvoiceId = i.Id
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE c.AssignedGroupId = :group_id
-            ORDER BY p.PaidAt DESC
-        """)
-        payments_result = db.session.execute(payments_query, {'group_id': group_id})
-        payments_data = payments_result.fetchall()
-        
-        # Oblicz statystyki
-        total_invoices = len(invoices_data)
-        paid_invoices = sum(1 for inv in invoices_data if inv[3])  # IsPaid
-        unpaid_invoices = total_invoices - paid_invoices
-        total_invoice_value = sum(float(inv[2]) for inv in invoices_data if inv[2])
-        paid_value = sum(float(inv[2]) for inv in invoices_data if inv[2] and inv[3])
-        unpaid_value = total_invoice_value - paid_value
-        
-        total_tasks = len(tasks_data)
-        completed_tasks = sum(1 for task in tasks_data if task[3])  # Completed
-        pending_tasks = total_tasks - completed_tasks
-        
-        total_payments = len(payments_data)
-        total_paid_amount = sum(float(p[1]) for p in payments_data if p[1])
-        
-        # Utwórz PDF z osobnymi tabelami dla każdej sekcji
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                              leftMargin=15, rightMargin=15, 
-                              topMargin=20, bottomMargin=20)
-        
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontName=POLISH_FONT,
-            fontSize=18,
-            spaceAfter=25,
-            alignment=1,
-            textColor=colors.darkblue
-        )
-        
-        section_title_style = ParagraphStyle(
-            'SectionTitle',
-            parent=styles['Heading2'],
-            fontName=POLISH_FONT,
-            fontSize=14,
-            spaceAfter=10,
-            spaceBefore=20,
-            alignment=0,
-            textColor=colors.darkblue
-        )
-        
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=styles['Normal'],
-            fontName=POLISH_FONT,
-            fontSize=10,
-            textColor=colors.white,
-            alignment=1,
-            spaceAfter=6,
-            spaceBefore=6
-        )
-        
-        cell_style = ParagraphStyle(
-            'CellStyle',
-            parent=styles['Normal'],
-            fontName=POLISH_FONT,
-            fontSize=9,
-            textColor=colors.black,
-            alignment=0,
-            spaceAfter=4,
-            spaceBefore=4,
-            leftIndent=6,
-            rightIndent=6
-        )
-        
-        elements = []
-        
-        # Tytuł raportu
-        report_title = f"Raport grupy: {group_data[1]}"
-        if group_data[2]:
-            report_title += f" - {group_data[2]}"
-        report_title += f" (wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')})"
-        elements.append(Paragraph(report_title, title_style))
-        elements.append(Spacer(1, 20))
-        
-        page_width = landscape(A4)[0] - 30
-        
-        # 1. STATYSTYKI OGÓLNE
-        stats_data = [
-            ["Liczba członków grupy", f"{len(users_data)}", ""],
-            ["Liczba klientów", f"{len(customers_data)}", ""],
-            ["Liczba faktur", f"{total_invoices}", ""],
-            ["  - Opłacone", f"{paid_invoices}", ""],
-            ["  - Nieopłacone", f"{unpaid_invoices}", ""],
-            ["Wartość wszystkich faktur", f"{total_invoice_value:.2f} PLN", ""],
-            ["  - Opłacone", f"{paid_value:.2f} PLN", ""],
-            ["  - Nieopłacone", f"{unpaid_value:.2f} PLN", ""],
-            ["Liczba zadań", f"{total_tasks}", ""],
-            ["  - Ukończone", f"{completed_tasks}", ""],
-            ["  - W trakcie", f"{pending_tasks}", ""],
-            ["Liczba płatności", f"{total_payments}", ""],
-            ["Łączna kwota płatności", f"{total_paid_amount:.2f} PLN", ""]
-        ]
-        elements.append(Paragraph("STATYSTYKI OGÓLNE", section_title_style))
-        elements.append(create_section_table(stats_data, ["Kategoria", "Wartość", "Dodatkowe informacje"], page_width, header_style, cell_style))
-        elements.append(Spacer(1, 20))
-        
-        # 2. CZŁONKOWIE GRUPY
-        if users_data:
-            members_data = []
-            for user in users_data:
-                members_data.append([f"Użytkownik: {user[1]}", f"Email: {user[2]}", ""])
-            elements.append(Paragraph("CZŁONKOWIE GRUPY", section_title_style))
-            elements.append(create_section_table(members_data, ["Użytkownik", "Email", ""], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        else:
-            elements.append(Paragraph("CZŁONKOWIE GRUPY", section_title_style))
-            elements.append(create_section_table([["Brak członków", "", ""]], ["Użytkownik", "Email", ""], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        
-        # 3. KLIENCI W GRUPIE
-        if customers_data:
-            customers_table_data = []
-            for customer in customers_data:
-                company_info = f" ({customer[4]})" if customer[4] else ""
-                phone_info = f" | Tel: {customer[3]}" if customer[3] else ""
-                customers_table_data.append([
-                    f"{customer[1]}{company_info}",
-                    f"Email: {customer[2]}{phone_info}",
-                    ""
-                ])
-            elements.append(Paragraph("KLIENCI W GRUPIE", section_title_style))
-            elements.append(create_section_table(customers_table_data, ["Klient", "Kontakt", ""], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        else:
-            elements.append(Paragraph("KLIENCI W GRUPIE", section_title_style))
-            elements.append(create_section_table([["Brak klientów", "", ""]], ["Klient", "Kontakt", ""], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        
-        # 4. FAKTURY
-        if invoices_data:
-            invoices_table_data = []
-            for invoice in invoices_data:
-                status = "OPŁACONA" if invoice[3] else "NIEOFŁACONA"
-                date_str = invoice[4].strftime('%d.%m.%Y') if invoice[4] else 'Brak daty'
-                invoices_table_data.append([
-                    f"{invoice[1]} - {invoice[5]}",
-                    f"{float(invoice[2]):.2f} PLN",
-                    f"{status} | {date_str}"
-                ])
-            elements.append(Paragraph("FAKTURY", section_title_style))
-            elements.append(create_section_table(invoices_table_data, ["Faktura", "Kwota", "Status i data"], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        else:
-            elements.append(Paragraph("FAKTURY", section_title_style))
-            elements.append(create_section_table([["Brak faktur", "", ""]], ["Faktura", "Kwota", "Status i data"], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        
-        # 5. ZADANIA
-        if tasks_data:
-            tasks_table_data = []
-            for task in tasks_data:
-                status = "UKOŃCZONE" if task[3] else "W TRAKCIE"
-                due_date = task[4].strftime('%d.%m.%Y') if task[4] else 'Brak terminu'
-                tasks_table_data.append([
-                    f"{task[1]} - {task[5]}",
-                    status,
-                    f"Termin: {due_date}"
-                ])
-            elements.append(Paragraph("ZADANIA", section_title_style))
-            elements.append(create_section_table(tasks_table_data, ["Zadanie", "Status", "Termin"], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        else:
-            elements.append(Paragraph("ZADANIA", section_title_style))
-            elements.append(create_section_table([["Brak zadań", "", ""]], ["Zadanie", "Status", "Termin"], page_width, header_style, cell_style))
-            elements.append(Spacer(1, 20))
-        
-        # 6. PŁATNOŚCI
-        if payments_data:
-            payments_table_data = []
-            for payment in payments_data:
-                date_str = payment[2].strftime('%d.%m.%Y %H:%M') if payment[2] else 'Brak daty'
-                payments_table_data.append([
-                    f"{payment[3]} - {payment[4]}",
-                    f"{float(payment[1]):.2f} PLN",
-                    date_str
-                ])
-            elements.append(Paragraph("PŁATNOŚCI", section_title_style))
-            elements.append(create_section_table(payments_table_data, ["Faktura", "Kwota", "Data płatności"], page_width, header_style, cell_style))
-        else:
-            elements.append(Paragraph("PŁATNOŚCI", section_title_style))
-            elements.append(create_section_table([["Brak płatności", "", ""]], ["Faktura", "Kwota", "Data płatności"], page_width, header_style, cell_style))
-        
-        doc.build(elements)
-        buffer.seek(0)
-        
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        safe_group_name = group_data[1].replace('ą', 'a').replace('ć', 'c').replace('ę', 'e').replace('ł', 'l').replace('ń', 'n').replace('ó', 'o').replace('ś', 's').replace('ź', 'z').replace('ż', 'z')
-        response.headers['Content-Disposition'] = f'attachment; filename=raport_grupy_{group_id}_{safe_group_name}.pdf'
-        
-        return response
-        
+        error = report_scope_error(group_id)
+        if error:
+            return error
+        return report_response('group_pdf', {'groupId': group_id}, 'Grupa nie znaleziona')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Endpointy dla raportów tagów
+TAG_CUSTOMERS_SQL = hot_query('reports.tag_customers', f"""
+    SELECT DISTINCT c.Id, c.Name, c.Email, c.Phone, c.Company, c.Address
+    FROM Customers c
+    INNER JOIN CustomerTags ct ON c.Id = ct.CustomerId
+    WHERE ct.TagId = :tag_id AND c.DeletedAt IS NULL
+      AND {visibility_sql('c.AssignedGroupId')}
+    ORDER BY c.Name
+""", tag_id=1, **SAMPLE_VISIBILITY)
+
 @reports_bp.route('/tags/<int:tag_id>/customers', methods=['GET'])
 @require_auth
 def get_tag_customers(tag_id):
     """Pobiera klientów przypisanych do tagu"""
     try:
-        query = text("""
-            SELECT DISTINCT c.Id, c.Name, c.Email, c.Phone, c.Company, c.Address
-            FROM Customers c
-            INNER JOIN CustomerTags ct ON c.Id = ct.CustomerId
-            WHERE ct.TagId = :tag_id
-            ORDER BY c.Name
-        """)
-        result = db.session.execute(query, {'tag_id': tag_id})
+        result = db.session.execute(TAG_CUSTOMERS_SQL, {'tag_id': tag_id, **visibility_params()})
         customers = result.fetchall()
         
         customers_data = []
@@ -971,20 +580,22 @@ def get_tag_customers(tag_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+TAG_INVOICES_SQL = hot_query('reports.tag_invoices', f"""
+    SELECT DISTINCT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
+    FROM Invoices i
+    INNER JOIN InvoiceTags it ON i.Id = it.InvoiceId
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE it.TagId = :tag_id AND c.DeletedAt IS NULL
+      AND {visibility_sql('i.AssignedGroupId')}
+    ORDER BY i.IssuedAt DESC
+""", tag_id=1, **SAMPLE_VISIBILITY)
+
 @reports_bp.route('/tags/<int:tag_id>/invoices', methods=['GET'])
 @require_auth
 def get_tag_invoices(tag_id):
     """Pobiera faktury przypisane do tagu"""
     try:
-        query = text("""
-            SELECT DISTINCT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
-            FROM Invoices i
-            INNER JOIN InvoiceTags it ON i.Id = it.InvoiceId
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE it.TagId = :tag_id
-            ORDER BY i.IssuedAt DESC
-        """)
-        result = db.session.execute(query, {'tag_id': tag_id})
+        result = db.session.execute(TAG_INVOICES_SQL, {'tag_id': tag_id, **visibility_params()})
         invoices = result.fetchall()
         
         invoices_data = []
@@ -1003,20 +614,21 @@ def get_tag_invoices(tag_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+TAG_TASKS_SQL = hot_query('reports.tag_tasks', """
+    SELECT DISTINCT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
+    FROM Tasks t
+    INNER JOIN TaskTags tt ON t.Id = tt.TaskId
+    INNER JOIN Customers c ON t.CustomerId = c.Id
+    WHERE tt.TagId = :tag_id AND c.DeletedAt IS NULL
+    ORDER BY t.DueDate DESC
+""", tag_id=1)
+
 @reports_bp.route('/tags/<int:tag_id>/tasks', methods=['GET'])
 @require_auth
 def get_tag_tasks(tag_id):
     """Pobiera zadania przypisane do tagu"""
     try:
-        query = text("""
-            SELECT DISTINCT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
-            FROM Tasks t
-            INNER JOIN TaskTags tt ON t.Id = tt.TaskId
-            INNER JOIN Customers c ON t.CustomerId = c.Id
-            WHERE tt.TagId = :tag_id
-            ORDER BY t.DueDate DESC
-        """)
-        result = db.session.execute(query, {'tag_id': tag_id})
+        result = db.session.execute(TAG_TASKS_SQL, {'tag_id': tag_id})
         tasks = result.fetchall()
         
         tasks_data = []
@@ -1035,20 +647,22 @@ def get_tag_tasks(tag_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+TAG_CONTRACTS_SQL = hot_query('reports.tag_contracts', f"""
+    SELECT DISTINCT c.Id, c.Title, c.StartDate, c.EndDate, c.NetAmount, cust.Name as CustomerName
+    FROM Contracts c
+    INNER JOIN ContractTags ct ON c.Id = ct.ContractId
+    INNER JOIN Customers cust ON c.CustomerId = cust.Id
+    WHERE ct.TagId = :tag_id AND cust.DeletedAt IS NULL
+      AND {visibility_sql('c.ResponsibleGroupId')}
+    ORDER BY c.StartDate DESC
+""", tag_id=1, **SAMPLE_VISIBILITY)
+
 @reports_bp.route('/tags/<int:tag_id>/contracts', methods=['GET'])
 @require_auth
 def get_tag_contracts(tag_id):
     """Pobiera kontrakty przypisane do tagu"""
     try:
-        query = text("""
-            SELECT DISTINCT c.Id, c.Title, c.StartDate, c.EndDate, c.NetAmount, cust.Name as CustomerName
-            FROM Contracts c
-            INNER JOIN ContractTags ct ON c.Id = ct.ContractId
-            INNER JOIN Customers cust ON c.CustomerId = cust.Id
-            WHERE ct.TagId = :tag_id
-            ORDER BY c.StartDate DESC
-        """)
-        result = db.session.execute(query, {'tag_id': tag_id})
+        result = db.session.execute(TAG_CONTRACTS_SQL, {'tag_id': tag_id, **visibility_params()})
         contracts = result.fetchall()
         
         contracts_data = []
@@ -1067,20 +681,22 @@ def get_tag_contracts(tag_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+TAG_MEETINGS_SQL = hot_query('reports.tag_meetings', f"""
+    SELECT DISTINCT m.Id, m.Topic, m.ScheduledAt, c.Name as CustomerName
+    FROM Meetings m
+    INNER JOIN MeetingTags mt ON m.Id = mt.MeetingId
+    INNER JOIN Customers c ON m.CustomerId = c.Id
+    WHERE mt.TagId = :tag_id AND c.DeletedAt IS NULL
+      AND {visibility_sql('m.AssignedGroupId')}
+    ORDER BY m.ScheduledAt DESC
+""", tag_id=1, **SAMPLE_VISIBILITY)
+
 @reports_bp.route('/tags/<int:tag_id>/meetings', methods=['GET'])
 @require_auth
 def get_tag_meetings(tag_id):
     """Pobiera spotkania przypisane do tagu"""
     try:
-        query = text("""
-            SELECT DISTINCT m.Id, m.Topic, m.ScheduledAt, c.Name as CustomerName
-            FROM Meetings m
-            INNER JOIN MeetingTags mt ON m.Id = mt.MeetingId
-            INNER JOIN Customers c ON m.CustomerId = c.Id
-            WHERE mt.TagId = :tag_id
-            ORDER BY m.ScheduledAt DESC
-        """)
-        result = db.session.execute(query, {'tag_id': tag_id})
+        result = db.session.execute(TAG_MEETINGS_SQL, {'tag_id': tag_id, **visibility_params()})
         meetings = result.fetchall()
         
         meetings_data = []
@@ -1100,1482 +716,399 @@ def get_tag_meetings(tag_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@reports_bp.route('/tags/<int:tag_id>/pdf', methods=['GET'])
-@require_auth
-def get_tag_pdf_report(tag_id):
-    """Generuje szczegółowy raport PDF dla tagu z wszystkimi danymi"""
-    try:
-        # Pobierz dane tagu
-        tag_query = text("""
-            SELECT t.Id, t.Name, t.Description, t.Color
-            FROM Tags t
-            WHERE t.Id = :tag_id
-        """)
-        tag_result = db.session.execute(tag_query, {'tag_id': tag_id})
-        tag_data = tag_result.fetchone()
-        
-        if not tag_data:
-            return jsonify({'error': 'Tag nie znaleziony'}), 404
-        
-        # Pobierz klientów przypisanych do tagu
-        customers_query = text("""
-            SELECT DISTINCT c.Id, c.Name, c.Email, c.Phone, c.Company, c.Address
-            FROM Customers c
-            INNER JOIN CustomerTags ct ON c.Id = ct.CustomerId
-            WHERE ct.TagId = :tag_id
-            ORDER BY c.Name
-        """)
-        customers_result = db.session.execute(customers_query, {'tag_id': tag_id})
-        customers_data = customers_result.fetchall()
-        
-        # Pobierz faktury przypisane do tagu
-        invoices_query = text("""
-            SELECT DISTINCT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName
-            FROM Invoices i
-            INNER JOIN InvoiceTags it ON i.Id = it.InvoiceId
-            INNER JOIN Customers c ON i.CustomerId = c.Id
-            WHERE it.TagId = :tag_id
-            ORDER BY i.IssuedAt DESC
-        """)
-        invoices_result = db.session.execute(invoices_query, {'tag_id': tag_id})
-        invoices_data = invoices_result.fetchall()
-        
-        # Pobierz zadania przypisane do tagu
-        tasks_query = text("""
-            SELECT DISTINCT t.Id, t.Title, t.Description, t.Completed, t.DueDate, c.Name as CustomerName
-            FROM Tasks t
-            INNER JOIN TaskTags tt ON t.Id = tt.TaskId
-            INNER JOIN Customers c ON t.CustomerId = c.Id
-            WHERE tt.TagId = :tag_id
-            ORDER BY t.DueDate DESC
-        """)
-        tasks_result = db.session.execute(tasks_query, {'tag_id': tag_id})
-        tasks_data = tasks_result.fetchall()
-        
-        # Pobierz kontrakty przypisane do tagu
-        contracts_query = text("""
-            SELECT DISTINCT c.Id, c.Title, c.StartDate, c.EndDate, c.NetAmount, cust.Name as CustomerName
-            FROM Contracts c
-            INNER JOIN ContractTags ct ON c.Id = ct.ContractId
-            INNER JOIN Customers cust ON c.CustomerId = cust.Id
-            WHERE ct.TagId = :tag_id
-            ORDER BY c.StartDate DESC
-        """)
-        contracts_result = db.session.execute(contracts_query, {'tag_id': tag_id})
-        contracts_data = contracts_result.fetchall()
-        
-        # Pobierz spotkania przypisane do tagu
-        meetings_query = text("""
-            SELECT DISTINCT m.Id, m.Topic, m.ScheduledAt, c.Name as CustomerName
-            FROM Meetings m
-            INNER JOIN MeetingTags mt ON m.Id = mt.MeetingId
-            INNER JOIN Customers c ON m.CustomerId = c.Id
-            WHERE mt.TagId = :tag_id
-            ORDER BY m.ScheduledAt DESC
-        """)
-        meetings_result = db.session.execute(meetings_query, {'tag_id': tag_id})
-        meetings_data = meetings_result.fetchall()
-        
-        # Oblicz statystyki
-        total_invoices = len(invoices_data)
-        paid_invoices = sum(1 for inv in invoices_data if inv[3])  # IsPaid
-        unpaid_invoices = total_invoices - paid_invoices
-        total_invoice_value = sum(float(inv[2]) for inv in invoices_data if inv[2])
-        paid_value = sum(float(inv[2]) for inv in invoices_data if inv[2] and inv[3])
-        unpaid_value = total_invoice_value - paid_value
-        
-        total_tasks = len(tasks_data)
-        completed_tasks = sum(1 for task in tasks_data if task[3])  # Completed
-        pending_tasks = total_tasks - completed_tasks
-        
-        total_contracts = len(contracts_data)
-        total_contract_value = sum(float(c[4]) for c in contracts_data if c[4])
-        
-        total_meetings = len(meetings_data)
-        
-        # Przygotuj szczegółowe dane dla PDF - struktura z nagłówkami sekcji
-        data = []
-        
-        # Statystyki ogólne - pierwsza sekcja
+TAG_SQL = hot_query('reports.tag', """
+    SELECT t.Id, t.Name, t.Description, t.Color
+    FROM Tags t
+    WHERE t.Id = :tag_id
+""", tag_id=1)
+TAG_PDF_INVOICES_SQL = hot_query('reports.tag_pdf_invoices', f"""
+    SELECT DISTINCT i.Id, i.Number, i.TotalAmount, i.IsPaid, i.IssuedAt, c.Name as CustomerName,
+           {GROSZE_SQL.format(column='i.TotalAmount')} as TotalGrosze
+    FROM Invoices i
+    INNER JOIN InvoiceTags it ON i.Id = it.InvoiceId
+    INNER JOIN Customers c ON i.CustomerId = c.Id
+    WHERE it.TagId = :tag_id AND c.DeletedAt IS NULL
+      AND {visibility_sql('i.AssignedGroupId')}
+    ORDER BY i.IssuedAt DESC
+""", tag_id=1, **SAMPLE_VISIBILITY)
+TAG_PDF_CONTRACTS_SQL = hot_query('reports.tag_pdf_contracts', f"""
+    SELECT DISTINCT c.Id, c.Title, c.StartDate, c.EndDate, c.NetAmount, cust.Name as CustomerName,
+           {GROSZE_SQL.format(column='c.NetAmount')} as NetGrosze
+    FROM Contracts c
+    INNER JOIN ContractTags ct ON c.Id = ct.ContractId
+    INNER JOIN Customers cust ON c.CustomerId = cust.Id
+    WHERE ct.TagId = :tag_id AND cust.DeletedAt IS NULL
+      AND {visibility_sql('c.ResponsibleGroupId')}
+    ORDER BY c.StartDate DESC
+""", tag_id=1, **SAMPLE_VISIBILITY)
+
+def build_tag_pdf(tag_id):
+    """
+    Generuje szczegółowy raport PDF dla tagu z wszystkimi danymi.
+    Zwraca (zawartość, content_type, nazwa_pliku) lub None, jeśli tag nie istnieje.
+    """
+    # Pobierz dane tagu
+    tag_result = db.session.execute(TAG_SQL, {'tag_id': tag_id})
+    tag_data = tag_result.fetchone()
+    
+    if not tag_data:
+        return None
+    
+    # Pobierz klientów przypisanych do tagu
+    customers_result = db.session.execute(TAG_CUSTOMERS_SQL, {'tag_id': tag_id, **visibility_params()})
+    customers_data = customers_result.fetchall()
+    
+    # Pobierz faktury przypisane do tagu
+    invoices_result = db.session.execute(TAG_PDF_INVOICES_SQL, {'tag_id': tag_id, **visibility_params()})
+    invoices_data = invoices_result.fetchall()
+    
+    # Pobierz zadania przypisane do tagu
+    tasks_result = db.session.execute(TAG_TASKS_SQL, {'tag_id': tag_id})
+    tasks_data = tasks_result.fetchall()
+    
+    # Pobierz kontrakty przypisane do tagu
+    contracts_result = db.session.execute(TAG_PDF_CONTRACTS_SQL, {'tag_id': tag_id, **visibility_params()})
+    contracts_data = contracts_result.fetchall()
+    
+    # Pobierz spotkania przypisane do tagu
+    meetings_result = db.session.execute(TAG_MEETINGS_SQL, {'tag_id': tag_id, **visibility_params()})
+    meetings_data = meetings_result.fetchall()
+    
+    # Oblicz statystyki
+    total_invoices = len(invoices_data)
+    paid_invoices = sum(1 for inv in invoices_data if inv[3])  # IsPaid
+    unpaid_invoices = total_invoices - paid_invoices
+    # Sumy kwot na kolumnach groszy z SQL (app/money.py)
+    invoice_amounts = MoneyVector.from_grosze(inv[6] for inv in invoices_data)
+    total_invoice_value = invoice_amounts.total_decimal()
+    paid_value = invoice_amounts.total_decimal(mask=(bool(inv[3]) for inv in invoices_data))
+    unpaid_value = total_invoice_value - paid_value
+    
+    total_tasks = len(tasks_data)
+    completed_tasks = sum(1 for task in tasks_data if task[3])  # Completed
+    pending_tasks = total_tasks - completed_tasks
+    
+    total_contracts = len(contracts_data)
+    total_contract_value = MoneyVector.from_grosze(c[6] for c in contracts_data).total_decimal()
+    
+    total_meetings = len(meetings_data)
+    
+    # Przygotuj szczegółowe dane dla PDF - struktura z nagłówkami sekcji
+    data = []
+    
+    # Statystyki ogólne - pierwsza sekcja
+    data.extend([
+        ["STATYSTYKI OGÓLNE", "", ""],
+        [f"Liczba klientów:", f"{len(customers_data)}", ""],
+        [f"Liczba faktur:", f"{total_invoices}", ""],
+        [f"  - Opłacone:", f"{paid_invoices}", ""],
+        [f"  - Nieopłacone:", f"{unpaid_invoices}", ""],
+        [f"Wartość wszystkich faktur:", f"{total_invoice_value:.2f} PLN", ""],
+        [f"  - Opłacone:", f"{paid_value:.2f} PLN", ""],
+        [f"  - Nieopłacone:", f"{unpaid_value:.2f} PLN", ""],
+        [f"Liczba zadań:", f"{total_tasks}", ""],
+        [f"  - Ukończone:", f"{completed_tasks}", ""],
+        [f"  - W trakcie:", f"{pending_tasks}", ""],
+        [f"Liczba kontraktów:", f"{total_contracts}", ""],
+        [f"Wartość kontraktów:", f"{total_contract_value:.2f} PLN", ""],
+        [f"Liczba spotkań:", f"{total_meetings}", ""]
+    ])
+    
+    # Klienci
+    if customers_data:
         data.extend([
-            ["STATYSTYKI OGÓLNE", "", ""],
-            [f"Liczba klientów:", f"{len(customers_data)}", ""],
-            [f"Liczba faktur:", f"{total_invoices}", ""],
-            [f"  - Opłacone:", f"{paid_invoices}", ""],
-            [f"  - Nieopłacone:", f"{unpaid_invoices}", ""],
-            [f"Wartość wszystkich faktur:", f"{total_invoice_value:.2f} PLN", ""],
-            [f"  - Opłacone:", f"{paid_value:.2f} PLN", ""],
-            [f"  - Nieopłacone:", f"{unpaid_value:.2f} PLN", ""],
-            [f"Liczba zadań:", f"{total_tasks}", ""],
-            [f"  - Ukończone:", f"{completed_tasks}", ""],
-            [f"  - W trakcie:", f"{pending_tasks}", ""],
-            [f"Liczba kontraktów:", f"{total_contracts}", ""],
-            [f"Wartość kontraktów:", f"{total_contract_value:.2f} PLN", ""],
-            [f"Liczba spotkań:", f"{total_meetings}", ""]
+            ["KLIENCI Z TAGIEM", "", ""]
         ])
-        
-        # Klienci
-        if customers_data:
-            data.extend([
-                ["KLIENCI Z TAGIEM", "", ""]
+        for customer in customers_data:
+            company_info = f" ({customer[4]})" if customer[4] else ""
+            phone_info = f" | Tel: {customer[3]}" if customer[3] else ""
+            data.append([
+                f"ID: {customer[0]}", 
+                f"{customer[1]}{company_info}", 
+                f"Email: {customer[2]}{phone_info}"
             ])
-            for customer in customers_data:
-                company_info = f" ({customer[4]})" if customer[4] else ""
-                phone_info = f" | Tel: {customer[3]}" if customer[3] else ""
-                data.append([
-                    f"ID: {customer[0]}", 
-                    f"{customer[1]}{company_info}", 
-                    f"Email: {customer[2]}{phone_info}"
-                ])
-        else:
-            data.append(["KLIENCI Z TAGIEM", "Brak klientów", ""])
-        
-        # Faktury
-        if invoices_data:
-            data.extend([
-                ["FAKTURY Z TAGIEM", "", ""]
+    else:
+        data.append(["KLIENCI Z TAGIEM", "Brak klientów", ""])
+    
+    # Faktury
+    if invoices_data:
+        data.extend([
+            ["FAKTURY Z TAGIEM", "", ""]
+        ])
+        for invoice in invoices_data:
+            status = "OPŁACONA" if invoice[3] else "NIEOFŁACONA"
+            date_str = invoice[4].strftime('%d.%m.%Y') if invoice[4] else 'Brak daty'
+            data.append([
+                f"ID: {invoice[0]}", 
+                f"{invoice[1]} - {invoice[5]}", 
+                f"{format_money(invoice[2])} PLN | {status} | {date_str}"
             ])
-            for invoice in invoices_data:
-                status = "OPŁACONA" if invoice[3] else "NIEOFŁACONA"
-                date_str = invoice[4].strftime('%d.%m.%Y') if invoice[4] else 'Brak daty'
-                data.append([
-                    f"ID: {invoice[0]}", 
-                    f"{invoice[1]} - {invoice[5]}", 
-                    f"{float(invoice[2]):.2f} PLN | {status} | {date_str}"
-                ])
-        else:
-            data.append(["FAKTURY Z TAGIEM", "Brak faktur", ""])
-        
-        # Zadania
-        if tasks_data:
-            data.extend([
-                ["ZADANIA Z TAGIEM", "", ""]
+    else:
+        data.append(["FAKTURY Z TAGIEM", "Brak faktur", ""])
+    
+    # Zadania
+    if tasks_data:
+        data.extend([
+            ["ZADANIA Z TAGIEM", "", ""]
+        ])
+        for task in tasks_data:
+            status = "UKOŃCZONE" if task[3] else "W TRAKCIE"
+            due_date = task[4].strftime('%d.%m.%Y') if task[4] else 'Brak terminu'
+            data.append([
+                f"ID: {task[0]}", 
+                f"{task[1]} - {task[5]}", 
+                f"{status} | Termin: {due_date}"
             ])
-            for task in tasks_data:
-                status = "UKOŃCZONE" if task[3] else "W TRAKCIE"
-                due_date = task[4].strftime('%d.%m.%Y') if task[4] else 'Brak terminu'
-                data.append([
-                    f"ID: {task[0]}", 
-                    f"{task[1]} - {task[5]}", 
-                    f"{status} | Termin: {due_date}"
-                ])
-        else:
-            data.append(["ZADANIA Z TAGIEM", "Brak zadań", ""])
-        
-        # Kontrakty
-        if contracts_data:
-            data.extend([
-                ["KONTRAKTY Z TAGIEM", "", ""]
+    else:
+        data.append(["ZADANIA Z TAGIEM", "Brak zadań", ""])
+    
+    # Kontrakty
+    if contracts_data:
+        data.extend([
+            ["KONTRAKTY Z TAGIEM", "", ""]
+        ])
+        for contract in contracts_data:
+            start_date = contract[2].strftime('%d.%m.%Y') if contract[2] else 'Brak daty'
+            end_date = contract[3].strftime('%d.%m.%Y') if contract[3] else 'Brak daty'
+            data.append([
+                f"ID: {contract[0]}", 
+                f"{contract[1]} - {contract[5]}", 
+                f"{format_money(contract[4])} PLN | {start_date} - {end_date}"
             ])
-            for contract in contracts_data:
-                start_date = contract[2].strftime('%d.%m.%Y') if contract[2] else 'Brak daty'
-                end_date = contract[3].strftime('%d.%m.%Y') if contract[3] else 'Brak daty'
-                data.append([
-                    f"ID: {contract[0]}", 
-                    f"{contract[1]} - {contract[5]}", 
-                    f"{float(contract[4]):.2f} PLN | {start_date} - {end_date}"
-                ])
-        else:
-            data.append(["KONTRAKTY Z TAGIEM", "Brak kontraktów", ""])
-        
-        # Spotkania
-        if meetings_data:
-            data.extend([
-                ["SPOTKANIA Z TAGIEM", "", ""]
+    else:
+        data.append(["KONTRAKTY Z TAGIEM", "Brak kontraktów", ""])
+    
+    # Spotkania
+    if meetings_data:
+        data.extend([
+            ["SPOTKANIA Z TAGIEM", "", ""]
+        ])
+        for meeting in meetings_data:
+            start_time = meeting[2].strftime('%d.%m.%Y %H:%M') if meeting[2] else 'Brak daty'
+            data.append([
+                f"ID: {meeting[0]}", 
+                f"{meeting[1]} - {meeting[3]}", 
+                f"{start_time}"
             ])
-            for meeting in meetings_data:
-                start_time = meeting[2].strftime('%d.%m.%Y %H:%M') if meeting[2] else 'Brak daty'
-                data.append([
-                    f"ID: {meeting[0]}", 
-                    f"{meeting[1]} - {meeting[3]}", 
-                    f"{start_time}"
-                ])
-        else:
-            data.append(["SPOTKANIA Z TAGIEM", "Brak spotkań", ""])
-        
-        headers = ["Kategoria", "Wartość", "Dodatkowe informacje"]
-        
-        # Dodaj informacje o raporcie w tytule
-        report_title = f"Raport tagu: {tag_data[1]}"
-        if tag_data[2]:
-            report_title += f" - {tag_data[2]}"
-        report_title += f" (wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')})"
-        
-        buffer = create_pdf_table(data, headers, report_title)
-        
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        # Usuń polskie znaki z nazwy pliku
-        safe_tag_name = tag_data[1].replace('ą', 'a').replace('ć', 'c').replace('ę', 'e').replace('ł', 'l').replace('ń', 'n').replace('ó', 'o').replace('ś', 's').replace('ź', 'z').replace('ż', 'z')
-        response.headers['Content-Disposition'] = f'attachment; filename=raport_tagu_{tag_id}_{safe_tag_name}.pdf'
-        
-        return response
-        
+    else:
+        data.append(["SPOTKANIA Z TAGIEM", "Brak spotkań", ""])
+    
+    headers = ["Kategoria", "Wartość", "Dodatkowe informacje"]
+    
+    # Dodaj informacje o raporcie w tytule
+    report_title = f"Raport tagu: {tag_data[1]}"
+    if tag_data[2]:
+        report_title += f" - {tag_data[2]}"
+    report_title += f" (wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')})"
+    
+    buffer = create_pdf_table(data, headers, report_title)
+    
+    # Usuń polskie znaki z nazwy pliku
+    safe_tag_name = tag_data[1].replace('ą', 'a').replace('ć', 'c').replace('ę', 'e').replace('ł', 'l').replace('ń', 'n').replace('ó', 'o').replace('ś', 's').replace('ź', 'z').replace('ż', 'z')
+    return buffer.getvalue(), 'application/pdf', f'raport_tagu_{tag_id}_{safe_tag_name}.pdf'
+
+@reports_bp.route('/tags/<int:tag_id>/pdf', methods=['GET'])
+@require_auth
+def get_tag_pdf_report(tag_id):
+    """Zwraca raport PDF tagu - ostatnio wygenerowany w tle lub na żywo (?live=true)"""
+    try:
+        return report_response('tag_pdf', {'tagId': tag_id}, 'Tag nie znaleziony')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_sections_pdf(title, sections):
+    """
+    Tworzy PDF z osobną tabelą "Pole / Wartość" dla każdego rekordu.
+    sections może być generatorem - rekordy są renderowane na bieżąco.
+    """
+    styles = getSampleStyleSheet()
+    section_title_style = ParagraphStyle(
+        'SectionTitle',
+        parent=styles['Heading2'],
+        fontName=POLISH_FONT,
+        fontSize=14,
+        spaceAfter=10,
+        spaceBefore=20,
+        alignment=0,
+        textColor=colors.darkblue
+    )
+    page_width = landscape(A4)[0] - 30
+    
+    def elements():
+        yield from title_flowables(title, POLISH_FONT)
+        for section_title, section_data in sections:
+            yield Paragraph(escape(section_title), section_title_style)
+            yield from create_section_table(section_data, ["Pole", "Wartość"], page_width)
+            yield Spacer(1, 20)
+    
+    return build_pdf(elements())
+
+def render_export(schema_name, args):
+    """
+    Generuje plik eksportu na podstawie schematu z app/export_schema.py.
+    Zwraca (zawartość, content_type, nazwa_pliku, nagłówki) lub zgłasza ValueError
+    dla nieznanego formatu lub nieprawidłowego parametru since.
+    """
+    schema = get_schema(schema_name)
+    format_type = args.get('format', 'csv').lower()
+    include_relations = args.get('includeRelations', 'false').lower() == 'true'
+    since = args.get('since')
+    since_id = args.get('sinceId')
+    
+    if format_type not in EXPORT_CONTENT_TYPES:
+        raise ValueError('Nieobsługiwany format eksportu')
+    
+    columns = schema.resolve_columns(args.get('columns', '').split(','), include_relations)
+    dialect = db.engine.dialect.name
+    
+    # Tylko wiersze widoczne dla użytkownika (grupy) - zapytanie tekstowe omija zakres list ORM
+    scope = visibility_sql(schema.group_column) if schema.group_column else None
+    scope_params = visibility_params() if scope else {}
+    
+    # Eksport przyrostowy (?since=, ?sinceId=) i formaty kolumnowe zwracają kursor następnej paczki
+    tracker = None
+    if since or since_id:
+        where, bind_params, order_by, cursor_columns, cursor_mode = parse_since(schema, since, since_id or None)
+        tracker = CursorTracker(cursor_mode)
+        where = f'{scope} AND {where}' if scope else where
+        query = schema.compile(columns, dialect, where=where, order_by=order_by, extra_select=cursor_columns)
+        query = query.bindparams(*bind_params)
+    elif format_type in COLUMNAR_FORMATS and schema.id_column:
+        tracker = CursorTracker('id')
+        query = schema.compile(columns, dialect, where=scope, extra_select=[schema.id_column])
+    else:
+        query = schema.compile(columns, dialect, where=scope)
+    
+    # Kursor po stronie serwera - wiersze pobierane paczkami zamiast fetchall()
+    result = db.session.execute(query.execution_options(stream_results=True), scope_params)
+    rows = tracker.track(result) if tracker else result
+    filename = f'{schema.filename}.{EXPORT_EXTENSIONS.get(format_type, format_type)}'
+    
+    if format_type in COLUMNAR_FORMATS:
+        content = write_arrow(result, columns, format_type, on_batch=tracker.update if tracker else None)
+    elif format_type == 'csv':
+        content = write_csv(rows, columns)
+    elif format_type == 'xlsx':
+        content = write_xlsx(rows, columns, schema.sheet_name)
+    else:
+        # PDF - wartości formatowane tak samo jak w CSV, kwoty z walutą
+        kinds = [column.kind for column in columns]
+        if schema.pdf_layout == 'sections':
+            def sections():
+                for row in rows:
+                    values = dict(zip([column.key for column in columns], row))
+                    section_data = [[column.header, format_value(value, column.kind, for_pdf=True)]
+                                    for column, value in zip(columns, row)
+                                    if column.key not in schema.section_hidden]
+                    yield schema.section_title(values), section_data
+            buffer = build_sections_pdf(schema.title, sections())
+        else:
+            # Generator - wiersze z kursora trafiają do PDF fragmentami, bez listy całego wyniku
+            pdf_data = ([format_value(value, kind, for_pdf=True) for value, kind in zip(row, kinds)]
+                        for row in rows)
+            buffer = create_pdf_table(pdf_data, [column.header for column in columns], schema.title)
+        content = buffer.getvalue()
+    
+    headers = {}
+    if tracker and tracker.mode == 'timestamp':
+        # Brak nowych wierszy - klient ponawia z tym samym since
+        headers['X-Export-Next-Since'] = tracker.next_since() or since
+    elif tracker:
+        headers['X-Export-Next-Since-Id'] = tracker.next_since() or since_id or ''
+    return content, EXPORT_CONTENT_TYPES[format_type], filename, headers
+
+def is_live_request():
+    """?live=true wymusza wygenerowanie raportu na żywo zamiast serwowania artefaktu"""
+    return request.args.get('live', 'false').lower() == 'true'
+
+def report_response(report_type, params, not_found_message, live=False):
+    """
+    Wspólna obsługa endpointów raportów z gotowymi artefaktami z harmonogramu.
+    Artefakty są generowane bez ograniczeń widoczności, więc dostaje je tylko administrator -
+    pozostali użytkownicy dostają raport na żywo, zawężony do swoich grup.
+    """
+    live = live or is_live_request() or current_group_ids() is not None
+    response = serve_report(report_type, params, live=live)
+    if response is None:
+        return jsonify({'error': not_found_message}), 404
+    return response
+
+def export_response(schema_name):
+    """Wspólna obsługa endpointów /export-*"""
+    try:
+        params = request.args.to_dict()
+        params['entity'] = schema_name
+        # Eksport przyrostowy zawsze na żywo - artefakt nie niesie kursora następnej paczki
+        incremental = bool(params.get('since') or params.get('sinceId'))
+        return report_response('export', params, 'Brak danych do eksportu', live=incremental)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
+
 @reports_bp.route('/export-meetings', methods=['GET'])
 @require_auth
 def export_meetings():
     """Eksportuje spotkania do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'topic', 'customerName', 'scheduledAt']
-        
-        # Pobierz dane
-        query = text("""
-            SELECT m.Id, m.Topic, c.Name as CustomerName, m.ScheduledAt
-            FROM Meetings m
-            LEFT JOIN Customers c ON m.CustomerId = c.Id
-            ORDER BY m.ScheduledAt DESC
-        """)
-        
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'topic':
-                headers.append('Temat')
-            elif col == 'scheduledAt':
-                headers.append('Data spotkania')
-            elif col == 'customerId':
-                headers.append('ID klienta')
-            elif col == 'customerName':
-                headers.append('Nazwa klienta')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                writer.writerow(row)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=spotkania.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Spotkania')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=spotkania.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Przygotuj dane dla PDF
-            pdf_data = []
-            for row in data:
-                pdf_row = list(row)
-                # Format scheduledAt (index 2)
-                if len(pdf_row) > 2 and pdf_row[2] is not None and hasattr(pdf_row[2], 'strftime'):
-                    pdf_row[2] = pdf_row[2].strftime('%d.%m.%Y %H:%M')
-                pdf_data.append(pdf_row)
-
-            buffer = create_pdf_table(pdf_data, headers, "Raport spotkań")
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=spotkania.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return export_response('meetings')
 
 @reports_bp.route('/export-tasks', methods=['GET'])
 @require_auth
 def export_tasks():
     """Eksportuje zadania do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'title', 'description', 'customerName', 'assignedUser', 'dueDate', 'completed', 'createdAt']
-        
-        # Pobierz dane - dynamiczne zapytanie w zależności od kolumn
-        select_fields = []
-        need_customer_join = False
-        need_user_join = False
-        need_tags = False
-        
-        for col in columns:
-            if col == 'id':
-                select_fields.append('t.Id')
-            elif col == 'title':
-                select_fields.append('t.Title')
-            elif col == 'description':
-                select_fields.append('t.Description')
-            elif col == 'customerName':
-                select_fields.append('c.Name as customerName')
-                need_customer_join = True
-            elif col == 'assignedUser':
-                select_fields.append('u.username as assignedUser')
-                need_user_join = True
-            elif col == 'dueDate':
-                select_fields.append('t.DueDate')
-            elif col == 'completed':
-                select_fields.append('t.Completed')
-            elif col == 'priority':
-                # Tasks nie ma kolumny Priority, użyj Completed jako zamiennik
-                select_fields.append('CASE WHEN t.Completed = 1 THEN "Niski" ELSE "Wysoki" END as priority')
-            elif col == 'createdAt':
-                # Tasks nie ma kolumny CreatedAt, użyj DueDate jako zamiennik
-                select_fields.append('t.DueDate as createdAt')
-            elif col == 'tags':
-                select_fields.append('(SELECT GROUP_CONCAT(tag.Name SEPARATOR \', \') FROM Tags tag JOIN TaskTags tt ON tag.Id = tt.TagId WHERE tt.TaskId = t.Id) as tags')
-                need_tags = True
-        
-        if not select_fields:
-            select_fields = ['t.Id', 't.Title', 't.Description', 't.Completed', 't.DueDate']
-        
-        # Buduj zapytanie SQL
-        query_parts = ['SELECT']
-        query_parts.append(', '.join(select_fields))
-        query_parts.append('FROM Tasks t')
-        
-        if need_customer_join:
-            query_parts.append('LEFT JOIN Customers c ON t.CustomerId = c.Id')
-        
-        if need_user_join:
-            query_parts.append('LEFT JOIN users u ON t.UserId = u.id')
-        
-        query_parts.append('ORDER BY t.DueDate DESC')
-        
-        query = text(' '.join(query_parts))
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        # Mapuj nagłówki
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'title':
-                headers.append('Tytuł')
-            elif col == 'description':
-                headers.append('Opis')
-            elif col == 'customerName':
-                headers.append('Klient')
-            elif col == 'assignedUser':
-                headers.append('Przypisany użytkownik')
-            elif col == 'dueDate':
-                headers.append('Termin')
-            elif col == 'completed':
-                headers.append('Ukończone')
-            elif col == 'priority':
-                headers.append('Priorytet')
-            elif col == 'createdAt':
-                headers.append('Data utworzenia')
-            elif col == 'tags':
-                headers.append('Tagi')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                row_list = []
-                for i, col in enumerate(columns):
-                    if i < len(row):
-                        value = row[i]
-                        # Formatuj wartości
-                        if col == 'completed' and value is not None:
-                            row_list.append('Tak' if value else 'Nie')
-                        elif col in ['dueDate', 'createdAt'] and value is not None and hasattr(value, 'strftime'):
-                            row_list.append(value.strftime('%d.%m.%Y %H:%M'))
-                        else:
-                            row_list.append(str(value) if value is not None else '')
-                    else:
-                        row_list.append('')
-                writer.writerow(row_list)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=zadania.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Zadania')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, col in enumerate(columns):
-                    if col_idx < len(row):
-                        value = row[col_idx]
-                        # Formatuj wartości
-                        if col == 'completed' and value is not None:
-                            worksheet.write(row_idx, col_idx, 'Tak' if value else 'Nie')
-                        elif col in ['dueDate', 'createdAt'] and value is not None and hasattr(value, 'strftime'):
-                            worksheet.write(row_idx, col_idx, value.strftime('%d.%m.%Y %H:%M'))
-                        else:
-                            worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-                    else:
-                        worksheet.write(row_idx, col_idx, '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=zadania.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Przygotuj dane dla PDF
-            pdf_data = []
-            for row in data:
-                pdf_row = []
-                for i, col in enumerate(columns):
-                    if i < len(row):
-                        value = row[i]
-                        # Formatuj wartości
-                        if col == 'completed' and value is not None:
-                            pdf_row.append('Tak' if value else 'Nie')
-                        elif col in ['dueDate', 'createdAt'] and value is not None and hasattr(value, 'strftime'):
-                            pdf_row.append(value.strftime('%d.%m.%Y %H:%M'))
-                        else:
-                            pdf_row.append(str(value) if value is not None else '')
-                    else:
-                        pdf_row.append('')
-                pdf_data.append(pdf_row)
-
-            buffer = create_pdf_table(pdf_data, headers, "Raport zadań")
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=zadania.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        import traceback
-        print(f"ERROR in export_tasks: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
+    return export_response('tasks')
 
 @reports_bp.route('/export-notes', methods=['GET'])
 @require_auth
 def export_notes():
     """Eksportuje notatki do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'title', 'content', 'createdAt', 'createdBy']
-        
-        # Pobierz dane
-        query = text("""
-            SELECT n.Id, n.Title, n.Content, n.CreatedAt, u.username as CreatedBy
-            FROM Notes n
-            LEFT JOIN users u ON n.CreatedByUserId = u.id
-            ORDER BY n.CreatedAt DESC
-        """)
-        
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'title':
-                headers.append('Tytuł')
-            elif col == 'content':
-                headers.append('Treść')
-            elif col == 'createdAt':
-                headers.append('Data utworzenia')
-            elif col == 'createdBy':
-                headers.append('Utworzony przez')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                writer.writerow(row)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=notatki.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Notatki')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=notatki.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Przygotuj dane dla PDF
-            pdf_data = []
-            for row in data:
-                pdf_row = list(row)
-                # Format createdAt (index 3)
-                if len(pdf_row) > 3 and pdf_row[3] is not None and hasattr(pdf_row[3], 'strftime'):
-                    pdf_row[3] = pdf_row[3].strftime('%d.%m.%Y %H:%M')
-                pdf_data.append(pdf_row)
-
-            buffer = create_pdf_table(pdf_data, headers, "Raport notatek")
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=notatki.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return export_response('notes')
 
 @reports_bp.route('/export-customers', methods=['GET'])
 @require_auth
 def export_customers():
     """Eksportuje klientów do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'name', 'email', 'phone', 'company', 'address', 'tags']
-        
-        # Buduj zapytanie SQL
-        select_fields = []
-        need_rep_join = False
-        for col in columns:
-            if col == 'id':
-                select_fields.append('c.Id')
-            elif col == 'name':
-                select_fields.append('c.Name')
-            elif col == 'email':
-                select_fields.append('c.Email')
-            elif col == 'phone':
-                select_fields.append('c.Phone')
-            elif col == 'company':
-                select_fields.append('c.Company')
-            elif col == 'address':
-                select_fields.append('c.Address')
-            elif col == 'nip':
-                select_fields.append('c.NIP')
-            elif col == 'representative':
-              
-                select_fields.append('CASE WHEN u_rep.id IS NOT NULL THEN CONCAT(u_rep.username, " (", u_rep.email, ")") ELSE NULL END as representative')
-                need_rep_join = True
-            elif col == 'createdAt':
-                select_fields.append('c.CreatedAt')
-            elif col == 'assignedGroup' and include_relations:
-                select_fields.append('g.name as AssignedGroup')
-            elif col == 'assignedUser' and include_relations:
-                select_fields.append('u.username as AssignedUser')
-            elif col == 'tags':
-                select_fields.append('(SELECT GROUP_CONCAT(t.Name SEPARATOR \', \') FROM Tags t JOIN CustomerTags ct ON t.Id = ct.TagId WHERE ct.CustomerId = c.Id) as tags')
-        
-        if not select_fields:
-            select_fields = ['c.Id', 'c.Name', 'c.Email', 'c.Phone', 'c.Company', 'c.Address']
-        
-        query_sql = f"""
-            SELECT {', '.join(select_fields)}
-            FROM Customers c
-        """
-        
-        if include_relations:
-            query_sql += """
-                LEFT JOIN `Groups` g ON c.AssignedGroupId = g.Id
-                LEFT JOIN users u ON c.AssignedUserId = u.id
-            """
-        
-        # Dodaj JOIN dla representative jeśli potrzebny
-        if need_rep_join:
-            query_sql += """
-                LEFT JOIN users u_rep ON c.RepresentativeUserId = u_rep.id
-            """
-        
-        query_sql += " ORDER BY c.Id"
-        
-        query = text(query_sql)
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        # Mapuj nagłówki
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'name':
-                headers.append('Nazwa')
-            elif col == 'email':
-                headers.append('Email')
-            elif col == 'phone':
-                headers.append('Telefon')
-            elif col == 'company':
-                headers.append('Firma')
-            elif col == 'address':
-                headers.append('Adres')
-            elif col == 'nip':
-                headers.append('NIP')
-            elif col == 'representative':
-                headers.append('Przedstawiciel')
-            elif col == 'createdAt':
-                headers.append('Data utworzenia')
-            elif col == 'assignedGroup':
-                headers.append('Przypisana grupa')
-            elif col == 'assignedUser':
-                headers.append('Przypisany użytkownik')
-            elif col == 'tags':
-                headers.append('Tagi')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                try:
-                    writer.writerow(row)
-                except Exception as e:
-                    print(f"Error writing row to CSV: {row}, Error: {e}")
-                    raise # Re-raise the exception to get the full traceback
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=klienci.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Klienci')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=klienci.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Utwórz PDF z osobnymi tabelami dla każdego klienta
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                                  leftMargin=15, rightMargin=15, 
-                                  topMargin=20, bottomMargin=20)
-            
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontName=POLISH_FONT,
-                fontSize=18,
-                spaceAfter=25,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            section_title_style = ParagraphStyle(
-                'SectionTitle',
-                parent=styles['Heading2'],
-                fontName=POLISH_FONT,
-                fontSize=14,
-                spaceAfter=10,
-                spaceBefore=20,
-                alignment=0,
-                textColor=colors.darkblue
-            )
-            
-            header_style = ParagraphStyle(
-                'HeaderStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=10,
-                textColor=colors.white,
-                alignment=1,
-                spaceAfter=6,
-                spaceBefore=6
-            )
-            
-            cell_style = ParagraphStyle(
-                'CellStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=9,
-                textColor=colors.black,
-                alignment=0,
-                spaceAfter=4,
-                spaceBefore=4,
-                leftIndent=6,
-                rightIndent=6
-            )
-            
-            elements = []
-            
-            # Tytuł raportu
-            elements.append(Paragraph("Raport klientów", title_style))
-            elements.append(Spacer(1, 20))
-            
-            page_width = landscape(A4)[0] - 30
-            
-            # Dla każdego klienta utwórz osobną tabelę
-            for customer_row in data:
-                customer_data = []
-                customer_title = ""
-                
-                # Tworzymy mapowanie nazw kolumn do wartości
-                row_dict = {}
-                try:
-                    if hasattr(customer_row, '_mapping'):
-                        row_dict = dict(customer_row._mapping)
-                    elif hasattr(customer_row, 'keys'):
-                        row_dict = {key: customer_row[key] for key in customer_row.keys()}
-                    elif hasattr(customer_row, '__iter__') and not isinstance(customer_row, str):
-                        row_values = list(customer_row)
-                        for i, field in enumerate(select_fields):
-                            if ' as ' in field.lower():
-                                alias = field.split(' as ')[-1].strip()
-                            elif ' AS ' in field:
-                                alias = field.split(' AS ')[-1].strip()
-                            else:
-                                alias = field.split('.')[-1].strip()
-                            if i < len(row_values):
-                                row_dict[alias] = row_values[i]
-                except Exception:
-                    row_dict = {}
-                
-                # Przygotuj dane dla klienta
-                for i, col in enumerate(columns):
-                    # Mapuj nazwę kolumny na alias w SQL
-                    sql_alias = col
-                    if col == 'id':
-                        sql_alias = 'Id'
-                    elif col == 'name':
-                        sql_alias = 'Name'
-                    elif col == 'email':
-                        sql_alias = 'Email'
-                    elif col == 'phone':
-                        sql_alias = 'Phone'
-                    elif col == 'company':
-                        sql_alias = 'Company'
-                    elif col == 'address':
-                        sql_alias = 'Address'
-                    elif col == 'nip':
-                        sql_alias = 'NIP'
-                    elif col == 'representative':
-                        sql_alias = 'representative'
-                    elif col == 'tags':
-                        sql_alias = 'tags'
-                    elif col == 'createdAt':
-                        sql_alias = 'CreatedAt'
-                    elif col == 'assignedGroup':
-                        sql_alias = 'AssignedGroup'
-                    elif col == 'assignedUser':
-                        sql_alias = 'AssignedUser'
-                    elif col == 'totalInvoiceValue':
-                        sql_alias = 'totalInvoiceValue'
-                    elif col == 'paidInvoiceValue':
-                        sql_alias = 'paidInvoiceValue'
-                    
-                    value = row_dict.get(sql_alias, None)
-                    
-                    # Jeśli wartość jest None lub pustym stringiem dla representative, ustaw pusty string
-                    if col == 'representative' and (value is None or value == ' ()' or value == '()'):
-                        value = ''
-                    
-                    # Formatuj wartości
-                    if col in ['totalInvoiceValue', 'paidInvoiceValue'] and value is not None:
-                        try:
-                            formatted_value = f"{float(value):.2f} PLN"
-                        except (ValueError, TypeError):
-                            formatted_value = str(value)
-                    elif col == 'createdAt' and value is not None and hasattr(value, 'strftime'):
-                        formatted_value = value.strftime('%d.%m.%Y')
-                    else:
-                        formatted_value = str(value) if value is not None else ''
-                    
-                    # Pomiń ID - nie wyświetlaj go
-                    if col != 'id':
-                        # Znajdź polską nazwę kolumny
-                        header_name = headers[i] if i < len(headers) else col
-                        customer_data.append([header_name, formatted_value])
-                        
-                        # Użyj nazwy klienta jako nagłówka sekcji
-                        if col == 'name' and formatted_value:
-                            customer_title = formatted_value
-                
-                # Jeśli nie ma nazwy, użyj domyślnego
-                if not customer_title:
-                    customer_title = "Klient"
-                
-                # Utwórz tabelę dla klienta
-                elements.append(Paragraph(customer_title, section_title_style))
-                elements.append(create_section_table(customer_data, ["Pole", "Wartość"], page_width, header_style, cell_style))
-                elements.append(Spacer(1, 20))
-            
-            doc.build(elements)
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=klienci.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
+    return export_response('customers')
 
 @reports_bp.route('/export-invoices', methods=['GET'])
 @require_auth
 def export_invoices():
     """Eksportuje faktury do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'number', 'customerName', 'customerEmail', 'totalAmount', 'isPaid', 'issuedAt', 'dueDate', 'assignedGroup', 'createdBy']
-        
-        # Pobierz dane - dynamiczne zapytanie w zależności od kolumn
-        select_fields = []
-        for col in columns:
-            if col == 'id':
-                select_fields.append('i.Id')
-            elif col == 'number':
-                select_fields.append('i.Number')
-            elif col == 'customerName':
-                select_fields.append('c.Name as CustomerName')
-            elif col == 'customerEmail':
-                select_fields.append('c.Email as customerEmail')
-            elif col == 'totalAmount':
-                select_fields.append('i.TotalAmount')
-            elif col == 'isPaid':
-                select_fields.append('i.IsPaid')
-            elif col == 'issuedAt':
-                select_fields.append('i.IssuedAt')
-            elif col == 'dueDate':
-                select_fields.append('i.DueDate')
-            elif col == 'assignedGroup':
-                select_fields.append('g.Name as assignedGroup')
-            elif col == 'createdBy':
-                select_fields.append('u.username as createdBy')
-            elif col == 'tags':
-                select_fields.append('(SELECT GROUP_CONCAT(t.Name SEPARATOR \', \') FROM Tags t JOIN CustomerTags ct ON t.Id = ct.TagId WHERE ct.CustomerId = c.Id) as tags')
-            elif col == 'items':
-                select_fields.append('(SELECT GROUP_CONCAT(ii.Description SEPARATOR \', \') FROM InvoiceItems ii WHERE ii.InvoiceId = i.Id) as items')
-        
-        if not select_fields:
-            select_fields = ['i.Id', 'i.Number', 'c.Name as CustomerName', 'c.Email as customerEmail', 'i.TotalAmount', 'i.IsPaid', 'i.IssuedAt', 'i.DueDate', 'g.Name as assignedGroup', 'u.username as createdBy']
-        
-        query = text(f"""
-            SELECT {', '.join(select_fields)}
-            FROM Invoices i
-            LEFT JOIN Customers c ON i.CustomerId = c.Id
-            LEFT JOIN `Groups` g ON c.AssignedGroupId = g.Id
-            LEFT JOIN users u ON i.CreatedByUserId = u.id
-            ORDER BY i.IssuedAt DESC
-        """)
-        
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'number':
-                headers.append('Numer faktury')
-            elif col == 'customerName':
-                headers.append('Klient')
-            elif col == 'customerEmail':
-                headers.append('Email klienta')
-            elif col == 'totalAmount':
-                headers.append('Kwota')
-            elif col == 'isPaid':
-                headers.append('Opłacona')
-            elif col == 'issuedAt':
-                headers.append('Data wystawienia')
-            elif col == 'dueDate':
-                headers.append('Termin płatności')
-            elif col == 'assignedGroup':
-                headers.append('Grupa')
-            elif col == 'createdBy':
-                headers.append('Wystawiona przez')
-            elif col == 'tags':
-                headers.append('Tagi')
-            elif col == 'items':
-                headers.append('Przedmioty')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                writer.writerow(row)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=faktury.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Faktury')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=faktury.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Utwórz PDF z osobnymi tabelami dla każdej faktury
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                                  leftMargin=15, rightMargin=15, 
-                                  topMargin=20, bottomMargin=20)
-            
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontName=POLISH_FONT,
-                fontSize=18,
-                spaceAfter=25,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            section_title_style = ParagraphStyle(
-                'SectionTitle',
-                parent=styles['Heading2'],
-                fontName=POLISH_FONT,
-                fontSize=14,
-                spaceAfter=10,
-                spaceBefore=20,
-                alignment=0,
-                textColor=colors.darkblue
-            )
-            
-            header_style = ParagraphStyle(
-                'HeaderStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=10,
-                textColor=colors.white,
-                alignment=1,
-                spaceAfter=6,
-                spaceBefore=6
-            )
-            
-            cell_style = ParagraphStyle(
-                'CellStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=9,
-                textColor=colors.black,
-                alignment=0,
-                spaceAfter=4,
-                spaceBefore=4,
-                leftIndent=6,
-                rightIndent=6
-            )
-            
-            elements = []
-            
-            # Tytuł raportu
-            elements.append(Paragraph("Raport faktur", title_style))
-            elements.append(Spacer(1, 20))
-            
-            page_width = landscape(A4)[0] - 30
-            
-            # Dla każdej faktury utwórz osobną tabelę
-            for invoice_row in data:
-                invoice_data = []
-                invoice_title = ""
-                
-                # Przygotuj dane dla faktury
-                for i, col in enumerate(columns):
-                    if i < len(invoice_row):
-                        value = invoice_row[i]
-                        
-                        # Formatuj wartości
-                        if col == 'totalAmount' and value is not None:
-                            try:
-                                formatted_value = f"{float(value):.2f} PLN"
-                            except (ValueError, TypeError):
-                                formatted_value = str(value)
-                        elif col == 'isPaid' and value is not None:
-                            formatted_value = "Tak" if value else "Nie"
-                        elif col in ['issuedAt', 'dueDate'] and value is not None:
-                            if hasattr(value, 'strftime'):
-                                formatted_value = value.strftime('%d.%m.%Y')
-                            else:
-                                formatted_value = str(value)
-                        else:
-                            formatted_value = str(value) if value is not None else ''
-                        
-                        # Pomiń ID - nie wyświetlaj go
-                        if col != 'id':
-                            # Znajdź polską nazwę kolumny
-                            header_name = headers[i] if i < len(headers) else col
-                            invoice_data.append([header_name, formatted_value])
-                            
-                            # Użyj numeru faktury jako nagłówka sekcji
-                            if col == 'number' and formatted_value:
-                                invoice_title = f"Faktura {formatted_value}"
-                            elif col == 'customerName' and formatted_value and not invoice_title:
-                                invoice_title = f"Faktura - {formatted_value}"
-                
-                # Jeśli nie ma tytułu, użyj domyślnego
-                if not invoice_title:
-                    invoice_title = "Faktura"
-                
-                # Utwórz tabelę dla faktury
-                elements.append(Paragraph(invoice_title, section_title_style))
-                elements.append(create_section_table(invoice_data, ["Pole", "Wartość"], page_width, header_style, cell_style))
-                elements.append(Spacer(1, 20))
-            
-            doc.build(elements)
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=faktury.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
+    return export_response('invoices')
 
 @reports_bp.route('/export-payments', methods=['GET'])
 @require_auth
 def export_payments():
     """Eksportuje płatności do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'invoiceNumber', 'customerName', 'amount', 'paidAt']
-        
-        # Pobierz dane
-        query = text("""
-            SELECT p.Id, i.Number as InvoiceNumber, c.Name as CustomerName, p.Amount, p.PaidAt
-            FROM Payments p
-            LEFT JOIN Invoices i ON p.InvoiceId = i.Id
-            LEFT JOIN Customers c ON i.CustomerId = c.Id
-            ORDER BY p.PaidAt DESC
-        """)
-        
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'invoiceNumber':
-                headers.append('Numer faktury')
-            elif col == 'customerName':
-                headers.append('Klient')
-            elif col == 'amount':
-                headers.append('Kwota')
-            elif col == 'paidAt':
-                headers.append('Data płatności')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                writer.writerow(row)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=platnosci.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Płatności')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=platnosci.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Przygotuj dane dla PDF
-            pdf_data = []
-            for row in data:
-                pdf_row = list(row)
-                # Format amount (index 3)
-                if len(pdf_row) > 3 and pdf_row[3] is not None:
-                    try:
-                        pdf_row[3] = f"{float(pdf_row[3]):.2f} PLN"
-                    except (ValueError, TypeError):
-                        pdf_row[3] = str(pdf_row[3]) # Keep original if conversion fails
-                # Format paidAt (index 4)
-                if len(pdf_row) > 4 and pdf_row[4] is not None and hasattr(pdf_row[4], 'strftime'):
-                    pdf_row[4] = pdf_row[4].strftime('%d.%m.%Y %H:%M')
-                pdf_data.append(pdf_row)
-
-            buffer = create_pdf_table(pdf_data, headers, "Raport płatności")
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=platnosci.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
+    return export_response('payments')
 
 @reports_bp.route('/export-contracts', methods=['GET'])
 @require_auth
 def export_contracts():
     """Eksportuje umowy do CSV/Excel/PDF"""
-    try:
-        format_type = request.args.get('format', 'csv').lower()
-        include_relations = request.args.get('includeRelations', 'false').lower() == 'true'
-        columns = request.args.get('columns', '').split(',')
-        
-        if not columns or columns == ['']:
-            columns = ['id', 'title', 'contractNumber', 'customerId', 'netAmount', 'signedAt']
-        
-        # Pobierz dane - dynamiczne zapytanie w zależności od kolumn
-        select_fields = []
-        for col in columns:
-            if col == 'id':
-                select_fields.append('co.Id')
-            elif col == 'title':
-                select_fields.append('co.Title')
-            elif col == 'contractNumber':
-                select_fields.append('co.ContractNumber')
-            elif col == 'customerId':
-                select_fields.append('co.CustomerId')
-            elif col == 'customerName':
-                select_fields.append('c.Name as CustomerName')
-            elif col == 'placeOfSigning':
-                select_fields.append('co.PlaceOfSigning')
-            elif col == 'signedAt':
-                select_fields.append('co.SignedAt')
-            elif col == 'startDate':
-                select_fields.append('co.StartDate')
-            elif col == 'endDate':
-                select_fields.append('co.EndDate')
-            elif col == 'netAmount':
-                select_fields.append('co.NetAmount')
-            elif col == 'paymentTermDays':
-                select_fields.append('co.PaymentTermDays')
-            elif col == 'scopeOfServices':
-                select_fields.append('co.ScopeOfServices')
-        
-        if not select_fields:
-            select_fields = ['co.Id', 'co.Title', 'co.ContractNumber', 'co.CustomerId', 'c.Name as CustomerName', 'co.NetAmount', 'co.SignedAt']
-        
-        query = text(f"""
-            SELECT {', '.join(select_fields)}
-            FROM Contracts co
-            LEFT JOIN Customers c ON co.CustomerId = c.Id
-            ORDER BY co.SignedAt DESC
-        """)
-        
-        result = db.session.execute(query)
-        data = result.fetchall()
-        
-        headers = []
-        for col in columns:
-            if col == 'id':
-                headers.append('ID')
-            elif col == 'title':
-                headers.append('Tytuł')
-            elif col == 'contractNumber':
-                headers.append('Numer umowy')
-            elif col == 'customerId':
-                headers.append('ID klienta')
-            elif col == 'customerName':
-                headers.append('Klient')
-            elif col == 'placeOfSigning':
-                headers.append('Miejsce podpisania')
-            elif col == 'signedAt':
-                headers.append('Data podpisania')
-            elif col == 'startDate':
-                headers.append('Data rozpoczęcia')
-            elif col == 'endDate':
-                headers.append('Data zakończenia')
-            elif col == 'netAmount':
-                headers.append('Kwota netto')
-            elif col == 'paymentTermDays':
-                headers.append('Termin płatności (dni)')
-            elif col == 'scopeOfServices':
-                headers.append('Zakres usług')
-            else:
-                headers.append(col)
-        
-        if format_type == 'csv':
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            writer.writerow(headers)
-            
-            for row in data:
-                writer.writerow(row)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = 'attachment; filename=umowy.csv'
-            return response
-            
-        elif format_type == 'xlsx':
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            worksheet = workbook.add_worksheet('Umowy')
-            
-            # Dodaj nagłówki
-            for i, header in enumerate(headers):
-                worksheet.write(0, i, header)
-            
-            # Dodaj dane
-            for row_idx, row in enumerate(data, 1):
-                for col_idx, value in enumerate(row):
-                    worksheet.write(row_idx, col_idx, str(value) if value is not None else '')
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = 'attachment; filename=umowy.xlsx'
-            return response
-            
-        elif format_type == 'pdf':
-            # Utwórz PDF z osobnymi tabelami dla każdej umowy
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                                  leftMargin=15, rightMargin=15, 
-                                  topMargin=20, bottomMargin=20)
-            
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontName=POLISH_FONT,
-                fontSize=18,
-                spaceAfter=25,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            section_title_style = ParagraphStyle(
-                'SectionTitle',
-                parent=styles['Heading2'],
-                fontName=POLISH_FONT,
-                fontSize=14,
-                spaceAfter=10,
-                spaceBefore=20,
-                alignment=0,
-                textColor=colors.darkblue
-            )
-            
-            header_style = ParagraphStyle(
-                'HeaderStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=10,
-                textColor=colors.white,
-                alignment=1,
-                spaceAfter=6,
-                spaceBefore=6
-            )
-            
-            cell_style = ParagraphStyle(
-                'CellStyle',
-                parent=styles['Normal'],
-                fontName=POLISH_FONT,
-                fontSize=9,
-                textColor=colors.black,
-                alignment=0,
-                spaceAfter=4,
-                spaceBefore=4,
-                leftIndent=6,
-                rightIndent=6
-            )
-            
-            elements = []
-            
-            # Tytuł raportu
-            elements.append(Paragraph("Raport umów", title_style))
-            elements.append(Spacer(1, 20))
-            
-            page_width = landscape(A4)[0] - 30
-            
-            # Dla każdej umowy utwórz osobną tabelę
-            for contract_row in data:
-                contract_data = []
-                contract_title = ""
-                
-                # Przygotuj dane dla umowy
-                for i, col in enumerate(columns):
-                    if i < len(contract_row):
-                        value = contract_row[i]
-                        
-                        # Formatuj wartości
-                        if col == 'netAmount' and value is not None:
-                            try:
-                                formatted_value = f"{float(value):.2f} PLN"
-                            except (ValueError, TypeError):
-                                formatted_value = str(value)
-                        elif col in ['signedAt', 'startDate', 'endDate'] and value is not None:
-                            if hasattr(value, 'strftime'):
-                                formatted_value = value.strftime('%d.%m.%Y')
-                            else:
-                                formatted_value = str(value)
-                        else:
-                            formatted_value = str(value) if value is not None else ''
-                        
-                        # Pomiń ID i customerId - nie wyświetlaj ich
-                        if col not in ['id', 'customerId']:
-                            # Znajdź polską nazwę kolumny
-                            header_name = headers[i] if i < len(headers) else col
-                            contract_data.append([header_name, formatted_value])
-                            
-                            # Użyj tytułu lub numeru umowy jako nagłówka sekcji
-                            if col == 'title' and formatted_value:
-                                contract_title = formatted_value
-                            elif col == 'contractNumber' and formatted_value and not contract_title:
-                                contract_title = f"Umowa {formatted_value}"
-                
-                # Jeśli nie ma tytułu, użyj domyślnego
-                if not contract_title:
-                    contract_title = "Umowa"
-                
-                # Utwórz tabelę dla umowy
-                elements.append(Paragraph(contract_title, section_title_style))
-                elements.append(create_section_table(contract_data, ["Pole", "Wartość"], page_width, header_style, cell_style))
-                elements.append(Spacer(1, 20))
-            
-            doc.build(elements)
-            buffer.seek(0)
-            
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = 'attachment; filename=umowy.pdf'
-            return response
-        
-        else:
-            return jsonify({'error': 'Nieobsługiwany format eksportu'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': f'Błąd eksportu: {str(e)}'}), 500
-    
\ No newline at end of file
+    return export_response('contracts')
+
+def normalize_export_params(params):
+    """Parametry eksportu w postaci kanonicznej (klucz artefaktu nie zależy od kolejności i wielkości liter)"""
+    columns = [column.strip() for column in str(params.get('columns', '')).split(',') if column.strip()]
+    normalized = {
+        'entity': params['entity'],
+        'format': str(params.get('format', 'csv')).lower(),
+        'columns': ','.join(columns),
+        'includeRelations': 'true' if str(params.get('includeRelations', 'false')).lower() == 'true' else 'false'
+    }
+    if params.get('since'):
+        normalized['since'] = str(params['since'])
+    if params.get('sinceId'):
+        normalized['sinceId'] = str(params['sinceId'])
+    return normalized
+
+register_report('group_pdf', 'Raport PDF grupy (parametry: groupId)',
+                lambda params: build_group_pdf(params['groupId']),
+                normalize=lambda params: {'groupId': int(params['groupId'])})
+register_report('tag_pdf', 'Raport PDF tagu (parametry: tagId)',
+                lambda params: build_tag_pdf(params['tagId']),
+                normalize=lambda params: {'tagId': int(params['tagId'])})
+register_report('export', 'Eksport danych (parametry: entity, format, columns, includeRelations, since, sinceId)',
+                lambda params: render_export(params['entity'], params),
+                normalize=normalize_export_params)
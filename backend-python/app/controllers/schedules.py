@@ -0,0 +1,137 @@
+from flask import Blueprint, request, jsonify
+from app.middleware import require_admin
+from app.database import db
+from app.models import ScheduledJob, ReportArtifact
+from app.scheduler import JOB_TYPES, CronExpression, CronError, get_job_types, run_job
+from datetime import datetime
+import json
+
+schedules_bp = Blueprint('schedules', __name__)
+
+def apply_job_data(job, data):
+    """Waliduje i przepisuje dane zadania z żądania; zwraca komunikat błędu lub None"""
+    if 'name' in data:
+        job.Name = data['name']
+    if 'jobType' in data:
+        if data['jobType'] not in JOB_TYPES:
+            return f"Nieznany typ zadania: {data['jobType']}"
+        job.JobType = data['jobType']
+    if 'cron' in data:
+        try:
+            CronExpression(data['cron'])
+        except CronError as e:
+            return str(e)
+        job.Cron = data['cron']
+    if 'parameters' in data:
+        job.Parameters = json.dumps(data['parameters'] or {})
+    if 'isActive' in data:
+        job.IsActive = bool(data['isActive'])
+
+    if not job.Name or not job.JobType or not job.Cron:
+        return 'Pola name, jobType i cron są wymagane'
+
+    job.NextRunAt = CronExpression(job.Cron).next_after(datetime.now()) if job.IsActive else None
+    return None
+
+@schedules_bp.route('/', methods=['GET'])
+@require_admin
+def get_schedules():
+    """Pobiera listę zaplanowanych zadań"""
+    try:
+        jobs = ScheduledJob.query.order_by(ScheduledJob.Id).all()
+        return jsonify([job.to_dict() for job in jobs]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/job-types', methods=['GET'])
+@require_admin
+def get_schedule_job_types():
+    """Pobiera listę dostępnych typów zadań"""
+    try:
+        return jsonify(get_job_types()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/', methods=['POST'])
+@require_admin
+def create_schedule():
+    """Tworzy zaplanowane zadanie"""
+    try:
+        data = request.get_json() or {}
+        job = ScheduledJob(IsActive=True)
+        validation_error = apply_job_data(job, data)
+        if validation_error:
+            return jsonify({'error': validation_error}), 400
+
+        db.session.add(job)
+        db.session.commit()
+
+        return jsonify(job.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/<int:job_id>', methods=['PUT'])
+@require_admin
+def update_schedule(job_id):
+    """Aktualizuje zaplanowane zadanie"""
+    try:
+        job = ScheduledJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Zadanie nie znalezione'}), 404
+
+        validation_error = apply_job_data(job, request.get_json() or {})
+        if validation_error:
+            db.session.rollback()
+            return jsonify({'error': validation_error}), 400
+
+        db.session.commit()
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/<int:job_id>', methods=['DELETE'])
+@require_admin
+def delete_schedule(job_id):
+    """Usuwa zaplanowane zadanie (wygenerowane artefakty pozostają)"""
+    try:
+        job = ScheduledJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Zadanie nie znalezione'}), 404
+
+        ReportArtifact.query.filter_by(ScheduledJobId=job_id).update({'ScheduledJobId': None})
+        db.session.delete(job)
+        db.session.commit()
+
+        return jsonify({'message': 'Zadanie usunięte'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/<int:job_id>/run', methods=['POST'])
+@require_admin
+def run_schedule_now(job_id):
+    """Uruchamia zadanie natychmiast (poza harmonogramem)"""
+    try:
+        job = ScheduledJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Zadanie nie znalezione'}), 404
+
+        result = run_job(job)
+        status_code = 200 if result['status'] == 'success' else 500
+        return jsonify({'job': ScheduledJob.query.get(job_id).to_dict(), 'result': result['summary'],
+                        'error': result['error']}), status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@schedules_bp.route('/artifacts', methods=['GET'])
+@require_admin
+def get_artifacts():
+    """Pobiera listę wygenerowanych artefaktów raportów"""
+    try:
+        artifacts = ReportArtifact.query.order_by(ReportArtifact.GeneratedAt.desc()).limit(200).all()
+        return jsonify([artifact.to_dict() for artifact in artifacts]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,11 +2,13 @@ from flask import Blueprint, request, jsonify
 from app.middleware import require_auth
 from app.database import db
 from app.models import Service
+from app.http_cache import cached_response
 
 services_bp = Blueprint('services', __name__)
 
 @services_bp.route('/', methods=['GET'])
 @require_auth
+@cached_response(tables=['Services'])
 def get_services():
     """Pobiera listę usług, posortowaną od najnowszych (malejąco według ID)"""
     try:
@@ -38,6 +40,7 @@ def create_service():
 
 @services_bp.route('/<int:service_id>', methods=['GET'])
 @require_auth
+@cached_response(tables=['Services'])
 def get_service(service_id):
     """Pobiera szczegóły usługi"""
     try:
@@ -0,0 +1,49 @@
+from flask import Blueprint, request, jsonify
+from app.middleware import require_auth, get_current_user_id
+from app.change_tracking import (parse_types, parse_cursor, parse_snapshot_cursor, full_snapshot, changes_since,
+                                  SyncCursorExpired)
+
+sync_bp = Blueprint('sync', __name__)
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 2000
+
+@sync_bp.route('/', methods=['GET'])
+@require_auth
+def sync():
+    """
+    Synchronizacja przyrostowa dla aplikacji mobilnej.
+    ?since=<kursor> zwraca encje zmienione po kursorze (upserts) i usunięte (deletes);
+    bez since zwraca pełny stan, stronicowany po (typ, Id) - kolejną stronę wskazuje ?snapshot=<snapshotCursor>.
+    ?types=customers,tasks zawęża typy encji, ?limit= rozmiar strony.
+    Gdy hasMore=true, klient pobiera kolejną stronę z otrzymanym kursorem.
+    """
+    try:
+        user_id = int(get_current_user_id())
+        try:
+            types = parse_types(request.args.get('types'))
+            limit = max(1, min(int(request.args.get('limit', DEFAULT_SYNC_LIMIT)), MAX_SYNC_LIMIT))
+            since = request.args.get('since')
+            since = parse_cursor(since) if since not in (None, '') else None
+            snapshot = request.args.get('snapshot')
+            snapshot = parse_snapshot_cursor(snapshot) if snapshot not in (None, '') else None
+        except SyncCursorExpired:
+            return _cursor_expired()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if since is None:
+            try:
+                return jsonify(full_snapshot(user_id, types, limit, snapshot)), 200
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        try:
+            return jsonify(changes_since(user_id, since, types, limit)), 200
+        except SyncCursorExpired:
+            return _cursor_expired()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _cursor_expired():
+    return jsonify({'error': 'Kursor wygasł - wymagana pełna synchronizacja', 'fullSyncRequired': True}), 410
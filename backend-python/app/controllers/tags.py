@@ -2,12 +2,17 @@ from flask import Blueprint, request, jsonify
 from app.middleware import require_auth
 from app.database import db
 from app.models import Tag
+from app.http_cache import cached_response
 from sqlalchemy import text
 
 tags_bp = Blueprint('tags', __name__)
 
+# Lista tagów zawiera liczniki powiązań - zależy także od tabel asocjacyjnych
+TAG_LIST_TABLES = ['Tags', 'CustomerTags', 'InvoiceTags', 'ContractTags', 'TaskTags', 'MeetingTags']
+
 @tags_bp.route('/', methods=['GET'])
 @require_auth
+@cached_response(tables=TAG_LIST_TABLES)
 def get_tags():
     """Pobiera listę tagów, posortowaną od najnowszych (malejąco według ID)"""
     try:
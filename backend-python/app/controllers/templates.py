@@ -4,6 +4,7 @@ import os
 from app.database import db
 from app.models.template import Template
 from app.middleware import require_auth, get_current_user_id
+from app.http_cache import cached_response
 from datetime import datetime
 import json
 
@@ -11,6 +12,7 @@ templates_bp = Blueprint('templates', __name__)
 
 @templates_bp.route('/', methods=['GET'])
 @require_auth
+@cached_response(tables=['Templates'])
 def get_templates():
     """Pobierz wszystkie szablony dla zalogowanego użytkownika, posortowane od najnowszych"""
     try:
@@ -235,6 +237,7 @@ def upload_template():
 
 @templates_bp.route('/categories', methods=['GET'])
 @require_auth
+@cached_response(tables=['Templates'])
 def get_template_categories():
     """Pobierz wszystkie kategorie szablonów"""
     try:
@@ -250,6 +253,7 @@ def get_template_categories():
 
 @templates_bp.route('/types', methods=['GET'])
 @require_auth
+@cached_response(tables=['Templates'])
 def get_template_types():
     """Pobierz wszystkie typy szablonów"""
     try:
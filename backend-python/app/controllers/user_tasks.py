@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from app.middleware import require_auth, get_current_user_id
 from app.database import db
 from app.models import Task, User, Customer
-from sqlalchemy import text
+from app.query_plans import hot_query
 from datetime import datetime
 
 user_tasks_bp = Blueprint('user_tasks', __name__)
@@ -26,6 +26,20 @@ def create_task():
         )
         
         db.session.add(new_task)
+        
+        # Skutki uboczne zapisywane w tej samej transakcji co zadanie (app/outbox.py)
+        from app.outbox import add_notification, add_activity, add_system_log
+        add_notification(user_id, f'Utworzono nowe zadanie: {data.get("title")}')
+        add_activity(user_id, f'Utworzono nowe zadanie: {data.get("title", "Bez tytułu")}',
+                     data.get('customerId') if data.get('customerId') else None)
+        add_system_log(
+            level='Information',
+            message='Zadanie zostało utworzone',
+            source='Python.Backend.TasksController',
+            user_id=user_id,
+            details=f'{{"title": "{data.get("title")}", "dueDate": "{data.get("dueDate")}"}}'
+        )
+        
         db.session.commit()
         
         # Zwróć utworzone zadanie
@@ -40,49 +54,24 @@ def create_task():
             'assignedGroupId': new_task.AssignedGroupId
         }
         
-        # Dodaj powiadomienie dla użytkownika (opcjonalnie)
-        try:
-            from app.controllers.notifications import create_notification
-            create_notification(
-                user_id=user_id,
-                message=f'Utworzono nowe zadanie: {data.get("title")}'
-            )
-        except Exception as e:
-            print(f"Błąd przy tworzeniu powiadomienia: {e}")
-        
-        # Dodaj aktywność (automatyczne logowanie akcji)
-        try:
-            from app.models import Activity
-            
-            activity = Activity(
-                Note=f'Utworzono nowe zadanie: {data.get("title", "Bez tytułu")}',
-                CreatedAt=datetime.now(),
-                UserId=user_id,
-                CustomerId=data.get('customerId') if data.get('customerId') else None
-            )
-            db.session.add(activity)
-        except Exception as e:
-            print(f"Błąd przy tworzeniu aktywności: {e}")
-        
-        # Dodaj log systemowy (opcjonalnie)
-        try:
-            from app.controllers.logs import log_system_event
-            log_system_event(
-                level='Information',
-                message=f'Zadanie zostało utworzone',
-                source='Python.Backend.TasksController',
-                user_id=user_id,
-                details=f'{{"title": "{data.get("title")}", "dueDate": "{data.get("dueDate")}"}}'
-            )
-        except Exception as e:
-            print(f"Błąd przy tworzeniu logu: {e}")
-        
         return jsonify(result), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+USER_TASKS_SQL = hot_query('user_tasks.list', """
+    SELECT
+        t.Id, t.Title, t.Description, t.DueDate, t.Completed,
+        u.username,
+        c.Name as customer_name
+    FROM Tasks t
+    LEFT JOIN users u ON t.UserId = u.id AND u.DeletedAt IS NULL
+    LEFT JOIN Customers c ON t.CustomerId = c.Id AND c.DeletedAt IS NULL
+    WHERE t.UserId = :user_id
+    ORDER BY t.DueDate ASC, t.Id DESC
+""", user_id=1)
+
 @user_tasks_bp.route('/tasks', methods=['GET'])
 @require_auth
 def get_tasks():
@@ -91,17 +80,7 @@ def get_tasks():
         user_id = get_current_user_id()
         
         # Pobierz zadania z JOIN do tabel Users i Customers
-        tasks = db.session.execute(text("""
-            SELECT 
-                t.Id, t.Title, t.Description, t.DueDate, t.Completed,
-                u.username,
-                c.Name as customer_name
-            FROM Tasks t
-            LEFT JOIN users u ON t.UserId = u.id
-            LEFT JOIN Customers c ON t.CustomerId = c.Id
-            WHERE t.UserId = :user_id
-            ORDER BY t.DueDate ASC, t.Id DESC
-        """), {'user_id': user_id}).fetchall()
+        tasks = db.session.execute(USER_TASKS_SQL, {'user_id': user_id}).fetchall()
         
         result = []
         for row in tasks:
@@ -141,6 +120,17 @@ def get_tasks():
         print(f"Traceback: {traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
+USER_TASK_SQL = hot_query('user_tasks.detail', """
+    SELECT
+        t.Id, t.Title, t.Description, t.DueDate, t.Completed, t.CustomerId,
+        u.username,
+        c.Name as customer_name
+    FROM Tasks t
+    LEFT JOIN users u ON t.UserId = u.id AND u.DeletedAt IS NULL
+    LEFT JOIN Customers c ON t.CustomerId = c.Id AND c.DeletedAt IS NULL
+    WHERE t.Id = :task_id AND t.UserId = :user_id
+""", task_id=1, user_id=1)
+
 @user_tasks_bp.route('/tasks/<int:task_id>', methods=['GET'])
 @require_auth
 def get_task(task_id):
@@ -149,16 +139,7 @@ def get_task(task_id):
         user_id = get_current_user_id()
 
         # Pobierz zadanie z JOIN do tabel Users i Customers
-        task_data = db.session.execute(text("""
-            SELECT
-                t.Id, t.Title, t.Description, t.DueDate, t.Completed, t.CustomerId,
-                u.username,
-                c.Name as customer_name
-            FROM Tasks t
-            LEFT JOIN users u ON t.UserId = u.id
-            LEFT JOIN Customers c ON t.CustomerId = c.Id
-            WHERE t.Id = :task_id AND t.UserId = :user_id
-        """), {'task_id': task_id, 'user_id': user_id}).fetchone()
+        task_data = db.session.execute(USER_TASK_SQL, {'task_id': task_id, 'user_id': user_id}).fetchone()
 
         if not task_data:
             return jsonify({'error': 'Zadanie nie znalezione'}), 404
@@ -244,4 +225,77 @@ def delete_task(task_id):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+def run_bulk_operation(operation):
+    """
+    Wspólna obsługa operacji zbiorczych: wybór zadań (ids lub filter), operacja,
+    jeden commit na całe żądanie. operation(user_id, wiersze, dane) zwraca słownik wyniku.
+    """
+    try:
+        from app.bulk_tasks import BulkTaskConflict, parse_selection, select_tasks
+
+        user_id = get_current_user_id()
+        data = request.get_json() or {}
+        try:
+            ids, filters = parse_selection(data)
+            rows = select_tasks(user_id, ids, filters)
+            result = operation(user_id, rows, data)
+        except BulkTaskConflict as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 409
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+        return jsonify({'matched': len(rows), **result}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@user_tasks_bp.route('/tasks/bulk/complete', methods=['POST'])
+@require_auth
+def bulk_complete_tasks():
+    """Oznacza wiele zadań jako ukończone (lub wznowione przy "completed": false)"""
+    from app.bulk_tasks import bulk_complete
+
+    def operation(user_id, rows, data):
+        return {'updated': bulk_complete(user_id, rows, bool(data.get('completed', True)))}
+    return run_bulk_operation(operation)
+
+@user_tasks_bp.route('/tasks/bulk/reassign', methods=['POST'])
+@require_auth
+def bulk_reassign_tasks():
+    """Przepisuje wiele zadań na innego użytkownika (pole userId)"""
+    from app.bulk_tasks import bulk_reassign
+
+    def operation(user_id, rows, data):
+        if not isinstance(data.get('userId'), int):
+            raise ValueError('Pole userId jest wymagane')
+        return {'updated': bulk_reassign(user_id, rows, data['userId'])}
+    return run_bulk_operation(operation)
+
+@user_tasks_bp.route('/tasks/bulk/tags', methods=['POST'])
+@require_auth
+def bulk_retag_tasks():
+    """Dodaje (add) i usuwa (remove) tagi wielu zadań - listy Id tagów"""
+    from app.bulk_tasks import bulk_retag
+
+    def operation(user_id, rows, data):
+        add, remove = data.get('add') or [], data.get('remove') or []
+        if not isinstance(add, list) or not isinstance(remove, list) or not (add or remove) \
+                or not all(isinstance(tag_id, int) for tag_id in add + remove):
+            raise ValueError('Wymagana niepusta lista Id tagów add lub remove')
+        added, removed = bulk_retag(user_id, rows, add, remove)
+        return {'tagsAdded': added, 'tagsRemoved': removed}
+    return run_bulk_operation(operation)
+
+@user_tasks_bp.route('/tasks/bulk/delete', methods=['POST'])
+@require_auth
+def bulk_delete_tasks():
+    """Usuwa wiele zadań"""
+    from app.bulk_tasks import bulk_delete
+
+    def operation(user_id, rows, data):
+        return {'deleted': bulk_delete(user_id, rows)}
+    return run_bulk_operation(operation)
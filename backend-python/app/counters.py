@@ -0,0 +1,212 @@
+"""
+Liczniki plakietek użytkownika (nieprzeczytane powiadomienia i wiadomości, nieukończone zadania,
+oczekujące przypomnienia).
+
+Zamiast liczyć wiersze przy każdym odpytaniu, liczniki są trzymane w tabeli UserCounters
+i aktualizowane przyrostowo w tej samej transakcji co zapis (zdarzenia mapperów SQLAlchemy
+after_insert / after_update / after_delete zbierają zmiany, after_flush zapisuje je jednym
+UPDATE na użytkownika). Brakujący wiersz licznika powstaje z pełnego przeliczenia - przy
+pierwszym odczycie albo przy pierwszym zapisie (upsert w transakcji zapisu, więc zmiana nie ginie
+między przeliczeniem a utworzeniem wiersza). Zadanie `rebuild_counters` koryguje ewentualne
+rozbieżności.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import get_history
+
+from app.database import db
+from app.models import Notification, Message, Task, Reminder, UserCounter
+from app.scheduler import register_job_type
+
+# Klucz session.info ze zmianami liczników z bieżącego flush: {UserId: {kolumna: delta}}
+PENDING_KEY = 'counter_deltas'
+
+CounterSpec = namedtuple('CounterSpec', ['column', 'owner', 'attributes', 'counted'])
+
+COUNTER_SPECS = {
+    Notification: CounterSpec('UnreadNotifications', 'UserId', ('UserId', 'IsRead'),
+                              lambda values: not values['IsRead']),
+    Message: CounterSpec('UnreadMessages', 'RecipientUserId', ('RecipientUserId', 'IsRead'),
+                         lambda values: not values['IsRead']),
+    Task: CounterSpec('PendingTasks', 'UserId', ('UserId', 'Completed'),
+                      lambda values: not values['Completed']),
+    Reminder: CounterSpec('PendingReminders', 'UserId', ('UserId', 'FiredAt'),
+                          lambda values: values['FiredAt'] is None),
+}
+
+
+def adjust_counters(connection, user_id, deltas):
+    """Zmienia liczniki użytkownika o delty {kolumna: delta}; brakujący wiersz licznika tworzy pełnym przeliczeniem"""
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not user_id or not deltas:
+        return
+    table = UserCounter.__table__
+    values = {column: table.c[column] + delta for column, delta in deltas.items()}
+    result = connection.execute(
+        update(table)
+        .where(table.c.UserId == user_id)
+        .values({**values, 'Version': table.c.Version + 1, 'UpdatedAt': datetime.utcnow()})
+    )
+    if not result.rowcount:
+        create_counter(connection, user_id, deltas)
+
+
+def adjust_counter(connection, user_id, column, delta):
+    """Zmienia licznik użytkownika o delta (wywoływane po zapisie, w tej samej transakcji)"""
+    adjust_counters(connection, user_id, {column: delta})
+
+
+def _upsert(connection, table, values, index_elements, changes):
+    """INSERT z aktualizacją istniejącego wiersza (ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE)"""
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return mysql_insert(table).values(values).on_duplicate_key_update(changes)
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(table).values(values).on_conflict_do_update(index_elements=index_elements,
+                                                                          set_=changes)
+    return insert(table).values(values)
+
+
+def create_counter(connection, user_id, deltas=None):
+    """
+    Tworzy wiersz licznika z pełnego przeliczenia w bieżącej transakcji zapisu.
+    Przeliczenie widzi już zapisane zmiany, więc delty nie są doliczane; jeśli równoległa
+    transakcja utworzyła wiersz w międzyczasie (jej przeliczenie nie widziało tych zmian),
+    upsert dolicza do niego tylko delty.
+    """
+    table = UserCounter.__table__
+    now = datetime.utcnow()
+    changes = {'Version': table.c.Version + 1, 'UpdatedAt': now}
+    changes.update({column: table.c[column] + delta for column, delta in (deltas or {}).items()})
+    connection.execute(_upsert(connection, table,
+                               {'UserId': user_id, 'Version': 1, 'UpdatedAt': now,
+                                **compute_counts(user_id, connection)},
+                               ['UserId'], changes))
+
+
+def _queue(target, user_id, column, delta):
+    """Zbiera zmianę licznika do zapisu po flush - pełne przeliczenie przy tworzeniu wiersza
+    widzi wtedy wszystkie wiersze flush, więc żadna zmiana nie jest liczona podwójnie"""
+    if not user_id or not delta:
+        return
+    deltas = object_session(target).info.setdefault(PENDING_KEY, {}).setdefault(user_id, {})
+    deltas[column] = deltas.get(column, 0) + delta
+
+
+def _current_values(target, spec):
+    return {attribute: getattr(target, attribute) for attribute in spec.attributes}
+
+
+def _previous_values(target, spec):
+    values = {}
+    for attribute in spec.attributes:
+        history = get_history(target, attribute)
+        values[attribute] = history.deleted[0] if history.deleted else getattr(target, attribute)
+    return values
+
+
+def _after_insert(mapper, connection, target):
+    spec = COUNTER_SPECS[mapper.class_]
+    values = _current_values(target, spec)
+    if spec.counted(values):
+        _queue(target, values[spec.owner], spec.column, 1)
+
+
+def _after_update(mapper, connection, target):
+    spec = COUNTER_SPECS[mapper.class_]
+    old, new = _previous_values(target, spec), _current_values(target, spec)
+    old_counted, new_counted = spec.counted(old), spec.counted(new)
+    if old[spec.owner] == new[spec.owner]:
+        _queue(target, new[spec.owner], spec.column, int(new_counted) - int(old_counted))
+        return
+    # Zmiana właściciela (np. przepisanie zadania na innego użytkownika)
+    if old_counted:
+        _queue(target, old[spec.owner], spec.column, -1)
+    if new_counted:
+        _queue(target, new[spec.owner], spec.column, 1)
+
+
+def _after_delete(mapper, connection, target):
+    spec = COUNTER_SPECS[mapper.class_]
+    values = _previous_values(target, spec)
+    if spec.counted(values):
+        _queue(target, values[spec.owner], spec.column, -1)
+
+
+def _after_flush(session, flush_context):
+    for user_id, deltas in session.info.pop(PENDING_KEY, {}).items():
+        adjust_counters(session.connection(), user_id, deltas)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+for model in COUNTER_SPECS:
+    event.listen(model, 'after_insert', _after_insert)
+    event.listen(model, 'after_update', _after_update)
+    event.listen(model, 'after_delete', _after_delete)
+
+
+def init_counters(app):
+    """Rejestruje zapis zebranych zmian liczników po każdym flush"""
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_flush', _after_flush):
+        event.listen(session_class, 'after_flush', _after_flush)
+        event.listen(session_class, 'after_rollback', _after_rollback)
+
+
+def compute_counts(user_id, connection=None):
+    """Pełne przeliczenie liczników użytkownika (connection - w trakcie flush, np. ze zdarzeń mapperów)"""
+    executor = connection if connection is not None else db.session
+
+    def count(column, *conditions):
+        return executor.execute(select(func.count(column)).where(*conditions)).scalar()
+
+    return {
+        'UnreadNotifications': count(Notification.Id, Notification.UserId == user_id,
+                                     Notification.IsRead.isnot(True)),
+        'UnreadMessages': count(Message.Id, Message.RecipientUserId == user_id, Message.IsRead.isnot(True)),
+        'PendingTasks': count(Task.Id, Task.UserId == user_id, Task.Completed.isnot(True)),
+        'PendingReminders': count(Reminder.Id, Reminder.UserId == user_id, Reminder.FiredAt.is_(None)),
+    }
+
+
+def get_counters(user_id):
+    """Zwraca wiersz liczników użytkownika, tworząc go przy pierwszym odczycie"""
+    counter = UserCounter.query.get(user_id)
+    if counter:
+        return counter
+
+    # Upsert zamiast INSERT - wiersz utworzony w międzyczasie przez zapis (adjust_counter) zostaje
+    create_counter(db.session.connection(), user_id)
+    db.session.commit()
+    return db.session.get(UserCounter, user_id)
+
+
+def rebuild_counters():
+    """Przelicza wszystkie istniejące liczniki; zwraca liczbę poprawionych wierszy"""
+    fixed = 0
+    for counter in UserCounter.query.all():
+        counts = compute_counts(counter.UserId)
+        if any(getattr(counter, column) != value for column, value in counts.items()):
+            for column, value in counts.items():
+                setattr(counter, column, value)
+            counter.Version += 1
+            counter.UpdatedAt = datetime.utcnow()
+            fixed += 1
+    db.session.commit()
+    return fixed
+
+
+@register_job_type('rebuild_counters', 'Korekta liczników plakietek użytkowników')
+def rebuild_counters_job(params, job):
+    return {'fixed': rebuild_counters()}
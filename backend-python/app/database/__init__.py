@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 import os
 
 db = SQLAlchemy()
@@ -12,12 +12,22 @@ def init_database(app):
             User, Role, Customer, Task, Message, Activity,
             Reminder, Notification, Invoice, InvoiceItem, Group, Meeting,
             Note, Tag, Contract, Service, Payment, TaxRate,
-            Template, Setting, SystemLog, LoginHistory, CalendarEvent
+            Template, Setting, SystemLog, LoginHistory, CalendarEvent,
+            ScheduledJob, ReportArtifact, UserCounter, ChangeLog,
+            TableVersion, ImportJob, TaskAggregate,
+            CustomerMatchKey, CustomerDuplicate, DeletionJob
         )
         
         db.create_all()
         print("✅ Tabele w bazie danych zostały utworzone!")
         
+        # Uzupełnij kolumny i indeksy dodane do modeli po utworzeniu tabel
+        try:
+            apply_schema_updates()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Uwaga: Nie udało się zaktualizować schematu bazy danych: {e}")
+        
         # Utwórz widoki, procedury, funkcje i indeksy jeśli nie istnieją
         try:
             create_database_enhancements()
@@ -25,6 +35,51 @@ def init_database(app):
             print(f"⚠️  Uwaga: Nie udało się utworzyć rozszerzeń bazy danych: {e}")
             print("   Możesz utworzyć je ręcznie uruchamiając: database_enhancements.sql")
 
+def apply_schema_updates():
+    """
+    Dodaje do istniejących tabel kolumny i indeksy zadeklarowane w modelach.
+    db.create_all() tworzy tylko brakujące tabele, więc nowe kolumny (jako NULL; istniejące wiersze
+    dostają wartość domyślną z modelu) i indeksy trzeba dołożyć osobno (indeks o tych samych
+    kolumnach pod inną nazwą, np. idx_* z database_enhancements.sql, nie jest duplikowany). Kolumny kwot zmieniają typ na DECIMAL(18, 2) (app/money.py).
+    """
+    from app.money import migrate_money_columns
+    from app.query_plans import create_missing_indexes
+    
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=dialect)
+            db.session.execute(text(
+                f'ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} {column_type} NULL'
+            ))
+            print(f"🔧 Dodano kolumnę {table.name}.{column.name}")
+            backfill_column_default(table, column)
+        db.session.commit()
+
+    create_missing_indexes(db.engine)
+    migrate_money_columns(db.session, db.metadata)
+
+def backfill_column_default(table, column):
+    """
+    Uzupełnia nową kolumnę istniejących wierszy wartością domyślną z modelu (np. UpdatedAt = teraz),
+    żeby zapytania po tej kolumnie (eksport przyrostowy po czasie modyfikacji) nie pomijały starych danych.
+    """
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return
+    value = default.arg(None) if default.is_callable else default.arg
+    db.session.execute(table.update().where(column.is_(None)).values({column.name: value}))
+
 def create_database_enhancements():
     """Tworzy widoki, procedury, funkcje i indeksy w bazie danych"""
     
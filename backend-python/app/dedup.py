@@ -0,0 +1,481 @@
+"""
+Wykrywanie i scalanie duplikatów klientów.
+
+Klucze blokujące: znormalizowany NIP, e-mail małymi literami, numer telefonu (ostatnie 9 cyfr)
+i fonetyczny klucz nazwy (bez polskich znaków i form prawnych, np. "sp. z o.o."). Klucze są
+zapisywane w tabeli CustomerMatchKeys (PK: typ, wartość, klient) przy każdym zapisie klienta
+przez ORM (zdarzenia mapperów) oraz po imporcie masowym (index_customers).
+
+Zadanie `detect_customer_duplicates` porównuje tylko klientów z tym samym kluczem (blok), a nie
+każdego z każdym: przebieg pełny czyta klucze w kolejności indeksu stronami, przebieg przyrostowy
+- tylko bloki zmienione od poprzedniego przebiegu (indeks IndexedAt). Bloki większe niż
+MAX_BLOCK_SIZE (np. wspólny adres biura@) są pomijane. Pary są oceniane partiami (jedno zapytanie
+o dane klientów na partię) i zapisywane w CustomerDuplicates; odrzucone pary (Dismissed) nie
+wracają na listę.
+
+Scalanie (merge_customers) przepina faktury, zadania, notatki, kontrakty, spotkania i aktywności
+klientów źródłowych pojedynczymi UPDATE, przenosi tagi jednym INSERT ... SELECT i usuwa
+scalonych klientów. Funkcja nie wykonuje commit.
+"""
+import json
+import re
+import time
+import unicodedata
+from datetime import datetime
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from sqlalchemy import and_, bindparam, delete, event, exists, inspect, literal, or_, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from app.change_tracking import record_changed_where
+from app.database import db
+from app.http_cache import bump_table_version
+from app.models import (Activity, Contract, Customer, CustomerDuplicate, CustomerMatchKey, Invoice,
+                        Meeting, Note, Setting, Task)
+from app.models.customer import customer_tags
+from app.scheduler import register_job_type
+
+WATERMARK_KEY = 'DuplicatesScannedThrough'
+METRICS_KEY = 'DuplicatesLastRun'
+
+MAX_BLOCK_SIZE = 50
+KEY_PAGE_SIZE = 5000
+TOUCHED_PAGE_SIZE = 500
+PAIR_BATCH_SIZE = 1000
+MAX_MERGE_SOURCES = 50
+
+# Waga zgodności klucza w ocenie pary; nazwa liczy się proporcjonalnie do podobieństwa
+KEY_WEIGHTS = {'nip': 0.6, 'email': 0.4, 'phone': 0.3}
+NAME_WEIGHT = 0.5
+NAME_SIMILARITY = 0.85
+MIN_SCORE = 0.5
+
+# Modele wskazujące klienta kolumną CustomerId - przepinane przy scalaniu
+REFERENCING_MODELS = {
+    'invoices': Invoice,
+    'tasks': Task,
+    'notes': Note,
+    'contracts': Contract,
+    'meetings': Meeting,
+    'activities': Activity,
+}
+
+# Pola uzupełniane w kliencie docelowym z klientów scalanych, jeśli są puste
+FILL_FIELDS = ('Email', 'Phone', 'Company', 'Address', 'NIP', 'RepresentativeUserId',
+               'AssignedGroupId', 'AssignedUserId')
+
+KEY_FIELDS = ('Name', 'Email', 'NIP', 'Phone')
+
+# Formy prawne i skróty pomijane w nazwie
+NAME_STOP_WORDS = {
+    'sp', 'z', 'o', 'oo', 'zoo', 'spz', 'spzoo', 'sa', 'spj', 'spk', 'sc', 'spolka', 'ograniczona',
+    'odpowiedzialnoscia', 'akcyjna', 'jawna', 'komandytowa', 'cywilna', 'firma',
+    'ph', 'phu', 'fhu', 'ppuh', 'pphu',
+}
+
+# Polskie dwuznaki i głoski o podobnym brzmieniu (kolejność ma znaczenie)
+PHONETIC_RULES = (
+    ('ch', 'h'), ('rz', 'z'), ('sz', 's'), ('cz', 'c'), ('dz', 'c'), ('ck', 'k'),
+    ('ph', 'f'), ('th', 't'), ('w', 'v'), ('y', 'i'), ('x', 'ks'), ('q', 'k'),
+)
+
+
+class CustomerMergeError(ValueError):
+    """Nieprawidłowe żądanie scalenia klientów"""
+
+
+# --- Normalizacja ------------------------------------------------------------
+
+def _ascii(value):
+    value = value.lower().replace('ł', 'l').replace('ó', 'u')
+    return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+
+
+def normalize_name(value):
+    """Nazwa bez polskich znaków, interpunkcji i form prawnych"""
+    if not value:
+        return None
+    # Kropki usuwane przed podziałem - "S.A." i "sp.j." dają jedno słowo (sa, spj)
+    tokens = [token for token in re.split(r'[^a-z0-9]+', _ascii(value).replace('.', ''))
+              if token and token not in NAME_STOP_WORDS]
+    return ' '.join(tokens) or None
+
+
+def _phonetic_token(token):
+    if token.isdigit():
+        return token
+    for source, target in PHONETIC_RULES:
+        token = token.replace(source, target)
+    # Pierwsza litera i spółgłoski, bez powtórzeń
+    key = token[0] + re.sub(r'[aeiou]', '', token[1:])
+    return re.sub(r'(.)\1+', r'\1', key)
+
+
+def name_key(value):
+    """Fonetyczny klucz nazwy - niezależny od kolejności słów (np. "Jan Kowalski" = "Kovalski Jan")"""
+    name = normalize_name(value)
+    if not name:
+        return None
+    return ' '.join(sorted(_phonetic_token(token) for token in name.split()))[:191]
+
+
+def normalize_nip(value):
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == 10 else None
+
+
+def normalize_email(value):
+    value = (value or '').strip().lower()
+    return value[:191] if '@' in value else None
+
+
+def normalize_phone(value):
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-9:] if len(digits) >= 9 else None
+
+
+def match_keys(name, email, nip, phone):
+    """Klucze blokujące klienta: lista (typ, wartość)"""
+    keys = (('nip', normalize_nip(nip)), ('email', normalize_email(email)),
+            ('phone', normalize_phone(phone)), ('name', name_key(name)))
+    return [(key_type, value) for key_type, value in keys if value]
+
+
+# --- Utrzymanie kluczy -------------------------------------------------------
+
+def _key_rows(customers, now):
+    return [{'KeyType': key_type, 'KeyValue': value, 'CustomerId': customer_id, 'IndexedAt': now}
+            for customer_id, name, email, nip, phone in customers
+            for key_type, value in match_keys(name, email, nip, phone)]
+
+
+def _replace_keys(connection, customers, now):
+    table = CustomerMatchKey.__table__
+    connection.execute(delete(table).where(table.c.CustomerId.in_([row[0] for row in customers])))
+    rows = _key_rows(customers, now)
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def index_customers(condition=None, batch_size=KEY_PAGE_SIZE):
+    """
+    Przelicza klucze klientów spełniających condition (domyślnie wszystkich) - stronami po Id.
+    Dla zapisów z pominięciem ORM (import masowy). Zwraca liczbę przetworzonych klientów.
+    """
+    columns = (Customer.Id, Customer.Name, Customer.Email, Customer.NIP, Customer.Phone)
+    last_id, total = 0, 0
+    while True:
+        stmt = select(*columns).where(Customer.Id > last_id).order_by(Customer.Id).limit(batch_size)
+        if condition is not None:
+            stmt = stmt.where(condition)
+        customers = [tuple(row) for row in db.session.execute(stmt)]
+        if not customers:
+            return total
+        _replace_keys(db.session.connection(), customers, datetime.utcnow())
+        last_id, total = customers[-1][0], total + len(customers)
+
+
+def _key_values(target):
+    return (target.Id, target.Name, target.Email, target.NIP, target.Phone)
+
+
+def _after_insert(mapper, connection, target):
+    _replace_keys(connection, [_key_values(target)], datetime.utcnow())
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in KEY_FIELDS):
+        _replace_keys(connection, [_key_values(target)], datetime.utcnow())
+
+
+def _after_delete(mapper, connection, target):
+    _forget_customers(connection, [target.Id])
+
+
+def _forget_customers(connection, customer_ids):
+    keys, pairs = CustomerMatchKey.__table__, CustomerDuplicate.__table__
+    connection.execute(delete(keys).where(keys.c.CustomerId.in_(customer_ids)))
+    connection.execute(delete(pairs).where(or_(pairs.c.CustomerId.in_(customer_ids),
+                                               pairs.c.DuplicateCustomerId.in_(customer_ids))))
+
+
+event.listen(Customer, 'after_insert', _after_insert)
+event.listen(Customer, 'after_update', _after_update)
+event.listen(Customer, 'after_delete', _after_delete)
+
+
+# --- Bloki i ocena par -------------------------------------------------------
+
+def _group_blocks(rows, blocks):
+    """Grupuje kolejne wiersze (typ, wartość, klient) w bloki; blocks - stan bloku otwartego"""
+    for key_type, key_value, customer_id in rows:
+        if blocks['key'] != (key_type, key_value):
+            if blocks['key'] is not None:
+                yield blocks['key'], blocks['ids'], blocks['size']
+            blocks.update(key=(key_type, key_value), ids=[], size=0)
+        blocks['size'] += 1
+        if blocks['size'] <= MAX_BLOCK_SIZE:
+            blocks['ids'].append(customer_id)
+
+
+def iter_blocks(since=None, page_size=KEY_PAGE_SIZE):
+    """
+    Bloki (klucz, Id klientów, rozmiar) w kolejności klucza głównego CustomerMatchKeys.
+    since - tylko bloki z kluczem zapisanym później (przebieg przyrostowy).
+    Strony są pobierane w całości, więc między nimi można zapisywać wyniki.
+    """
+    table = CustomerMatchKey.__table__
+    columns = (table.c.KeyType, table.c.KeyValue, table.c.CustomerId)
+    blocks = {'key': None, 'ids': [], 'size': 0}
+
+    if since is None:
+        last = None
+        while True:
+            stmt = select(*columns).order_by(*columns).limit(page_size)
+            if last is not None:
+                stmt = stmt.where(tuple_(*columns) > tuple_(*last))
+            rows = [tuple(row) for row in db.session.execute(stmt)]
+            if not rows:
+                break
+            yield from _group_blocks(rows, blocks)
+            last = rows[-1]
+    else:
+        # Zmienione klucze w kolejności indeksu IndexedAt; blok odczytywany raz, w całości
+        order = (table.c.IndexedAt, table.c.CustomerId, table.c.KeyType)
+        visited, last = set(), None
+        while True:
+            stmt = select(*order, table.c.KeyValue).where(table.c.IndexedAt > since) \
+                .order_by(*order).limit(TOUCHED_PAGE_SIZE)
+            if last is not None:
+                stmt = stmt.where(tuple_(*order) > tuple_(*last))
+            page = [tuple(row) for row in db.session.execute(stmt)]
+            if not page:
+                break
+            last = page[-1][:3]
+            touched = {(key_type, key_value) for _, _, key_type, key_value in page} - visited
+            if not touched:
+                continue
+            visited.update(touched)
+            # OR równości zamiast (a, b) IN (...) - wyszukiwanie po kluczu głównym w każdej bazie
+            members = or_(*(and_(table.c.KeyType == key_type, table.c.KeyValue == key_value)
+                            for key_type, key_value in sorted(touched)))
+            rows = db.session.execute(select(*columns).where(members).order_by(*columns))
+            yield from _group_blocks([tuple(row) for row in rows], blocks)
+
+    if blocks['key'] is not None:
+        yield blocks['key'], blocks['ids'], blocks['size']
+
+
+def _profile(name, email, nip, phone):
+    return {'name': normalize_name(name), 'email': normalize_email(email),
+            'nip': normalize_nip(nip), 'phone': normalize_phone(phone)}
+
+
+def score_pair(first, second):
+    """Ocena pary (0-1) i lista zgodnych atrybutów - na podstawie znormalizowanych danych klientów"""
+    matched = [key for key in KEY_WEIGHTS if first[key] and first[key] == second[key]]
+    score = sum(KEY_WEIGHTS[key] for key in matched)
+    if first['name'] and second['name']:
+        similarity = SequenceMatcher(None, first['name'], second['name']).ratio()
+        if similarity >= NAME_SIMILARITY:
+            matched.append('name')
+            score += NAME_WEIGHT * similarity
+    if first['nip'] and second['nip'] and first['nip'] != second['nip']:
+        # Różne NIP - najpewniej różne firmy o podobnej nazwie
+        score *= 0.5
+    return min(round(score, 3), 1.0), matched
+
+
+def store_pairs(pairs, now=None):
+    """Ocenia pary (Id, Id) i zapisuje/aktualizuje/usuwa wpisy CustomerDuplicates; zwraca liczbę duplikatów"""
+    now = now or datetime.utcnow()
+    ids = {customer_id for pair in pairs for customer_id in pair}
+    profiles = {row[0]: _profile(*row[1:]) for row in db.session.execute(
+        select(Customer.Id, Customer.Name, Customer.Email, Customer.NIP, Customer.Phone).where(Customer.Id.in_(ids)))}
+
+    table = CustomerDuplicate.__table__
+    pair_columns = (table.c.CustomerId, table.c.DuplicateCustomerId)
+    existing = {(row[0], row[1]): row[2] for row in db.session.execute(
+        select(*pair_columns, table.c.Status).where(tuple_(*pair_columns).in_(pairs)))}
+
+    inserts, updates, stale = [], [], []
+    for pair in pairs:
+        if pair[0] not in profiles or pair[1] not in profiles:
+            continue
+        score, matched = score_pair(profiles[pair[0]], profiles[pair[1]])
+        status = existing.get(pair)
+        if score < MIN_SCORE:
+            if status == 'Open':
+                stale.append(pair)
+            continue
+        values = {'CustomerId': pair[0], 'DuplicateCustomerId': pair[1], 'Score': score,
+                  'MatchedOn': ','.join(matched)}
+        if status is None:
+            inserts.append(dict(values, Status='Open', DetectedAt=now))
+        elif status == 'Open':
+            updates.append({'c_id': pair[0], 'd_id': pair[1], 'c_score': score, 'c_matched': values['MatchedOn']})
+
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if updates:
+        db.session.execute(
+            update(table).where(table.c.CustomerId == bindparam('c_id'),
+                                table.c.DuplicateCustomerId == bindparam('d_id'))
+            .values(Score=bindparam('c_score'), MatchedOn=bindparam('c_matched')),
+            updates
+        )
+    if stale:
+        db.session.execute(delete(table).where(tuple_(*pair_columns).in_(stale)))
+    return len(inserts) + len(updates)
+
+
+def _get_setting(key):
+    return Setting.query.filter_by(Key=key).first()
+
+
+def _store_setting(key, value):
+    setting = _get_setting(key)
+    if not setting:
+        setting = Setting(Key=key)
+        db.session.add(setting)
+    setting.Value = value
+
+
+def detect_duplicates(full=False):
+    """
+    Wyszukuje pary duplikatów w blokach. Bez znacznika lub z full=True - wszystkie bloki,
+    w przeciwnym razie tylko bloki zmienione od poprzedniego przebiegu. Zatwierdza każdą partię
+    par osobno; zwraca metryki przebiegu.
+    """
+    started = time.monotonic()
+    scan_started = datetime.utcnow()
+    watermark = None if full else _get_setting(WATERMARK_KEY)
+    since = datetime.fromisoformat(watermark.Value) if watermark and watermark.Value else None
+
+    metrics = {'mode': 'incremental' if since else 'full', 'blocks': 0, 'skippedBlocks': 0,
+               'pairsScored': 0, 'duplicates': 0}
+    seen, pending = set(), []
+
+    def flush():
+        metrics['pairsScored'] += len(pending)
+        metrics['duplicates'] += store_pairs(pending)
+        db.session.commit()
+        pending.clear()
+
+    for _, customer_ids, size in iter_blocks(since):
+        if size < 2:
+            continue
+        if size > MAX_BLOCK_SIZE:
+            metrics['skippedBlocks'] += 1
+            continue
+        metrics['blocks'] += 1
+        for pair in combinations(sorted(customer_ids), 2):
+            # Para zgodna w kilku kluczach jest oceniana raz
+            if pair not in seen:
+                seen.add(pair)
+                pending.append(pair)
+        if len(pending) >= PAIR_BATCH_SIZE:
+            flush()
+    flush()
+
+    metrics['durationMs'] = int((time.monotonic() - started) * 1000)
+    _store_setting(WATERMARK_KEY, scan_started.isoformat())
+    _store_setting(METRICS_KEY, json.dumps(metrics))
+    db.session.commit()
+    return metrics
+
+
+@register_job_type('detect_customer_duplicates', 'Wykrywanie duplikatów klientów (porównania w blokach kluczy)')
+def detect_customer_duplicates_job(params, job):
+    if params.get('reindex'):
+        index_customers()
+        db.session.commit()
+    return detect_duplicates(full=params.get('full', False) or params.get('reindex', False))
+
+
+# --- Lista i scalanie --------------------------------------------------------
+
+def duplicate_page(min_score=MIN_SCORE, status='Open', limit=100, offset=0):
+    """Pary duplikatów od najwyższej oceny z podstawowymi danymi obu klientów"""
+    first, second = aliased(Customer), aliased(Customer)
+    rows = db.session.query(CustomerDuplicate, first, second) \
+        .join(first, first.Id == CustomerDuplicate.CustomerId) \
+        .join(second, second.Id == CustomerDuplicate.DuplicateCustomerId) \
+        .filter(CustomerDuplicate.Status == status, CustomerDuplicate.Score >= min_score) \
+        .order_by(CustomerDuplicate.Score.desc(), CustomerDuplicate.CustomerId, CustomerDuplicate.DuplicateCustomerId) \
+        .offset(offset).limit(limit).all()
+
+    def summary(customer):
+        return {'id': customer.Id, 'name': customer.Name, 'email': customer.Email,
+                'phone': customer.Phone, 'nip': customer.NIP, 'company': customer.Company}
+
+    return [dict(pair.to_dict(), customer=summary(customer), duplicate=summary(duplicate))
+            for pair, customer, duplicate in rows]
+
+
+def dismiss_pair(customer_id, duplicate_id):
+    """Oznacza parę jako niebędącą duplikatem; zwraca False, jeśli pary nie ma"""
+    first, second = sorted((customer_id, duplicate_id))
+    pair = db.session.get(CustomerDuplicate, (first, second))
+    if not pair:
+        return False
+    pair.Status = 'Dismissed'
+    return True
+
+
+def merge_customers(target_id, source_ids):
+    """
+    Scala klientów source_ids w kliencie target_id. Zwraca (klient docelowy, liczby przepiętych
+    wierszy per typ). Nie wykonuje commit.
+    """
+    source_ids = sorted({int(source_id) for source_id in source_ids})
+    if not source_ids:
+        raise CustomerMergeError('Podaj sourceIds - klientów do scalenia')
+    if len(source_ids) > MAX_MERGE_SOURCES:
+        raise CustomerMergeError(f'Jednorazowo można scalić maksymalnie {MAX_MERGE_SOURCES} klientów')
+    if target_id in source_ids:
+        raise CustomerMergeError('Klient docelowy nie może być scalany sam ze sobą')
+
+    target = db.session.get(Customer, target_id)
+    sources = Customer.query.filter(Customer.Id.in_(source_ids)).order_by(Customer.Id).all()
+    missing = set(source_ids) - {source.Id for source in sources}
+    if missing:
+        raise CustomerMergeError(f"Nie znaleziono klientów: {', '.join(map(str, sorted(missing)))}")
+
+    # Dziennik synchronizacji - wiersze zmieniane poza ORM
+    record_changed_where('invoices', Invoice.CustomerId.in_(source_ids))
+    record_changed_where('tasks', Task.CustomerId.in_(source_ids))
+
+    moved = {}
+    for name, model in REFERENCING_MODELS.items():
+        moved[name] = db.session.execute(
+            update(model).where(model.CustomerId.in_(source_ids)).values(CustomerId=target_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    # Tagi klientów scalanych, których klient docelowy jeszcze nie ma - jednym INSERT ... SELECT
+    source_tags = customer_tags.alias('SourceTags')
+    has_tag = exists().where(and_(customer_tags.c.CustomerId == target_id,
+                                  customer_tags.c.TagId == source_tags.c.TagId))
+    moved['tags'] = db.session.execute(customer_tags.insert().from_select(
+        ['CustomerId', 'TagId'],
+        select(literal(target_id), source_tags.c.TagId).where(
+            source_tags.c.CustomerId.in_(source_ids), ~has_tag).distinct()
+    )).rowcount
+    db.session.execute(delete(customer_tags).where(customer_tags.c.CustomerId.in_(source_ids)))
+    bump_table_version('CustomerTags')
+
+    for field in FILL_FIELDS:
+        if getattr(target, field) in (None, ''):
+            value = next((getattr(source, field) for source in sources if getattr(source, field) not in (None, '')), None)
+            if value is not None:
+                setattr(target, field, value)
+
+    # Relacje przepięte zapytaniami - obiekty w sesji mogą mieć nieaktualne kolekcje
+    db.session.flush()
+    db.session.expire_all()
+    for source in Customer.query.filter(Customer.Id.in_(source_ids)).all():
+        db.session.delete(source)
+    return target, moved
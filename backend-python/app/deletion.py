@@ -0,0 +1,380 @@
+"""
+Usuwanie klientów i użytkowników w tle.
+
+Usunięcie przez API nie ładuje już wszystkich zależnych wierszy do sesji (kaskady ORM):
+- encja dostaje znacznik DeletedAt w tej samej transakcji, w której powstaje zadanie usuwania
+  (DeletionJob) - od tej chwili zapytania ORM jej nie zwracają (warunek dokładany do każdego
+  SELECT w zdarzeniu do_orm_execute, pominięcie: execution_options(include_deleted=True)),
+- zależne wiersze usuwa (albo odpina - SET NULL) wątek tła krok po kroku, partiami
+  DELETION_BATCH_SIZE wierszy: na MySQL `DELETE ... WHERE ... LIMIT n`, na pozostałych bazach
+  przez wybór Id partii i `DELETE ... WHERE Id IN (...)`; każda partia to osobna transakcja
+  razem z postępem zadania,
+- na końcu usuwany jest sam wiersz klienta / użytkownika.
+
+Zapis zbiorczy pomija zdarzenia mapperów, więc dziennik zmian synchronizacji, liczniki plakietek,
+agregaty zadań i wersje tabel są aktualizowane jawnie. Zadania przerwane (np. restart procesu)
+wznawia zadanie harmonogramu `purge_deleted_entities` albo `flask --app app:create_app deletions run`.
+"""
+import json
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy import delete, event, func, or_, select, update
+from sqlalchemy.orm import with_loader_criteria
+from sqlalchemy.sql import Select
+
+from app.change_tracking import record_changed_where, record_changes
+from app.counters import adjust_counter
+from app.database import db
+from app.dedup import _forget_customers
+from app.http_cache import bump_table_version
+from app.log_storage import log_tables
+from app.models import (Activity, CalendarEvent, Contract, Customer, DeletionJob, ImportJob, Invoice,
+                        InvoiceItem, Meeting, Message, Note, Notification, Payment, Reminder,
+                        Task, TaskAggregate, User, UserCounter)
+from app.models.contract import contract_services, contract_tags
+from app.models.customer import customer_tags
+from app.models.group import user_groups
+from app.models.invoice import invoice_tags
+from app.models.meeting import meeting_tags
+from app.models.task import task_tags
+from app.scheduler import register_job_type
+from app.task_analytics import adjust_task_aggregates, task_deltas
+
+# Modele z miękkim usuwaniem - wiersze z DeletedAt są ukryte w zapytaniach ORM
+SOFT_DELETED_MODELS = (Customer, User)
+ENTITY_MODELS = {'customer': Customer, 'user': User}
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class DeletionError(ValueError):
+    """Encja nie może zostać usunięta (np. usuwanie jest już zaplanowane)"""
+
+
+# ---------------------------------------------------------------------------
+# Ukrywanie usuniętych wierszy
+# ---------------------------------------------------------------------------
+
+def _hide_deleted(execute_state):
+    """Dokłada warunek DeletedAt IS NULL do zapytań SELECT o klientów i użytkowników"""
+    if (not execute_state.is_select or execute_state.is_column_load or execute_state.is_relationship_load
+            or not isinstance(execute_state.statement, Select)
+            or execute_state.execution_options.get('include_deleted', False)):
+        return
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.DeletedAt.is_(None), include_aliases=True,
+                             propagate_to_loaders=False)
+        for model in SOFT_DELETED_MODELS
+    ))
+
+
+# ---------------------------------------------------------------------------
+# Kroki usuwania
+# ---------------------------------------------------------------------------
+
+# name - nazwa kroku w postępie, table - tabela kroku, where(entity_id) - warunek wierszy,
+# nullify - kolumna ustawiana na NULL zamiast usuwania, children - (tabela, kolumna klucza)
+# usuwane przed wierszami kroku, columns - kolumny pobierane dla after, after(rows) - aktualizacja
+# pochodnych (dziennik zmian, liczniki, agregaty) w transakcji partii
+PurgeStep = namedtuple('PurgeStep', ['name', 'table', 'where', 'nullify', 'children', 'columns', 'after'])
+
+
+def purge_step(name, model, where, nullify=None, children=(), columns=(), after=None):
+    return PurgeStep(name, model.__table__, where, nullify, tuple(children), tuple(columns), after)
+
+
+def _customer_invoices_deleted(rows):
+    record_changes('invoices', [row.Id for row in rows], 'delete')
+
+
+def _customer_tasks_detached(rows):
+    record_changed_where('tasks', Task.Id.in_([row.Id for row in rows]))
+
+
+def _user_messages_deleted(rows, user_id):
+    # Nieprzeczytane wiadomości od użytkownika znikają z plakietek pozostałych odbiorców
+    unread = Counter(row.RecipientUserId for row in rows
+                     if row.RecipientUserId != user_id and not row.IsRead)
+    connection = db.session.connection()
+    for recipient_id, count in sorted(unread.items()):
+        adjust_counter(connection, recipient_id, 'UnreadMessages', -count)
+
+
+def _user_tasks_deleted(rows):
+    adjust_task_aggregates(db.session.connection(), task_deltas(rows, -1))
+
+
+CUSTOMER_STEPS = (
+    purge_step('notes', Note, lambda customer_id: Note.CustomerId == customer_id),
+    purge_step('meetings', Meeting, lambda customer_id: Meeting.CustomerId == customer_id,
+               children=[(meeting_tags, 'MeetingId')]),
+    purge_step('contracts', Contract, lambda customer_id: Contract.CustomerId == customer_id,
+               children=[(contract_tags, 'ContractId'), (contract_services, 'ContractId')]),
+    purge_step('invoices', Invoice, lambda customer_id: Invoice.CustomerId == customer_id,
+               children=[(invoice_tags, 'InvoiceId'), (InvoiceItem.__table__, 'InvoiceId'),
+                         (Payment.__table__, 'InvoiceId')],
+               after=_customer_invoices_deleted),
+    purge_step('tasks', Task, lambda customer_id: Task.CustomerId == customer_id,
+               nullify='CustomerId', after=_customer_tasks_detached),
+    purge_step('activities', Activity, lambda customer_id: Activity.CustomerId == customer_id,
+               nullify='CustomerId'),
+)
+
+
+def _log_steps(name, table_name, nullify=None):
+    """
+    Kroki dla tabeli logów i jej tabel miesięcznych (app/log_storage.py). Tabele miesięczne i
+    partycjonowane tabele MySQL nie mają kluczy obcych - wiersze użytkownika usuwa ten krok.
+    """
+    steps = []
+    for table in log_tables(table_name):
+        steps.append(PurgeStep(name + table.name[len(table_name):], table,
+                               lambda uid, table=table: table.c.UserId == uid, nullify, (), (), None))
+    return steps
+
+
+def _user_steps(user_id):
+    return (
+        purge_step('messages', Message,
+                   lambda uid: or_(Message.SenderUserId == uid, Message.RecipientUserId == uid),
+                   columns=['RecipientUserId', 'IsRead'],
+                   after=lambda rows: _user_messages_deleted(rows, user_id)),
+        purge_step('tasks', Task, lambda uid: Task.UserId == uid,
+                   children=[(task_tags, 'TaskId')], columns=['UserId', 'AssignedGroupId', 'Completed'],
+                   after=_user_tasks_deleted),
+        purge_step('reminders', Reminder, lambda uid: Reminder.UserId == uid),
+        purge_step('notifications', Notification, lambda uid: Notification.UserId == uid),
+        purge_step('calendarEvents', CalendarEvent, lambda uid: CalendarEvent.UserId == uid),
+        *_log_steps('loginHistory', 'LoginHistory'),
+        purge_step('activities', Activity, lambda uid: Activity.UserId == uid),
+        purge_step('notes', Note, lambda uid: Note.UserId == uid),
+        purge_step('meetings', Meeting, lambda uid: Meeting.CreatedByUserId == uid, nullify='CreatedByUserId'),
+        *_log_steps('systemLogs', 'SystemLogs', nullify='UserId'),
+        purge_step('customers', Customer, lambda uid: Customer.RepresentativeUserId == uid,
+                   nullify='RepresentativeUserId'),
+        purge_step('imports', ImportJob, lambda uid: ImportJob.CreatedByUserId == uid,
+                   nullify='CreatedByUserId'),
+    )
+
+
+def steps_for(job):
+    return CUSTOMER_STEPS if job.EntityType == 'customer' else _user_steps(job.EntityId)
+
+
+def _finish_customer(customer_id):
+    db.session.execute(delete(customer_tags).where(customer_tags.c.CustomerId == customer_id))
+    _forget_customers(db.session.connection(), [customer_id])
+    db.session.execute(delete(Customer.__table__).where(Customer.__table__.c.Id == customer_id))
+    bump_table_version('CustomerTags')
+
+
+def _finish_user(user_id):
+    aggregates = TaskAggregate.__table__
+    db.session.execute(delete(user_groups).where(user_groups.c.UserId == user_id))
+    db.session.execute(delete(UserCounter.__table__).where(UserCounter.__table__.c.UserId == user_id))
+    db.session.execute(delete(aggregates).where(aggregates.c.ScopeType == 'user',
+                                                aggregates.c.ScopeId == user_id))
+    db.session.execute(delete(User.__table__).where(User.__table__.c.id == user_id))
+    bump_table_version('users', 'UserGroups')
+
+
+FINISHERS = {'customer': _finish_customer, 'user': _finish_user}
+
+
+# ---------------------------------------------------------------------------
+# Zaplanowanie usunięcia
+# ---------------------------------------------------------------------------
+
+def schedule_deletion(entity, requested_by=None):
+    """
+    Oznacza klienta lub użytkownika jako usuniętego i kolejkuje usunięcie zależności.
+    Zatwierdzenie transakcji i uruchomienie (start_deletion) należy do wywołującego.
+    """
+    entity_type = 'customer' if isinstance(entity, Customer) else 'user'
+    if entity.DeletedAt is not None:
+        raise DeletionError('Usuwanie jest już zaplanowane')
+
+    entity.DeletedAt = datetime.now()
+    entity_id = entity.Id if entity_type == 'customer' else entity.id
+    job = DeletionJob(EntityType=entity_type, EntityId=entity_id, Status='queued',
+                      ProcessedRows=0, RequestedByUserId=requested_by)
+    db.session.add(job)
+
+    if entity_type == 'customer':
+        # Klienci synchronizacji i kandydaci na duplikaty tracą klienta od razu
+        record_changes('customers', [entity_id], 'delete')
+        _forget_customers(db.session.connection(), [entity_id])
+    else:
+        bump_table_version('users')
+    db.session.flush()
+    # Obiekt z mapy tożsamości nie może wrócić z Session.get - kolejne odczyty idą do bazy
+    db.session.expunge(entity)
+    return job
+
+
+# ---------------------------------------------------------------------------
+# Wykonanie
+# ---------------------------------------------------------------------------
+
+def _count(step, entity_id):
+    return db.session.execute(select(func.count()).select_from(step.table).where(step.where(entity_id))
+                              .execution_options(include_deleted=True)).scalar()
+
+
+def _purge_batch(step, entity_id, batch_size):
+    """Usuwa (odpina) jedną partię wierszy kroku; zwraca liczbę wierszy partii"""
+    table = step.table
+    condition = step.where(entity_id)
+    if db.session.get_bind().dialect.name == 'mysql' and not step.children and not step.after:
+        statement = delete(table) if step.nullify is None else update(table).values({step.nullify: None})
+        return db.session.execute(statement.where(condition).with_dialect_options(mysql_limit=batch_size)).rowcount
+
+    rows = db.session.execute(
+        select(table.c.Id, *(table.c[column] for column in step.columns))
+        .where(condition).order_by(table.c.Id).limit(batch_size)
+        .execution_options(include_deleted=True)
+    ).all()
+    if not rows:
+        return 0
+    ids = [row.Id for row in rows]
+    for child, column in step.children:
+        db.session.execute(delete(child).where(child.c[column].in_(ids)))
+    if step.nullify is None:
+        db.session.execute(delete(table).where(table.c.Id.in_(ids)))
+    else:
+        db.session.execute(update(table).where(table.c.Id.in_(ids)).values({step.nullify: None}))
+    if step.after:
+        step.after(rows)
+    return len(rows)
+
+
+def _tracked_children(steps):
+    return sorted({child.name for step in steps for child, _ in step.children
+                   if child.name.endswith('Tags')})
+
+
+def purge_entity(job, batch_size=None):
+    """Usuwa zależności encji krok po kroku i partiami, a na końcu samą encję"""
+    batch_size = batch_size or current_app.config.get('DELETION_BATCH_SIZE', 1000)
+    steps = steps_for(job)
+    counts = json.loads(job.StepCounts) if job.StepCounts else {}
+
+    if job.TotalRows is None:
+        job.TotalRows = sum(_count(step, job.EntityId) for step in steps) + 1
+        db.session.commit()
+
+    for step in steps:
+        job.CurrentStep = step.name
+        while True:
+            processed = _purge_batch(step, job.EntityId, batch_size)
+            if processed:
+                counts[step.name] = counts.get(step.name, 0) + processed
+                job.ProcessedRows += processed
+                job.StepCounts = json.dumps(counts)
+            db.session.commit()
+            if processed < batch_size:
+                break
+
+    # Tabele tagów są śledzone przez wersje tabel (ETag słowników)
+    changed_tags = _tracked_children(steps)
+    if changed_tags:
+        bump_table_version(*changed_tags)
+
+    job.CurrentStep = 'entity'
+    FINISHERS[job.EntityType](job.EntityId)
+    job.ProcessedRows += 1
+    db.session.commit()
+    return counts
+
+
+def claim_deletion(job_id):
+    """Oznacza usuwanie jako uruchomione; zwraca False, jeśli inny worker już je przetwarza"""
+    result = db.session.execute(
+        update(DeletionJob)
+        .where(DeletionJob.Id == job_id, DeletionJob.Status == 'queued')
+        .values(Status='running', StartedAt=datetime.now())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_deletion(job_id, batch_size=None):
+    """Wykonuje zakolejkowane usuwanie i zapisuje jego status"""
+    if not claim_deletion(job_id):
+        return None
+
+    job = db.session.get(DeletionJob, job_id)
+    try:
+        purge_entity(job, batch_size)
+        job.Status = 'completed'
+        job.CurrentStep = None
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(DeletionJob, job_id)
+        job.Status = 'failed'
+        job.Error = str(e)
+    job.FinishedAt = datetime.now()
+    db.session.commit()
+    return job
+
+
+def run_queued_deletions(retry_failed=False):
+    """Wykonuje zakolejkowane (i opcjonalnie nieudane) usuwania; zwraca ich liczbę"""
+    if retry_failed:
+        db.session.execute(update(DeletionJob).where(DeletionJob.Status == 'failed')
+                           .values(Status='queued', Error=None))
+        db.session.commit()
+    job_ids = db.session.execute(select(DeletionJob.Id).where(DeletionJob.Status == 'queued')
+                                 .order_by(DeletionJob.Id)).scalars().all()
+    return sum(1 for job_id in job_ids if run_deletion(job_id))
+
+
+def _run_in_thread(app, job_id):
+    with app.app_context():
+        try:
+            run_deletion(job_id)
+        except Exception as e:
+            print(f"⚠️  Błąd usuwania {job_id}: {e}")
+        finally:
+            db.session.remove()
+
+
+def start_deletion(app, job_id):
+    """Uruchamia usuwanie w wątku tła albo od razu (DELETION_RUN_ASYNC=false)"""
+    if not app.config.get('DELETION_RUN_ASYNC', True):
+        run_deletion(job_id)
+        return None
+    thread = threading.Thread(target=_run_in_thread, args=(app, job_id),
+                              name=f'crm-deletion-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+@register_job_type('purge_deleted_entities', 'Dokończenie usuwania klientów i użytkowników w tle')
+def purge_deleted_entities_job(params, job):
+    return {'processed': run_queued_deletions(retry_failed=bool(params.get('retryFailed')))}
+
+
+def init_deletion(app):
+    """Rejestruje ukrywanie usuniętych wierszy i komendy CLI usuwania"""
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'do_orm_execute', _hide_deleted):
+        event.listen(session_class, 'do_orm_execute', _hide_deleted)
+
+    @app.cli.group('deletions')
+    def deletions_cli():
+        """Usuwanie klientów i użytkowników w tle"""
+
+    @deletions_cli.command('run')
+    @click.argument('job_id', type=int, required=False)
+    @click.option('--retry-failed', is_flag=True, help='Ponów także nieudane usuwania')
+    def run_command(job_id, retry_failed):
+        """Wykonuje wskazane usuwanie albo wszystkie zakolejkowane"""
+        if job_id:
+            job = run_deletion(job_id)
+            click.echo(f'Usuwanie {job_id}: {job.Status if job else "nie jest w kolejce"}')
+        else:
+            click.echo(f'Wykonane usuwania: {run_queued_deletions(retry_failed)}')
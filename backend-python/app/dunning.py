@@ -0,0 +1,154 @@
+"""
+Wykrywanie przeterminowanych faktur (zadanie `overdue_invoices`).
+
+Zadanie przetwarza tylko faktury, którym termin płatności minął od poprzedniego uruchomienia:
+nieopłacone z DueDate w przedziale (znacznik, teraz] - zapytanie po indeksie (IsPaid, DueDate),
+bez skanowania całej tabeli. Znacznik (OverdueCheckedThrough) i metryki ostatniego przebiegu
+(OverdueLastRun) są zapisywane w tabeli Settings w tej samej transakcji co zmiany.
+
+Dla nowych przeterminowanych faktur zadanie:
+- ustawia Status='Overdue' i OverdueSince jednym UPDATE (i dopisuje je do dziennika synchronizacji),
+- tworzy powiadomienia dla członków grupy faktury (bez grupy - dla wystawiającego)
+  jednym INSERT ... SELECT (app/fanout.py).
+
+Status jest też przeliczany przy każdym zapisie faktury przez ORM (np. opłacenie), więc lista
+GET /api/Invoices/overdue to wyszukiwanie po indeksie (Status, DueDate).
+"""
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, case, event, false, func, literal, or_, select, union, update
+
+from app.change_tracking import record_changed_where
+from app.database import db
+from app.fanout import insert_notifications
+from app.models import Invoice, Setting, User
+from app.models.group import user_groups
+from app.models.invoice import invoice_status
+from app.scheduler import register_job_type
+
+WATERMARK_KEY = 'OverdueCheckedThrough'
+METRICS_KEY = 'OverdueLastRun'
+
+# Warunek zgodny z indeksem (IsPaid, DueDate) - równość zamiast IS NOT TRUE
+UNPAID = or_(Invoice.IsPaid == false(), Invoice.IsPaid.is_(None))
+
+
+def _set_status(mapper, connection, target):
+    target.Status = invoice_status(target.IsPaid, target.DueDate)
+    if target.Status == 'Overdue':
+        target.OverdueSince = target.OverdueSince or target.DueDate
+    else:
+        target.OverdueSince = None
+
+
+event.listen(Invoice, 'before_insert', _set_status)
+event.listen(Invoice, 'before_update', _set_status)
+
+
+def _get_setting(key):
+    return Setting.query.filter_by(Key=key).first()
+
+
+def _store_setting(key, value):
+    setting = _get_setting(key)
+    if not setting:
+        setting = Setting(Key=key)
+        db.session.add(setting)
+    setting.Value = value
+
+
+def backfill_statuses(now):
+    """Ustawia status faktur bez statusu (istniejące bazy, import masowy); bez powiadomień"""
+    return db.session.execute(
+        update(Invoice)
+        .where(Invoice.Status.is_(None))
+        .values(
+            Status=case(
+                (Invoice.IsPaid.is_(True), 'Paid'),
+                (Invoice.DueDate <= now, 'Overdue'),
+                else_='Pending'
+            ),
+            OverdueSince=case(
+                (UNPAID & (Invoice.DueDate <= now), Invoice.DueDate),
+                else_=None
+            )
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def overdue_recipients(window):
+    """
+    SELECT (Message, UserId) - członkowie grupy faktury lub wystawiający fakturę bez grupy.
+    Usunięci użytkownicy (DeletedAt) są pomijani jawnym złączeniem z users - INSERT ... SELECT
+    nie przechodzi przez ukrywanie usuniętych wierszy.
+    """
+    message = literal('Faktura ') + Invoice.Number + literal(' jest przeterminowana')
+    group_members = select(message.label('Message'), user_groups.c.UserId.label('UserId')) \
+        .select_from(Invoice).join(user_groups, user_groups.c.GroupId == Invoice.AssignedGroupId) \
+        .join(User, and_(User.id == user_groups.c.UserId, User.DeletedAt.is_(None))) \
+        .where(window)
+    creators = select(message.label('Message'), Invoice.CreatedByUserId.label('UserId')) \
+        .join(User, and_(User.id == Invoice.CreatedByUserId, User.DeletedAt.is_(None))) \
+        .where(window, Invoice.AssignedGroupId.is_(None))
+    return union(group_members, creators)
+
+
+def detect_overdue_invoices(now=None, notify=True):
+    """
+    Oznacza faktury przeterminowane od ostatniego przebiegu i powiadamia odpowiedzialnych.
+    Zwraca metryki przebiegu; wykonuje commit.
+    """
+    started = time.monotonic()
+    now = now or datetime.now()
+    watermark_setting = _get_setting(WATERMARK_KEY)
+    watermark = datetime.fromisoformat(watermark_setting.Value) if watermark_setting and watermark_setting.Value else None
+
+    backfilled = backfill_statuses(now)
+
+    newly_overdue = notifications = 0
+    if watermark is None:
+        # Pierwszy przebieg - oznaczenie zaległych faktur bez powiadomień
+        window, notify = UNPAID & (Invoice.DueDate <= now), False
+    elif watermark < now:
+        window = UNPAID & (Invoice.DueDate > watermark) & (Invoice.DueDate <= now)
+    else:
+        window = None
+
+    if window is not None:
+        newly_overdue = db.session.execute(
+            update(Invoice).where(window)
+            .values(Status='Overdue', OverdueSince=Invoice.DueDate)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if newly_overdue:
+            record_changed_where('invoices', window)
+        if newly_overdue and notify:
+            notifications = insert_notifications(overdue_recipients(window), datetime.utcnow())
+
+    metrics = {
+        'checkedFrom': watermark.isoformat() if watermark else None,
+        'checkedThrough': now.isoformat(),
+        'newlyOverdue': newly_overdue,
+        'backfilled': backfilled,
+        'notifications': notifications,
+        'totalOverdue': db.session.query(func.count(Invoice.Id)).filter(Invoice.Status == 'Overdue').scalar(),
+        'durationMs': int((time.monotonic() - started) * 1000),
+    }
+    if window is not None:
+        _store_setting(WATERMARK_KEY, now.isoformat())
+    _store_setting(METRICS_KEY, json.dumps(metrics))
+    db.session.commit()
+    return metrics
+
+
+def get_last_run_metrics():
+    setting = _get_setting(METRICS_KEY)
+    return json.loads(setting.Value) if setting and setting.Value else None
+
+
+@register_job_type('overdue_invoices', 'Wykrywanie przeterminowanych faktur i powiadomienia (windykacja)')
+def overdue_invoices_job(params, job):
+    return detect_overdue_invoices(notify=params.get('notify', True))
@@ -0,0 +1,634 @@
+"""
+Rejestr schematów eksportu (CSV/Excel/PDF).
+
+Każda encja deklaruje raz swoje kolumny: klucz z parametru ?columns=, polski nagłówek,
+wyrażenie SQL, potrzebne JOIN-y oraz typ wartości. Na tej podstawie budowane jest
+jedno zapytanie SQL, a typ kolumny wybiera formatowanie (CSV/PDF) i typowany zapis
+komórek w Excelu (liczby, daty, wartości logiczne zamiast tekstu).
+"""
+import csv
+import io
+from datetime import datetime, date, timezone
+from decimal import Decimal
+import xlsxwriter
+from sqlalchemy import DateTime, Integer, bindparam, text
+
+# pyarrow jest opcjonalny - bez niego formaty parquet/arrow są niedostępne
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Typy kolumn
+INT = 'int'
+TEXT = 'text'
+MONEY = 'money'
+BOOL = 'bool'
+DATETIME = 'datetime'
+DATE = 'date'
+
+DATETIME_FORMAT = '%d.%m.%Y %H:%M'
+DATE_FORMAT = '%d.%m.%Y'
+
+# Formaty kolumnowe zapisywane paczkami (record batches) prosto z kursora
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+ARROW_BATCH_SIZE = 10000
+
+
+def group_concat(expression, dialect):
+    """GROUP_CONCAT zgodny z dialektem bazy (MySQL produkcyjnie, SQLite w testach)"""
+    if dialect == 'mysql':
+        return f"GROUP_CONCAT({expression} SEPARATOR ', ')"
+    if dialect == 'postgresql':
+        return f"STRING_AGG({expression}, ', ')"
+    return f"GROUP_CONCAT({expression}, ', ')"
+
+
+def concat(dialect, *parts):
+    """Konkatenacja napisów zgodna z dialektem bazy"""
+    if dialect == 'mysql':
+        return f"CONCAT({', '.join(parts)})"
+    return ' || '.join(parts)
+
+
+class ExportColumn:
+    """
+    Kolumna eksportu.
+
+    sql   - wyrażenie SQL lub funkcja (dialekt) -> wyrażenie SQL
+    joins - nazwy JOIN-ów zadeklarowanych w schemacie, których wymaga kolumna
+    requires_relations - kolumna dostępna tylko przy includeRelations=true
+    """
+
+    def __init__(self, key, header, sql, kind=TEXT, joins=(), requires_relations=False):
+        self.key = key
+        self.header = header
+        self.sql = sql
+        self.kind = kind
+        self.joins = tuple(joins)
+        self.requires_relations = requires_relations
+
+    def expression(self, dialect):
+        return self.sql(dialect) if callable(self.sql) else self.sql
+
+
+class ExportSchema:
+    """Schemat eksportu jednej encji"""
+
+    def __init__(self, name, source, columns, default_columns, order_by, joins=None, where=None,
+                 title='', sheet_name='', filename='', pdf_layout='table',
+                 section_title=None, section_hidden=('id',),
+                 id_column=None, modified_column=None, group_column=None):
+        self.name = name
+        self.source = source
+        self.columns = {column.key: column for column in columns}
+        self.default_columns = default_columns
+        self.order_by = order_by
+        self.joins = joins or {}
+        # Warunek dokładany zawsze (np. pominięcie usuniętych klientów - zapytania tekstowe omijają ORM)
+        self.where = where
+        self.title = title
+        self.sheet_name = sheet_name
+        self.filename = filename
+        # 'table' - jedna tabela z wierszami, 'sections' - osobna tabela dla każdego rekordu
+        self.pdf_layout = pdf_layout
+        self.section_title = section_title
+        self.section_hidden = set(section_hidden)
+        # Kolumny eksportu przyrostowego: ?sinceId= po ID, ?since= po czasie modyfikacji wiersza
+        self.id_column = id_column
+        self.modified_column = modified_column
+        # Kolumna grupy decydująca o widoczności wierszy (app/visibility.py)
+        self.group_column = group_column
+
+    def resolve_columns(self, requested, include_relations=False):
+        """Zwraca listę kolumn do eksportu (nieznane i niedostępne kolumny są pomijane)"""
+        keys = [key.strip() for key in requested if key and key.strip()] or self.default_columns
+        resolved = []
+        for key in keys:
+            column = self.columns.get(key)
+            if column is None or (column.requires_relations and not include_relations):
+                continue
+            resolved.append(column)
+        if not resolved:
+            resolved = [self.columns[key] for key in self.default_columns
+                        if not self.columns[key].requires_relations]
+        return resolved
+
+    def compile(self, columns, dialect, where=None, order_by=None, extra_select=None):
+        """
+        Buduje jedno zapytanie SQL dla wybranych kolumn.
+        extra_select - dodatkowe wyrażenia na końcu wiersza (np. kursor eksportu przyrostowego)
+        """
+        select_parts = [f'{column.expression(dialect)} AS {column.key}' for column in columns]
+        select_parts += list(extra_select or [])
+        needed_joins = {join for column in columns for join in column.joins}
+        # Zachowaj kolejność JOIN-ów ze schematu (kolejne JOIN-y mogą zależeć od poprzednich)
+        join_parts = [clause for join_name, clause in self.joins.items() if join_name in needed_joins]
+
+        sql = f"SELECT {', '.join(select_parts)} FROM {self.source}"
+        if join_parts:
+            sql += ' ' + ' '.join(join_parts)
+        conditions = [condition for condition in (self.where, where) if condition]
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(f'({condition})' for condition in conditions)
+        sql += f' ORDER BY {order_by or self.order_by}'
+        return text(sql)
+
+
+def _to_datetime(value):
+    """SQLite zwraca daty z zapytań tekstowych jako napisy - zamień je na datetime"""
+    if isinstance(value, (datetime, date)):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', ''))
+        except ValueError:
+            return None
+    return None
+
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    try:
+        return Decimal(str(value))
+    except Exception:
+        return None
+
+
+def format_value(value, kind, for_pdf=False):
+    """Formatuje wartość do postaci tekstowej (CSV i PDF)"""
+    if value is None:
+        return ''
+    if kind == BOOL:
+        return 'Tak' if value in (True, 1, '1') else 'Nie'
+    if kind in (DATETIME, DATE):
+        parsed = _to_datetime(value)
+        if parsed is None:
+            return str(value)
+        return parsed.strftime(DATETIME_FORMAT if kind == DATETIME else DATE_FORMAT)
+    if kind == MONEY:
+        amount = _to_decimal(value)
+        if amount is None:
+            return str(value)
+        formatted = f'{amount:.2f}'
+        return f'{formatted} PLN' if for_pdf else formatted
+    return str(value)
+
+
+def write_csv(rows, columns):
+    """Zapisuje wiersze do CSV, zwraca zawartość pliku"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.header for column in columns])
+    kinds = [column.kind for column in columns]
+    for row in rows:
+        writer.writerow([format_value(value, kind) for value, kind in zip(row, kinds)])
+    return buffer.getvalue()
+
+
+def write_xlsx(rows, columns, sheet_name):
+    """Zapisuje wiersze do XLSX z typowanymi komórkami, zwraca zawartość pliku"""
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {'in_memory': True})
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    header_format = workbook.add_format({'bold': True})
+    money_format = workbook.add_format({'num_format': '#,##0.00'})
+    datetime_format = workbook.add_format({'num_format': 'dd.mm.yyyy hh:mm'})
+    date_format = workbook.add_format({'num_format': 'dd.mm.yyyy'})
+
+    def write_int(row_idx, col_idx, value):
+        try:
+            worksheet.write_number(row_idx, col_idx, int(value))
+        except (TypeError, ValueError):
+            worksheet.write_string(row_idx, col_idx, str(value))
+
+    def write_money(row_idx, col_idx, value):
+        amount = _to_decimal(value)
+        if amount is None:
+            worksheet.write_string(row_idx, col_idx, str(value))
+        else:
+            worksheet.write_number(row_idx, col_idx, float(amount), money_format)
+
+    def write_bool(row_idx, col_idx, value):
+        worksheet.write_boolean(row_idx, col_idx, value in (True, 1, '1'))
+
+    def make_date_writer(cell_format):
+        def write_date(row_idx, col_idx, value):
+            parsed = _to_datetime(value)
+            if parsed is None:
+                worksheet.write_string(row_idx, col_idx, str(value))
+            else:
+                if not isinstance(parsed, datetime):
+                    parsed = datetime(parsed.year, parsed.month, parsed.day)
+                worksheet.write_datetime(row_idx, col_idx, parsed, cell_format)
+        return write_date
+
+    def write_text(row_idx, col_idx, value):
+        worksheet.write_string(row_idx, col_idx, str(value))
+
+    writers = {
+        INT: write_int,
+        MONEY: write_money,
+        BOOL: write_bool,
+        DATETIME: make_date_writer(datetime_format),
+        DATE: make_date_writer(date_format),
+        TEXT: write_text,
+    }
+    column_writers = [writers[column.kind] for column in columns]
+
+    worksheet.write_row(0, 0, [column.header for column in columns], header_format)
+    for row_idx, row in enumerate(rows, 1):
+        for col_idx, (value, writer) in enumerate(zip(row, column_writers)):
+            if value is not None:
+                writer(row_idx, col_idx, value)
+
+    # Szerokość kolumn dopasowana do typu (daty i kwoty nie mieszczą się w domyślnej)
+    for col_idx, column in enumerate(columns):
+        if column.kind in (DATETIME, DATE, MONEY):
+            worksheet.set_column(col_idx, col_idx, 16)
+
+    workbook.close()
+    return buffer.getvalue()
+
+
+def parse_since(schema, since=None, since_id=None):
+    """
+    Parametry eksportu przyrostowego: ?sinceId=<ID> - wiersze o większym ID (tylko nowe rekordy),
+    ?since=<data ISO> lub kursor <data ISO>_<ID> z nagłówka X-Export-Next-Since - wiersze
+    zmienione później (UpdatedAt), przy tej samej chwili modyfikacji rozstrzyga ID.
+    Zwraca (warunek WHERE, parametry jako bindparam, ORDER BY, wyrażenia kursora, tryb).
+    Parametry są typowane, żeby data była porównywana w formacie zapisu kolumny.
+    """
+    if since_id is not None:
+        if not schema.id_column:
+            raise ValueError('Ten eksport nie obsługuje parametru sinceId')
+        if not str(since_id).isdigit():
+            raise ValueError(f'Nieprawidłowa wartość sinceId: {since_id}')
+        return (f'{schema.id_column} > :since_id', [bindparam('since_id', int(since_id), type_=Integer())],
+                f'{schema.id_column} ASC', [schema.id_column], 'id')
+
+    if not schema.modified_column or not schema.id_column:
+        raise ValueError('Ten eksport nie obsługuje parametru since - użyj sinceId')
+    timestamp, _, last_id = since.partition('_')
+    if timestamp.isdigit():
+        # Sama liczba nie jest datą - eksport po ID wymaga jawnego sinceId=
+        raise ValueError(f'Nieprawidłowa wartość since: {since} (eksport po ID: sinceId=)')
+    try:
+        since_date = datetime.fromisoformat(timestamp.replace('Z', ''))
+        last_id = int(last_id or 0)
+    except ValueError:
+        raise ValueError(f'Nieprawidłowa wartość since: {since}')
+    if since_date.tzinfo is not None:
+        # UpdatedAt jest zapisywany w UTC bez strefy czasowej
+        since_date = since_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    modified, id_column = schema.modified_column, schema.id_column
+    where = f'({modified} > :since_ts OR ({modified} = :since_ts AND {id_column} > :since_id))'
+    params = [bindparam('since_ts', since_date, type_=DateTime()), bindparam('since_id', last_id, type_=Integer())]
+    return where, params, f'{modified} ASC, {id_column} ASC', [modified, id_column], 'timestamp'
+
+
+class CursorTracker:
+    """
+    Zapamiętuje największy kursor w eksportowanych wierszach (ostatnie kolumny wiersza):
+    ID w trybie 'id', parę (czas modyfikacji, ID) w trybie 'timestamp'.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.value = None
+
+    def update(self, rows):
+        for row in rows:
+            if self.mode == 'timestamp':
+                modified = _to_datetime(row[-2])
+                if modified is None or row[-1] is None:
+                    continue
+                current = (modified, int(row[-1]))
+            else:
+                current = row[-1]
+                if current is None:
+                    continue
+            if self.value is None or current > self.value:
+                self.value = current
+
+    def track(self, rows):
+        """Przepuszcza wiersze, aktualizując kursor"""
+        for row in rows:
+            self.update((row,))
+            yield row
+
+    def next_since(self):
+        if self.value is None:
+            return None
+        if self.mode == 'timestamp':
+            modified, last_id = self.value
+            return f'{modified.isoformat()}_{last_id}'
+        return str(self.value)
+
+
+def arrow_type(kind):
+    """Typ Arrow dla typu kolumny eksportu"""
+    return {
+        INT: pa.int64(),
+        MONEY: pa.decimal128(18, 2),
+        BOOL: pa.bool_(),
+        DATETIME: pa.timestamp('ms'),
+        DATE: pa.timestamp('ms'),
+        TEXT: pa.string(),
+    }[kind]
+
+
+def _arrow_value(value, kind):
+    if value is None:
+        return None
+    if kind == INT:
+        return int(value)
+    if kind == MONEY:
+        amount = _to_decimal(value)
+        return amount.quantize(Decimal('0.01')) if amount is not None else None
+    if kind == BOOL:
+        return value in (True, 1, '1')
+    if kind in (DATETIME, DATE):
+        parsed = _to_datetime(value)
+        if parsed is not None and not isinstance(parsed, datetime):
+            parsed = datetime(parsed.year, parsed.month, parsed.day)
+        return parsed
+    return str(value)
+
+
+def write_arrow(result, columns, format_type, batch_size=ARROW_BATCH_SIZE, on_batch=None):
+    """
+    Zapisuje wynik zapytania jako Parquet lub strumień Arrow IPC.
+    Wiersze są pobierane z kursora paczkami (fetchmany), więc w pamięci jest
+    tylko jedna paczka danych źródłowych naraz.
+    on_batch - opcjonalna funkcja wywoływana z każdą paczką surowych wierszy
+    """
+    if pa is None:
+        raise ValueError(f'Format {format_type} wymaga biblioteki pyarrow')
+
+    schema = pa.schema([pa.field(column.key, arrow_type(column.kind)) for column in columns])
+    kinds = [column.kind for column in columns]
+    sink = io.BytesIO()
+    if format_type == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    try:
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            if on_batch:
+                on_batch(rows)
+            arrays = [
+                pa.array([_arrow_value(row[index], kind) for row in rows], type=schema.field(index).type)
+                for index, kind in enumerate(kinds)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
+    return sink.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Rejestr schematów
+# ---------------------------------------------------------------------------
+
+EXPORT_SCHEMAS = {}
+
+# Literały SQL dla "username (email)"
+QUOTED_OPEN = "' ('"
+QUOTED_CLOSE = "')'"
+
+
+def register_schema(schema):
+    EXPORT_SCHEMAS[schema.name] = schema
+    return schema
+
+
+def get_schema(name):
+    if name not in EXPORT_SCHEMAS:
+        raise ValueError(f'Nieznany eksport: {name}')
+    return EXPORT_SCHEMAS[name]
+
+
+register_schema(ExportSchema(
+    name='meetings',
+    source='Meetings m',
+    group_column='m.AssignedGroupId',
+    joins={'customer': 'LEFT JOIN Customers c ON m.CustomerId = c.Id AND c.DeletedAt IS NULL'},
+    columns=[
+        ExportColumn('id', 'ID', 'm.Id', INT),
+        ExportColumn('topic', 'Temat', 'm.Topic'),
+        ExportColumn('customerId', 'ID klienta', 'm.CustomerId', INT),
+        ExportColumn('customerName', 'Nazwa klienta', 'c.Name', joins=['customer']),
+        ExportColumn('scheduledAt', 'Data spotkania', 'm.ScheduledAt', DATETIME),
+    ],
+    default_columns=['id', 'topic', 'customerName', 'scheduledAt'],
+    order_by='m.ScheduledAt DESC',
+    title='Raport spotkań',
+    sheet_name='Spotkania',
+    filename='spotkania',
+    id_column='m.Id',
+    modified_column='m.UpdatedAt',
+))
+
+register_schema(ExportSchema(
+    name='tasks',
+    source='Tasks t',
+    joins={
+        'customer': 'LEFT JOIN Customers c ON t.CustomerId = c.Id AND c.DeletedAt IS NULL',
+        'user': 'LEFT JOIN users u ON t.UserId = u.id AND u.DeletedAt IS NULL',
+    },
+    columns=[
+        ExportColumn('id', 'ID', 't.Id', INT),
+        ExportColumn('title', 'Tytuł', 't.Title'),
+        ExportColumn('description', 'Opis', 't.Description'),
+        ExportColumn('customerName', 'Klient', 'c.Name', joins=['customer']),
+        ExportColumn('assignedUser', 'Przypisany użytkownik', 'u.username', joins=['user']),
+        ExportColumn('dueDate', 'Termin', 't.DueDate', DATETIME),
+        ExportColumn('completed', 'Ukończone', 't.Completed', BOOL),
+        # Tasks nie ma kolumny Priority, użyj Completed jako zamiennik
+        ExportColumn('priority', 'Priorytet', "CASE WHEN t.Completed = 1 THEN 'Niski' ELSE 'Wysoki' END"),
+        # Tasks nie ma kolumny CreatedAt, użyj DueDate jako zamiennik
+        ExportColumn('createdAt', 'Data utworzenia', 't.DueDate', DATETIME),
+        ExportColumn('tags', 'Tagi', lambda dialect: (
+            f"(SELECT {group_concat('tag.Name', dialect)} FROM Tags tag "
+            f"JOIN TaskTags tt ON tag.Id = tt.TagId WHERE tt.TaskId = t.Id)")),
+    ],
+    default_columns=['id', 'title', 'description', 'customerName', 'assignedUser', 'dueDate', 'completed', 'createdAt'],
+    order_by='t.DueDate DESC',
+    title='Raport zadań',
+    sheet_name='Zadania',
+    filename='zadania',
+    id_column='t.Id',
+))
+
+register_schema(ExportSchema(
+    name='notes',
+    source='Notes n',
+    joins={
+        'user': 'LEFT JOIN users u ON n.UserId = u.id AND u.DeletedAt IS NULL',
+        'customer': 'LEFT JOIN Customers c ON n.CustomerId = c.Id AND c.DeletedAt IS NULL',
+    },
+    columns=[
+        ExportColumn('id', 'ID', 'n.Id', INT),
+        ExportColumn('content', 'Treść', 'n.Content'),
+        ExportColumn('customerName', 'Klient', 'c.Name', joins=['customer']),
+        ExportColumn('createdAt', 'Data utworzenia', 'n.CreatedAt', DATETIME),
+        ExportColumn('createdBy', 'Utworzony przez', 'u.username', joins=['user']),
+    ],
+    default_columns=['id', 'content', 'customerName', 'createdAt', 'createdBy'],
+    order_by='n.CreatedAt DESC',
+    title='Raport notatek',
+    sheet_name='Notatki',
+    filename='notatki',
+    id_column='n.Id',
+    modified_column='n.UpdatedAt',
+))
+
+register_schema(ExportSchema(
+    name='customers',
+    source='Customers c',
+    where='c.DeletedAt IS NULL',
+    group_column='c.AssignedGroupId',
+    joins={
+        'group': 'LEFT JOIN `Groups` g ON c.AssignedGroupId = g.Id',
+        'user': 'LEFT JOIN users u ON c.AssignedUserId = u.id AND u.DeletedAt IS NULL',
+        'representative': 'LEFT JOIN users u_rep ON c.RepresentativeUserId = u_rep.id AND u_rep.DeletedAt IS NULL',
+    },
+    columns=[
+        ExportColumn('id', 'ID', 'c.Id', INT),
+        ExportColumn('name', 'Nazwa', 'c.Name'),
+        ExportColumn('email', 'Email', 'c.Email'),
+        ExportColumn('phone', 'Telefon', 'c.Phone'),
+        ExportColumn('company', 'Firma', 'c.Company'),
+        ExportColumn('address', 'Adres', 'c.Address'),
+        ExportColumn('nip', 'NIP', 'c.NIP'),
+        ExportColumn('representative', 'Przedstawiciel', lambda dialect: (
+            f"CASE WHEN u_rep.id IS NOT NULL THEN {concat(dialect, 'u_rep.username', QUOTED_OPEN, 'u_rep.email', QUOTED_CLOSE)} "
+            "ELSE NULL END"), joins=['representative']),
+        ExportColumn('createdAt', 'Data utworzenia', 'c.CreatedAt', DATE),
+        ExportColumn('assignedGroup', 'Przypisana grupa', 'g.Name', joins=['group'], requires_relations=True),
+        ExportColumn('assignedUser', 'Przypisany użytkownik', 'u.username', joins=['user'], requires_relations=True),
+        ExportColumn('tags', 'Tagi', lambda dialect: (
+            f"(SELECT {group_concat('t.Name', dialect)} FROM Tags t "
+            f"JOIN CustomerTags ct ON t.Id = ct.TagId WHERE ct.CustomerId = c.Id)")),
+        ExportColumn('totalInvoiceValue', 'Wartość faktur',
+                     '(SELECT SUM(inv.TotalAmount) FROM Invoices inv WHERE inv.CustomerId = c.Id)', MONEY),
+        ExportColumn('paidInvoiceValue', 'Wartość opłaconych faktur',
+                     '(SELECT SUM(inv.TotalAmount) FROM Invoices inv WHERE inv.CustomerId = c.Id AND inv.IsPaid = 1)', MONEY),
+    ],
+    default_columns=['id', 'name', 'email', 'phone', 'company', 'address', 'tags'],
+    order_by='c.Id',
+    title='Raport klientów',
+    sheet_name='Klienci',
+    filename='klienci',
+    id_column='c.Id',
+    modified_column='c.UpdatedAt',
+    pdf_layout='sections',
+    section_title=lambda row: row.get('name') or 'Klient',
+))
+
+register_schema(ExportSchema(
+    name='invoices',
+    source='Invoices i',
+    group_column='i.AssignedGroupId',
+    joins={
+        'customer': 'LEFT JOIN Customers c ON i.CustomerId = c.Id AND c.DeletedAt IS NULL',
+        # Grupa faktury - ta sama kolumna, po której działa widoczność (group_column)
+        'group': 'LEFT JOIN `Groups` g ON i.AssignedGroupId = g.Id',
+        'user': 'LEFT JOIN users u ON i.CreatedByUserId = u.id AND u.DeletedAt IS NULL',
+    },
+    columns=[
+        ExportColumn('id', 'ID', 'i.Id', INT),
+        ExportColumn('number', 'Numer faktury', 'i.Number'),
+        ExportColumn('customerName', 'Klient', 'c.Name', joins=['customer']),
+        ExportColumn('customerEmail', 'Email klienta', 'c.Email', joins=['customer']),
+        ExportColumn('totalAmount', 'Kwota', 'i.TotalAmount', MONEY),
+        ExportColumn('isPaid', 'Opłacona', 'i.IsPaid', BOOL),
+        ExportColumn('issuedAt', 'Data wystawienia', 'i.IssuedAt', DATE),
+        ExportColumn('dueDate', 'Termin płatności', 'i.DueDate', DATE),
+        ExportColumn('assignedGroup', 'Grupa', 'g.Name', joins=['group']),
+        ExportColumn('createdBy', 'Wystawiona przez', 'u.username', joins=['user']),
+        ExportColumn('tags', 'Tagi', lambda dialect: (
+            f"(SELECT {group_concat('t.Name', dialect)} FROM Tags t "
+            f"JOIN CustomerTags ct ON t.Id = ct.TagId WHERE ct.CustomerId = i.CustomerId)")),
+        ExportColumn('items', 'Przedmioty', lambda dialect: (
+            f"(SELECT {group_concat('ii.Description', dialect)} FROM InvoiceItems ii WHERE ii.InvoiceId = i.Id)")),
+    ],
+    default_columns=['id', 'number', 'customerName', 'customerEmail', 'totalAmount', 'isPaid',
+                     'issuedAt', 'dueDate', 'assignedGroup', 'createdBy'],
+    order_by='i.IssuedAt DESC',
+    title='Raport faktur',
+    sheet_name='Faktury',
+    filename='faktury',
+    id_column='i.Id',
+    modified_column='i.UpdatedAt',
+    pdf_layout='sections',
+    section_title=lambda row: (f"Faktura {row['number']}" if row.get('number')
+                               else f"Faktura - {row['customerName']}" if row.get('customerName')
+                               else 'Faktura'),
+))
+
+register_schema(ExportSchema(
+    name='payments',
+    source='Payments p',
+    joins={
+        'invoice': 'LEFT JOIN Invoices i ON p.InvoiceId = i.Id',
+        'customer': 'LEFT JOIN Customers c ON i.CustomerId = c.Id AND c.DeletedAt IS NULL',
+    },
+    columns=[
+        ExportColumn('id', 'ID', 'p.Id', INT),
+        ExportColumn('invoiceId', 'ID faktury', 'p.InvoiceId', INT),
+        ExportColumn('invoiceNumber', 'Numer faktury', 'i.Number', joins=['invoice']),
+        ExportColumn('customerName', 'Klient', 'c.Name', joins=['invoice', 'customer']),
+        ExportColumn('amount', 'Kwota', 'p.Amount', MONEY),
+        ExportColumn('paidAt', 'Data płatności', 'p.PaidAt', DATETIME),
+    ],
+    default_columns=['id', 'invoiceNumber', 'customerName', 'amount', 'paidAt'],
+    order_by='p.PaidAt DESC',
+    title='Raport płatności',
+    sheet_name='Płatności',
+    filename='platnosci',
+    id_column='p.Id',
+    modified_column='p.UpdatedAt',
+))
+
+register_schema(ExportSchema(
+    name='contracts',
+    source='Contracts co',
+    group_column='co.ResponsibleGroupId',
+    joins={'customer': 'LEFT JOIN Customers c ON co.CustomerId = c.Id AND c.DeletedAt IS NULL'},
+    columns=[
+        ExportColumn('id', 'ID', 'co.Id', INT),
+        ExportColumn('title', 'Tytuł', 'co.Title'),
+        ExportColumn('contractNumber', 'Numer umowy', 'co.ContractNumber'),
+        ExportColumn('customerId', 'ID klienta', 'co.CustomerId', INT),
+        ExportColumn('customerName', 'Klient', 'c.Name', joins=['customer']),
+        ExportColumn('placeOfSigning', 'Miejsce podpisania', 'co.PlaceOfSigning'),
+        ExportColumn('signedAt', 'Data podpisania', 'co.SignedAt', DATE),
+        ExportColumn('startDate', 'Data rozpoczęcia', 'co.StartDate', DATE),
+        ExportColumn('endDate', 'Data zakończenia', 'co.EndDate', DATE),
+        ExportColumn('netAmount', 'Kwota netto', 'co.NetAmount', MONEY),
+        ExportColumn('paymentTermDays', 'Termin płatności (dni)', 'co.PaymentTermDays', INT),
+        ExportColumn('scopeOfServices', 'Zakres usług', 'co.ScopeOfServices'),
+    ],
+    default_columns=['id', 'title', 'contractNumber', 'customerId', 'netAmount', 'signedAt'],
+    order_by='co.SignedAt DESC',
+    title='Raport umów',
+    sheet_name='Umowy',
+    filename='umowy',
+    id_column='co.Id',
+    modified_column='co.UpdatedAt',
+    pdf_layout='sections',
+    section_title=lambda row: (row.get('title') or
+                               (f"Umowa {row['contractNumber']}" if row.get('contractNumber') else 'Umowa')),
+    section_hidden=('id', 'customerId'),
+))
@@ -0,0 +1,112 @@
+"""
+Rozsyłanie powiadomienia do wielu odbiorców (członkowie grup, role, wszyscy użytkownicy).
+
+Odbiorcy są wyznaczani jednym zapytaniem (UserGroups / roles / users), a powiadomienia
+zapisywane jednym INSERT ... SELECT - bez pętli po użytkownikach i bez commitów per wiersz.
+Liczniki nieprzeczytanych powiadomień i dziennik synchronizacji są aktualizowane również
+zapytaniami zbiorowymi. Funkcja nie wykonuje commit; połączeni klienci dostają zdarzenie push
+po zatwierdzeniu transakcji (kolejka outboxa).
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, func, literal, or_, select, true, update
+
+from app.change_tracking import record_inserted
+from app.counters import create_counter
+from app.database import db
+from app.models import Notification, Role, User, UserCounter
+from app.models.group import user_groups
+from app.outbox import PUSH_KEY
+from app.push import hub
+
+
+def recipients_query(group_ids=None, role_names=None, user_ids=None, all_users=False, exclude_user_id=None):
+    """
+    SELECT Id odbiorców (bez duplikatów - jeden warunek OR na tabeli users). Zapytanie trafia do
+    INSERT ... SELECT, który nie przechodzi przez ukrywanie usuniętych (app/deletion.py), stąd jawny
+    warunek DeletedAt.
+    """
+    conditions = []
+    if all_users:
+        conditions.append(true())
+    if group_ids:
+        conditions.append(User.id.in_(select(user_groups.c.UserId).where(user_groups.c.GroupId.in_(group_ids))))
+    if role_names:
+        conditions.append(User.role_id.in_(select(Role.id).where(Role.name.in_(role_names))))
+    if user_ids:
+        conditions.append(User.id.in_(user_ids))
+    if not conditions:
+        raise ValueError('Nie wskazano odbiorców (groupIds, roles, userIds lub all)')
+
+    query = select(User.id).where(or_(*conditions), User.DeletedAt.is_(None))
+    if exclude_user_id:
+        query = query.where(User.id != exclude_user_id)
+    return query
+
+
+def insert_notifications(source, now):
+    """
+    Zapisuje powiadomienia z zapytania source (kolumny Message, UserId) jednym INSERT ... SELECT.
+    Wszystkie wiersze dostają CreatedAt=now - po nim, odbiorcy i treści (indeks UserId, CreatedAt)
+    rozpoznawane są wiersze tej operacji; samo Id > max(Id) objęłoby równoległe transakcje.
+    Zwraca liczbę utworzonych powiadomień.
+    """
+    # Pełne sekundy - DATETIME w MySQL nie przechowuje części ułamkowej, porównanie musi się zgadzać
+    now = now.replace(microsecond=0)
+    # Dolna granica (odczyt bez blokad) odcina wcześniejsze powiadomienia z tej samej sekundy
+    last_id = db.session.query(func.max(Notification.Id)).scalar() or 0
+    table = Notification.__table__
+    rows = source.subquery()
+    count = db.session.execute(table.insert().from_select(
+        [table.c.Message, table.c.IsRead, table.c.CreatedAt, table.c.UserId],
+        select(rows.c.Message, literal(False), literal(now), rows.c.UserId)
+    )).rowcount
+    if not count:
+        return 0
+
+    # Odbiorcy bez wiersza licznika - tworzony z pełnego przeliczenia (obejmuje już te powiadomienia)
+    counters = UserCounter.__table__
+    missing = db.session.execute(
+        select(rows.c.UserId, func.count()).where(~select(counters.c.UserId)
+                                                 .where(counters.c.UserId == rows.c.UserId).exists())
+        .group_by(rows.c.UserId)
+    ).all()
+    connection = db.session.connection()
+    for user_id, user_count in missing:
+        create_counter(connection, user_id, {'UnreadNotifications': user_count})
+
+    # Pozostałe liczniki zwiększane o liczbę powiadomień odbiorcy - jeden UPDATE ze skorelowanym podzapytaniem
+    per_user = select(func.count()).select_from(rows).where(rows.c.UserId == counters.c.UserId).scalar_subquery()
+    db.session.execute(
+        update(counters)
+        .where(counters.c.UserId.in_(select(rows.c.UserId)),
+               counters.c.UserId.notin_([user_id for user_id, _ in missing]))
+        .values(UnreadNotifications=counters.c.UnreadNotifications + per_user,
+                Version=counters.c.Version + 1, UpdatedAt=now)
+    )
+    created = db.session.execute(
+        select(Notification.Id, Notification.UserId).distinct()
+        .join(rows, and_(rows.c.UserId == Notification.UserId, rows.c.Message == Notification.Message))
+        .where(Notification.Id > last_id, Notification.CreatedAt == now)
+        .order_by(Notification.Id)
+    ).all()
+    record_inserted('notifications', created)
+
+    # Push tylko do użytkowników połączonych z tym procesem
+    connected = hub.connected_user_ids()
+    pushed = [notification_id for notification_id, user_id in created if user_id in connected]
+    if pushed:
+        events = db.session.info.setdefault(PUSH_KEY, [])
+        events.extend((notification.UserId, 'notification', notification.to_dict()) for notification in
+                      db.session.execute(select(Notification).where(Notification.Id.in_(pushed))
+                                         .order_by(Notification.Id)).scalars())
+    return count
+
+
+def fan_out_notification(message, group_ids=None, role_names=None, user_ids=None, all_users=False,
+                         exclude_user_id=None):
+    """Tworzy powiadomienie dla każdego odbiorcy; zwraca liczbę odbiorców"""
+    recipients = recipients_query(group_ids, role_names, user_ids, all_users, exclude_user_id)
+    source = select(literal(message).label('Message'), User.id.label('UserId')) \
+        .where(User.id.in_(recipients.scalar_subquery()))
+    return insert_notifications(source, datetime.utcnow())
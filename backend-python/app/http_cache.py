@@ -0,0 +1,233 @@
+"""
+Warunkowe cache'owanie odpowiedzi HTTP dla danych słownikowych (usługi, role, grupy, tagi, szablony).
+
+- Każda śledzona tabela ma wersję w TableVersions, zwiększaną w tej samej transakcji co zapis
+  (zdarzenie sesji after_flush - także dla tabel asocjacyjnych, np. CustomerTags). Zapisy przez
+  surowy SQL zgłaszają zmianę przez bump_table_version().
+- Dekorator @cached_response(tables=...) liczy silny ETag z wersji tabel i adresu żądania.
+  Przy zgodnym If-None-Match zwraca 304 bez wykonywania zapytań widoku.
+- Wyrenderowane odpowiedzi są trzymane w pamięci procesu (LRU); wpisy zależne od zmienionej
+  tabeli są usuwane po zatwierdzeniu transakcji.
+- Nagłówek Cache-Control zależy od blueprintu (BLUEPRINT_CACHE_CONTROL).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import request, make_response, g
+from sqlalchemy import event, inspect, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db
+from app.models import TableVersion
+
+# Tabele, których wersje są śledzone
+TRACKED_TABLES = {
+    'Services', 'Roles', 'users', 'Groups', 'Templates',
+    'Tags', 'CustomerTags', 'InvoiceTags', 'ContractTags', 'TaskTags', 'MeetingTags',
+    'UserGroups',
+}
+
+# Polityka Cache-Control per blueprint (domyślnie: zawsze rewalidacja)
+BLUEPRINT_CACHE_CONTROL = {
+    'services': 'private, max-age=60, must-revalidate',
+    'templates': 'private, max-age=60, must-revalidate',
+    'groups': 'private, no-cache',
+    'tags': 'private, no-cache',
+    'admin': 'private, no-cache',
+}
+DEFAULT_CACHE_CONTROL = 'private, no-cache'
+
+RESPONSE_CACHE_SIZE = 256
+
+
+class ResponseCache:
+    """Pamięć wyrenderowanych odpowiedzi (LRU) z unieważnianiem po tabelach"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, tables, body, mimetype):
+        with self._lock:
+            self._entries[key] = {'tables': set(tables), 'body': body, 'mimetype': mimetype}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry['tables'] & tables]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+# ---------------------------------------------------------------------------
+# Wersje tabel
+# ---------------------------------------------------------------------------
+
+def _bump(connection, table_names):
+    table = TableVersion.__table__
+    now = datetime.utcnow()
+    for table_name in table_names:
+        result = connection.execute(
+            update(table).where(table.c.TableName == table_name)
+            .values(Version=table.c.Version + 1, UpdatedAt=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(TableName=table_name, Version=2, UpdatedAt=now))
+
+
+def bump_table_version(*table_names):
+    """Zgłasza zmianę tabel zapisanych z pominięciem ORM (np. surowym INSERT/DELETE)"""
+    _bump(db.session.connection(), table_names)
+    db.session.info.setdefault('changed_tables', set()).update(table_names)
+
+
+def _changed_tables(session):
+    """Śledzone tabele zmienione we flushu - także tabele asocjacyjne relacji many-to-many"""
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        mapper = state.mapper
+        is_modified = obj in session.new or obj in session.deleted or session.is_modified(obj, include_collections=False)
+        for table in mapper.tables:
+            if table.name in TRACKED_TABLES and is_modified:
+                changed.add(table.name)
+        for relationship in mapper.relationships:
+            if relationship.secondary is None or relationship.secondary.name not in TRACKED_TABLES:
+                continue
+            if obj in session.deleted or state.attrs[relationship.key].history.has_changes():
+                changed.add(relationship.secondary.name)
+    return changed
+
+
+def _before_flush(session, flush_context, instances):
+    # Zbiór liczony przed flushem - po flushu historia atrybutów jest już wyczyszczona
+    session.info.setdefault('pending_tables', set()).update(_changed_tables(session))
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop('pending_tables', set())
+    if pending:
+        _bump(session.connection(), sorted(pending))
+        session.info.setdefault('changed_tables', set()).update(pending)
+
+
+def _after_commit(session):
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        response_cache.invalidate(changed)
+
+
+def _after_rollback(session):
+    session.info.pop('pending_tables', None)
+    session.info.pop('changed_tables', None)
+
+
+def get_table_versions(table_names):
+    rows = db.session.query(TableVersion.TableName, TableVersion.Version) \
+        .filter(TableVersion.TableName.in_(table_names)).all()
+    versions = {name: version for name, version in rows}
+    return [(name, versions.get(name, 0)) for name in sorted(table_names)]
+
+
+def ensure_table_versions():
+    """Tworzy brakujące wiersze wersji śledzonych tabel"""
+    existing = {name for (name,) in db.session.query(TableVersion.TableName).all()}
+    for table_name in sorted(TRACKED_TABLES - existing):
+        db.session.add(TableVersion(TableName=table_name, Version=1, UpdatedAt=datetime.utcnow()))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+# ---------------------------------------------------------------------------
+# Dekorator odpowiedzi
+# ---------------------------------------------------------------------------
+
+def compute_etag(tables, vary_user=False):
+    parts = [request.endpoint or '', request.full_path]
+    parts.extend(f'{name}:{version}' for name, version in get_table_versions(tables))
+    if vary_user:
+        parts.append(f"user:{getattr(g, 'user_id', '')}")
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _finish(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = BLUEPRINT_CACHE_CONTROL.get(request.blueprint, DEFAULT_CACHE_CONTROL)
+    return response
+
+
+def cached_response(tables, vary_user=False):
+    """
+    Dekorator widoku GET z danymi zależnymi tylko od podanych tabel.
+    vary_user=True - odpowiedź zależy od użytkownika (np. sprawdzenie uprawnień w widoku).
+    Umieszczany pod @require_auth, aby autoryzacja była sprawdzana zawsze.
+    """
+    tables = tuple(tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            etag = compute_etag(tables, vary_user)
+            if request.if_none_match.contains(etag):
+                return _finish(make_response('', 304), etag)
+
+            cached = response_cache.get(etag)
+            if cached:
+                response = make_response(cached['body'], 200)
+                response.mimetype = cached['mimetype']
+                response.headers['X-Cache'] = 'HIT'
+                return _finish(response, etag)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response_cache.set(etag, tables, response.get_data(), response.mimetype)
+            response.headers['X-Cache'] = 'MISS'
+            return _finish(response, etag)
+        return wrapper
+    return decorator
+
+
+def init_http_cache(app):
+    """Rejestruje zdarzenia sesji i tworzy brakujące wersje tabel"""
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'after_flush', _after_flush):
+        event.listen(session_class, 'before_flush', _before_flush)
+        event.listen(session_class, 'after_flush', _after_flush)
+        event.listen(session_class, 'after_commit', _after_commit)
+        event.listen(session_class, 'after_rollback', _after_rollback)
+
+    with app.app_context():
+        try:
+            ensure_table_versions()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Uwaga: Nie udało się zainicjalizować wersji tabel: {e}")
@@ -0,0 +1,809 @@
+"""
+Masowy import klientów, usług i faktur z plików CSV/XLSX.
+
+Plik jest czytany strumieniowo i przetwarzany partiami (IMPORT_BATCH_SIZE wierszy):
+- walidacja wierszy partii,
+- rozwiązywanie odwołań (opiekunowie, grupy, tagi, klienci, usługi) jednym zapytaniem IN
+  na partię - wyniki są zapamiętywane na czas całego importu,
+- zapis przez executemany i jeden commit na partię (razem z postępem); Id nowych wierszy potrzebne
+  do powiązań są odczytywane jednym zapytaniem po zapisie.
+
+Błędne wiersze nie przerywają importu - trafiają do raportu błędów CSV (numer wiersza, błąd,
+oryginalne wartości). Zapis masowy pomija zdarzenia mapperów, więc dziennik zmian
+synchronizacji i wersje tabel słownikowych są aktualizowane jawnie.
+
+Import wykonuje wątek tła (IMPORT_RUN_ASYNC=true) albo osobny proces:
+`flask --app app:create_app imports run`.
+"""
+import csv
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+import click
+from flask import current_app
+from sqlalchemy import func, insert, or_, select, update
+
+from app.change_tracking import record_inserted
+from app.dedup import index_customers
+from app.database import db
+from app.http_cache import bump_table_version
+from app.money import from_grosze, line_amounts
+from app.models import Customer, Group, ImportJob, Invoice, InvoiceItem, Service, Tag, User
+from app.models.invoice import invoice_status
+from app.models.customer import customer_tags
+
+try:
+    import openpyxl
+except ImportError:  # Import XLSX jest opcjonalny
+    openpyxl = None
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+TAG_SEPARATOR = '|'
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+DEFAULT_TAX_RATE = Decimal('0.23')
+# Rozmiar listy IN przy przeliczaniu kluczy duplikatów nowych klientów
+IN_CHUNK_SIZE = 1000
+
+IMPORTERS = {}
+
+
+class ImportFileError(ValueError):
+    """Plik importu nie może zostać przetworzony (format, brak wymaganych kolumn)"""
+
+
+def register_importer(entity_type):
+    """Dekorator rejestrujący klasę importu dla typu encji"""
+    def decorator(cls):
+        cls.entity_type = entity_type
+        IMPORTERS[entity_type] = cls
+        return cls
+    return decorator
+
+
+def get_importers():
+    return [{'entityType': name, 'columns': list(cls.columns), 'required': list(cls.required)}
+            for name, cls in sorted(IMPORTERS.items())]
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in IMPORT_FORMATS:
+        raise ImportFileError(f"Nieobsługiwany format pliku. Dozwolone: {', '.join(IMPORT_FORMATS)}")
+    if extension == 'xlsx' and openpyxl is None:
+        raise ImportFileError('Import XLSX wymaga biblioteki openpyxl')
+    return extension
+
+
+def get_import_dir():
+    directory = current_app.config.get('IMPORT_DIR') or os.path.join(current_app.root_path, 'uploads', 'imports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+# ---------------------------------------------------------------------------
+# Odczyt plików
+# ---------------------------------------------------------------------------
+
+def _normalize_header(name):
+    return re.sub(r'[\s_\-]', '', str(name or '')).lower()
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _text(value):
+    """Wartość tekstowa - liczby całkowite z arkusza (np. telefon 500600700.0) bez części ułamkowej"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _open_csv(path):
+    handle = open(path, newline='', encoding='utf-8-sig')
+    sample = handle.read(64 * 1024)
+    handle.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return handle, csv.reader(handle, dialect)
+
+
+def count_rows(path, file_format):
+    """Liczba wierszy danych (bez nagłówka) - szybki przebieg bez parsowania wartości"""
+    if file_format == 'xlsx':
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    handle, reader = _open_csv(path)
+    with handle:
+        return max(sum(1 for _ in reader) - 1, 0)
+
+
+def iter_file_rows(path, file_format):
+    """
+    Generator: najpierw lista nagłówków, potem krotki (numer_wiersza, wartości).
+    Numer wiersza liczony od 1 razem z nagłówkiem - tak jak w arkuszu.
+    """
+    if file_format == 'xlsx':
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            yield list(next(rows, None) or [])
+            for number, values in enumerate(rows, start=2):
+                yield number, list(values)
+        finally:
+            workbook.close()
+        return
+
+    handle, reader = _open_csv(path)
+    with handle:
+        yield next(reader, None) or []
+        for number, values in enumerate(reader, start=2):
+            yield number, values
+
+
+def iter_records(headers, rows, columns):
+    """Mapuje wiersze na słowniki pól importu (kolumny rozpoznawane po nazwie lub aliasie)"""
+    aliases = {_normalize_header(alias): field
+               for field, names in columns.items() for alias in (field, *names)}
+    mapping = [aliases.get(_normalize_header(header)) for header in headers]
+    for number, values in rows:
+        if not any(_clean(value) is not None for value in values):
+            continue  # Pusty wiersz
+        record = {'_row': number, '_values': values}
+        for field, value in zip(mapping, values):
+            if field:
+                record[field] = _clean(value)
+        yield record
+
+
+def iter_units(records, group_by=None):
+    """Jednostki zapisu: pojedyncze wiersze albo kolejne wiersze o tej samej wartości group_by"""
+    if not group_by:
+        for record in records:
+            yield [record]
+        return
+    unit = []
+    for record in records:
+        if unit and record.get(group_by) != unit[0].get(group_by):
+            yield unit
+            unit = []
+        unit.append(record)
+    if unit:
+        yield unit
+
+
+def iter_chunks(units, batch_size):
+    chunk, size = [], 0
+    for unit in units:
+        chunk.append(unit)
+        size += len(unit)
+        if size >= batch_size:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Parsowanie wartości
+# ---------------------------------------------------------------------------
+
+def parse_decimal(value):
+    if value is None or isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    text = str(value).replace(' ', '').replace('\xa0', '')
+    if ',' in text and '.' not in text:
+        text = text.replace(',', '.')
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f'nieprawidłowa liczba: {value}')
+
+
+def parse_tax_rate(value):
+    """Stawka VAT jako ułamek: akceptuje 0.23, 23 oraz 23%"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    rate = parse_decimal(text.rstrip('%'))
+    if text.endswith('%') or rate > 1:
+        rate = rate / 100
+    if rate < 0 or rate > 1:
+        raise ValueError(f'nieprawidłowa stawka VAT: {value}')
+    return rate
+
+
+def parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    for date_format in ('%d.%m.%Y', '%d.%m.%Y %H:%M'):
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f'nieprawidłowa data: {value}')
+
+
+def parse_bool(value):
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    return str(value).strip().lower() in ('1', 'true', 'tak', 'yes', 't', 'y')
+
+
+def parse_int(value):
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'nieprawidłowa liczba całkowita: {value}')
+    if number != number.to_integral_value():
+        raise ValueError(f'nieprawidłowa liczba całkowita: {value}')
+    return int(number)
+
+
+# ---------------------------------------------------------------------------
+# Importy encji
+# ---------------------------------------------------------------------------
+
+class Importer:
+    """
+    Bazowa klasa importu. Podklasy definiują kolumny (pole -> aliasy nagłówków),
+    prepare(jednostki) -> (rekordy do zapisu, błędy) oraz write(rekordy).
+    Błąd to krotka (wiersz, komunikat, oryginalne wartości).
+    """
+    entity_type = None
+    columns = {}
+    required = ()
+    group_by = None
+
+    def __init__(self, job):
+        self.job = job
+        self._lookups = {}
+
+    def check_headers(self, headers):
+        present = {_normalize_header(header) for header in headers}
+        missing = [field for field in self.required
+                   if not any(_normalize_header(alias) in present for alias in (field, *self.columns[field]))]
+        if missing:
+            raise ImportFileError(f"Brak wymaganych kolumn: {', '.join(missing)}")
+
+    def lookup(self, kind, keys, loader):
+        """Rozwiązuje klucze jednym zapytaniem dla brakujących w pamięci; nieznane -> None"""
+        cache = self._lookups.setdefault(kind, {})
+        missing = {key for key in keys if key is not None and key not in cache}
+        if missing:
+            found = loader(missing)
+            for key in missing:
+                cache[key] = found.get(key)
+        return cache
+
+    @staticmethod
+    def split_ids(keys):
+        ids = {int(key) for key in keys if str(key).isdigit()}
+        names = {key for key in keys if not str(key).isdigit()}
+        return ids, names
+
+    def prepare(self, units):
+        raise NotImplementedError
+
+    def write(self, records):
+        raise NotImplementedError
+
+
+def _load_users(keys):
+    ids, names = Importer.split_ids(keys)
+    lowered = {name.lower() for name in names}
+    rows = db.session.query(User.id, User.username, User.email).filter(or_(
+        User.id.in_(ids), func.lower(User.username).in_(lowered), func.lower(User.email).in_(lowered)
+    )).all()
+    by_key = {}
+    for user_id, username, email in rows:
+        by_key[str(user_id)] = user_id
+        by_key[username.lower()] = user_id
+        by_key[email.lower()] = user_id
+    return {key: by_key[key.lower()] for key in keys if key.lower() in by_key}
+
+
+def _load_groups(keys):
+    ids, names = Importer.split_ids(keys)
+    rows = db.session.query(Group.Id, Group.Name).filter(or_(Group.Id.in_(ids), Group.Name.in_(names))).all()
+    found = {name: group_id for group_id, name in rows if name in names}
+    found.update({str(group_id): group_id for group_id, _ in rows if group_id in ids})
+    return found
+
+
+def _load_tags(names):
+    rows = db.session.query(Tag.Id, Tag.Name).filter(Tag.Name.in_(names)).all()
+    return {name: tag_id for tag_id, name in rows}
+
+
+@register_importer('customers')
+class CustomerImporter(Importer):
+    columns = {
+        'name': ('nazwa',),
+        'email': ('e-mail',),
+        'phone': ('telefon',),
+        'company': ('firma',),
+        'address': ('adres',),
+        'nip': (),
+        'representative': ('opiekun', 'representativeUserId'),
+        'group': ('grupa', 'assignedGroupId'),
+        'tags': ('tagi',),
+    }
+    required = ('name',)
+
+    def prepare(self, units):
+        records = [unit[0] for unit in units]
+        users = self.lookup('users', {_text(r['representative']) for r in records if r.get('representative')}, _load_users)
+        groups = self.lookup('groups', {_text(r['group']) for r in records if r.get('group')}, _load_groups)
+        tag_names = {name.strip() for r in records if r.get('tags')
+                     for name in str(r['tags']).split(TAG_SEPARATOR) if name.strip()}
+        tags = self.lookup('tags', tag_names, _load_tags)
+
+        mappings, errors = [], []
+        for record in records:
+            problems = []
+            name = record.get('name')
+            if not name:
+                problems.append('brak nazwy')
+            elif len(str(name)) > 255:
+                problems.append('nazwa dłuższa niż 255 znaków')
+            email = record.get('email')
+            if email and not EMAIL_PATTERN.match(str(email)):
+                problems.append(f'nieprawidłowy e-mail: {email}')
+
+            representative_id = None
+            if record.get('representative'):
+                representative_id = users.get(_text(record['representative']))
+                if representative_id is None:
+                    problems.append(f"nieznany opiekun: {record['representative']}")
+            group_id = None
+            if record.get('group'):
+                group_id = groups.get(_text(record['group']))
+                if group_id is None:
+                    problems.append(f"nieznana grupa: {record['group']}")
+            tag_ids = []
+            for tag_name in str(record.get('tags') or '').split(TAG_SEPARATOR):
+                tag_name = tag_name.strip()
+                if not tag_name:
+                    continue
+                if tags.get(tag_name) is None:
+                    problems.append(f'nieznany tag: {tag_name}')
+                elif tags[tag_name] not in tag_ids:
+                    tag_ids.append(tags[tag_name])
+
+            if problems:
+                errors.append((record['_row'], '; '.join(problems), record['_values']))
+                continue
+            mappings.append({
+                'Name': _text(name),
+                'Email': email,
+                'Phone': _text(record.get('phone')),
+                'Company': _text(record.get('company')),
+                'Address': _text(record.get('address')),
+                'NIP': _text(record.get('nip')),
+                'RepresentativeUserId': representative_id,
+                'AssignedGroupId': group_id,
+                '_tags': tag_ids,
+            })
+        return mappings, errors
+
+    def write(self, records):
+        # Nowe wiersze rozpoznaje wspólny znacznik partii (CreatedAt, pełne sekundy - DATETIME w MySQL)
+        # i klucz rekordu; samo Id > last_id objęłoby klientów dodanych równolegle przez API
+        now = datetime.utcnow().replace(microsecond=0)
+        last_id = db.session.query(func.max(Customer.Id)).scalar() or 0
+        rows = [{**{k: v for k, v in r.items() if k != '_tags'}, 'CreatedAt': now} for r in records]
+        db.session.execute(insert(Customer.__table__), rows)
+
+        # Id jednym zapytaniem zamiast return_defaults (które na MySQL wstawia wiersz po wierszu);
+        # wiersze o tym samym kluczu dostają Id w kolejności zapisu
+        new_ids = {}
+        for customer_id, *key in db.session.execute(
+                select(Customer.Id, Customer.Name, Customer.Email, Customer.NIP)
+                .where(Customer.Id > last_id, Customer.CreatedAt == now).order_by(Customer.Id)):
+            new_ids.setdefault(tuple(key), []).append(customer_id)
+        for record in records:
+            ids = new_ids.get((record['Name'], record['Email'], record['NIP']))
+            if not ids:
+                raise RuntimeError(f"Nie znaleziono zapisanego klienta {record['Name']}")
+            record['Id'] = ids.pop(0)
+
+        tagged = [r for r in records if r['_tags']]
+        if tagged:
+            links = [{'CustomerId': record['Id'], 'TagId': tag_id} for record in tagged for tag_id in record['_tags']]
+            db.session.execute(customer_tags.insert(), links)
+            bump_table_version('CustomerTags')
+        customer_ids = [record['Id'] for record in records]
+        record_inserted('customers', [(customer_id, None) for customer_id in customer_ids])
+        # Klucze wykrywania duplikatów - wstawienia masowe pomijają zdarzenia mapperów
+        for start in range(0, len(customer_ids), IN_CHUNK_SIZE):
+            index_customers(Customer.Id.in_(customer_ids[start:start + IN_CHUNK_SIZE]))
+        return len(records)
+
+
+@register_importer('services')
+class ServiceImporter(Importer):
+    columns = {
+        'name': ('nazwa',),
+        'price': ('cena',),
+        'taxRate': ('vat', 'stawkaVat'),
+    }
+    required = ('name', 'price')
+
+    def prepare(self, units):
+        mappings, errors = [], []
+        for (record,) in units:
+            problems = []
+            if not record.get('name'):
+                problems.append('brak nazwy')
+            price = tax_rate = None
+            try:
+                price = parse_decimal(record.get('price'))
+                if price is None or price < 0:
+                    problems.append('cena musi być liczbą nieujemną')
+            except ValueError as e:
+                problems.append(str(e))
+            try:
+                tax_rate = parse_tax_rate(record.get('taxRate'))
+            except (ValueError, InvalidOperation) as e:
+                problems.append(str(e))
+
+            if problems:
+                errors.append((record['_row'], '; '.join(problems), record['_values']))
+                continue
+            mappings.append({
+                'Name': _text(record['name']),
+                'Price': price,
+                'TaxRate': tax_rate if tax_rate is not None else DEFAULT_TAX_RATE,
+            })
+        return mappings, errors
+
+    def write(self, records):
+        db.session.execute(insert(Service.__table__), records)
+        bump_table_version('Services')
+        return len(records)
+
+
+def _load_customers_by_nip(nips):
+    rows = db.session.query(Customer.NIP, Customer.Id).filter(Customer.NIP.in_(nips)).order_by(Customer.Id).all()
+    found = {}
+    for nip, customer_id in rows:
+        found.setdefault(nip, customer_id)
+    return found
+
+
+def _load_customer_ids(ids):
+    rows = db.session.query(Customer.Id).filter(Customer.Id.in_([int(i) for i in ids])).all()
+    return {str(customer_id): customer_id for (customer_id,) in rows}
+
+
+def _load_services(keys):
+    ids, names = Importer.split_ids(keys)
+    rows = db.session.query(Service.Id, Service.Name, Service.Price, Service.TaxRate) \
+        .filter(or_(Service.Id.in_(ids), Service.Name.in_(names))).order_by(Service.Id).all()
+    found = {}
+    for row in rows:
+        if row.Name in names:
+            found.setdefault(row.Name, row)
+        if row.Id in ids:
+            found[str(row.Id)] = row
+    return found
+
+
+def _load_invoice_numbers(numbers):
+    rows = db.session.query(Invoice.Number).filter(Invoice.Number.in_(numbers)).all()
+    return {number: True for (number,) in rows}
+
+
+@register_importer('invoices')
+class InvoiceImporter(Importer):
+    """
+    Jeden wiersz pliku to jedna pozycja faktury; kolejne wiersze o tym samym numerze
+    tworzą jedną fakturę. Faktura z błędną pozycją jest odrzucana w całości.
+    """
+    columns = {
+        'number': ('numer', 'invoiceNumber'),
+        'customerId': ('klientId',),
+        'customerNip': ('nipKlienta',),
+        'issuedAt': ('dataWystawienia',),
+        'dueDate': ('terminPlatnosci', 'terminPłatności'),
+        'isPaid': ('zaplacona', 'zapłacona'),
+        'service': ('usluga', 'usługa', 'serviceId'),
+        'quantity': ('ilosc', 'ilość'),
+        'unitPrice': ('cenaJednostkowa',),
+    }
+    required = ('number', 'service')
+    group_by = 'number'
+
+    def __init__(self, job):
+        super().__init__(job)
+        self.seen_numbers = set()
+
+    def prepare(self, units):
+        rows = [record for unit in units for record in unit]
+        customer_ids = self.lookup('customer_ids', {_text(r['customerId']) for r in rows if r.get('customerId')},
+                                   _load_customer_ids)
+        customer_nips = self.lookup('customer_nips', {_text(r['customerNip']) for r in rows if r.get('customerNip')},
+                                    _load_customers_by_nip)
+        services = self.lookup('services', {_text(r['service']) for r in rows if r.get('service')}, _load_services)
+        # Istniejące numery nie są zapamiętywane - zapis kolejnych partii mógłby je zmienić
+        existing = _load_invoice_numbers({_text(unit[0]['number']) for unit in units if unit[0].get('number')})
+
+        records, errors = [], []
+        for unit in units:
+            head = unit[0]
+            number = _text(head['number']) if head.get('number') else None
+            invoice_problems, row_problems = [], {}
+
+            if not number:
+                invoice_problems.append('brak numeru faktury')
+            elif number in existing:
+                invoice_problems.append(f'faktura {number} już istnieje')
+            elif number in self.seen_numbers:
+                invoice_problems.append(f'pozycje faktury {number} muszą być w kolejnych wierszach')
+            if number:
+                self.seen_numbers.add(number)
+
+            customer_id = None
+            if head.get('customerId'):
+                customer_id = customer_ids.get(_text(head['customerId']))
+            elif head.get('customerNip'):
+                customer_id = customer_nips.get(_text(head['customerNip']))
+            if customer_id is None:
+                invoice_problems.append('nieznany klient (customerId lub customerNip)')
+
+            issued_at = due_date = None
+            try:
+                issued_at = parse_datetime(head.get('issuedAt')) or datetime.now()
+                due_date = parse_datetime(head.get('dueDate')) or issued_at + timedelta(days=14)
+            except ValueError as e:
+                invoice_problems.append(str(e))
+
+            items, total_grosze = [], 0
+            for record in unit:
+                problems = []
+                service = services.get(_text(record['service'])) if record.get('service') else None
+                if service is None:
+                    problems.append(f"nieznana usługa: {record.get('service')}")
+                try:
+                    quantity = parse_int(record.get('quantity'))
+                    quantity = 1 if quantity is None else quantity
+                    if quantity <= 0:
+                        problems.append('ilość musi być dodatnia')
+                    unit_price = parse_decimal(record.get('unitPrice'))
+                except ValueError as e:
+                    problems.append(str(e))
+                if problems:
+                    row_problems[record['_row']] = problems
+                    continue
+
+                unit_price = unit_price if unit_price is not None else Decimal(str(service.Price or 0))
+                tax_rate = service.TaxRate if service.TaxRate is not None else DEFAULT_TAX_RATE
+                net_grosze, tax_grosze, gross_grosze = line_amounts(unit_price, quantity, tax_rate)
+                total_grosze += gross_grosze
+                items.append({
+                    'ServiceId': service.Id,
+                    'Quantity': quantity,
+                    'UnitPrice': unit_price,
+                    'Description': service.Name,
+                    'TaxRate': tax_rate,
+                    'NetAmount': from_grosze(net_grosze),
+                    'TaxAmount': from_grosze(tax_grosze),
+                    'GrossAmount': from_grosze(gross_grosze),
+                })
+
+            if invoice_problems or row_problems:
+                for record in unit:
+                    problems = invoice_problems + row_problems.get(record['_row'], [])
+                    if not problems:
+                        problems = [f'odrzucona razem z błędną pozycją faktury {number}']
+                    errors.append((record['_row'], '; '.join(problems), record['_values']))
+                continue
+
+            is_paid = parse_bool(head.get('isPaid'))
+            status = invoice_status(is_paid, due_date)
+            records.append({
+                'invoice': {
+                    'Number': number,
+                    'CustomerId': customer_id,
+                    'IssuedAt': issued_at,
+                    'DueDate': due_date,
+                    'IsPaid': is_paid,
+                    'TotalAmount': from_grosze(total_grosze),
+                    'CreatedByUserId': self.job.CreatedByUserId,
+                    # Zapis masowy pomija zdarzenia ORM ustawiające status (app/dunning.py)
+                    'Status': status,
+                    'OverdueSince': due_date if status == 'Overdue' else None,
+                },
+                'items': items,
+            })
+        return records, errors
+
+    def write(self, records):
+        # Nowe faktury rozpoznaje numer i wspólny znacznik partii (UpdatedAt, pełne sekundy - DATETIME
+        # w MySQL); samo Id > last_id objęłoby faktury o tym numerze dodane równolegle przez API
+        now = datetime.utcnow().replace(microsecond=0)
+        last_id = db.session.query(func.max(Invoice.Id)).scalar() or 0
+        invoices = [{**record['invoice'], 'UpdatedAt': now} for record in records]
+        db.session.execute(insert(Invoice.__table__), invoices)
+        # Numery w imporcie są unikalne - Id nowych faktur jednym zapytaniem po numerach
+        invoice_ids = dict(db.session.execute(
+            select(Invoice.Number, Invoice.Id)
+            .where(Invoice.Number.in_([invoice['Number'] for invoice in invoices]),
+                   Invoice.Id > last_id, Invoice.UpdatedAt == now)).all())
+        items = []
+        for record, invoice in zip(records, invoices):
+            for item in record['items']:
+                items.append({**item, 'InvoiceId': invoice_ids[invoice['Number']]})
+        if items:
+            db.session.execute(insert(InvoiceItem.__table__), items)
+        record_inserted('invoices', [(invoice_ids[invoice['Number']], None) for invoice in invoices])
+        return len(items)
+
+
+# ---------------------------------------------------------------------------
+# Wykonywanie importu
+# ---------------------------------------------------------------------------
+
+class ErrorReport:
+    """Raport błędów CSV tworzony przy pierwszym błędzie"""
+
+    def __init__(self, job, headers):
+        self.job = job
+        self.headers = [str(header) for header in headers]
+        self.path = None
+        self._handle = None
+        self._writer = None
+
+    def add(self, errors):
+        if not errors:
+            return
+        if self._writer is None:
+            self.path = os.path.join(get_import_dir(), f'import_{self.job.Id}_errors.csv')
+            self._handle = open(self.path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._handle)
+            self._writer.writerow(['row', 'error'] + self.headers)
+        for row_number, message, values in errors:
+            self._writer.writerow([row_number, message] + ['' if value is None else value for value in values])
+        self._handle.flush()
+
+    def close(self):
+        if self._handle:
+            self._handle.close()
+
+
+def process_import(job):
+    """Przetwarza plik importu partiami; postęp jest zapisywany w tym samym commicie co partia"""
+    importer = IMPORTERS[job.EntityType](job)
+    batch_size = job.BatchSize or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+
+    job.TotalRows = count_rows(job.FilePath, job.FileFormat)
+    db.session.commit()
+
+    rows = iter_file_rows(job.FilePath, job.FileFormat)
+    report = None
+    try:
+        headers = next(rows)
+        importer.check_headers(headers)
+        report = ErrorReport(job, headers)
+        units = iter_units(iter_records(headers, rows, importer.columns), importer.group_by)
+        for chunk in iter_chunks(units, batch_size):
+            row_count = sum(len(unit) for unit in chunk)
+            records, errors = importer.prepare(chunk)
+            inserted = 0
+            if records and not job.DryRun:
+                try:
+                    inserted = importer.write(records)
+                except Exception as e:
+                    db.session.rollback()
+                    failed = {record['_row'] for unit in chunk for record in unit} - {error[0] for error in errors}
+                    errors += [(record['_row'], f'błąd zapisu partii: {e}', record['_values'])
+                               for unit in chunk for record in unit if record['_row'] in failed]
+            report.add(errors)
+
+            job.ProcessedRows = (job.ProcessedRows or 0) + row_count
+            job.InsertedRows = (job.InsertedRows or 0) + inserted
+            job.ErrorRows = (job.ErrorRows or 0) + len(errors)
+            job.ErrorReportPath = report.path
+            db.session.commit()
+    finally:
+        rows.close()
+        if report:
+            report.close()
+
+
+def claim_import(job_id):
+    """Oznacza import jako uruchomiony; zwraca False, jeśli inny worker już go przetwarza"""
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.Id == job_id, ImportJob.Status == 'queued')
+        .values(Status='running', StartedAt=datetime.now())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_import(job_id):
+    """Wykonuje zakolejkowany import i zapisuje jego status"""
+    if not claim_import(job_id):
+        return None
+
+    job = ImportJob.query.get(job_id)
+    try:
+        process_import(job)
+        job.Status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        job = ImportJob.query.get(job_id)
+        job.Status = 'failed'
+        job.Error = str(e)
+    job.FinishedAt = datetime.now()
+    db.session.commit()
+    return job
+
+
+def run_queued_imports():
+    """Wykonuje wszystkie zakolejkowane importy; zwraca ich liczbę"""
+    job_ids = [job_id for (job_id,) in db.session.query(ImportJob.Id)
+               .filter(ImportJob.Status == 'queued').order_by(ImportJob.Id).all()]
+    return sum(1 for job_id in job_ids if run_import(job_id))
+
+
+def _run_in_thread(app, job_id):
+    with app.app_context():
+        try:
+            run_import(job_id)
+        except Exception as e:
+            print(f"⚠️  Błąd importu {job_id}: {e}")
+        finally:
+            db.session.remove()
+
+
+def start_import(app, job_id):
+    """Uruchamia import w wątku tła albo od razu (IMPORT_RUN_ASYNC=false)"""
+    if not app.config.get('IMPORT_RUN_ASYNC', True):
+        run_import(job_id)
+        return None
+    thread = threading.Thread(target=_run_in_thread, args=(app, job_id),
+                              name=f'crm-import-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+def init_imports(app):
+    """Rejestruje komendy CLI importu"""
+
+    @app.cli.group('imports')
+    def imports_cli():
+        """Masowy import danych"""
+
+    @imports_cli.command('run')
+    @click.argument('job_id', type=int, required=False)
+    def run_command(job_id):
+        """Wykonuje wskazany import albo wszystkie zakolejkowane"""
+        if job_id:
+            job = run_import(job_id)
+            click.echo(f'Import {job_id}: {job.Status if job else "nie jest w kolejce"}')
+        else:
+            click.echo(f'Wykonane importy: {run_queued_imports()}')
@@ -0,0 +1,302 @@
+"""
+Wspólna warstwa zapytań dla endpointów listujących.
+
+Obsługuje parametry:
+- ?fields=id,name,email       - zwraca tylko wybrane pola (SELECT tylko potrzebnych kolumn)
+- ?filter[name]=Jan           - filtr równościowy (kompilowany do WHERE)
+- ?filter[createdAt][gte]=... - filtr z operatorem (eq, ne, lt, lte, gt, gte, like, in)
+- ?sort=-createdAt,name       - sortowanie ('-' oznacza malejąco)
+- ?limit=100&cursor=...       - stronicowanie (domyślnie DEFAULT_LIST_LIMIT, najwyżej MAX_LIST_LIMIT);
+                                kursor kolejnej strony w nagłówku X-Next-Cursor (brak - koniec listy)
+
+Bez ?fields= endpoint zwraca pełne obiekty (to_dict), ale filtry i sortowanie
+nadal są wykonywane w bazie danych.
+"""
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from flask import jsonify
+from sqlalchemy import select, and_, Boolean, Integer, Numeric, DateTime, Date
+from app.database import db
+
+FILTER_PARAM = re.compile(r'^filter\[(\w+)\](?:\[(\w+)\])?$')
+OPERATORS = ('eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'like', 'in')
+DEFAULT_LIST_LIMIT = 500
+MAX_LIST_LIMIT = 2000
+
+
+class ListQueryError(ValueError):
+    """Nieprawidłowe parametry listy - kontrolery zwracają go jako 400"""
+
+
+class ListField:
+    """
+    Opis pojedynczego pola listy.
+
+    column   - wyrażenie SQL (kolumna modelu lub kolumna z dołączonej tabeli)
+    join     - (model, warunek) dla LEFT JOIN potrzebnego do tej kolumny
+    compute  - (zależności, funkcja) dla pól wyliczanych z innych pól
+    loader   - (zależności, funkcja) dla relacji ładowanych jednym zapytaniem dla całej strony
+    """
+
+    def __init__(self, column=None, join=None, compute=None, loader=None,
+                 filterable=True, sortable=True):
+        self.column = column
+        self.join = join
+        self.compute = compute
+        self.loader = loader
+        self.filterable = filterable and column is not None
+        self.sortable = sortable and column is not None
+
+
+class ListQuerySpec:
+    """Specyfikacja listy dla jednej encji (pola, domyślne sortowanie, opcje ORM)"""
+
+    def __init__(self, model, fields, default_sort, full_options=None):
+        self.model = model
+        self.fields = fields
+        self.default_sort = default_sort
+        self.full_options = full_options or []
+        self.primary_key = model.__mapper__.primary_key[0]
+
+
+class ListParams:
+    def __init__(self, fields, filters, sort, limit=DEFAULT_LIST_LIMIT, offset=0):
+        self.fields = fields
+        self.filters = filters
+        self.sort = sort
+        self.limit = limit
+        self.offset = offset
+
+
+class ListPage:
+    """Strona wyników listy; next_cursor - kursor kolejnej strony (None, gdy to ostatnia)"""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def parse_list_params(spec, args):
+    """Parsuje i waliduje parametry ?fields=, ?filter[...]= oraz ?sort="""
+    fields = None
+    raw_fields = args.get('fields')
+    if raw_fields:
+        fields = [f.strip() for f in raw_fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in spec.fields]
+        if unknown:
+            raise ListQueryError(f'Nieznane pola: {", ".join(unknown)}')
+
+    filters = []
+    for key, value in args.items(multi=True):
+        match = FILTER_PARAM.match(key)
+        if not match:
+            continue
+        name, operator = match.group(1), match.group(2) or 'eq'
+        field = spec.fields.get(name)
+        if not field or not field.filterable:
+            raise ListQueryError(f'Nie można filtrować po polu: {name}')
+        if operator not in OPERATORS:
+            raise ListQueryError(f'Nieznany operator filtra: {operator}')
+        filters.append((name, operator, value))
+
+    sort = []
+    raw_sort = args.get('sort') or spec.default_sort
+    for item in raw_sort.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith('-')
+        name = item.lstrip('-+')
+        field = spec.fields.get(name)
+        if not field or not field.sortable:
+            raise ListQueryError(f'Nie można sortować po polu: {name}')
+        sort.append((name, descending))
+
+    # Kursor to pozycja w posortowanej liście - sortowanie po dowolnych polach wyklucza kursor po kluczu
+    try:
+        limit = int(args.get('limit', DEFAULT_LIST_LIMIT))
+        offset = int(args.get('cursor') or 0)
+    except ValueError:
+        raise ListQueryError('Nieprawidłowa wartość limit lub cursor')
+    if limit < 1 or offset < 0:
+        raise ListQueryError('Nieprawidłowa wartość limit lub cursor')
+
+    return ListParams(fields, filters, sort, min(limit, MAX_LIST_LIMIT), offset)
+
+
+def _coerce(column, value):
+    """Konwertuje wartość z query stringa na typ kolumny"""
+    column_type = getattr(column, 'type', None)
+    try:
+        if isinstance(column_type, Boolean):
+            if value.lower() in ('true', '1', 'tak'):
+                return True
+            if value.lower() in ('false', '0', 'nie'):
+                return False
+            raise ValueError(value)
+        if isinstance(column_type, Integer):
+            return int(value)
+        if isinstance(column_type, Numeric):
+            return Decimal(value)
+        if isinstance(column_type, (DateTime, Date)):
+            return datetime.fromisoformat(value.replace('Z', ''))
+    except (ValueError, InvalidOperation):
+        raise ListQueryError(f'Nieprawidłowa wartość filtra: {value}')
+    return value
+
+
+def _build_condition(field, operator, value):
+    column = field.column
+    if operator == 'in':
+        return column.in_([_coerce(column, v) for v in value.split(',') if v != ''])
+    if operator == 'like':
+        return column.ilike(f'%{value}%')
+
+    if value.lower() == 'null' and operator in ('eq', 'ne'):
+        return column.is_(None) if operator == 'eq' else column.isnot(None)
+
+    coerced = _coerce(column, value)
+    return {
+        'eq': lambda: column == coerced,
+        'ne': lambda: column != coerced,
+        'lt': lambda: column < coerced,
+        'lte': lambda: column <= coerced,
+        'gt': lambda: column > coerced,
+        'gte': lambda: column >= coerced,
+    }[operator]()
+
+
+def _serialize(value):
+    """Konwertuje wartości z bazy do formatu JSON (tak jak metody to_dict)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _apply_filters_and_sort(stmt, spec, params, joined):
+    conditions = []
+    for name, operator, value in params.filters:
+        field = spec.fields[name]
+        _add_join(field, joined)
+        conditions.append(_build_condition(field, operator, value))
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+
+    order_by = []
+    for name, descending in params.sort:
+        field = spec.fields[name]
+        _add_join(field, joined)
+        order_by.append(field.column.desc() if descending else field.column.asc())
+    # Stabilne sortowanie - klucz główny jako ostatnie kryterium
+    order_by.append(spec.primary_key.desc())
+    return stmt.order_by(*order_by)
+
+
+def _add_join(field, joined):
+    if field.join is not None:
+        target, condition = field.join
+        if target not in joined:
+            joined[target] = condition
+
+
+def _apply_joins(stmt, joined):
+    for target, condition in joined.items():
+        stmt = stmt.outerjoin(target, condition)
+    return stmt
+
+
+def _expand_dependencies(spec, requested):
+    """Zwraca listę pól kolumnowych potrzebnych do zbudowania odpowiedzi"""
+    needed = []
+    pending = list(requested)
+    while pending:
+        name = pending.pop(0)
+        if name in needed:
+            continue
+        needed.append(name)
+        field = spec.fields[name]
+        extra = field.compute or field.loader
+        if extra:
+            pending.extend(extra[0])
+    return needed
+
+
+def _paginate(stmt, params):
+    # Jeden wiersz ponad limit - informacja, czy istnieje kolejna strona, bez COUNT(*)
+    return stmt.limit(params.limit + 1).offset(params.offset)
+
+
+def _page(items, params):
+    if len(items) > params.limit:
+        return ListPage(items[:params.limit], str(params.offset + params.limit))
+    return ListPage(items)
+
+
+def list_response(page):
+    """Odpowiedź JSON strony listy (tablica elementów); kursor kolejnej strony w nagłówku X-Next-Cursor"""
+    response = jsonify(page.items)
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return response, 200
+
+
+def run_list_query(spec, args, scope=None):
+    """
+    Wykonuje zapytanie listy zgodnie z parametrami żądania; zwraca ListPage.
+
+    scope - dodatkowy warunek WHERE narzucony przez kontroler (np. widoczność wierszy)
+    """
+    params = parse_list_params(spec, args)
+    joined = {}
+
+    if params.fields is None:
+        # Pełne obiekty - filtrujemy i sortujemy w SQL (jedno zapytanie), serializujemy przez to_dict()
+        stmt = select(spec.model).options(*spec.full_options)
+        stmt = _apply_filters_and_sort(stmt, spec, params, joined)
+        stmt = _apply_joins(stmt, joined)
+        if scope is not None:
+            stmt = stmt.where(scope)
+        # unique() - opcje joinedload kolekcji powtarzają wiersz obiektu
+        objects = db.session.execute(_paginate(stmt, params)).unique().scalars().all()
+        return _page([obj.to_dict() for obj in objects], params)
+
+    # Wybrane pola - SELECT tylko potrzebnych kolumn, bez hydratacji obiektów ORM
+    needed = _expand_dependencies(spec, ['id'] + params.fields if 'id' in spec.fields else params.fields)
+    column_names = [name for name in needed if spec.fields[name].column is not None]
+    columns = []
+    for name in column_names:
+        field = spec.fields[name]
+        _add_join(field, joined)
+        columns.append(field.column.label(name))
+
+    stmt = select(*columns).select_from(spec.model)
+    stmt = _apply_filters_and_sort(stmt, spec, params, joined)
+    stmt = _apply_joins(stmt, joined)
+    if scope is not None:
+        stmt = stmt.where(scope)
+
+    rows = [dict(row) for row in db.session.execute(_paginate(stmt, params)).mappings()]
+    page = _page(rows, params)
+    rows = page.items
+
+    # Relacje ładowane jednym zapytaniem dla wszystkich wierszy
+    for name in needed:
+        field = spec.fields[name]
+        if field.loader and rows:
+            field.loader[1](rows, name)
+
+    result = []
+    for row in rows:
+        item = {}
+        for name in params.fields:
+            field = spec.fields[name]
+            if field.compute:
+                item[name] = field.compute[1](row)
+            else:
+                item[name] = _serialize(row.get(name))
+        result.append(item)
+    page.items = result
+    return page
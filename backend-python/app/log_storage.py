@@ -0,0 +1,452 @@
+"""
+Przechowywanie logów (SystemLogs, LoginHistory) w miesięcznych partycjach z retencją.
+
+- MySQL: partycjonowanie RANGE po miesiącach (TO_DAYS kolumny czasu). Zapytania z zakresem
+  dat czytają tylko pasujące partycje (partition pruning), a wygasłe partycje są usuwane
+  przez DROP PARTITION zamiast kosztownego DELETE.
+- Inne bazy (SQLite w testach i instalacjach lokalnych): tabela główna przechowuje bieżący
+  miesiąc, starsze wiersze są przenoszone do tabel miesięcznych, np. SystemLogs_202405.
+
+Wygasłe miesiące (starsze niż retencja) są archiwizowane do plików .jsonl.gz w LOG_ARCHIVE_DIR.
+Konserwację uruchamia endpoint POST /api/Logs/maintenance, komenda `flask logs maintain`
+lub zadanie harmonogramu typu `log_maintenance`. Jednorazowa konwersja tabel MySQL na partycjonowane
+przebudowuje tabele, dlatego jest osobną migracją: `flask logs partition`.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import datetime, date
+from decimal import Decimal
+
+import click
+from flask import current_app
+from sqlalchemy import Column, MetaData, Table, func, inspect, select, text, union_all, literal_column
+
+from app.database import db
+from app.scheduler import register_job_type
+
+# Tabele logów: nazwa -> (kolumna czasu, klucz konfiguracji retencji)
+LOG_TABLES = {
+    'SystemLogs': ('Timestamp', 'SYSTEM_LOGS_RETENTION_MONTHS'),
+    'LoginHistory': ('LoginTime', 'LOGIN_HISTORY_RETENTION_MONTHS'),
+}
+
+FETCH_BATCH_SIZE = 1000
+
+
+class LogStorageError(ValueError):
+    """Migracja tabeli logów nie może zostać wykonana (np. wiersze bez daty)"""
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(moment, months):
+    month_index = moment.year * 12 + moment.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def month_suffix(moment):
+    return f'{moment.year:04d}{moment.month:02d}'
+
+
+def parse_suffix(suffix):
+    return datetime(int(suffix[:4]), int(suffix[4:6]), 1)
+
+
+def is_partitioning_supported():
+    return db.engine.dialect.name == 'mysql'
+
+
+def base_table(table_name):
+    return db.metadata.tables[table_name]
+
+
+def month_table(table_name, suffix):
+    """Tabela miesięczna o kolumnach tabeli głównej (bez kluczy obcych)"""
+    source = base_table(table_name)
+    return Table(
+        f'{table_name}_{suffix}', MetaData(),
+        *[Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+          for column in source.columns]
+    )
+
+
+def log_tables(table_name):
+    """Tabela główna i jej tabele miesięczne - wszystkie miejsca, w których mogą być wiersze"""
+    if is_partitioning_supported():
+        return [base_table(table_name)]
+    return [base_table(table_name)] + [month_table(table_name, suffix) for suffix in list_month_tables(table_name)]
+
+
+def list_month_tables(table_name):
+    """Zwraca sufiksy istniejących tabel miesięcznych (posortowane rosnąco)"""
+    pattern = re.compile(rf'^{re.escape(table_name)}_(\d{{6}})$')
+    suffixes = []
+    for name in inspect(db.engine).get_table_names():
+        match = pattern.match(name)
+        if match:
+            suffixes.append(match.group(1))
+    return sorted(suffixes)
+
+
+# ---------------------------------------------------------------------------
+# Odczyt z zakresem dat
+# ---------------------------------------------------------------------------
+
+def _tables_for_range(table_name, date_from, date_to):
+    """Tabele (główna + miesięczne), które mogą zawierać wiersze z zakresu dat"""
+    tables = [base_table(table_name)]
+    if is_partitioning_supported():
+        # MySQL sam wybiera partycje na podstawie warunku WHERE
+        return tables
+    for suffix in list_month_tables(table_name):
+        start = parse_suffix(suffix)
+        end = add_months(start, 1)
+        if date_from and end <= date_from:
+            continue
+        if date_to and start >= date_to:
+            continue
+        tables.append(month_table(table_name, suffix))
+    return tables
+
+
+def build_range_query(table_name, date_from=None, date_to=None, filters=None, limit=None):
+    """
+    Buduje zapytanie o logi z zakresu [date_from, date_to), najnowsze najpierw.
+    filters - słownik kolumna -> wartość (równość)
+    """
+    time_column = LOG_TABLES[table_name][0]
+    selects = []
+    for table in _tables_for_range(table_name, date_from, date_to):
+        stmt = select(*[table.c[column.name] for column in base_table(table_name).columns])
+        if date_from:
+            stmt = stmt.where(table.c[time_column] >= date_from)
+        if date_to:
+            stmt = stmt.where(table.c[time_column] < date_to)
+        for column_name, value in (filters or {}).items():
+            stmt = stmt.where(table.c[column_name] == value)
+        selects.append(stmt)
+
+    if len(selects) == 1:
+        query = selects[0].order_by(selects[0].selected_columns[time_column].desc(),
+                                    selects[0].selected_columns['Id'].desc())
+    else:
+        combined = union_all(*selects).subquery()
+        query = select(combined).order_by(combined.c[time_column].desc(), combined.c['Id'].desc())
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def query_logs(table_name, date_from=None, date_to=None, filters=None, limit=None):
+    """Zwraca wiersze logów jako listę słowników (nazwy kolumn z bazy)"""
+    result = db.session.execute(build_range_query(table_name, date_from, date_to, filters, limit))
+    return [dict(row) for row in result.mappings()]
+
+
+def query_recent_logs(table_name, filters=None, limit=50, now=None):
+    """
+    Najnowsze wiersze logów bez zakresu dat w żądaniu. Odczyt zaczyna się od bieżącego miesiąca
+    (jedna partycja / tabela główna), a okno jest podwajane tylko, gdy wierszy jest mniej niż limit;
+    po przekroczeniu okresu retencji czytane są wszystkie tabele (także wiersze bez daty).
+    """
+    current = month_start(now or datetime.now())
+    retention_months = current_app.config.get(LOG_TABLES[table_name][1], 12)
+    months = 1
+    while months <= retention_months:
+        rows = query_logs(table_name, add_months(current, 1 - months), None, filters, limit)
+        if len(rows) >= limit:
+            return rows
+        months *= 2
+    return query_logs(table_name, None, None, filters, limit)
+
+
+def iter_logs(table_name, date_from=None, date_to=None, filters=None):
+    """Iteruje po logach paczkami (kursor po stronie serwera) - dla eksportu"""
+    query = build_range_query(table_name, date_from, date_to, filters)
+    result = db.session.execute(query.execution_options(stream_results=True))
+    while True:
+        rows = result.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            yield row._mapping
+
+
+# ---------------------------------------------------------------------------
+# Archiwizacja
+# ---------------------------------------------------------------------------
+
+def get_archive_dir():
+    directory = current_app.config.get('LOG_ARCHIVE_DIR') or \
+        os.path.join(current_app.root_path, 'uploads', 'log_archive')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def archive_rows(table_name, suffix, result):
+    """
+    Zapisuje wiersze wyniku zapytania do pliku .jsonl.gz; zwraca (ścieżka, liczba wierszy).
+    Plik powstaje jako tymczasowy i zastępuje archiwum dopiero po zapisaniu całości. Wiersze
+    istniejącego archiwum miesiąca są przepisywane, a wiersze o Id już w nim zapisanych pomijane -
+    ponowienie po przerwanej konserwacji nie duplikuje wierszy, a późno dopisane trafiają do archiwum.
+    """
+    path = os.path.join(get_archive_dir(), f'{table_name}_{suffix}.jsonl.gz')
+    temp_path = f'{path}.tmp'
+    archived_ids = set()
+    count = 0
+    try:
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+            if os.path.exists(path):
+                with gzip.open(path, 'rt', encoding='utf-8') as previous:
+                    for line in previous:
+                        archive.write(line)
+                        archived_ids.add(json.loads(line).get('Id'))
+            while True:
+                rows = result.fetchmany(FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    count += 1
+                    if row._mapping['Id'] in archived_ids:
+                        continue
+                    archive.write(json.dumps({key: _json_value(value) for key, value in row._mapping.items()},
+                                             ensure_ascii=False) + '\n')
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path, count
+
+
+# ---------------------------------------------------------------------------
+# Konserwacja - wariant z tabelami miesięcznymi
+# ---------------------------------------------------------------------------
+
+def _rotate_month_tables(table_name, now):
+    """Przenosi wiersze starsze niż bieżący miesiąc z tabeli głównej do tabel miesięcznych"""
+    time_column = LOG_TABLES[table_name][0]
+    source = base_table(table_name)
+    current_start = month_start(now)
+    moved = {}
+
+    columns = [column.name for column in source.columns]
+    # Kolejno najstarszy miesiąc z danymi - bez tworzenia pustych tabel dla miesięcy bez logów
+    while True:
+        oldest = db.session.execute(
+            select(source.c[time_column]).where(source.c[time_column] < current_start)
+            .order_by(source.c[time_column]).limit(1)
+        ).scalar()
+        if oldest is None:
+            break
+
+        start = month_start(oldest)
+        suffix = month_suffix(start)
+        in_month = (source.c[time_column] >= start) & (source.c[time_column] < add_months(start, 1))
+        target = month_table(table_name, suffix)
+        target.create(bind=db.session.connection(), checkfirst=True)
+
+        db.session.execute(target.insert().from_select(columns, select(*[source.c[name] for name in columns]).where(in_month)))
+        moved[suffix] = db.session.execute(source.delete().where(in_month)).rowcount
+        db.session.commit()
+
+    # Wiersze bez daty zostają w tabeli głównej
+    return moved
+
+
+def _expire_month_tables(table_name, cutoff):
+    """Archiwizuje i usuwa tabele miesięczne starsze niż cutoff"""
+    expired = []
+    for suffix in list_month_tables(table_name):
+        if parse_suffix(suffix) >= cutoff:
+            continue
+        table = month_table(table_name, suffix)
+        result = db.session.execute(select(table).execution_options(stream_results=True))
+        path, count = archive_rows(table_name, suffix, result)
+        table.drop(bind=db.session.connection())
+        db.session.commit()
+        expired.append({'month': suffix, 'rows': count, 'archive': path})
+    return expired
+
+
+# ---------------------------------------------------------------------------
+# Konserwacja - partycjonowanie MySQL
+# ---------------------------------------------------------------------------
+
+def _mysql_partitions(table_name):
+    rows = db.session.execute(text("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """), {'table_name': table_name}).fetchall()
+    return [row[0] for row in rows]
+
+
+def _partition_definition(start):
+    end = add_months(start, 1)
+    return f"PARTITION p{month_suffix(start)} VALUES LESS THAN (TO_DAYS('{end:%Y-%m-%d}'))"
+
+
+def enable_partitioning(table_name, now=None, archive_undated=False):
+    """
+    Jednorazowa migracja (`flask logs partition`): konwersja tabeli na partycjonowaną.
+    MySQL wymaga, aby klucz główny zawierał kolumnę partycjonowania, i nie pozwala na klucze
+    obce w tabelach partycjonowanych - spójność z tabelą users zapewnia usuwanie użytkownika
+    (app/deletion.py usuwa jego LoginHistory i odpina SystemLogs). Wiersze bez daty nie są
+    zmieniane: migracja kończy się błędem albo (archive_undated) archiwizuje je i usuwa.
+    """
+    now = now or datetime.now()
+    months_ahead = current_app.config.get('LOG_PARTITIONS_AHEAD', 2)
+    time_column = LOG_TABLES[table_name][0]
+    table = base_table(table_name)
+    undated = table.c[time_column].is_(None)
+    undated_count = db.session.execute(select(func.count()).select_from(table).where(undated)).scalar()
+    if undated_count:
+        if not archive_undated:
+            raise LogStorageError(f'{table_name}: {undated_count} wierszy bez {time_column} - uzupełnij je '
+                                  f'albo uruchom migrację z --archive-undated')
+        result = db.session.execute(select(table).where(undated).execution_options(stream_results=True))
+        archive_rows(table_name, 'undated', result)
+        db.session.execute(table.delete().where(undated))
+        db.session.commit()
+
+    foreign_keys = db.session.execute(text("""
+        SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+    """), {'table_name': table_name}).fetchall()
+    for (constraint_name,) in foreign_keys:
+        db.session.execute(text(f'ALTER TABLE `{table_name}` DROP FOREIGN KEY `{constraint_name}`'))
+
+    db.session.execute(text(
+        f'ALTER TABLE `{table_name}` MODIFY `{time_column}` DATETIME NOT NULL, '
+        f'DROP PRIMARY KEY, ADD PRIMARY KEY (`Id`, `{time_column}`)'
+    ))
+
+    oldest = db.session.execute(text(f'SELECT MIN(`{time_column}`) FROM `{table_name}`')).scalar()
+    start = month_start(oldest or now)
+    last = add_months(month_start(now), months_ahead)
+    definitions = []
+    while start <= last:
+        definitions.append(_partition_definition(start))
+        start = add_months(start, 1)
+    definitions.append('PARTITION pmax VALUES LESS THAN MAXVALUE')
+
+    db.session.execute(text(
+        f'ALTER TABLE `{table_name}` PARTITION BY RANGE (TO_DAYS(`{time_column}`)) ({", ".join(definitions)})'
+    ))
+    db.session.commit()
+    return {'undatedArchived': undated_count, 'foreignKeysDropped': [name for (name,) in foreign_keys],
+            'partitions': len(definitions)}
+
+
+def _mysql_add_future_partitions(table_name, now, months_ahead):
+    existing = set(_mysql_partitions(table_name))
+    added = []
+    start = month_start(now)
+    for _ in range(months_ahead + 1):
+        name = f'p{month_suffix(start)}'
+        if name not in existing:
+            db.session.execute(text(
+                f'ALTER TABLE `{table_name}` REORGANIZE PARTITION pmax INTO '
+                f'({_partition_definition(start)}, PARTITION pmax VALUES LESS THAN MAXVALUE)'
+            ))
+            added.append(name)
+        start = add_months(start, 1)
+    db.session.commit()
+    return added
+
+
+def _mysql_expire_partitions(table_name, cutoff):
+    time_column = LOG_TABLES[table_name][0]
+    expired = []
+    for name in _mysql_partitions(table_name):
+        if not re.match(r'^p\d{6}$', name) or parse_suffix(name[1:]) >= cutoff:
+            continue
+        result = db.session.execute(
+            text(f'SELECT * FROM `{table_name}` PARTITION ({name})').execution_options(stream_results=True)
+        )
+        path, count = archive_rows(table_name, name[1:], result)
+        db.session.execute(text(f'ALTER TABLE `{table_name}` DROP PARTITION {name}'))
+        db.session.commit()
+        expired.append({'month': name[1:], 'rows': count, 'archive': path})
+    return expired
+
+
+# ---------------------------------------------------------------------------
+# Punkt wejścia konserwacji
+# ---------------------------------------------------------------------------
+
+def run_maintenance(now=None):
+    """Tworzy/rotuje partycje i archiwizuje wygasłe miesiące dla wszystkich tabel logów"""
+    now = now or datetime.now()
+    months_ahead = current_app.config.get('LOG_PARTITIONS_AHEAD', 2)
+    summary = {}
+    for table_name, (time_column, retention_key) in LOG_TABLES.items():
+        retention_months = current_app.config.get(retention_key, 12)
+        cutoff = add_months(month_start(now), -retention_months)
+        table_summary = {'retentionMonths': retention_months, 'cutoff': cutoff.isoformat()}
+
+        if is_partitioning_supported():
+            if not _mysql_partitions(table_name):
+                # Przebudowa tabeli nie jest wykonywana w ramach konserwacji (żądanie HTTP, harmonogram)
+                table_summary['partitioned'] = False
+                table_summary['error'] = 'Tabela nie jest partycjonowana - uruchom `flask logs partition`'
+                summary[table_name] = table_summary
+                continue
+            table_summary['partitionsAdded'] = _mysql_add_future_partitions(table_name, now, months_ahead)
+            table_summary['expired'] = _mysql_expire_partitions(table_name, cutoff)
+        else:
+            table_summary['moved'] = _rotate_month_tables(table_name, now)
+            table_summary['expired'] = _expire_month_tables(table_name, cutoff)
+
+        summary[table_name] = table_summary
+    return summary
+
+
+@register_job_type('log_maintenance', 'Rotacja partycji logów i archiwizacja wygasłych miesięcy')
+def log_maintenance_job(params, job):
+    return run_maintenance()
+
+
+def init_log_storage(app):
+    """Rejestruje komendy CLI konserwacji logów"""
+
+    @app.cli.group('logs')
+    def logs_cli():
+        """Przechowywanie i retencja logów"""
+
+    @logs_cli.command('maintain')
+    def maintain_command():
+        """Rotuje partycje logów i archiwizuje wygasłe miesiące"""
+        summary = run_maintenance()
+        click.echo(json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+
+    @logs_cli.command('partition')
+    @click.option('--archive-undated', is_flag=True,
+                  help='Zarchiwizuj i usuń wiersze bez daty zamiast przerywać migrację')
+    def partition_command(archive_undated):
+        """Jednorazowo konwertuje tabele logów MySQL na partycjonowane (przebudowa tabel)"""
+        if not is_partitioning_supported():
+            click.echo('Partycjonowanie jest dostępne tylko w MySQL - pozostałe bazy używają tabel miesięcznych')
+            return
+        for table_name in LOG_TABLES:
+            if _mysql_partitions(table_name):
+                click.echo(f'{table_name}: tabela jest już partycjonowana')
+                continue
+            try:
+                result = enable_partitioning(table_name, archive_undated=archive_undated)
+            except LogStorageError as e:
+                db.session.rollback()
+                raise click.ClickException(str(e))
+            click.echo(f'{table_name}: {json.dumps(result, ensure_ascii=False)}')
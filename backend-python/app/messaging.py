@@ -0,0 +1,116 @@
+"""
+Skrzynka wiadomości: wątki, stronicowanie i zbiorcze oznaczanie jako przeczytane.
+
+Listy (odebrane, wysłane, wątek) są stronicowane kursorem (SentAt, Id) zamiast OFFSET -
+każda strona to odczyt zakresu indeksu (RecipientUserId[, IsRead], SentAt) lub
+(SenderUserId, SentAt), więc czas odpowiedzi nie zależy od liczby wiadomości użytkownika.
+Nazwy nadawcy i odbiorcy są dołączane w tym samym zapytaniu (bez zapytania o użytkownika
+dla każdej wiadomości).
+
+Wątek to pierwsza wiadomość (ThreadId = NULL) i odpowiedzi z ThreadId równym jej Id.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, false, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.counters import adjust_counter
+from app.database import db
+from app.models import Message, User
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class MessageCursorError(ValueError):
+    """Nieprawidłowy kursor stronicowania"""
+
+
+def encode_cursor(message):
+    return f"{message.SentAt.isoformat() if message.SentAt else ''}_{message.Id}"
+
+
+def parse_cursor(value):
+    """Kursor '<SentAt ISO lub pusty>_<Id>' -> (datetime lub None, id)"""
+    try:
+        sent_at, message_id = value.rsplit('_', 1)
+        return (datetime.fromisoformat(sent_at) if sent_at else None), int(message_id)
+    except (AttributeError, ValueError):
+        raise MessageCursorError('Nieprawidłowy kursor stronicowania')
+
+
+def _after_cursor(cursor, newest_first):
+    # Wiadomości bez SentAt są w MySQL i SQLite pierwsze przy rosnącym i ostatnie przy malejącym sortowaniu
+    sent_at, message_id = parse_cursor(cursor)
+    if newest_first:
+        if sent_at is None:
+            return and_(Message.SentAt.is_(None), Message.Id < message_id)
+        return or_(Message.SentAt < sent_at, and_(Message.SentAt == sent_at, Message.Id < message_id),
+                   Message.SentAt.is_(None))
+    if sent_at is None:
+        return or_(and_(Message.SentAt.is_(None), Message.Id > message_id), Message.SentAt.isnot(None))
+    return or_(Message.SentAt > sent_at, and_(Message.SentAt == sent_at, Message.Id > message_id))
+
+
+def thread_condition(thread_id):
+    return or_(Message.Id == thread_id, Message.ThreadId == thread_id)
+
+
+def message_page(condition, limit=DEFAULT_PAGE_SIZE, cursor=None, newest_first=True):
+    """
+    Strona wiadomości spełniających condition razem z danymi nadawcy i odbiorcy.
+    Zwraca (lista słowników, kursor następnej strony albo None).
+    """
+    sender, recipient = aliased(User), aliased(User)
+    query = select(Message, sender, recipient) \
+        .outerjoin(sender, sender.id == Message.SenderUserId) \
+        .outerjoin(recipient, recipient.id == Message.RecipientUserId) \
+        .where(condition)
+
+    if cursor:
+        query = query.where(_after_cursor(cursor, newest_first))
+    order = (Message.SentAt.desc(), Message.Id.desc()) if newest_first else (Message.SentAt, Message.Id)
+
+    # Jeden wiersz więcej - informacja, czy istnieje następna strona
+    rows = db.session.execute(query.order_by(*order).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][0]) if has_more else None
+    return [message.to_dict(sender=sender_user, recipient=recipient_user)
+            for message, sender_user, recipient_user in rows], next_cursor
+
+
+def inbox_condition(user_id, unread_only=False):
+    condition = Message.RecipientUserId == user_id
+    if unread_only:
+        condition = and_(condition, Message.IsRead == false())
+    return condition
+
+
+def sent_condition(user_id):
+    return Message.SenderUserId == user_id
+
+
+def participant_condition(user_id):
+    return or_(Message.SenderUserId == user_id, Message.RecipientUserId == user_id)
+
+
+def mark_read(user_id, ids=None, thread_id=None):
+    """
+    Oznacza jako przeczytane wiadomości odebrane przez użytkownika - wskazane Id, wątek
+    albo wszystkie (bez ids i thread_id). Jeden UPDATE bez wstępnego odczytu Id - obiekty
+    wczytane do sesji odświeżają się po commit. Licznik nieprzeczytanych jest korygowany
+    jawnie, bo zapis zbiorczy pomija zdarzenia mapperów. Nie wykonuje commit.
+    """
+    condition = and_(Message.RecipientUserId == user_id, Message.IsRead.isnot(True))
+    if ids is not None:
+        condition = and_(condition, Message.Id.in_(ids))
+    if thread_id is not None:
+        condition = and_(condition, thread_condition(thread_id))
+
+    updated = db.session.execute(
+        update(Message).where(condition).values(IsRead=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    adjust_counter(db.session.connection(), user_id, 'UnreadMessages', -updated)
+    return updated
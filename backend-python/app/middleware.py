@@ -23,6 +23,11 @@ def require_auth(f):
                 return jsonify({'error': 'Token nieprawidłowy'}), 401
         
         if not token:
+            # Żądanie częściowe /api/batch - autoryzacja wykonana raz dla całego batcha
+            batch_user_id = getattr(g, 'batch_user_id', None)
+            if batch_user_id and request.environ.get('crm.batch'):
+                g.user_id = batch_user_id
+                return f(*args, **kwargs)
             return jsonify({'error': 'Brak tokenu autoryzacji'}), 401
         
         try:
@@ -83,16 +88,26 @@ def get_current_user():
         return User.query.get(user_id)
     return None
 
+def check_admin():
+    """Zwraca odpowiedź z błędem, jeśli bieżący użytkownik nie jest administratorem"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Użytkownik nie znaleziony'}), 401
+    if not user.role or user.role.name != 'Admin':
+        return jsonify({'error': 'Brak uprawnień administratora'}), 403
+    return None
+
 def require_admin(f):
-    """Dekorator wymagający uprawnień administratora"""
+    """Dekorator wymagający uprawnień administratora (autoryzacja jak w require_auth)"""
     @wraps(f)
+    @require_auth
     def decorated_function(*args, **kwargs):
-        if not require_auth(f):
-            return jsonify({'error': 'Wymagana autoryzacja'}), 401
+        if request.method == 'OPTIONS':
+            return f(*args, **kwargs)
         
-        user_role = get_current_user_role()
-        if user_role != 'Admin':
-            return jsonify({'error': 'Wymagane uprawnienia administratora'}), 403
+        error = check_admin()
+        if error:
+            return error
         
         return f(*args, **kwargs)
     
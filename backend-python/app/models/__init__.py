@@ -21,10 +21,22 @@ from .setting import Setting
 from .system_log import SystemLog
 from .login_history import LoginHistory
 from .calendar_event import CalendarEvent
+from .scheduled_job import ScheduledJob
+from .report_artifact import ReportArtifact
+from .user_counter import UserCounter
+from .change_log import ChangeLog
+from .table_version import TableVersion
+from .import_job import ImportJob
+from .task_aggregate import TaskAggregate
+from .customer_duplicate import CustomerMatchKey, CustomerDuplicate
+from .deletion_job import DeletionJob
 
 __all__ = [
     'User', 'Role', 'Customer', 'Task', 'Message', 'Activity',
     'Reminder', 'Notification', 'Invoice', 'InvoiceItem', 'Group', 'Meeting',
     'Note', 'Tag', 'Contract', 'Service', 'Payment', 'TaxRate',
-    'Template', 'Setting', 'SystemLog', 'LoginHistory', 'CalendarEvent'
+    'Template', 'Setting', 'SystemLog', 'LoginHistory', 'CalendarEvent',
+    'ScheduledJob', 'ReportArtifact', 'UserCounter',
+    'ChangeLog', 'TableVersion', 'ImportJob', 'TaskAggregate',
+    'CustomerMatchKey', 'CustomerDuplicate', 'DeletionJob'
 ]
\ No newline at end of file
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Activity(db.Model):
     __tablename__ = 'Activities'
+    __table_args__ = (
+        # Aktywności klienta i użytkownika
+        db.Index('ix_Activities_CustomerId', 'CustomerId'),
+        db.Index('ix_Activities_UserId', 'UserId'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Note = db.Column(db.Text, nullable=False)
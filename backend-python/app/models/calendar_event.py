@@ -3,6 +3,10 @@ from datetime import datetime
 
 class CalendarEvent(db.Model):
     __tablename__ = 'CalendarEvents'
+    __table_args__ = (
+        # Kalendarz użytkownika w zakresie dat
+        db.Index('ix_CalendarEvents_UserId_StartTime', 'UserId', 'StartTime'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Title = db.Column(db.String(255), nullable=False)
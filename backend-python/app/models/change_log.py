@@ -0,0 +1,35 @@
+from app.database import db
+from datetime import datetime
+
+class ChangeLog(db.Model):
+    """Dziennik zmian encji dla synchronizacji przyrostowej (kursor /api/sync to (CommitSeq, Id))"""
+    __tablename__ = 'ChangeLog'
+    __table_args__ = (
+        # Odczyt zmian po kursorze w kolejności zatwierdzeń
+        db.Index('ix_ChangeLog_CommitSeq_Id', 'CommitSeq', 'Id'),
+        # Nadanie numeru zatwierdzenia wpisom transakcji
+        db.Index('ix_ChangeLog_TxnToken', 'TxnToken'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    EntityType = db.Column(db.String(50), nullable=False)
+    EntityId = db.Column(db.Integer, nullable=False)
+    Operation = db.Column(db.String(10), nullable=False)  # upsert / delete
+    # Właściciel encji należących do użytkownika (zadania, przypomnienia); NULL - widoczne dla wszystkich
+    OwnerUserId = db.Column(db.Integer)
+    ChangedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Numer zatwierdzenia transakcji (nadawany przy commit, rośnie w kolejności zatwierdzeń)
+    CommitSeq = db.Column(db.Integer)
+    # Znacznik transakcji, która dopisała wpis - wiąże wpisy z numerem zatwierdzenia
+    TxnToken = db.Column(db.String(32))
+    
+    def to_dict(self):
+        return {
+            'id': self.Id,
+            'entityType': self.EntityType,
+            'entityId': self.EntityId,
+            'operation': self.Operation,
+            'ownerUserId': self.OwnerUserId,
+            'changedAt': self.ChangedAt.isoformat() if self.ChangedAt else None,
+            'commitSeq': self.CommitSeq
+        }
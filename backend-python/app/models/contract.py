@@ -1,22 +1,37 @@
 from app.database import db
+from app.money import Money
 from datetime import datetime
 from decimal import Decimal
 
 # Tabela pomocnicza dla relacji many-to-many między umowami a tagami
 contract_tags = db.Table('ContractTags',
     db.Column('ContractId', db.Integer, db.ForeignKey('Contracts.Id'), primary_key=True),
-    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True)
+    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True),
+    # Encje z danym tagiem - klucz główny zaczyna się od ContractId
+    db.Index('ix_ContractTags_TagId', 'TagId')
 )
 
 # Tabela pomocnicza dla relacji many-to-many między umowami a usługami
 contract_services = db.Table('ContractServices',
     db.Column('ContractId', db.Integer, db.ForeignKey('Contracts.Id'), primary_key=True),
     db.Column('ServiceId', db.Integer, db.ForeignKey('Services.Id'), primary_key=True),
-    db.Column('Quantity', db.Integer, default=1)  # Ilość danej usługi w kontrakcie
+    db.Column('Quantity', db.Integer, default=1),  # Ilość danej usługi w kontrakcie
+    db.Index('ix_ContractServices_ServiceId', 'ServiceId')
 )
 
 class Contract(db.Model):
     __tablename__ = 'Contracts'
+    __table_args__ = (
+        # Lista kontraktów zawężona do grup użytkownika (app/visibility.py), od najnowszych
+        db.Index('ix_Contracts_ResponsibleGroupId_Id', 'ResponsibleGroupId', 'Id'),
+        # Kontrakty klienta i okresy obowiązywania
+        db.Index('ix_Contracts_CustomerId', 'CustomerId'),
+        db.Index('ix_Contracts_SignedAt', 'SignedAt'),
+        db.Index('ix_Contracts_StartDate', 'StartDate'),
+        db.Index('ix_Contracts_EndDate', 'EndDate'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Contracts_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Title = db.Column(db.String(255), nullable=False)
@@ -27,10 +42,11 @@ class Contract(db.Model):
     ScopeOfServices = db.Column(db.Text)
     StartDate = db.Column(db.DateTime)
     EndDate = db.Column(db.DateTime)
-    NetAmount = db.Column(db.Numeric(65, 30))
+    NetAmount = db.Column(Money)
     PaymentTermDays = db.Column(db.Integer)
     CreatedByUserId = db.Column(db.Integer)
     ResponsibleGroupId = db.Column(db.Integer)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     customer = db.relationship('Customer', backref='contracts')
     # Relacja many-to-many z tagami
@@ -4,11 +4,25 @@ from datetime import datetime
 # Tabela pomocnicza dla relacji many-to-many między klientami a tagami
 customer_tags = db.Table('CustomerTags',
     db.Column('CustomerId', db.Integer, db.ForeignKey('Customers.Id'), primary_key=True),
-    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True)
+    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True),
+    # Encje z danym tagiem - klucz główny zaczyna się od CustomerId
+    db.Index('ix_CustomerTags_TagId', 'TagId')
 )
 
 class Customer(db.Model):
     __tablename__ = 'Customers'
+    __table_args__ = (
+        # Lista klientów zawężona do grup użytkownika (app/visibility.py), od najnowszych
+        db.Index('ix_Customers_AssignedGroupId_Id', 'AssignedGroupId', 'Id'),
+        # Wyszukiwanie i sortowanie listy, dopasowanie duplikatów po e-mailu
+        db.Index('ix_Customers_Email', 'Email'),
+        db.Index('ix_Customers_Company', 'Company'),
+        db.Index('ix_Customers_CreatedAt', 'CreatedAt'),
+        db.Index('ix_Customers_AssignedUserId', 'AssignedUserId'),
+        db.Index('ix_Customers_RepresentativeUserId', 'RepresentativeUserId'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Customers_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Name = db.Column(db.String(255), nullable=False)
@@ -19,8 +33,10 @@ class Customer(db.Model):
     NIP = db.Column(db.String(50))
     RepresentativeUserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     CreatedAt = db.Column(db.DateTime, default=datetime.utcnow)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     AssignedGroupId = db.Column(db.Integer)
     AssignedUserId = db.Column(db.Integer)
+    DeletedAt = db.Column(db.DateTime)  # Usunięty - ukryty w zapytaniach do czasu usunięcia zależności (app/deletion.py)
     
     representative_user = db.relationship('User', foreign_keys=[RepresentativeUserId], backref='represented_customers')
     
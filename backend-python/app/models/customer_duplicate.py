@@ -0,0 +1,43 @@
+from app.database import db
+from datetime import datetime
+
+class CustomerMatchKey(db.Model):
+    """Znormalizowany klucz blokujący klienta (app/dedup.py) - kandydaci na duplikaty mają wspólny klucz"""
+    __tablename__ = 'CustomerMatchKeys'
+    __table_args__ = (
+        # Usuwanie i odświeżanie kluczy jednego klienta
+        db.Index('ix_CustomerMatchKeys_CustomerId', 'CustomerId'),
+        # Bloki zmienione od ostatniego przebiegu wykrywania
+        db.Index('ix_CustomerMatchKeys_IndexedAt', 'IndexedAt'),
+    )
+
+    KeyType = db.Column(db.String(10), primary_key=True)  # nip / email / phone / name
+    KeyValue = db.Column(db.String(191), primary_key=True)
+    CustomerId = db.Column(db.Integer, primary_key=True)
+    IndexedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class CustomerDuplicate(db.Model):
+    """Para klientów podejrzanych o duplikat (CustomerId < DuplicateCustomerId)"""
+    __tablename__ = 'CustomerDuplicates'
+    __table_args__ = (
+        # Lista podejrzanych duplikatów od najbardziej prawdopodobnych
+        db.Index('ix_CustomerDuplicates_Status_Score', 'Status', 'Score'),
+        db.Index('ix_CustomerDuplicates_DuplicateCustomerId', 'DuplicateCustomerId'),
+    )
+
+    CustomerId = db.Column(db.Integer, primary_key=True)
+    DuplicateCustomerId = db.Column(db.Integer, primary_key=True)
+    Score = db.Column(db.Float, nullable=False)
+    MatchedOn = db.Column(db.String(50))  # np. "nip,name"
+    Status = db.Column(db.String(20), nullable=False, default='Open')  # Open / Dismissed
+    DetectedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'customerId': self.CustomerId,
+            'duplicateCustomerId': self.DuplicateCustomerId,
+            'score': self.Score,
+            'matchedOn': self.MatchedOn.split(',') if self.MatchedOn else [],
+            'status': self.Status,
+            'detectedAt': self.DetectedAt.isoformat() if self.DetectedAt else None
+        }
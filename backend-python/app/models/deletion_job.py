@@ -0,0 +1,48 @@
+from app.database import db
+from datetime import datetime
+import json
+
+class DeletionJob(db.Model):
+    """Usuwanie klienta lub użytkownika w tle - encja jest ukryta od razu, zależności usuwane partiami"""
+    __tablename__ = 'DeletionJobs'
+    __table_args__ = (
+        db.Index('ix_DeletionJobs_Entity', 'EntityType', 'EntityId'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    EntityType = db.Column(db.String(20), nullable=False)  # customer / user
+    EntityId = db.Column(db.Integer, nullable=False)
+    Status = db.Column(db.String(20), default='queued', nullable=False, index=True)  # queued / running / completed / failed
+    CurrentStep = db.Column(db.String(50))
+    TotalRows = db.Column(db.Integer)
+    ProcessedRows = db.Column(db.Integer, default=0, nullable=False)
+    StepCounts = db.Column(db.Text)  # JSON: krok -> liczba usuniętych / odpiętych wierszy
+    Error = db.Column(db.Text)
+    RequestedByUserId = db.Column(db.Integer)
+    CreatedAt = db.Column(db.DateTime, default=datetime.now)
+    StartedAt = db.Column(db.DateTime)
+    FinishedAt = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        progress = None
+        if self.Status == 'completed':
+            progress = 100.0
+        elif self.TotalRows:
+            progress = round(100 * (self.ProcessedRows or 0) / self.TotalRows, 1)
+        
+        return {
+            'id': self.Id,
+            'entityType': self.EntityType,
+            'entityId': self.EntityId,
+            'status': self.Status,
+            'currentStep': self.CurrentStep,
+            'totalRows': self.TotalRows,
+            'processedRows': self.ProcessedRows,
+            'steps': json.loads(self.StepCounts) if self.StepCounts else {},
+            'progress': progress,
+            'error': self.Error,
+            'requestedByUserId': self.RequestedByUserId,
+            'createdAt': self.CreatedAt.isoformat() if self.CreatedAt else None,
+            'startedAt': self.StartedAt.isoformat() if self.StartedAt else None,
+            'finishedAt': self.FinishedAt.isoformat() if self.FinishedAt else None
+        }
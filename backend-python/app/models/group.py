@@ -4,7 +4,9 @@ from datetime import datetime
 # Tabela pomocnicza dla relacji many-to-many między użytkownikami a grupami
 user_groups = db.Table('UserGroups',
     db.Column('UserId', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('GroupId', db.Integer, db.ForeignKey('Groups.Id'), primary_key=True)
+    db.Column('GroupId', db.Integer, db.ForeignKey('Groups.Id'), primary_key=True),
+    # Członkowie grupy - klucz główny zaczyna się od UserId
+    db.Index('ix_UserGroups_GroupId', 'GroupId')
 )
 
 class Group(db.Model):
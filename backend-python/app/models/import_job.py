@@ -0,0 +1,52 @@
+from app.database import db
+from datetime import datetime
+
+class ImportJob(db.Model):
+    __tablename__ = 'ImportJobs'
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    EntityType = db.Column(db.String(50), nullable=False)  # customers / services / invoices
+    FileName = db.Column(db.String(255), nullable=False)
+    FilePath = db.Column(db.String(500), nullable=False)
+    FileFormat = db.Column(db.String(10), nullable=False)  # csv / xlsx
+    Status = db.Column(db.String(20), default='queued', nullable=False, index=True)  # queued / running / completed / failed
+    BatchSize = db.Column(db.Integer)
+    DryRun = db.Column(db.Boolean, default=False, nullable=False)  # Tylko walidacja, bez zapisu
+    TotalRows = db.Column(db.Integer)
+    ProcessedRows = db.Column(db.Integer, default=0, nullable=False)
+    InsertedRows = db.Column(db.Integer, default=0, nullable=False)
+    ErrorRows = db.Column(db.Integer, default=0, nullable=False)
+    ErrorReportPath = db.Column(db.String(500))  # Raport błędów CSV (wiersz, błąd, dane wiersza)
+    Error = db.Column(db.Text)  # Błąd przerywający cały import
+    CreatedByUserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
+    CreatedAt = db.Column(db.DateTime, default=datetime.now)
+    StartedAt = db.Column(db.DateTime)
+    FinishedAt = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        progress = None
+        if self.TotalRows:
+            progress = round(100 * (self.ProcessedRows or 0) / self.TotalRows, 1)
+        elif self.Status == 'completed':
+            progress = 100.0
+        
+        return {
+            'id': self.Id,
+            'entityType': self.EntityType,
+            'fileName': self.FileName,
+            'fileFormat': self.FileFormat,
+            'status': self.Status,
+            'batchSize': self.BatchSize,
+            'dryRun': self.DryRun,
+            'totalRows': self.TotalRows,
+            'processedRows': self.ProcessedRows,
+            'insertedRows': self.InsertedRows,
+            'errorRows': self.ErrorRows,
+            'progress': progress,
+            'hasErrorReport': bool(self.ErrorReportPath),
+            'error': self.Error,
+            'createdByUserId': self.CreatedByUserId,
+            'createdAt': self.CreatedAt.isoformat() if self.CreatedAt else None,
+            'startedAt': self.StartedAt.isoformat() if self.StartedAt else None,
+            'finishedAt': self.FinishedAt.isoformat() if self.FinishedAt else None
+        }
@@ -1,14 +1,40 @@
 from app.database import db
+from app.money import Money, from_grosze, split_gross, to_grosze
 from datetime import datetime
 
 # Tabela pomocnicza dla relacji many-to-many między fakturami a tagami
 invoice_tags = db.Table('InvoiceTags',
     db.Column('InvoiceId', db.Integer, db.ForeignKey('Invoices.Id'), primary_key=True),
-    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True)
+    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True),
+    # Encje z danym tagiem - klucz główny zaczyna się od InvoiceId
+    db.Index('ix_InvoiceTags_TagId', 'TagId')
 )
 
+def invoice_status(is_paid, due_date, now=None):
+    """Status faktury: Paid / Overdue (termin minął) / Pending"""
+    if is_paid:
+        return 'Paid'
+    if due_date and due_date <= (now or datetime.now()):
+        return 'Overdue'
+    return 'Pending'
+
 class Invoice(db.Model):
     __tablename__ = 'Invoices'
+    __table_args__ = (
+        # Wyszukiwanie faktur, którym właśnie minął termin (zadanie overdue_invoices)
+        db.Index('ix_Invoices_IsPaid_DueDate', 'IsPaid', 'DueDate'),
+        # Lista przeterminowanych faktur (GET /api/Invoices/overdue)
+        db.Index('ix_Invoices_Status_DueDate', 'Status', 'DueDate'),
+        # Lista faktur zawężona do grup użytkownika (app/visibility.py), od najnowszych
+        db.Index('ix_Invoices_AssignedGroupId_Id', 'AssignedGroupId', 'Id'),
+        # Faktury klienta, okresy raportów i wyszukiwanie po numerze
+        db.Index('ix_Invoices_CustomerId', 'CustomerId'),
+        db.Index('ix_Invoices_IssuedAt', 'IssuedAt'),
+        db.Index('ix_Invoices_DueDate', 'DueDate'),
+        db.Index('ix_Invoices_Number', 'Number'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Invoices_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Number = db.Column(db.String(100), nullable=False)
@@ -16,19 +42,24 @@ class Invoice(db.Model):
     IssuedAt = db.Column(db.DateTime)
     DueDate = db.Column(db.DateTime)
     IsPaid = db.Column(db.Boolean, default=False)
-    TotalAmount = db.Column(db.Numeric(65, 30))
+    TotalAmount = db.Column(Money)
     AssignedGroupId = db.Column(db.Integer)
     CreatedByUserId = db.Column(db.Integer)
+    Status = db.Column(db.String(20), default='Pending')  # Pending / Overdue / Paid - utrzymywany przy zapisie i przez zadanie overdue_invoices
+    OverdueSince = db.Column(db.DateTime)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     customer = db.relationship('Customer', backref='invoices')
     # Relacja many-to-many z tagami
     tags = db.relationship('Tag', secondary=invoice_tags, backref='invoices')
     
     def to_dict(self, include_items=False):
-        # Oblicz kwoty netto i podatku (23% VAT)
-        total_amount = float(self.TotalAmount) if self.TotalAmount else 0
-        net_amount = total_amount / 1.23 if total_amount > 0 else 0  # Kwota netto (bez VAT)
-        tax_amount = total_amount - net_amount  # Kwota podatku VAT
+        # Oblicz kwoty netto i podatku (23% VAT) w groszach - netto + VAT = brutto co do grosza
+        total_grosze = to_grosze(self.TotalAmount) or 0
+        net_grosze, tax_grosze = split_gross(total_grosze)
+        total_amount = float(from_grosze(total_grosze))
+        net_amount = float(from_grosze(net_grosze))  # Kwota netto (bez VAT)
+        tax_amount = float(from_grosze(tax_grosze))  # Kwota podatku VAT
         
         result = {
             'id': self.Id,
@@ -39,7 +70,8 @@ class Invoice(db.Model):
             'issuedAt': self.IssuedAt.isoformat() if self.IssuedAt else None,
             'dueDate': self.DueDate.isoformat() if self.DueDate else None,
             'isPaid': self.IsPaid,
-            'status': 'Paid' if self.IsPaid else 'Pending',  # Mapowanie boolean na string
+            'status': self.Status or invoice_status(self.IsPaid, self.DueDate),
+            'overdueSince': self.OverdueSince.isoformat() if self.OverdueSince else None,
             'amount': total_amount,
             'totalAmount': total_amount,
             'netAmount': net_amount,  # Kwota netto
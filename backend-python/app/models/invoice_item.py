@@ -1,30 +1,38 @@
 from app.database import db
+from app.money import DEFAULT_VAT_RATE, Money, from_grosze, line_amounts
 from decimal import Decimal
 
 class InvoiceItem(db.Model):
     """Model reprezentujący pozycję na fakturze (relacja Invoice <-> Service)"""
     __tablename__ = 'InvoiceItems'
+    __table_args__ = (
+        # Pozycje faktury i pozycje z daną usługą
+        db.Index('ix_InvoiceItems_InvoiceId', 'InvoiceId'),
+        db.Index('ix_InvoiceItems_ServiceId', 'ServiceId'),
+    )
 
     Id = db.Column(db.Integer, primary_key=True)
     InvoiceId = db.Column(db.Integer, db.ForeignKey('Invoices.Id'), nullable=False)
     ServiceId = db.Column(db.Integer, db.ForeignKey('Services.Id'), nullable=False)
     Quantity = db.Column(db.Integer, default=1)
-    UnitPrice = db.Column(db.Numeric(65, 30))  # Cena w momencie utworzenia faktury
+    UnitPrice = db.Column(Money)  # Cena w momencie utworzenia faktury
     Description = db.Column(db.String(255), nullable=True) # Dodana kolumna Description
     TaxRate = db.Column(db.Numeric(65, 30), default=Decimal('0.23'), nullable=False) # Dodana kolumna TaxRate z domyślną wartością 23%
-    NetAmount = db.Column(db.Numeric(65, 30), default=Decimal('0.00'), nullable=False) # Dodana kolumna NetAmount
-    TaxAmount = db.Column(db.Numeric(65, 30), default=Decimal('0.00'), nullable=False) # Dodana kolumna TaxAmount
-    GrossAmount = db.Column(db.Numeric(65, 30), default=Decimal('0.00'), nullable=False) # Dodana kolumna GrossAmount
+    NetAmount = db.Column(Money, default=Decimal('0.00'), nullable=False) # Dodana kolumna NetAmount
+    TaxAmount = db.Column(Money, default=Decimal('0.00'), nullable=False) # Dodana kolumna TaxAmount
+    GrossAmount = db.Column(Money, default=Decimal('0.00'), nullable=False) # Dodana kolumna GrossAmount
 
     # Relacje
     invoice = db.relationship('Invoice', backref='invoice_items')
     service = db.relationship('Service', backref='invoice_items')
 
     def to_dict(self):
-        unit_price = float(self.UnitPrice) if self.UnitPrice else 0
         quantity = self.Quantity or 0
-        net_total = unit_price * quantity  # Kwota netto pozycji
-        gross_total = net_total * 1.23  # Kwota brutto z VAT (23%)
+        # Kwoty pozycji w groszach (VAT 23%)
+        net_grosze, _, gross_grosze = line_amounts(self.UnitPrice, quantity, DEFAULT_VAT_RATE)
+        unit_price = float(self.UnitPrice) if self.UnitPrice else 0
+        net_total = float(from_grosze(net_grosze))  # Kwota netto pozycji
+        gross_total = float(from_grosze(gross_grosze))  # Kwota brutto z VAT (23%)
         
         return {
             'id': self.Id,
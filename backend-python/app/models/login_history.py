@@ -5,6 +5,11 @@ import pytz # Importuj pytz
 
 class LoginHistory(db.Model):
     __tablename__ = 'LoginHistory'
+    __table_args__ = (
+        # Historia logowań użytkownika od najnowszych i czyszczenie starych wpisów
+        db.Index('ix_LoginHistory_UserId_LoginTime', 'UserId', 'LoginTime'),
+        db.Index('ix_LoginHistory_LoginTime', 'LoginTime'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     UserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -16,24 +21,29 @@ class LoginHistory(db.Model):
     user = db.relationship('User', backref=db.backref('login_history', cascade='all, delete-orphan'))
     
     def to_dict(self):
-        # Parsuj informacje o urządzeniu z UserAgent
-        device_info = get_device_info(self.UserAgent or '')
-        device_parts = device_info.split(' - ')
-        
-        device_type = device_parts[0] if len(device_parts) > 0 else 'Unknown'
-        operating_system = device_parts[1] if len(device_parts) > 1 else 'Unknown'
-        browser = device_parts[2] if len(device_parts) > 2 else 'Unknown'
-        
-        login_time_iso = self.LoginTime.isoformat() if self.LoginTime else None 
-        
-        return {
-            'id': self.Id,
-            'userId': self.UserId,
-            'loginTime': login_time_iso,
-            'ipAddress': self.IpAddress,
-            'userAgent': self.UserAgent,
-            'deviceType': device_type,
-            'operatingSystem': operating_system,
-            'browser': browser,
-            'success': self.Success
-        }
\ No newline at end of file
+        return login_row_to_dict({column.name: getattr(self, column.name) for column in self.__table__.columns})
+
+
+def login_row_to_dict(row):
+    """Słownik API z wiersza historii logowań (także wiersza zapytania po tabelach miesięcznych logów)"""
+    # Parsuj informacje o urządzeniu z UserAgent
+    device_info = get_device_info(row['UserAgent'] or '')
+    device_parts = device_info.split(' - ')
+
+    device_type = device_parts[0] if len(device_parts) > 0 else 'Unknown'
+    operating_system = device_parts[1] if len(device_parts) > 1 else 'Unknown'
+    browser = device_parts[2] if len(device_parts) > 2 else 'Unknown'
+
+    login_time_iso = row['LoginTime'].isoformat() if row['LoginTime'] else None
+
+    return {
+        'id': row['Id'],
+        'userId': row['UserId'],
+        'loginTime': login_time_iso,
+        'ipAddress': row['IpAddress'],
+        'userAgent': row['UserAgent'],
+        'deviceType': device_type,
+        'operatingSystem': operating_system,
+        'browser': browser,
+        'success': row['Success']
+    }
@@ -4,11 +4,22 @@ from datetime import datetime
 # Tabela pomocnicza dla relacji many-to-many między spotkaniami a tagami
 meeting_tags = db.Table('MeetingTags',
     db.Column('MeetingId', db.Integer, db.ForeignKey('Meetings.Id'), primary_key=True),
-    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True)
+    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True),
+    # Encje z danym tagiem - klucz główny zaczyna się od MeetingId
+    db.Index('ix_MeetingTags_TagId', 'TagId')
 )
 
 class Meeting(db.Model):
     __tablename__ = 'Meetings'
+    __table_args__ = (
+        # Lista spotkań zawężona do grup użytkownika (app/visibility.py), według terminu
+        db.Index('ix_Meetings_AssignedGroupId_ScheduledAt', 'AssignedGroupId', 'ScheduledAt'),
+        # Kalendarz spotkań i spotkania klienta
+        db.Index('ix_Meetings_ScheduledAt', 'ScheduledAt'),
+        db.Index('ix_Meetings_CustomerId', 'CustomerId'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Meetings_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Topic = db.Column(db.String(255), nullable=False)
@@ -16,6 +27,7 @@ class Meeting(db.Model):
     CustomerId = db.Column(db.Integer, db.ForeignKey('Customers.Id'), nullable=False)
     AssignedGroupId = db.Column(db.Integer, db.ForeignKey('Groups.Id'), nullable=True)
     CreatedByUserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     customer = db.relationship('Customer', backref='meetings')
     assigned_group = db.relationship('Group', backref='meetings')
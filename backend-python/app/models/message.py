@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Message(db.Model):
     __tablename__ = 'Messages'
+    __table_args__ = (
+        # Skrzynka odbiorcza (także tylko nieprzeczytane) i wysłane - stronicowanie po (SentAt, Id)
+        db.Index('ix_Messages_Recipient_IsRead_SentAt', 'RecipientUserId', 'IsRead', 'SentAt'),
+        db.Index('ix_Messages_Recipient_SentAt', 'RecipientUserId', 'SentAt'),
+        db.Index('ix_Messages_Sender_SentAt', 'SenderUserId', 'SentAt'),
+        db.Index('ix_Messages_ThreadId_SentAt', 'ThreadId', 'SentAt'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Subject = db.Column(db.String(255), nullable=False)
@@ -11,38 +18,44 @@ class Message(db.Model):
     RecipientUserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     SentAt = db.Column(db.DateTime, default=datetime.utcnow)
     IsRead = db.Column(db.Boolean, default=False)
+    # Wątek - Id pierwszej wiadomości wątku (NULL dla wiadomości rozpoczynającej wątek)
+    ThreadId = db.Column(db.Integer)
+    ParentMessageId = db.Column(db.Integer)
     
     sender = db.relationship('User', foreign_keys=[SenderUserId], backref=db.backref('sent_messages', cascade='all, delete-orphan'))
     recipient = db.relationship('User', foreign_keys=[RecipientUserId], backref=db.backref('received_messages', cascade='all, delete-orphan'))
     
-    def to_dict(self):
-        """Konwertuje model do słownika z nazwami użytkowników - format zgodny z C# API"""
-        from app.models import User
-        
-        # Pobierz dane nadawcy i odbiorcy
-        sender = User.query.get(self.SenderUserId)
-        recipient = User.query.get(self.RecipientUserId)
-        
+    def to_dict(self, sender=None, recipient=None):
+        """
+        Konwertuje model do słownika z nazwami użytkowników - format zgodny z C# API.
+        Listy przekazują dane użytkowników pobrane w tym samym zapytaniu (app/messaging.py),
+        pojedyncza wiadomość korzysta z relacji sender / recipient.
+        """
+        sender = sender if sender is not None else self.sender
+        recipient = recipient if recipient is not None else self.recipient
+
         sender_username = sender.username if sender else 'Unknown'
         recipient_username = recipient.username if recipient else 'Unknown'
         
         return {
             'id': self.Id,
+            'threadId': self.ThreadId or self.Id,
+            'parentMessageId': self.ParentMessageId,
             'subject': self.Subject,
             'body': self.Body,
             'senderUserId': self.SenderUserId,
             'senderUsername': sender_username,  # Dodane dla frontendu
             'sender': {
-                'id': sender.id if sender else None,
+                'id': sender.id,
                 'username': sender_username,
-                'email': sender.email if sender else None
+                'email': sender.email
             } if sender else None,
             'recipientUserId': self.RecipientUserId,
             'recipientUsername': recipient_username,  # Dodane dla frontendu
             'recipient': {
-                'id': recipient.id if recipient else None,
+                'id': recipient.id,
                 'username': recipient_username,
-                'email': recipient.email if recipient else None
+                'email': recipient.email
             } if recipient else None,
             'sentAt': self.SentAt.isoformat() if self.SentAt else None,
             'isRead': self.IsRead
@@ -3,10 +3,18 @@ from datetime import datetime
 
 class Note(db.Model):
     __tablename__ = 'Notes'
+    __table_args__ = (
+        # Notatki klienta i użytkownika (karta klienta, usuwanie)
+        db.Index('ix_Notes_CustomerId', 'CustomerId'),
+        db.Index('ix_Notes_UserId', 'UserId'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Notes_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Content = db.Column(db.Text, nullable=False)
     CreatedAt = db.Column(db.DateTime, default=datetime.utcnow)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     CustomerId = db.Column(db.Integer, db.ForeignKey('Customers.Id'), nullable=False)
     UserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
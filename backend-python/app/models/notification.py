@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Notification(db.Model):
     __tablename__ = 'Notifications'
+    __table_args__ = (
+        # Powiadomienia użytkownika od najnowszych i liczba nieprzeczytanych
+        db.Index('ix_Notifications_UserId_CreatedAt', 'UserId', 'CreatedAt'),
+        db.Index('ix_Notifications_UserId_IsRead', 'UserId', 'IsRead'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Message = db.Column(db.Text, nullable=False)
@@ -1,13 +1,22 @@
 from app.database import db
+from app.money import Money
 from datetime import datetime
 
 class Payment(db.Model):
     __tablename__ = 'Payments'
+    __table_args__ = (
+        # Wpłaty do faktury i okresy raportów
+        db.Index('ix_Payments_InvoiceId', 'InvoiceId'),
+        db.Index('ix_Payments_PaidAt', 'PaidAt'),
+        # Eksport przyrostowy (?since=) po czasie modyfikacji
+        db.Index('ix_Payments_UpdatedAt_Id', 'UpdatedAt', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     InvoiceId = db.Column(db.Integer, db.ForeignKey('Invoices.Id'), nullable=False)
     PaidAt = db.Column(db.DateTime, nullable=False)
-    Amount = db.Column(db.Numeric(65, 30), nullable=False)
+    Amount = db.Column(Money, nullable=False)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     invoice = db.relationship('Invoice', backref='payments')
     
@@ -3,10 +3,16 @@ from datetime import datetime
 
 class Reminder(db.Model):
     __tablename__ = 'Reminders'
+    __table_args__ = (
+        # Przypomnienia użytkownika (lista, liczba niewysłanych)
+        db.Index('ix_Reminders_UserId_FiredAt', 'UserId', 'FiredAt'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Note = db.Column(db.Text, nullable=False)
-    RemindAt = db.Column(db.DateTime, nullable=False)
+    RemindAt = db.Column(db.DateTime, nullable=False, index=True)
+    # Moment wysłania powiadomienia przez harmonogram przypomnień (NULL - jeszcze nie wysłane)
+    FiredAt = db.Column(db.DateTime)
     UserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # Relacje
@@ -17,5 +23,6 @@ class Reminder(db.Model):
             'id': self.Id,
             'note': self.Note,
             'remind_at': self.RemindAt.isoformat() + 'Z' if self.RemindAt else None,
-            'user_id': self.UserId
+            'user_id': self.UserId,
+            'fired_at': self.FiredAt.isoformat() + 'Z' if self.FiredAt else None
         }
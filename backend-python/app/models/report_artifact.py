@@ -0,0 +1,25 @@
+from app.database import db
+from datetime import datetime
+
+class ReportArtifact(db.Model):
+    __tablename__ = 'ReportArtifacts'
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    ReportKey = db.Column(db.String(255), nullable=False, index=True)  # Typ raportu + parametry, np. group_pdf:{"groupId": 1}
+    FilePath = db.Column(db.String(500), nullable=False)
+    FileName = db.Column(db.String(255), nullable=False)
+    ContentType = db.Column(db.String(100), nullable=False)
+    SizeBytes = db.Column(db.Integer)
+    GeneratedAt = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    ScheduledJobId = db.Column(db.Integer, db.ForeignKey('ScheduledJobs.Id', ondelete='SET NULL'))
+    
+    def to_dict(self):
+        return {
+            'id': self.Id,
+            'reportKey': self.ReportKey,
+            'fileName': self.FileName,
+            'contentType': self.ContentType,
+            'sizeBytes': self.SizeBytes,
+            'generatedAt': self.GeneratedAt.isoformat() if self.GeneratedAt else None,
+            'scheduledJobId': self.ScheduledJobId
+        }
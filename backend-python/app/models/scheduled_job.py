@@ -0,0 +1,39 @@
+from app.database import db
+from datetime import datetime
+import json
+
+class ScheduledJob(db.Model):
+    __tablename__ = 'ScheduledJobs'
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    Name = db.Column(db.String(255), nullable=False)
+    JobType = db.Column(db.String(100), nullable=False)  # Typ zadania z rejestru app/scheduler.py
+    Cron = db.Column(db.String(100), nullable=False)  # Wyrażenie cron: minuta godzina dzień miesiąc dzień_tygodnia
+    Parameters = db.Column(db.Text)  # Parametry zadania w JSON
+    IsActive = db.Column(db.Boolean, default=True, nullable=False)
+    NextRunAt = db.Column(db.DateTime, index=True)
+    LastRunAt = db.Column(db.DateTime)
+    LastStatus = db.Column(db.String(20))  # success / error
+    LastError = db.Column(db.Text)
+    LastDurationMs = db.Column(db.Integer)
+    LockedUntil = db.Column(db.DateTime)  # Blokada zapobiegająca równoległemu uruchomieniu przez kilka workerów
+    CreatedAt = db.Column(db.DateTime, default=datetime.now)
+    
+    def get_parameters(self):
+        return json.loads(self.Parameters) if self.Parameters else {}
+    
+    def to_dict(self):
+        return {
+            'id': self.Id,
+            'name': self.Name,
+            'jobType': self.JobType,
+            'cron': self.Cron,
+            'parameters': self.get_parameters(),
+            'isActive': self.IsActive,
+            'nextRunAt': self.NextRunAt.isoformat() if self.NextRunAt else None,
+            'lastRunAt': self.LastRunAt.isoformat() if self.LastRunAt else None,
+            'lastStatus': self.LastStatus,
+            'lastError': self.LastError,
+            'lastDurationMs': self.LastDurationMs,
+            'createdAt': self.CreatedAt.isoformat() if self.CreatedAt else None
+        }
@@ -1,4 +1,5 @@
 from app.database import db
+from app.money import Money
 from datetime import datetime
 from decimal import Decimal
 
@@ -7,7 +8,7 @@ class Service(db.Model):
     
     Id = db.Column(db.Integer, primary_key=True)
     Name = db.Column(db.String(255), nullable=False)
-    Price = db.Column(db.Numeric(65, 30))
+    Price = db.Column(Money)
     TaxRate = db.Column(db.Numeric(65, 30), default=Decimal('0.23'), nullable=False)
     
     def to_dict(self):
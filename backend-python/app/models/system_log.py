@@ -3,6 +3,11 @@ from datetime import datetime
 
 class SystemLog(db.Model):
     __tablename__ = 'SystemLogs'
+    __table_args__ = (
+        # Przeglądanie logów po czasie i poziomie
+        db.Index('ix_SystemLogs_Timestamp', 'Timestamp'),
+        db.Index('ix_SystemLogs_Level', 'Level'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Level = db.Column(db.String(20), nullable=False)
@@ -0,0 +1,17 @@
+from app.database import db
+from datetime import datetime
+
+class TableVersion(db.Model):
+    """Wersja tabeli zwiększana przy każdym zapisie - podstawa nagłówków ETag (app/http_cache.py)"""
+    __tablename__ = 'TableVersions'
+    
+    TableName = db.Column(db.String(100), primary_key=True)
+    Version = db.Column(db.Integer, nullable=False, default=1)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'tableName': self.TableName,
+            'version': self.Version,
+            'updatedAt': self.UpdatedAt.isoformat() if self.UpdatedAt else None
+        }
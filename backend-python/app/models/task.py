@@ -4,11 +4,22 @@ from datetime import datetime
 # Tabela pomocnicza dla relacji many-to-many między zadaniami a tagami
 task_tags = db.Table('TaskTags',
     db.Column('TaskId', db.Integer, db.ForeignKey('Tasks.Id'), primary_key=True),
-    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True)
+    db.Column('TagId', db.Integer, db.ForeignKey('Tags.Id'), primary_key=True),
+    # Encje z danym tagiem - klucz główny zaczyna się od TaskId
+    db.Index('ix_TaskTags_TagId', 'TagId')
 )
 
 class Task(db.Model):
     __tablename__ = 'Tasks'
+    __table_args__ = (
+        # Listy zadań w panelu administratora (filtr użytkownik / grupa / status, okno terminów)
+        db.Index('ix_Tasks_UserId_Completed_DueDate', 'UserId', 'Completed', 'DueDate'),
+        db.Index('ix_Tasks_AssignedGroupId_Completed_DueDate', 'AssignedGroupId', 'Completed', 'DueDate'),
+        db.Index('ix_Tasks_Completed_DueDate', 'Completed', 'DueDate'),
+        db.Index('ix_Tasks_DueDate', 'DueDate'),
+        # Zadania klienta (karta klienta, usuwanie klienta)
+        db.Index('ix_Tasks_CustomerId', 'CustomerId'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Title = db.Column(db.String(255), nullable=False)
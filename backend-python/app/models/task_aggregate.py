@@ -0,0 +1,24 @@
+from app.database import db
+from datetime import datetime
+
+class TaskAggregate(db.Model):
+    """Liczniki zadań użytkownika lub grupy utrzymywane przyrostowo (app/task_analytics.py)"""
+    __tablename__ = 'TaskAggregates'
+    __table_args__ = (
+        # Podsumowanie obciążenia posortowane po liczbie otwartych zadań
+        db.Index('ix_TaskAggregates_Scope_Pending', 'ScopeType', 'PendingTasks'),
+    )
+    
+    ScopeType = db.Column(db.String(10), primary_key=True)  # user / group
+    ScopeId = db.Column(db.Integer, primary_key=True)
+    TotalTasks = db.Column(db.Integer, nullable=False, default=0)
+    PendingTasks = db.Column(db.Integer, nullable=False, default=0)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'totalTasks': self.TotalTasks,
+            'pendingTasks': self.PendingTasks,
+            'completedTasks': self.TotalTasks - self.PendingTasks,
+            'updatedAt': self.UpdatedAt.isoformat() if self.UpdatedAt else None
+        }
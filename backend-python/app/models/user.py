@@ -3,12 +3,17 @@ from datetime import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Użytkownicy danej roli
+        db.Index('ix_users_role_id', 'role_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role_id = db.Column(db.Integer, db.ForeignKey('roles.id'))
+    DeletedAt = db.Column(db.DateTime)  # Usunięty - ukryty w zapytaniach do czasu usunięcia zależności (app/deletion.py)
     
     role = db.relationship('Role', backref='users')
     
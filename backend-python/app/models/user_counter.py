@@ -0,0 +1,27 @@
+from app.database import db
+from datetime import datetime
+
+class UserCounter(db.Model):
+    """Liczniki plakietek użytkownika utrzymywane przyrostowo przy zapisach (app/counters.py)"""
+    __tablename__ = 'UserCounters'
+    
+    UserId = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    UnreadNotifications = db.Column(db.Integer, nullable=False, default=0)
+    UnreadMessages = db.Column(db.Integer, nullable=False, default=0)
+    PendingTasks = db.Column(db.Integer, nullable=False, default=0)
+    PendingReminders = db.Column(db.Integer, nullable=False, default=0)
+    # Zwiększana przy każdej zmianie - podstawa nagłówka ETag
+    Version = db.Column(db.Integer, nullable=False, default=1)
+    UpdatedAt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def etag(self):
+        return f'{self.UserId}-{self.Version}'
+    
+    def to_dict(self):
+        return {
+            'unreadNotifications': self.UnreadNotifications,
+            'unreadMessages': self.UnreadMessages,
+            'pendingTasks': self.PendingTasks,
+            'pendingReminders': self.PendingReminders,
+            'updatedAt': self.UpdatedAt.isoformat() + 'Z' if self.UpdatedAt else None
+        }
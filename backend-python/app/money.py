@@ -0,0 +1,224 @@
+"""
+Kwoty pieniężne: przechowywanie, arytmetyka i agregacja.
+
+- Kolumny kwot są typu Money - w bazie DECIMAL(18, 2) (zamiast DECIMAL(65, 30)), w Pythonie
+  Decimal z dokładnie dwoma miejscami po przecinku (zaokrąglenie połówkowe przy zapisie).
+- Obliczenia (pozycje faktur, VAT, sumy) są wykonywane na liczbach całkowitych groszy
+  (to_grosze / from_grosze), więc suma pozycji zawsze równa się kwocie faktury.
+- Sumy w raportach liczy MoneyVector - kolumna groszy w tablicy array('q') sumowana w C,
+  bez tworzenia obiektów Decimal/float dla każdego wiersza; grosze mogą pochodzić wprost
+  z SQL (grosze() / GROSZE_SQL).
+- migrate_money_columns zmienia typ istniejących kolumn na MySQL (zaokrąglenie wartości
+  partiami, potem ALTER TABLE ... MODIFY).
+"""
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import compress
+
+from sqlalchemy import BigInteger, Numeric, cast, func, inspect, text
+from sqlalchemy.types import TypeDecorator
+
+MONEY_PRECISION = 18
+MONEY_SCALE = 2
+CENT = Decimal('0.01')
+# Największa kwota mieszcząca się w DECIMAL(18, 2)
+MAX_GROSZE = 10 ** MONEY_PRECISION - 1
+MIGRATION_BATCH_SIZE = 10000
+DEFAULT_VAT_RATE = Decimal('0.23')
+
+# Wyrażenie SQL zamieniające kolumnę kwoty na całkowite grosze (MySQL: BIGINT, SQLite: INTEGER)
+GROSZE_SQL = 'CAST(ROUND({column} * 100) AS SIGNED INTEGER)'
+
+
+def to_decimal(value):
+    """Kwota jako Decimal z dwoma miejscami po przecinku (None bez zmian)"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    if value.as_tuple().exponent == -MONEY_SCALE:
+        return value
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_grosze(value):
+    """Kwota (Decimal, int, float, str) jako liczba całkowita groszy"""
+    if value is None:
+        return None
+    return int(to_decimal(value).scaleb(MONEY_SCALE))
+
+
+def from_grosze(grosze):
+    """Liczba groszy jako Decimal z dwoma miejscami po przecinku"""
+    if grosze is None:
+        return None
+    return Decimal(grosze).scaleb(-MONEY_SCALE)
+
+
+def to_float(value, default=0.0):
+    """Kwota do JSON (float) - default dla pustej wartości"""
+    if value is None:
+        return default
+    return float(to_decimal(value))
+
+
+def format_money(value):
+    """Kwota jako tekst z dwoma miejscami po przecinku (np. do PDF)"""
+    return f'{to_decimal(value or 0):.2f}'
+
+
+def divide_round(numerator, denominator):
+    """Dzielenie całkowite z zaokrągleniem połówkowym (od zera)"""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def apply_rate(grosze, rate):
+    """Kwota w groszach pomnożona przez stawkę (np. VAT 0.23), zaokrąglona do grosza"""
+    rate = Decimal(str(rate)) if not isinstance(rate, Decimal) else rate
+    sign, digits, exponent = rate.as_tuple()
+    numerator = int(''.join(map(str, digits)) or 0) * (-1 if sign else 1)
+    if exponent >= 0:
+        return grosze * numerator * 10 ** exponent
+    return divide_round(grosze * numerator, 10 ** -exponent)
+
+
+def line_amounts(unit_price, quantity, tax_rate):
+    """Kwoty pozycji faktury w groszach: (netto, VAT, brutto) - netto = cena × ilość"""
+    net = to_grosze(unit_price or 0) * (quantity or 0)
+    tax = apply_rate(net, tax_rate)
+    return net, tax, net + tax
+
+
+def split_gross(gross_grosze, tax_rate=DEFAULT_VAT_RATE):
+    """Kwota brutto w groszach rozbita na (netto, VAT) - netto = brutto / (1 + stawka)"""
+    if gross_grosze <= 0:
+        return 0, 0
+    rate = Decimal(str(tax_rate))
+    net = int((Decimal(gross_grosze) / (1 + rate)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    return net, gross_grosze - net
+
+
+class Money(TypeDecorator):
+    """Kwota pieniężna: DECIMAL(18, 2) w bazie, Decimal z dwoma miejscami po przecinku w Pythonie"""
+    impl = Numeric(MONEY_PRECISION, MONEY_SCALE)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_decimal(value)
+
+    def process_result_value(self, value, dialect):
+        return to_decimal(value)
+
+
+def grosze(column):
+    """Wyrażenie SQL: kolumna kwoty jako całkowita liczba groszy"""
+    return cast(func.round(column * 100), BigInteger)
+
+
+class MoneyVector:
+    """Kolumna kwot w groszach (array('q')) - sumy bez konwersji wiersz po wierszu"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values=()):
+        self.values = array('q', values)
+
+    @classmethod
+    def from_grosze(cls, values):
+        """Z wartości całkowitych (np. kolumna grosze() z SQL); None jako 0"""
+        return cls(0 if value is None else value for value in values)
+
+    @classmethod
+    def from_amounts(cls, values):
+        """Z kwot (Decimal, float, str) - dla danych bez kolumny groszy"""
+        return cls(to_grosze(value) or 0 for value in values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def total(self, mask=None):
+        """Suma groszy - wszystkich albo wybranych maską (iterowalne wartości logiczne)"""
+        if mask is None:
+            return sum(self.values)
+        return sum(compress(self.values, mask))
+
+    def total_decimal(self, mask=None):
+        return from_grosze(self.total(mask))
+
+    def total_float(self, mask=None):
+        return self.total(mask) / 100
+
+
+# ---------------------------------------------------------------------------
+# Migracja istniejących kolumn
+# ---------------------------------------------------------------------------
+
+def money_columns(metadata):
+    """(tabela, kolumna) wszystkich kolumn typu Money"""
+    return [(table, column) for table in metadata.sorted_tables for column in table.columns
+            if isinstance(column.type, Money)]
+
+
+def _needs_migration(existing_type):
+    return (getattr(existing_type, 'precision', None), getattr(existing_type, 'scale', None)) != \
+        (MONEY_PRECISION, MONEY_SCALE)
+
+
+def _round_in_batches(session, table, column, quote):
+    """Zaokrągla wartości kolumny do groszy partiami po kluczu głównym"""
+    key = next(iter(table.primary_key.columns))
+    table_name, column_name, key_name = quote(table.name), quote(column.name), quote(key.name)
+    bounds = session.execute(text(f'SELECT MIN({key_name}), MAX({key_name}) FROM {table_name}')).fetchone()
+    if bounds[0] is None:
+        return
+    for start in range(bounds[0], bounds[1] + 1, MIGRATION_BATCH_SIZE):
+        session.execute(text(
+            f'UPDATE {table_name} SET {column_name} = ROUND({column_name}, {MONEY_SCALE}) '
+            f'WHERE {key_name} >= :start AND {key_name} < :end '
+            f'AND {column_name} <> ROUND({column_name}, {MONEY_SCALE})'
+        ), {'start': start, 'end': start + MIGRATION_BATCH_SIZE})
+        session.commit()
+
+
+def migrate_money_columns(session, metadata):
+    """
+    Zmienia typ istniejących kolumn kwot na DECIMAL(18, 2) (tylko MySQL - SQLite nie ma
+    precyzji kolumn). Wartości są najpierw zaokrąglane do groszy, kolumna z kwotą spoza
+    zakresu DECIMAL(18, 2) jest pomijana. Zwraca listę zmienionych kolumn "tabela.kolumna".
+    """
+    bind = session.get_bind()
+    dialect = bind.dialect
+    if dialect.name != 'mysql':
+        return []
+
+    inspector = inspect(bind)
+    quote = dialect.identifier_preparer.quote
+    existing_tables = set(inspector.get_table_names())
+    migrated = []
+    for table, column in money_columns(metadata):
+        if table.name not in existing_tables:
+            continue
+        existing = {info['name']: info for info in inspector.get_columns(table.name)}.get(column.name)
+        if existing is None or not _needs_migration(existing['type']):
+            continue
+
+        largest = session.execute(text(
+            f'SELECT MAX(ABS({quote(column.name)})) FROM {quote(table.name)}'
+        )).scalar()
+        if largest is not None and to_grosze(largest) > MAX_GROSZE:
+            print(f"⚠️  Uwaga: Kolumna {table.name}.{column.name} zawiera kwotę spoza DECIMAL(18, 2) - pominięto")
+            continue
+
+        _round_in_batches(session, table, column, quote)
+        null_sql = '' if column.nullable else ' NOT NULL'
+        session.execute(text(
+            f'ALTER TABLE {quote(table.name)} MODIFY {quote(column.name)} '
+            f'{column.type.compile(dialect=dialect)}{null_sql}'
+        ))
+        session.commit()
+        migrated.append(f'{table.name}.{column.name}')
+        print(f"🔧 Zmieniono typ kolumny {table.name}.{column.name} na DECIMAL(18, 2)")
+    return migrated
@@ -0,0 +1,135 @@
+"""
+Skutki uboczne zapisów (powiadomienia, aktywności, logi systemowe) w jednej transakcji.
+
+Kontroler rejestruje skutki w trakcie żądania (add_notification, add_activity,
+add_system_log), a sesja zapisuje je przy commit - po flushu głównych zmian, w tej samej
+transakcji, jednym wielowierszowym INSERT na tabelę. Rollback odrzuca zarejestrowane skutki,
+więc nie ma już częściowo zapisanych powiadomień czy logów. Nowe powiadomienia są
+wysyłane kanałem push dopiero po zatwierdzeniu transakcji.
+
+Zapis wielowierszowy pomija zdarzenia mapperów, dlatego liczniki nieprzeczytanych
+powiadomień i dziennik synchronizacji są aktualizowane jawnie.
+"""
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func, insert, select
+
+from app.change_tracking import record_inserted
+from app.counters import adjust_counter
+from app.database import db
+from app.models import Activity, Notification, SystemLog
+from app.push import hub
+
+OUTBOX_KEY = 'outbox'
+PUSH_KEY = 'outbox_push'
+
+
+class Outbox:
+    """Skutki uboczne zarejestrowane w bieżącej transakcji sesji"""
+
+    def __init__(self):
+        self.notifications = []
+        self.activities = []
+        self.system_logs = []
+
+    def __bool__(self):
+        return bool(self.notifications or self.activities or self.system_logs)
+
+
+def get_outbox(session=None):
+    session = session or db.session()
+    if not session.in_transaction():
+        # Jawny początek transakcji - rollback bez wykonanego SQL też odrzuci outbox
+        session.begin()
+    return session.info.setdefault(OUTBOX_KEY, Outbox())
+
+
+def add_notification(user_id, message):
+    """Rejestruje powiadomienie użytkownika (zapis przy commit)"""
+    get_outbox().notifications.append({'Message': message, 'UserId': user_id,
+                                       'IsRead': False, 'CreatedAt': datetime.utcnow()})
+
+
+def add_activity(user_id, note, customer_id=None):
+    """Rejestruje aktywność użytkownika (zapis przy commit)"""
+    get_outbox().activities.append({'Note': note, 'UserId': user_id, 'CustomerId': customer_id,
+                                    'CreatedAt': datetime.now()})
+
+
+def add_system_log(level, message, source, user_id=None, details=None):
+    """Rejestruje wpis logu systemowego (zapis przy commit)"""
+    get_outbox().system_logs.append({'Level': level, 'Message': message, 'Source': source,
+                                     'UserId': user_id, 'Details': details, 'Timestamp': datetime.now()})
+
+
+def _write_notifications(session, rows):
+    # Wspólny CreatedAt zapisu - po nim i odbiorcach (indeks UserId, CreatedAt) rozpoznawane są
+    # wiersze tej instrukcji; zakres Id > max(Id) objąłby powiadomienia równoległych transakcji.
+    # Pełne sekundy - DATETIME w MySQL nie przechowuje części ułamkowej, porównanie musi się zgadzać
+    now = datetime.utcnow().replace(microsecond=0)
+    # Dolna granica (odczyt bez blokad) odcina wcześniejsze powiadomienia z tej samej sekundy
+    last_id = session.query(func.max(Notification.Id)).scalar() or 0
+    for row in rows:
+        row['CreatedAt'] = now
+    session.execute(insert(Notification.__table__), rows)
+
+    connection = session.connection()
+    for user_id, count in Counter(row['UserId'] for row in rows).items():
+        adjust_counter(connection, user_id, 'UnreadNotifications', count)
+
+    expected = Counter((row['UserId'], row['Message']) for row in rows)
+    candidates = session.execute(select(Notification).where(
+        Notification.UserId.in_({row['UserId'] for row in rows}), Notification.CreatedAt == now,
+        Notification.Id > last_id
+    ).order_by(Notification.Id)).scalars()
+    created = []
+    for notification in candidates:
+        key = (notification.UserId, notification.Message)
+        if expected[key] > 0:
+            expected[key] -= 1
+            created.append(notification)
+    record_inserted('notifications', [(notification.Id, notification.UserId) for notification in created])
+    session.info.setdefault(PUSH_KEY, []).extend(
+        (notification.UserId, 'notification', notification.to_dict()) for notification in created)
+
+
+def flush_outbox(session):
+    """Zapisuje zarejestrowane skutki uboczne w bieżącej transakcji"""
+    outbox = session.info.pop(OUTBOX_KEY, None)
+    if not outbox:
+        return
+    # Najpierw główne zmiany - aktywności mogą wskazywać na właśnie dodanego klienta
+    session.flush()
+    if outbox.notifications:
+        _write_notifications(session, outbox.notifications)
+    if outbox.activities:
+        session.execute(insert(Activity.__table__), outbox.activities)
+    if outbox.system_logs:
+        session.execute(insert(SystemLog.__table__), outbox.system_logs)
+
+
+def _before_commit(session):
+    flush_outbox(session)
+
+
+def _after_commit(session):
+    for user_id, event_name, data in session.info.pop(PUSH_KEY, []):
+        hub.publish(user_id, event_name, data)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    # after_soft_rollback - także dla rollback bez wykonanego SQL; savepoint nie odrzuca outboxa
+    if previous_transaction.nested:
+        return
+    session.info.pop(OUTBOX_KEY, None)
+    session.info.pop(PUSH_KEY, None)
+
+
+def init_outbox(app):
+    """Rejestruje zdarzenia sesji zapisujące skutki uboczne przy commit"""
+    session_class = db.session.session_factory.class_
+    if not event.contains(session_class, 'before_commit', _before_commit):
+        event.listen(session_class, 'before_commit', _before_commit)
+        event.listen(session_class, 'after_commit', _after_commit)
+        event.listen(session_class, 'after_soft_rollback', _after_soft_rollback)
@@ -0,0 +1,291 @@
+"""
+Strumieniowe tabele PDF dla raportów i eksportów.
+
+Zamiast jednej tabeli z całym zbiorem danych (każda komórka jako Paragraph) wiersze są
+pobierane z iteratora (np. kursora bazy) i układane w małe tabele po CHUNK_ROWS wierszy,
+które ReportLab rysuje i zwalnia strona po stronie. Dokument jest budowany z leniwej kolejki
+elementów (FlowableStream), więc w pamięci jest tylko bieżący fragment, a czas rośnie
+liniowo z liczbą wierszy.
+
+- Paragraph (zawijanie tekstu) tylko dla komórek, które nie mieszczą się w kolumnie;
+  pozostałe komórki to zwykłe napisy.
+- Szerokości kolumn są mierzone na pierwszych wierszach i zapamiętywane dla danego zestawu
+  nagłówków, czcionki i szerokości strony.
+- Tabele z wieloma kolumnami są dzielone na części, ale dane są czytane raz - każdy fragment
+  wierszy jest rysowany kolejno dla każdej części kolumn.
+"""
+import io
+from collections import OrderedDict
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+PAGE_SIZE = landscape(A4)
+MARGINS = {'leftMargin': 15, 'rightMargin': 15, 'topMargin': 20, 'bottomMargin': 20}
+PAGE_WIDTH = PAGE_SIZE[0] - MARGINS['leftMargin'] - MARGINS['rightMargin']
+
+CHUNK_ROWS = 40              # wierszy w jednej tabeli (mniej więcej strona)
+MEASURE_SAMPLE_ROWS = 200    # wierszy używanych do pomiaru szerokości kolumn
+MAX_PARTS_COLUMNS = 8        # powyżej - podział kolumn na części
+CELL_PADDING = 12            # LEFTPADDING + RIGHTPADDING komórki
+MIN_COLUMN_WIDTH = 30
+WIDTH_CACHE_SIZE = 128
+
+_width_cache = OrderedDict()
+
+
+class FlowableStream(list):
+    """
+    Leniwa kolejka elementów dla SimpleDocTemplate.build - pobiera kolejne elementy z generatora
+    dopiero wtedy, gdy ReportLab zagląda na początek kolejki (trzyma kilka elementów zapasu).
+    """
+
+    LOOKAHEAD = 3
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = iter(source)
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self.LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def build_pdf(flowables, pagesize=PAGE_SIZE):
+    """Buduje dokument z (leniwego) iterowalnego zbioru elementów; zwraca BytesIO"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize, **MARGINS)
+    doc.build(FlowableStream(flowables))
+    buffer.seek(0)
+    return buffer
+
+
+def font_sizes(num_cols):
+    """Rozmiar czcionki (nagłówek, komórki) zależny od liczby kolumn"""
+    if num_cols >= 12:
+        return 4, 4
+    if num_cols >= 10:
+        return 5, 5
+    if num_cols >= 8:
+        return 6, 6
+    if num_cols >= 6:
+        return 7, 7
+    return 10, 9
+
+
+def max_cell_chars(num_cols):
+    """Limit długości tekstu komórki - przy wielu kolumnach dłuższe teksty są skracane"""
+    if num_cols >= 10:
+        return 15
+    if num_cols >= 8:
+        return 20
+    if num_cols >= 6:
+        return 25
+    return None
+
+
+def truncate(text, max_length):
+    if max_length is None or len(text) <= max_length:
+        return text
+    return text[:max_length - 3] + '...'
+
+
+def cell_text(value):
+    return '' if value is None else str(value)
+
+
+def is_section_row(row):
+    """Wiersz nagłówka sekcji (raport tagu): pierwsza komórka WIELKIMI LITERAMI lub zakończona dwukropkiem"""
+    first = cell_text(row[0]) if row else ''
+    return (first.isupper() and len(first) > 3) or first.endswith(':')
+
+
+def measure_column_widths(headers, sample_rows, font, font_size, total_width=PAGE_WIDTH):
+    """
+    Szerokości kolumn proporcjonalne do naturalnej szerokości tekstu (nagłówek i próbka wierszy),
+    dopasowane do szerokości strony. Wynik jest zapamiętywany dla (nagłówki, czcionka, szerokość).
+    """
+    key = (tuple(headers), font, font_size, total_width)
+    if key in _width_cache:
+        _width_cache.move_to_end(key)
+        return _width_cache[key]
+
+    num_cols = len(headers)
+    natural = [stringWidth(cell_text(header), font, font_size) for header in headers]
+    for row in sample_rows:
+        if is_section_row(row):
+            continue
+        for index in range(min(num_cols, len(row))):
+            natural[index] = max(natural[index], stringWidth(cell_text(row[index]), font, font_size))
+
+    # Pojedyncza kolumna nie zajmuje więcej niż połowę strony (długie teksty są zawijane)
+    cap = total_width / 2 if num_cols > 1 else total_width
+    natural = [min(max(width + CELL_PADDING, MIN_COLUMN_WIDTH), cap) for width in natural]
+    scale = total_width / sum(natural)
+    widths = [width * scale for width in natural]
+
+    _width_cache[key] = widths
+    if len(_width_cache) > WIDTH_CACHE_SIZE:
+        _width_cache.popitem(last=False)
+    return widths
+
+
+class TableLayout:
+    """Układ tabeli (czcionki, style, szerokości kolumn) wspólny dla wszystkich fragmentów"""
+
+    def __init__(self, headers, font, col_widths=None, sample_rows=(), font_size=None, section_rows=False):
+        self.headers = list(headers)
+        self.font = font
+        self.section_rows = section_rows
+        num_cols = len(self.headers)
+        header_size, cell_size = font_sizes(num_cols)
+        if font_size:
+            header_size, cell_size = font_size + 1, font_size
+        self.header_size, self.cell_size = header_size, cell_size
+        self.max_chars = max_cell_chars(num_cols)
+        self.col_widths = col_widths or measure_column_widths(self.headers, sample_rows, font, cell_size)
+
+        styles = getSampleStyleSheet()
+        self.header_style = ParagraphStyle('PdfTableHeader', parent=styles['Normal'], fontName=font,
+                                           fontSize=header_size, leading=header_size + 2,
+                                           textColor=colors.white, alignment=1)
+        self.cell_style = ParagraphStyle('PdfTableCell', parent=styles['Normal'], fontName=font,
+                                         fontSize=cell_size, leading=cell_size + 2)
+        self.section_style = ParagraphStyle('PdfTableSection', parent=self.cell_style,
+                                            textColor=colors.darkblue)
+        padding = 2 if num_cols >= 12 else 4
+        self.base_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, 0), header_size),
+            ('FONTSIZE', (0, 1), (-1, -1), cell_size),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, 0), padding + 2),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), padding + 2),
+            ('TOPPADDING', (0, 1), (-1, -1), padding),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), padding),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.darkblue),
+        ]
+        self.header_row = [self._cell(header, index, self.header_style, self.header_size)
+                           for index, header in enumerate(self.headers)]
+
+    def _cell(self, text, index, style, font_size):
+        """Zwykły napis, jeśli mieści się w kolumnie; w przeciwnym razie zawijany Paragraph"""
+        if not text:
+            return ''
+        if stringWidth(text, self.font, font_size) <= self.col_widths[index] - CELL_PADDING:
+            return text
+        return Paragraph(escape(text), style)
+
+    def row_cells(self, row, section=False):
+        cells = []
+        for index in range(len(self.headers)):
+            text = cell_text(row[index]) if index < len(row) else ''
+            if section:
+                cells.append(self._cell(text, index, self.section_style, self.cell_size))
+            else:
+                cells.append(self._cell(truncate(text, self.max_chars), index, self.cell_style, self.cell_size))
+        return cells
+
+    def table(self, rows):
+        """Tabela dla jednego fragmentu wierszy (z powtarzanym nagłówkiem)"""
+        data = [self.header_row]
+        commands = list(self.base_style)
+        for row in rows:
+            section = self.section_rows and is_section_row(row)
+            data.append(self.row_cells(row, section))
+            if section:
+                row_index = len(data) - 1
+                commands.extend([
+                    ('BACKGROUND', (0, row_index), (-1, row_index), colors.lightblue),
+                    ('TEXTCOLOR', (0, row_index), (-1, row_index), colors.darkblue),
+                    ('LINEBELOW', (0, row_index), (-1, row_index), 1, colors.darkblue),
+                ])
+        table = Table(data, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(TableStyle(commands))
+        return table
+
+
+def column_parts(num_cols):
+    """Podział indeksów kolumn na części (2 do 12 kolumn, powyżej 3)"""
+    if num_cols <= MAX_PARTS_COLUMNS:
+        return [range(num_cols)]
+    parts = 2 if num_cols <= 12 else 3
+    size = num_cols // parts
+    bounds = [size * part for part in range(parts)] + [num_cols]
+    return [range(bounds[part], bounds[part + 1]) for part in range(parts)]
+
+
+def table_flowables(rows, headers, font, col_widths=None, chunk_rows=CHUNK_ROWS, font_size=None,
+                    section_rows=False):
+    """
+    Generator tabel po chunk_rows wierszy z iteratora rows. Szerokości kolumn - podane
+    albo mierzone na pierwszych MEASURE_SAMPLE_ROWS wierszach. Przy wielu kolumnach każdy
+    fragment jest rysowany kolejno dla każdej części kolumn (dane czytane jeden raz).
+    section_rows=True - wyróżnianie wierszy nagłówków sekcji (is_section_row).
+    """
+    rows = iter(rows)
+    headers = list(headers)
+    sample = list(islice(rows, MEASURE_SAMPLE_ROWS))
+    parts = column_parts(len(headers))
+
+    layouts = []
+    for part in parts:
+        part_headers = [headers[index] for index in part]
+        part_sample = [[row[index] if index < len(row) else None for index in part] for row in sample]
+        layouts.append(TableLayout(part_headers, font, col_widths if len(parts) == 1 else None,
+                                   part_sample, font_size, section_rows))
+
+    def chunks():
+        buffered = iter(sample)
+        while True:
+            chunk = list(islice(buffered, chunk_rows))
+            if len(chunk) < chunk_rows:
+                chunk.extend(islice(rows, chunk_rows - len(chunk)))
+            if not chunk:
+                return
+            yield chunk
+
+    for chunk in chunks():
+        for part, layout in zip(parts, layouts):
+            if len(parts) == 1:
+                yield layout.table(chunk)
+            else:
+                yield layout.table([[row[index] if index < len(row) else None for index in part] for row in chunk])
+                yield Spacer(1, 8)
+
+
+def title_flowables(title, font):
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('PdfTableTitle', parent=styles['Heading1'], fontName=font, fontSize=18,
+                                 spaceAfter=25, alignment=1, textColor=colors.darkblue)
+    return [Paragraph(escape(title), title_style), Spacer(1, 20)]
+
+
+def build_table_pdf(rows, headers, title, font):
+    """PDF z tytułem i tabelą wierszy z iteratora rows (np. kursora); zwraca BytesIO"""
+    def flowables():
+        yield from title_flowables(title, font)
+        yield from table_flowables(rows, headers, font, section_rows=True)
+    return build_pdf(flowables())
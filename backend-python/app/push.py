@@ -0,0 +1,81 @@
+"""
+Kanał push (Server-Sent Events) dla powiadomień w czasie rzeczywistym.
+
+Każde połączenie GET /api/Notifications/stream subskrybuje kolejkę użytkownika w bieżącym
+procesie. Zdarzenia publikowane w innym procesie nie docierają do tych kolejek - klient
+i tak widzi je w liście powiadomień przy następnym pobraniu. Wyjątkiem są przypomnienia
+z harmonogramu w trybie sidecar - przekazuje je ReminderRelay (app/reminder_scheduler.py).
+"""
+import json
+import queue
+import threading
+
+HEARTBEAT_SECONDS = 25
+QUEUE_SIZE = 100
+
+
+class PushHub:
+    """Rejestr subskrypcji: użytkownik -> lista kolejek otwartych połączeń"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, event, data):
+        """Wysyła zdarzenie do wszystkich połączeń użytkownika; zwraca liczbę odbiorców"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, []))
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait((event, data))
+                delivered += 1
+            except queue.Full:
+                # Wolny klient - pomijamy zdarzenie, zobaczy je w liście powiadomień
+                pass
+        return delivered
+
+    def connected_user_ids(self):
+        with self._lock:
+            return set(self._subscribers)
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscribers.get(user_id, []))
+
+
+hub = PushHub()
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+def event_stream(user_id, heartbeat_seconds=HEARTBEAT_SECONDS):
+    """Generator strumienia SSE dla użytkownika (z komentarzem heartbeat co kilkanaście sekund)"""
+    subscription = hub.subscribe(user_id)
+    try:
+        yield ': connected\n\n'
+        while True:
+            try:
+                event, data = subscription.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            yield format_event(event, data)
+    finally:
+        hub.unsubscribe(user_id, subscription)
@@ -0,0 +1,655 @@
+"""
+Plany zapytań i doradca indeksów.
+
+- Indeksy są zadeklarowane w modelach (__table_args__): db.create_all() tworzy je razem z nowymi
+  tabelami, create_missing_indexes() dokłada brakujące w istniejącej bazie. Indeks o tych samych
+  kolumnach pod inną nazwą (np. idx_* z database_enhancements.sql albo indeks klucza obcego
+  MySQL) jest traktowany jako istniejący, więc nie powstają duplikaty.
+- QueryCapture zbiera najcięższe zapytania SELECT wykonywane przez aplikację (zdarzenia silnika
+  SQLAlchemy): liczba wywołań, łączny i maksymalny czas, ostatnie parametry.
+- explain() wykonuje EXPLAIN (MySQL) albo EXPLAIN QUERY PLAN (SQLite) i sprowadza plan do wspólnej
+  postaci PlanStep: tabela, sposób dostępu, użyty indeks, szacowana liczba wierszy.
+- advise() raportuje pełne skany dużych tabel i proponuje brakujące indeksy na kolumnach
+  z warunków WHERE (a gdy ich brak - z JOIN ... ON i ORDER BY).
+- hot_query() rejestruje surowe zapytania text() kontrolerów (raporty, dashboard, grupy, panel
+  administratora, zadania); ich plany są porównywane z wzorcami w testach (compare_plans).
+
+Raport: GET /api/admin/index-advisor (zapytania przechwycone w procesie serwera) albo
+`flask --app app:create_app indexes advise --capture eksport.json` (eksport z GET /api/admin/query-capture);
+bez --capture komenda sprawdza zapytania zarejestrowane przez hot_query().
+"""
+import json
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+import click
+from sqlalchemy import event, inspect, text
+
+from app.database import db
+
+DEFAULT_CAPTURE_SIZE = 200
+DEFAULT_ADVISOR_LIMIT = 20
+# Pełny skan mniejszej tabeli jest tańszy niż indeks - nie jest raportowany
+DEFAULT_MIN_ROWS = 1000
+
+ACCESS_TYPES = ('full_scan', 'index_scan', 'index', 'primary_key', 'other')
+
+PlanStep = namedtuple('PlanStep', 'table alias access index rows detail')
+
+
+class PlanError(ValueError):
+    """Plan zapytania nie może zostać pobrany (np. nieobsługiwana baza danych)"""
+
+
+# ---------------------------------------------------------------------------
+# Indeksy zadeklarowane w modelach
+# ---------------------------------------------------------------------------
+
+def _column_key(columns):
+    return tuple(column.lower() for column in columns)
+
+
+def existing_indexes(inspector, table_name):
+    """{kolumny (małe litery): nazwa} indeksów tabeli w bazie, łącznie z kluczem głównym"""
+    indexes = {}
+    primary_key = inspector.get_pk_constraint(table_name).get('constrained_columns') or []
+    if primary_key:
+        indexes[_column_key(primary_key)] = 'PRIMARY'
+    for index in inspector.get_indexes(table_name):
+        columns = [column for column in index.get('column_names') or [] if column]
+        if columns:
+            indexes.setdefault(_column_key(columns), index['name'])
+    return indexes
+
+
+def missing_indexes(bind=None):
+    """Indeksy zadeklarowane w modelach, których brakuje w bazie (porównanie po nazwie i kolumnach)"""
+    bind = bind or db.engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = existing_indexes(inspector, table.name)
+        names = set(existing.values())
+        for index in sorted(table.indexes, key=lambda item: item.name):
+            if index.name in names or _column_key(column.name for column in index.columns) in existing:
+                continue
+            missing.append(index)
+    return missing
+
+
+def create_missing_indexes(bind=None):
+    """Tworzy brakujące indeksy zadeklarowane w modelach; zwraca ich nazwy"""
+    bind = bind or db.engine
+    created = []
+    for index in missing_indexes(bind):
+        index.create(bind=bind)
+        created.append(index.name)
+        print(f"🔧 Utworzono indeks {index.name}")
+    return created
+
+
+# ---------------------------------------------------------------------------
+# Przechwytywanie zapytań
+# ---------------------------------------------------------------------------
+
+_WHITESPACE = re.compile(r'\s+')
+# Listy parametrów IN (?, ?, ...) o różnej długości to to samo zapytanie
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))+\s*\)')
+
+
+def normalize_sql(statement):
+    """Zapytanie bez zbędnych odstępów i ze zwiniętymi listami parametrów IN"""
+    return _PLACEHOLDER_LIST.sub('(...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def _is_select(statement):
+    head = statement.lstrip()[:6].upper()
+    return head.startswith('SELECT') or head.startswith('WITH')
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(value)
+
+
+def _json_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: _json_value(value) for key, value in parameters.items()}
+    return [_json_value(value) for value in parameters or ()]
+
+
+class QueryCapture:
+    """Najcięższe zapytania SELECT (wg łącznego czasu) - ograniczona liczba wpisów"""
+
+    def __init__(self, size=DEFAULT_CAPTURE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, statement, parameters, elapsed_ms):
+        key = normalize_sql(statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.size:
+                    # Miejsce zwalnia zapytanie o najmniejszym łącznym czasie
+                    del self._entries[min(self._entries, key=lambda item: self._entries[item]['totalMs'])]
+                entry = self._entries[key] = {'sql': key, 'calls': 0, 'totalMs': 0.0, 'maxMs': 0.0}
+            entry['calls'] += 1
+            entry['totalMs'] += elapsed_ms
+            entry['maxMs'] = max(entry['maxMs'], elapsed_ms)
+            # Ostatnie wykonanie - do EXPLAIN z prawdziwymi parametrami
+            entry['statement'] = statement
+            entry['parameters'] = parameters
+
+    def top(self, limit=DEFAULT_ADVISOR_LIMIT):
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda item: item['totalMs'], reverse=True)
+            return [dict(entry) for entry in entries[:limit]]
+
+    def snapshot(self, limit=None):
+        """Wpisy gotowe do JSON (eksport dla `flask indexes advise --capture`)"""
+        entries = self.top(limit or self.size)
+        for entry in entries:
+            entry['totalMs'] = round(entry['totalMs'], 3)
+            entry['maxMs'] = round(entry['maxMs'], 3)
+            entry['parameters'] = _json_parameters(entry['parameters'])
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+query_capture = QueryCapture()
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info['query_started_at'] = time.perf_counter()
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    started = connection.info.pop('query_started_at', None)
+    if started is None or executemany or connection.info.get('skip_query_capture') or not _is_select(statement):
+        return
+    query_capture.record(statement, parameters, (time.perf_counter() - started) * 1000)
+
+
+# ---------------------------------------------------------------------------
+# Plany zapytań
+# ---------------------------------------------------------------------------
+
+_SQL_KEYWORDS = {'WHERE', 'ON', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'FULL', 'NATURAL',
+                 'GROUP', 'ORDER', 'LIMIT', 'OFFSET', 'USING', 'UNION', 'HAVING', 'SET', 'WINDOW',
+                 'FOR', 'STRAIGHT_JOIN', 'AND', 'OR', 'AS', 'SELECT', 'FORCE', 'USE', 'IGNORE'}
+_TABLE_REFERENCE = re.compile(
+    r'\b(?:FROM|JOIN)\s+[`"\[]?(\w+)[`"\]]?(?:\s+(?:AS\s+)?[`"]?(\w+)[`"]?)?', re.IGNORECASE)
+_SQLITE_STEP = re.compile(r'^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\S+)(?:\s+AS\s+(\S+))?(.*)$')
+_SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\S+)')
+
+
+def table_aliases(statement):
+    """{alias lub nazwa tabeli: tabela} dla tabel z FROM / JOIN"""
+    aliases = {}
+    for match in _TABLE_REFERENCE.finditer(statement):
+        table, alias = match.group(1), match.group(2)
+        if table.upper() in _SQL_KEYWORDS:
+            continue
+        aliases.setdefault(table, table)
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _sqlite_step(detail, aliases):
+    match = _SQLITE_STEP.match(detail)
+    if not match:
+        return PlanStep(None, None, 'other', None, None, detail)
+    operation, name, alias, rest = match.groups()
+    alias = alias or name
+    index = _SQLITE_INDEX.search(rest)
+    if 'PRIMARY KEY' in rest:
+        access = 'primary_key'
+    elif operation == 'SEARCH':
+        access = 'index'
+    elif index:
+        access = 'index_scan'
+    else:
+        access = 'full_scan'
+    return PlanStep(aliases.get(alias, aliases.get(name)), alias, access,
+                    index.group(1) if index else None, None, detail)
+
+
+def _mysql_step(row, aliases):
+    access_type, key = row.get('type'), row.get('key')
+    if access_type == 'ALL':
+        access = 'full_scan'
+    elif access_type == 'index':
+        access = 'index_scan'
+    elif access_type in ('const', 'eq_ref') and key == 'PRIMARY':
+        access = 'primary_key'
+    elif key:
+        access = 'index'
+    else:
+        access = 'other'
+    alias = row.get('table')
+    detail = ', '.join(f'{name}={row[name]}' for name in ('type', 'key', 'ref', 'Extra') if row.get(name))
+    return PlanStep(aliases.get(alias), alias, access, key, row.get('rows'), detail)
+
+
+def explain(connection, statement, parameters=None):
+    """Plan zapytania jako lista PlanStep (MySQL: EXPLAIN, SQLite: EXPLAIN QUERY PLAN)"""
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        prefix = 'EXPLAIN '
+    elif dialect == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        raise PlanError(f'Plany zapytań nie są obsługiwane dla bazy {dialect}')
+
+    aliases = table_aliases(statement)
+    if isinstance(parameters, list):
+        # Parametry z eksportu JSON - lista to jeden zestaw parametrów, nie executemany
+        parameters = tuple(parameters)
+    connection.info['skip_query_capture'] = True
+    try:
+        if parameters:
+            result = connection.exec_driver_sql(prefix + statement, parameters)
+        else:
+            result = connection.exec_driver_sql(prefix + statement)
+        rows = result.mappings().all()
+    finally:
+        connection.info.pop('skip_query_capture', None)
+
+    if dialect == 'mysql':
+        return [_mysql_step(dict(row), aliases) for row in rows]
+    return [_sqlite_step(row['detail'], aliases) for row in rows]
+
+
+def uses_temporary_sort(steps):
+    """Czy plan sortuje wyniki poza indeksem (filesort / TEMP B-TREE)"""
+    return any('TEMP B-TREE' in step.detail or 'filesort' in step.detail for step in steps)
+
+
+# ---------------------------------------------------------------------------
+# Gorące zapytania kontrolerów i regresje planów
+# ---------------------------------------------------------------------------
+
+HotQuery = namedtuple('HotQuery', 'name sql parameters')
+HOT_QUERIES = {}
+
+# Im wyższa pozycja, tym gorszy dostęp do tabeli
+ACCESS_RANK = {'primary_key': 0, 'index': 1, 'index_scan': 2, 'full_scan': 3}
+# Szacowana liczba wierszy może urosnąć ROWS_TOLERANCE razy (+ ROWS_SLACK) względem wzorca
+ROWS_TOLERANCE = 2.0
+ROWS_SLACK = 100
+
+
+def hot_query(name, sql, **parameters):
+    """
+    Rejestruje surowe zapytanie kontrolera jako gorące i zwraca text() do wykonania.
+    parameters - przykładowe wartości parametrów do EXPLAIN. Plany zarejestrowanych zapytań
+    porównują z wzorcami testy regresji planów (tests/test_query_plan_regressions.py),
+    sprawdza je też `flask indexes advise` bez eksportu przechwyconych zapytań.
+    """
+    registered = HOT_QUERIES.get(name)
+    if registered is not None and registered.sql != sql:
+        raise ValueError(f'Zapytanie {name} jest już zarejestrowane z inną treścią')
+    HOT_QUERIES[name] = HotQuery(name, sql, parameters)
+    return text(sql)
+
+
+def compile_hot_query(connection, hot):
+    """(SQL w dialekcie połączenia, parametry) zarejestrowanego zapytania"""
+    compiled = text(hot.sql).compile(dialect=connection.dialect)
+    values = compiled.construct_params(hot.parameters)
+    if compiled.positional:
+        return compiled.string, tuple(values[name] for name in compiled.positiontup)
+    return compiled.string, values
+
+
+def plan_summary(steps, row_count=None):
+    """
+    Plan w postaci porównywalnej z wzorcem: kroki na tabelach (sposób dostępu, indeks,
+    szacowana liczba wierszy) i sortowanie poza indeksem. SQLite nie szacuje liczby wierszy -
+    dla skanów przyjmowana jest liczba wierszy tabeli (row_count(tabela)).
+    """
+    summary = []
+    for step in steps:
+        if step.table is None:
+            continue
+        rows = step.rows
+        if rows is None and row_count and step.access in ('full_scan', 'index_scan'):
+            rows = row_count(step.table)
+        summary.append({'table': step.table, 'alias': step.alias, 'access': step.access,
+                        'index': step.index, 'rows': rows})
+    return {'steps': summary, 'temporarySort': uses_temporary_sort(steps)}
+
+
+def hot_query_plans(connection):
+    """{nazwa: plan_summary} wszystkich zapytań zarejestrowanych przez hot_query()"""
+    quote = connection.dialect.identifier_preparer.quote
+    row_counts = {}
+
+    def row_count(table):
+        if table not in row_counts:
+            row_counts[table] = connection.exec_driver_sql(f'SELECT COUNT(*) FROM {quote(table)}').scalar()
+        return row_counts[table]
+
+    plans = {}
+    for name in sorted(HOT_QUERIES):
+        statement, parameters = compile_hot_query(connection, HOT_QUERIES[name])
+        plans[name] = plan_summary(explain(connection, statement, parameters), row_count)
+    return plans
+
+
+def _keyed_steps(summary):
+    keyed, seen = {}, {}
+    for step in summary['steps']:
+        base = f"{step['table']} ({step['alias']})"
+        seen[base] = seen.get(base, 0) + 1
+        keyed[base if seen[base] == 1 else f'{base} #{seen[base]}'] = step
+    return keyed
+
+
+def compare_plans(baseline, current):
+    """Lista pogorszeń planu względem wzorca (pusta - plan nie jest gorszy)"""
+    regressions = []
+    baseline_steps = _keyed_steps(baseline)
+    for key, step in _keyed_steps(current).items():
+        rank = ACCESS_RANK.get(step['access'])
+        previous = baseline_steps.get(key)
+        if previous is None:
+            if rank is not None and rank >= ACCESS_RANK['index_scan']:
+                regressions.append(f"{key}: nowy krok {step['access']}")
+            continue
+        previous_rank = ACCESS_RANK.get(previous['access'])
+        if rank is not None and previous_rank is not None and rank > previous_rank:
+            regressions.append(f"{key}: {previous['access']} ({previous['index'] or '-'}) → "
+                               f"{step['access']} ({step['index'] or '-'})")
+        if step['rows'] is not None:
+            limit = (previous['rows'] or 0) * ROWS_TOLERANCE + ROWS_SLACK
+            if step['rows'] > limit:
+                regressions.append(f"{key}: szacowane wiersze {previous['rows']} → {step['rows']}")
+    if current['temporarySort'] and not baseline['temporarySort']:
+        regressions.append('sortowanie poza indeksem (filesort / TEMP B-TREE)')
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# Doradca indeksów
+# ---------------------------------------------------------------------------
+
+_CONDITION_OPERATOR = r'(=|<=|>=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b)'
+_EQUALITY = {'=', 'IN', 'IS'}
+
+
+def _clauses(statement):
+    """(warunki WHERE, warunki ON, ORDER BY) - fragmenty zapytania po pierwszym FROM"""
+    start = re.search(r'\bFROM\b', statement, re.IGNORECASE)
+    body = statement[start.start():] if start else statement
+    order_match = re.search(r'\bORDER\s+BY\b(.*)$', body, re.IGNORECASE | re.DOTALL)
+    order_by = order_match.group(1) if order_match else ''
+    body = body[:order_match.start()] if order_match else body
+    where_match = re.search(r'\bWHERE\b', body, re.IGNORECASE)
+    where = body[where_match.end():] if where_match else ''
+    joins = body[:where_match.start()] if where_match else body
+    on = ' '.join(re.findall(r'\bON\b(.*?)(?=\b(?:LEFT|RIGHT|INNER|OUTER|CROSS|JOIN)\b|$)', joins,
+                             re.IGNORECASE | re.DOTALL))
+    return where, on, order_by
+
+
+def _column_pattern(qualifiers, columns):
+    names = '|'.join(re.escape(name) for name in sorted(columns, key=len, reverse=True))
+    qualifier = ''
+    if qualifiers:
+        qualifier = rf'[`"]?(?:{"|".join(re.escape(name) for name in qualifiers)})[`"]?\.'
+    return rf'(?<![\w.`"]){qualifier}[`"]?({names})[`"]?(?![\w.])'
+
+
+def _condition_columns(fragment, column_pattern):
+    """(kolumny porównane równością, kolumny zakresów) w kolejności wystąpienia"""
+    equality, ranges = [], []
+    for match in re.finditer(rf'{column_pattern}\s*{_CONDITION_OPERATOR}', fragment, re.IGNORECASE):
+        target = equality if match.group(2).upper() in _EQUALITY else ranges
+        target.append(match.group(1))
+    for match in re.finditer(rf'{_CONDITION_OPERATOR}\s*{column_pattern}', fragment, re.IGNORECASE):
+        target = equality if match.group(1).upper() in _EQUALITY else ranges
+        target.append(match.group(2))
+    return equality, ranges
+
+
+def predicate_columns(statement, table, alias, table_columns, other_columns=()):
+    """
+    Kolumny tabeli przydatne w indeksie: równości, potem pierwszy zakres - z WHERE, a gdy ich
+    brak z warunków złączenia i w ostatniej kolejności z ORDER BY. Kolumny bez kwalifikatora
+    są brane tylko, gdy nie występują w innych tabelach zapytania.
+    """
+    canonical = {column.lower(): column for column in table_columns}
+    qualifiers = {table, alias} - {None}
+    patterns = [_column_pattern(qualifiers, canonical.values())]
+    unqualified = [column for column in canonical.values() if column.lower() not in other_columns]
+    if unqualified:
+        patterns.append(_column_pattern((), unqualified))
+
+    where, on, order_by = _clauses(statement)
+    for fragment in (where, on):
+        equality, ranges = [], []
+        for pattern in patterns:
+            found_equality, found_ranges = _condition_columns(fragment, pattern)
+            equality += found_equality
+            ranges += found_ranges
+        columns = list(dict.fromkeys(canonical[name.lower()] for name in equality))
+        for name in ranges:
+            if canonical[name.lower()] not in columns:
+                columns.append(canonical[name.lower()])
+                break
+        if columns:
+            return columns
+    for pattern in patterns:
+        match = re.search(pattern, order_by, re.IGNORECASE)
+        if match:
+            return [canonical[match.group(1).lower()]]
+    return []
+
+
+class IndexAdvisor:
+    """Analiza planów zapytań na jednym połączeniu (liczby wierszy i schemat w pamięci)"""
+
+    def __init__(self, connection, min_rows=DEFAULT_MIN_ROWS):
+        self.connection = connection
+        self.min_rows = min_rows
+        self.inspector = inspect(connection)
+        self.tables = set(self.inspector.get_table_names())
+        self._columns = {}
+        self._indexes = {}
+        self._row_counts = {}
+
+    def columns(self, table):
+        if table not in self._columns:
+            self._columns[table] = [column['name'] for column in self.inspector.get_columns(table)]
+        return self._columns[table]
+
+    def indexes(self, table):
+        if table not in self._indexes:
+            self._indexes[table] = existing_indexes(self.inspector, table)
+        return self._indexes[table]
+
+    def row_count(self, table):
+        if table not in self._row_counts:
+            quoted = self.connection.dialect.identifier_preparer.quote(table)
+            self.connection.info['skip_query_capture'] = True
+            try:
+                self._row_counts[table] = self.connection.exec_driver_sql(f'SELECT COUNT(*) FROM {quoted}').scalar()
+            finally:
+                self.connection.info.pop('skip_query_capture', None)
+        return self._row_counts[table]
+
+    def _covering_index(self, table, columns):
+        """Nazwa istniejącego indeksu zaczynającego się od podanych kolumn"""
+        wanted = _column_key(columns)
+        for existing, name in self.indexes(table).items():
+            if existing[:len(wanted)] == wanted:
+                return name
+        return None
+
+    def _suggestion(self, statement, aliases, step):
+        other_columns = {column.lower() for name in set(aliases.values()) - {step.table} if name in self.tables
+                         for column in self.columns(name)}
+        columns = predicate_columns(statement, step.table, step.alias, self.columns(step.table), other_columns)
+        if not columns:
+            return {'columns': [], 'note': 'Brak warunków na kolumnach tabeli - pełny skan jest oczekiwany'}
+        suggestion = {'columns': columns}
+        covering = self._covering_index(step.table, columns[:1])
+        if covering:
+            suggestion['existingIndex'] = covering
+            suggestion['note'] = 'Indeks istnieje, ale nie został użyty (mała selektywność albo funkcja na kolumnie)'
+            return suggestion
+        declared = next((index.name for table in db.metadata.sorted_tables if table.name == step.table
+                         for index in table.indexes
+                         if _column_key(column.name for column in index.columns)[:len(columns)] == _column_key(columns)),
+                        None)
+        if declared:
+            suggestion['declaredIndex'] = declared
+            suggestion['note'] = 'Indeks jest zadeklarowany w modelu - uruchom: flask indexes create'
+        name = f"ix_{step.table}_{'_'.join(columns)}"
+        quote = self.connection.dialect.identifier_preparer.quote
+        suggestion['sql'] = (f"CREATE INDEX {quote(name)} ON {quote(step.table)} "
+                             f"({', '.join(quote(column) for column in columns)})")
+        return suggestion
+
+    def review(self, entry):
+        """Raport dla jednego zapytania: plan, pełne skany z propozycjami indeksów"""
+        statement = entry.get('statement') or entry['sql']
+        report = {key: entry[key] for key in ('name', 'sql', 'calls', 'totalMs', 'maxMs') if key in entry}
+        report.setdefault('sql', normalize_sql(statement))
+        try:
+            steps = explain(self.connection, statement, entry.get('parameters'))
+        except Exception as e:
+            report['error'] = str(e)
+            return report
+
+        aliases = table_aliases(statement)
+        full_scans = []
+        for step in steps:
+            if step.access != 'full_scan' or step.table not in self.tables:
+                continue
+            rows = step.rows if step.rows is not None else self.row_count(step.table)
+            if rows < self.min_rows:
+                continue
+            full_scans.append({'table': step.table, 'alias': step.alias, 'rows': rows, 'detail': step.detail,
+                               'suggestion': self._suggestion(statement, aliases, step)})
+        report['plan'] = [step._asdict() for step in steps]
+        report['fullScans'] = full_scans
+        report['temporarySort'] = uses_temporary_sort(steps)
+        return report
+
+
+def advise(entries=None, limit=DEFAULT_ADVISOR_LIMIT, min_rows=DEFAULT_MIN_ROWS):
+    """
+    Raport doradcy indeksów dla zapytań (słowniki z 'sql' albo 'statement' i 'parameters')
+    - domyślnie dla najcięższych zapytań przechwyconych w tym procesie
+    """
+    if entries is None:
+        entries = query_capture.top(limit)
+    with db.engine.connect() as connection:
+        advisor = IndexAdvisor(connection, min_rows)
+        return [advisor.review(entry) for entry in entries]
+
+
+def advise_hot_queries(min_rows=DEFAULT_MIN_ROWS):
+    """Raport doradcy indeksów dla zapytań zarejestrowanych przez hot_query()"""
+    with db.engine.connect() as connection:
+        advisor = IndexAdvisor(connection, min_rows)
+        report = []
+        for hot in HOT_QUERIES.values():
+            statement, parameters = compile_hot_query(connection, hot)
+            report.append(advisor.review({'name': hot.name, 'statement': statement, 'parameters': parameters}))
+        return report
+
+
+def format_report(report):
+    """Raport doradcy jako tekst dla CLI"""
+    lines = []
+    for item in report:
+        timing = f" - {item['calls']}× / {item['totalMs']:.1f} ms" if 'calls' in item else ''
+        lines.append(f"{item.get('name') or item['sql'][:120]}{timing}")
+        if 'error' in item:
+            lines.append(f"  ⚠️  {item['error']}")
+            continue
+        for scan in item['fullScans']:
+            lines.append(f"  PEŁNY SKAN {scan['table']} (~{scan['rows']} wierszy)")
+            suggestion = scan['suggestion']
+            if suggestion.get('note'):
+                lines.append(f"    {suggestion['note']}")
+            if suggestion.get('sql'):
+                lines.append(f"    {suggestion['sql']}")
+        if item['temporarySort']:
+            lines.append('  Sortowanie poza indeksem')
+        if not item['fullScans'] and not item['temporarySort']:
+            lines.append('  OK')
+    return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Rejestracja
+# ---------------------------------------------------------------------------
+
+def init_query_plans(app):
+    """Rejestruje przechwytywanie zapytań i komendy CLI indeksów"""
+    query_capture.size = app.config.get('QUERY_CAPTURE_SIZE', DEFAULT_CAPTURE_SIZE)
+    if app.config.get('QUERY_CAPTURE_ENABLED', True):
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.cli.group('indexes')
+    def indexes_cli():
+        """Indeksy bazy danych i doradca indeksów"""
+
+    @indexes_cli.command('missing')
+    def missing_command():
+        """Wypisuje indeksy zadeklarowane w modelach, których brakuje w bazie"""
+        missing = missing_indexes()
+        for index in missing:
+            click.echo(f"{index.table.name}: {index.name} ({', '.join(column.name for column in index.columns)})")
+        click.echo(f'Brakujące indeksy: {len(missing)}')
+
+    @indexes_cli.command('create')
+    def create_command():
+        """Tworzy brakujące indeksy zadeklarowane w modelach"""
+        click.echo(f'Utworzone indeksy: {len(create_missing_indexes())}')
+
+    @indexes_cli.command('advise')
+    @click.option('--capture', 'capture_file', type=click.File('r'),
+                  help='Eksport przechwyconych zapytań (GET /api/admin/query-capture)')
+    @click.option('--limit', default=DEFAULT_ADVISOR_LIMIT, show_default=True)
+    @click.option('--min-rows', default=lambda: app.config.get('INDEX_ADVISOR_MIN_ROWS', DEFAULT_MIN_ROWS),
+                  type=int, help='Pomijaj pełne skany mniejszych tabel')
+    @click.option('--json', 'as_json', is_flag=True, help='Raport jako JSON')
+    def advise_command(capture_file, limit, min_rows, as_json):
+        """EXPLAIN przechwyconych (--capture) albo gorących zapytań: pełne skany i propozycje indeksów"""
+        if capture_file:
+            entries = sorted(json.load(capture_file), key=lambda item: item.get('totalMs', 0), reverse=True)[:limit]
+            report = advise(entries, limit, min_rows)
+        else:
+            # Bez eksportu - zarejestrowane gorące zapytania kontrolerów z przykładowymi parametrami
+            report = advise_hot_queries(min_rows)
+        click.echo(json.dumps(report, ensure_ascii=False, indent=2) if as_json else format_report(report))
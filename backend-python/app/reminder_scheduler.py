@@ -0,0 +1,269 @@
+"""
+Harmonogram przypomnień po stronie serwera.
+
+Nadchodzące przypomnienia są trzymane w kopcu (heapq) posortowanym po RemindAt. Kopiec jest
+ładowany oknami (REMINDER_WINDOW_SECONDS naprzód) z indeksu na Reminders.RemindAt i aktualizowany
+przy tworzeniu, edycji i usuwaniu przypomnień. Wątek śpi do najbliższego terminu, a następnie
+zapisuje powiadomienie (Notifications) i wysyła je kanałem push.
+
+Każde przypomnienie jest wysyłane raz - warunkowy UPDATE na FiredAt chroni przed podwójnym
+wysłaniem przy kilku procesach. Zmiany wykonane w innym procesie są wczytywane przy odświeżeniu
+okna (co REMINDER_REFRESH_SECONDS).
+
+Domyślnie harmonogram działa w procesie aplikacji (REMINDER_SCHEDULER_ENABLED). W trybie sidecar
+(`flask reminders run` w osobnym procesie) powiadomienie trafia do kanału push procesu sidecar,
+więc proces aplikacji uruchamia ReminderRelay - krótki odpyt przypomnień oznaczonych FiredAt
+dla podłączonych użytkowników, przekazujący ich powiadomienia do własnych połączeń SSE.
+
+RemindAt jest zapisywane w UTC (klient wysyła datę z 'Z'), dlatego porównania używają utcnow().
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import and_, select, update
+
+from app.counters import adjust_counter
+from app.database import db
+from app.push import hub
+
+
+def fire_reminder(reminder_id, now):
+    """Wysyła przypomnienie jako powiadomienie; zwraca powiadomienie lub None, jeśli już wysłane"""
+    from app.models import Reminder, Notification
+
+    result = db.session.execute(
+        update(Reminder)
+        .where(Reminder.Id == reminder_id)
+        .where(Reminder.FiredAt.is_(None))
+        .where(Reminder.RemindAt <= now)
+        .values(FiredAt=now)
+    )
+    if result.rowcount != 1:
+        db.session.commit()
+        return None
+
+    reminder = Reminder.query.get(reminder_id)
+    # UPDATE z pominięciem ORM - licznik oczekujących przypomnień trzeba zmienić ręcznie
+    adjust_counter(db.session.connection(), reminder.UserId, 'PendingReminders', -1)
+    notification = Notification(Message=f'Przypomnienie: {reminder.Note}', UserId=reminder.UserId,
+                                CreatedAt=now)
+    db.session.add(notification)
+    db.session.commit()
+
+    hub.publish(reminder.UserId, 'notification', notification.to_dict())
+    return notification
+
+
+class ReminderScheduler:
+    """Kopiec nadchodzących przypomnień z leniwym unieważnianiem wpisów"""
+
+    def __init__(self, window_seconds=3600, refresh_seconds=300):
+        self.window = timedelta(seconds=window_seconds)
+        self.refresh = timedelta(seconds=refresh_seconds)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._heap = []
+        # Aktualny termin przypomnienia - wpisy w kopcu z innym terminem są pomijane
+        self._scheduled = {}
+        self._window_end = None
+        self._loaded_at = None
+
+    def load_window(self, now):
+        """Wczytuje niewysłane przypomnienia z terminem przed końcem okna (także zaległe)"""
+        from app.models import Reminder
+
+        window_end = now + self.window
+        rows = db.session.query(Reminder.Id, Reminder.RemindAt).filter(
+            Reminder.FiredAt.is_(None),
+            Reminder.RemindAt < window_end
+        ).order_by(Reminder.RemindAt).all()
+
+        with self._lock:
+            self._heap = [(remind_at, reminder_id) for reminder_id, remind_at in rows]
+            heapq.heapify(self._heap)
+            self._scheduled = {reminder_id: remind_at for reminder_id, remind_at in rows}
+            self._window_end = window_end
+            self._loaded_at = now
+        return len(rows)
+
+    def needs_reload(self, now):
+        return self._window_end is None or now >= self._window_end or now - self._loaded_at >= self.refresh
+
+    def schedule(self, reminder_id, remind_at):
+        """Dodaje lub przesuwa przypomnienie (terminy poza oknem trafią do kopca przy wczytaniu okna)"""
+        with self._lock:
+            if self._window_end is not None and remind_at < self._window_end:
+                self._scheduled[reminder_id] = remind_at
+                heapq.heappush(self._heap, (remind_at, reminder_id))
+            else:
+                self._scheduled.pop(reminder_id, None)
+        self._wakeup.set()
+
+    def cancel(self, reminder_id):
+        with self._lock:
+            self._scheduled.pop(reminder_id, None)
+
+    def pop_due(self, now):
+        """Zdejmuje z kopca identyfikatory przypomnień, których termin minął"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                remind_at, reminder_id = heapq.heappop(self._heap)
+                if self._scheduled.get(reminder_id) == remind_at:
+                    del self._scheduled[reminder_id]
+                    due.append(reminder_id)
+        return due
+
+    def seconds_until_next(self, now):
+        """Czas snu wątku: do najbliższego przypomnienia, końca okna lub odświeżenia"""
+        with self._lock:
+            candidates = [self._window_end, self._loaded_at + self.refresh]
+            if self._heap:
+                candidates.append(self._heap[0][0])
+        return max(0.0, (min(candidates) - now).total_seconds())
+
+    def tick(self, now=None):
+        """Jeden krok harmonogramu; zwraca liczbę wysłanych przypomnień"""
+        now = now or datetime.utcnow()
+        if self.needs_reload(now):
+            self.load_window(now)
+        fired = 0
+        for reminder_id in self.pop_due(now):
+            if fire_reminder(reminder_id, now):
+                fired += 1
+        return fired
+
+    def run(self, app, stop_event=None):
+        """Pętla wątku - śpi do najbliższego terminu lub zmiany przypomnień"""
+        while not (stop_event and stop_event.is_set()):
+            with app.app_context():
+                try:
+                    self.tick()
+                    timeout = self.seconds_until_next(datetime.utcnow())
+                except Exception as e:
+                    print(f"⚠️  Błąd harmonogramu przypomnień: {e}")
+                    db.session.rollback()
+                    timeout = 30
+                finally:
+                    db.session.remove()
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+
+class ReminderRelay:
+    """Przekazuje do kanału push tego procesu przypomnienia wysłane przez inny proces (sidecar)"""
+
+    # Zapas okna odpytu - przypomnienie zatwierdzone chwilę po swoim FiredAt nie zostanie pominięte
+    OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, poll_seconds=5):
+        self.poll_seconds = poll_seconds
+        self._started = self._since = None
+        # Powiadomienia już przekazane: Id -> FiredAt (czyszczone po wyjściu poza okno)
+        self._published = {}
+
+    def tick(self, now=None):
+        """Jeden odpyt; zwraca liczbę przekazanych powiadomień"""
+        from app.models import Reminder, Notification
+
+        now = now or datetime.utcnow()
+        if self._since is None:
+            # Przypomnienia sprzed uruchomienia procesu klient widzi w liście powiadomień
+            self._started = self._since = now
+            return 0
+        since = max(self._since - self.OVERLAP, self._started)
+        self._since = now
+        self._published = {notification_id: fired_at for notification_id, fired_at in self._published.items()
+                           if fired_at > since}
+        user_ids = hub.connected_user_ids()
+        if not user_ids:
+            return 0
+
+        # fire_reminder zapisuje powiadomienie z CreatedAt równym FiredAt przypomnienia
+        rows = db.session.execute(
+            select(Notification, Reminder.FiredAt)
+            .join(Reminder, and_(Reminder.UserId == Notification.UserId, Reminder.FiredAt == Notification.CreatedAt))
+            .where(Reminder.UserId.in_(user_ids), Reminder.FiredAt > since)
+            .order_by(Reminder.FiredAt, Notification.Id)
+        ).all()
+        relayed = 0
+        for notification, fired_at in rows:
+            if notification.Id in self._published:
+                continue
+            self._published[notification.Id] = fired_at
+            hub.publish(notification.UserId, 'notification', notification.to_dict())
+            relayed += 1
+        return relayed
+
+    def run(self, app, stop_event):
+        while not stop_event.is_set():
+            with app.app_context():
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"⚠️  Błąd przekazywania przypomnień: {e}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            stop_event.wait(self.poll_seconds)
+
+
+def get_reminder_scheduler():
+    from flask import current_app
+    return current_app.extensions.get('reminder_scheduler')
+
+
+def reminder_changed(reminder):
+    """Aktualizuje kopiec po utworzeniu lub edycji przypomnienia"""
+    scheduler = get_reminder_scheduler()
+    if not scheduler:
+        return
+    if reminder.FiredAt is None:
+        scheduler.schedule(reminder.Id, reminder.RemindAt)
+    else:
+        scheduler.cancel(reminder.Id)
+
+
+def reminder_removed(reminder_id):
+    """Usuwa przypomnienie z kopca"""
+    scheduler = get_reminder_scheduler()
+    if scheduler:
+        scheduler.cancel(reminder_id)
+
+
+def init_reminder_scheduler(app):
+    """
+    Tworzy harmonogram przypomnień, rejestruje komendę CLI i uruchamia wątek harmonogramu
+    albo - gdy harmonogram działa w osobnym procesie - wątek przekazywania przypomnień
+    """
+    scheduler = ReminderScheduler(app.config.get('REMINDER_WINDOW_SECONDS', 3600),
+                                  app.config.get('REMINDER_REFRESH_SECONDS', 300))
+    app.extensions['reminder_scheduler'] = scheduler
+
+    @app.cli.group('reminders')
+    def reminders_cli():
+        """Harmonogram przypomnień"""
+
+    @reminders_cli.command('run')
+    def run_command():
+        """Uruchamia harmonogram przypomnień (tryb sidecar)"""
+        click.echo('Harmonogram przypomnień uruchomiony')
+        scheduler.run(app)
+
+    if app.config.get('REMINDER_SCHEDULER_ENABLED'):
+        stop_event = threading.Event()
+        thread = threading.Thread(target=scheduler.run, args=(app, stop_event),
+                                  name='crm-reminders', daemon=True)
+        thread.start()
+        scheduler.thread, scheduler.stop_event = thread, stop_event
+    elif app.config.get('REMINDER_RELAY_SECONDS', 5) > 0:
+        relay = ReminderRelay(app.config.get('REMINDER_RELAY_SECONDS', 5))
+        stop_event = threading.Event()
+        thread = threading.Thread(target=relay.run, args=(app, stop_event),
+                                  name='crm-reminder-relay', daemon=True)
+        thread.start()
+        relay.thread, relay.stop_event = thread, stop_event
+        app.extensions['reminder_relay'] = relay
+    return scheduler
@@ -0,0 +1,133 @@
+"""
+Magazyn wygenerowanych raportów (artefaktów).
+
+Raporty generowane przez harmonogram są zapisywane na dysku (REPORT_ARTIFACTS_DIR),
+a ich metadane w tabeli ReportArtifacts. Endpointy raportów serwują najnowszy artefakt
+i generują raport na żywo tylko wtedy, gdy klient o to poprosi (?live=true)
+lub gdy artefakt jeszcze nie istnieje.
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+
+from flask import current_app, make_response
+
+from app.database import db
+from app.scheduler import register_job_type
+
+# Funkcje generujące raporty: typ -> funkcja(parametry) -> (zawartość, content_type, nazwa_pliku[, nagłówki]) lub None
+REPORT_BUILDERS = {}
+# Normalizacja parametrów, aby zadanie harmonogramu i żądanie HTTP dawały ten sam klucz
+REPORT_NORMALIZERS = {}
+
+
+def normalize_params(report_type, params):
+    normalize = REPORT_NORMALIZERS.get(report_type)
+    return normalize(params) if normalize else dict(params)
+
+
+def report_key(report_type, params):
+    """Klucz raportu - typ + parametry w stałej kolejności"""
+    return f'{report_type}:{json.dumps(params, sort_keys=True, ensure_ascii=False)}'
+
+
+def get_artifacts_dir():
+    directory = current_app.config.get('REPORT_ARTIFACTS_DIR') or \
+        os.path.join(current_app.root_path, 'uploads', 'reports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def store_artifact(key, content, content_type, filename, job_id=None):
+    """Zapisuje artefakt i usuwa starsze wersje ponad limit REPORT_ARTIFACTS_KEEP"""
+    from app.models import ReportArtifact
+
+    path = os.path.join(get_artifacts_dir(), f'{uuid.uuid4().hex}_{filename}')
+    with open(path, 'wb') as f:
+        f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+
+    artifact = ReportArtifact(
+        ReportKey=key,
+        FilePath=path,
+        FileName=filename,
+        ContentType=content_type,
+        SizeBytes=os.path.getsize(path),
+        GeneratedAt=datetime.now(),
+        ScheduledJobId=job_id
+    )
+    db.session.add(artifact)
+    db.session.flush()
+
+    keep = current_app.config.get('REPORT_ARTIFACTS_KEEP', 3)
+    old_artifacts = ReportArtifact.query.filter_by(ReportKey=key) \
+        .order_by(ReportArtifact.GeneratedAt.desc(), ReportArtifact.Id.desc()).offset(keep).all()
+    for old in old_artifacts:
+        if os.path.exists(old.FilePath):
+            os.remove(old.FilePath)
+        db.session.delete(old)
+    return artifact
+
+
+def get_latest_artifact(key):
+    """Zwraca najnowszy artefakt, którego plik nadal istnieje"""
+    from app.models import ReportArtifact
+
+    artifact = ReportArtifact.query.filter_by(ReportKey=key) \
+        .order_by(ReportArtifact.GeneratedAt.desc(), ReportArtifact.Id.desc()).first()
+    if artifact and os.path.exists(artifact.FilePath):
+        return artifact
+    return None
+
+
+def file_response(content, content_type, filename, generated_at, source, headers=None):
+    response = make_response(content)
+    response.headers['Content-Type'] = content_type
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Report-Generated-At'] = generated_at.isoformat()
+    response.headers['X-Report-Source'] = source
+    response.last_modified = generated_at
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
+
+
+def serve_report(report_type, params, live=False):
+    """
+    Zwraca odpowiedź z raportem: najnowszy artefakt lub raport wygenerowany na żywo.
+    Zwraca None, jeśli generator nie znalazł danych (np. nieistniejąca grupa).
+    """
+    params = normalize_params(report_type, params)
+    if not live:
+        artifact = get_latest_artifact(report_key(report_type, params))
+        if artifact:
+            with open(artifact.FilePath, 'rb') as f:
+                content = f.read()
+            return file_response(content, artifact.ContentType, artifact.FileName,
+                                 artifact.GeneratedAt, 'artifact')
+
+    result = REPORT_BUILDERS[report_type](params)
+    if result is None:
+        return None
+    content, content_type, filename = result[:3]
+    headers = result[3] if len(result) > 3 else None
+    return file_response(content, content_type, filename, datetime.now(), 'live', headers)
+
+
+def register_report(report_type, description, builder, normalize=None):
+    """Rejestruje generator raportu i odpowiadający mu typ zadania harmonogramu"""
+    REPORT_BUILDERS[report_type] = builder
+    if normalize:
+        REPORT_NORMALIZERS[report_type] = normalize
+
+    @register_job_type(report_type, description)
+    def generate(params, job):
+        params = normalize_params(report_type, params)
+        result = builder(params)
+        if result is None:
+            raise ValueError(f'Brak danych dla raportu {report_type}: {params}')
+        content, content_type, filename = result[:3]
+        artifact = store_artifact(report_key(report_type, params), content, content_type, filename, job.Id)
+        return {'artifactId': artifact.Id, 'sizeBytes': artifact.SizeBytes}
+
+    return builder
@@ -0,0 +1,445 @@
+"""
+Backend raportów: agregacja w Pythonie albo w widokach i procedurach bazy danych.
+
+- PythonReportingBackend - wiersze faktur, płatności, kontraktów i zadań są czytane do aplikacji
+  i sumowane w groszach; działa na każdej bazie.
+- DatabaseReportingBackend - te same raporty z widoków v_customer_invoice_summary,
+  v_invoice_details, v_group_statistics i procedury sp_generate_sales_report
+  (database_enhancements.sql, tylko MySQL); do aplikacji trafiają wyłącznie wiersze wyniku.
+- Backend jest wybierany przy starcie (REPORTING_BACKEND=auto): baza MySQL z widokami w bieżącej
+  wersji i procedurą dostaje backend bazodanowy, pozostałe - Pythonowy. REPORTING_BACKEND=python
+  albo database wymusza wybór (database bez obiektów w bazie - ostrzeżenie i backend Pythonowy).
+- Oba backendy zwracają te same rekordy (kwoty jako Decimal z groszami); rows_transferred zlicza
+  wiersze przesłane z bazy (benchmarks/reporting_benchmark.py).
+
+Widoki i procedurę tworzy skrypt database_enhancements.sql albo
+`flask --app app:create_app reporting install`.
+"""
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import click
+from flask import current_app
+from sqlalchemy import bindparam, func, select, text
+
+from app.database import db
+from app.models import Contract, Customer, Group, Invoice, Meeting, Payment, Task, User
+from app.models.group import user_groups
+from app.money import from_grosze, grosze, to_decimal, to_grosze
+
+BACKEND_MODES = ('auto', 'python', 'database')
+SCRIPT_PATH = Path(__file__).resolve().parent.parent / 'database_enhancements.sql'
+
+REPORTING_VIEWS = ('v_customer_invoice_summary', 'v_invoice_details', 'v_group_statistics')
+REPORTING_PROCEDURES = ('sp_generate_sales_report',)
+# Kolumna bieżącej wersji widoków - starsze widoki (sumy mnożone przez złączenia) nie są używane
+VIEW_VERSION_COLUMN = ('v_customer_invoice_summary', 'CustomerGroupId')
+
+CUSTOMER_SUMMARY_FIELDS = (
+    'customerId', 'customerName', 'customerEmail', 'customerCompany', 'totalInvoices',
+    'totalInvoiceValue', 'paidInvoiceValue', 'unpaidInvoiceValue', 'paidInvoicesCount',
+    'unpaidInvoicesCount', 'totalContracts', 'totalTasks',
+)
+INVOICE_DETAIL_FIELDS = (
+    'invoiceId', 'invoiceNumber', 'issuedAt', 'dueDate', 'totalAmount', 'isPaid', 'createdByUserId',
+    'assignedGroupId', 'customerId', 'customerName', 'customerEmail', 'customerCompany', 'customerPhone',
+    'paidAmount', 'remainingAmount', 'paymentsCount', 'paymentStatus',
+)
+GROUP_STATISTICS_FIELDS = (
+    'groupId', 'groupName', 'groupDescription', 'totalMembers', 'totalCustomers', 'totalInvoices',
+    'totalInvoiceValue', 'paidInvoicesCount', 'unpaidInvoicesCount', 'totalContracts', 'totalTasks',
+    'completedTasksCount', 'pendingTasksCount', 'totalMeetings',
+)
+SALES_REPORT_FIELDS = (
+    'invoiceId', 'invoiceNumber', 'issuedAt', 'totalAmount', 'isPaid', 'customerName',
+    'customerCompany', 'groupName', 'paidAmount', 'remainingAmount',
+)
+AMOUNT_FIELDS = {'totalInvoiceValue', 'paidInvoiceValue', 'unpaidInvoiceValue', 'totalAmount',
+                 'paidAmount', 'remainingAmount'}
+FLAG_FIELDS = {'isPaid'}
+
+
+class ReportingError(ValueError):
+    """Nieprawidłowe parametry raportu albo niedostępny backend"""
+
+
+def _record(fields, values):
+    """Rekord raportu - kwoty jako Decimal z groszami, flagi jako bool (MySQL zwraca 0/1)"""
+    record = dict(zip(fields, values))
+    for field in AMOUNT_FIELDS.intersection(record):
+        record[field] = to_decimal(record[field])
+    for field in FLAG_FIELDS.intersection(record):
+        if record[field] is not None:
+            record[field] = bool(record[field])
+    return record
+
+
+def jsonable(record):
+    """Rekord raportu do JSON (kwoty jako float, daty w ISO 8601)"""
+    return {key: float(value) if isinstance(value, Decimal)
+            else value.isoformat() if isinstance(value, (date, datetime)) else value
+            for key, value in record.items()}
+
+
+def payment_status(due_date, is_paid, today):
+    """Status płatności jak w v_invoice_details (CURDATE() - początek bieżącego dnia)"""
+    if due_date is not None and is_paid is not None and not is_paid and due_date < today:
+        return 'Overdue'
+    if is_paid:
+        return 'Paid'
+    return 'Pending'
+
+
+def sales_range(date_from, date_to):
+    """Zakres wystawienia faktur [od, do + 1 dzień) - dzień końcowy w całości"""
+    if date_from > date_to:
+        raise ReportingError('Data początkowa jest późniejsza niż końcowa')
+    return datetime.combine(date_from, time.min), datetime.combine(date_to + timedelta(days=1), time.min)
+
+
+class ReportingBackend:
+    """Wspólny interfejs backendów raportów (bind - połączenie, domyślnie sesja aplikacji)"""
+
+    name = None
+
+    def __init__(self, bind=None, capabilities=None):
+        self.bind = bind
+        self.capabilities = capabilities or {}
+        self.rows_transferred = 0
+        self._lock = threading.Lock()
+
+    def _rows(self, statement, parameters=None):
+        rows = (self.bind or db.session).execute(statement, parameters or {}).all()
+        with self._lock:
+            self.rows_transferred += len(rows)
+        return rows
+
+    def customer_summaries(self, group_id=None):
+        """Podsumowanie faktur, kontraktów i zadań klientów (grupa klienta), według Id klienta"""
+        raise NotImplementedError
+
+    def invoice_details(self, customer_id=None, group_id=None):
+        """Faktury z danymi klienta i płatnościami (grupa faktury), według Id faktury"""
+        raise NotImplementedError
+
+    def group_statistics(self, group_id):
+        """Statystyki grupy (None - grupa nie istnieje)"""
+        raise NotImplementedError
+
+    def sales_report(self, date_from, date_to, group_id=None):
+        """Faktury wystawione od date_from do date_to włącznie, od najnowszych"""
+        raise NotImplementedError
+
+
+class PythonReportingBackend(ReportingBackend):
+    """Wiersze źródłowe czytane do aplikacji, sumy liczone w groszach w Pythonie"""
+
+    name = 'python'
+
+    def _paid_grosze(self, *conditions):
+        """{Id faktury: [suma wpłat w groszach, liczba wpłat]} dla faktur spełniających warunki"""
+        paid = defaultdict(lambda: [0, 0])
+        rows = self._rows(select(Payment.InvoiceId, grosze(Payment.Amount))
+                          .join(Invoice, Invoice.Id == Payment.InvoiceId)
+                          .join(Customer, Customer.Id == Invoice.CustomerId)
+                          .where(*conditions))
+        for invoice_id, amount in rows:
+            paid[invoice_id][0] += amount
+            paid[invoice_id][1] += 1
+        return paid
+
+    def customer_summaries(self, group_id=None):
+        conditions = [Customer.DeletedAt.is_(None)]
+        if group_id is not None:
+            conditions.append(Customer.AssignedGroupId == group_id)
+
+        customers = self._rows(select(Customer.Id, Customer.Name, Customer.Email, Customer.Company)
+                               .where(*conditions).order_by(Customer.Id))
+        invoices = self._rows(select(Invoice.CustomerId, Invoice.IsPaid, grosze(Invoice.TotalAmount))
+                              .join(Customer, Customer.Id == Invoice.CustomerId).where(*conditions))
+        contracts = Counter(row[0] for row in self._rows(
+            select(Contract.CustomerId).join(Customer, Customer.Id == Contract.CustomerId).where(*conditions)))
+        tasks = Counter(row[0] for row in self._rows(
+            select(Task.CustomerId).join(Customer, Customer.Id == Task.CustomerId).where(*conditions)))
+
+        # [liczba, suma, suma opłaconych, suma nieopłaconych, opłacone, nieopłacone]
+        totals = defaultdict(lambda: [0, 0, 0, 0, 0, 0])
+        for customer_id, is_paid, amount in invoices:
+            entry = totals[customer_id]
+            entry[0] += 1
+            entry[1] += amount or 0
+            if is_paid is None:
+                continue
+            entry[2 if is_paid else 3] += amount or 0
+            entry[4 if is_paid else 5] += 1
+
+        summaries = []
+        for customer_id, name, email, company in customers:
+            count, total, paid, unpaid, paid_count, unpaid_count = totals[customer_id]
+            summaries.append(_record(CUSTOMER_SUMMARY_FIELDS, (
+                customer_id, name, email, company, count, from_grosze(total), from_grosze(paid),
+                from_grosze(unpaid), paid_count, unpaid_count, contracts[customer_id], tasks[customer_id],
+            )))
+        return summaries
+
+    def invoice_details(self, customer_id=None, group_id=None):
+        conditions = [Customer.DeletedAt.is_(None)]
+        if customer_id is not None:
+            conditions.append(Invoice.CustomerId == customer_id)
+        if group_id is not None:
+            conditions.append(Invoice.AssignedGroupId == group_id)
+
+        invoices = self._rows(select(
+            Invoice.Id, Invoice.Number, Invoice.IssuedAt, Invoice.DueDate, Invoice.TotalAmount, Invoice.IsPaid,
+            Invoice.CreatedByUserId, Invoice.AssignedGroupId, Customer.Id, Customer.Name, Customer.Email,
+            Customer.Company, Customer.Phone,
+        ).join(Customer, Customer.Id == Invoice.CustomerId).where(*conditions).order_by(Invoice.Id))
+        paid = self._paid_grosze(*conditions)
+        today = datetime.combine(date.today(), time.min)
+
+        details = []
+        for row in invoices:
+            paid_grosze, payments_count = paid.get(row[0], (0, 0))
+            remaining = None if row[4] is None else from_grosze(to_grosze(row[4]) - paid_grosze)
+            details.append(_record(INVOICE_DETAIL_FIELDS, (
+                *row, from_grosze(paid_grosze), remaining, payments_count, payment_status(row[3], row[5], today),
+            )))
+        return details
+
+    def group_statistics(self, group_id):
+        def count(model, *conditions):
+            return select(func.count()).select_from(model).where(*conditions).scalar_subquery()
+
+        invoice_value = select(func.coalesce(func.sum(Invoice.TotalAmount), 0)) \
+            .where(Invoice.AssignedGroupId == Group.Id).scalar_subquery()
+        members = select(func.count()).select_from(user_groups) \
+            .join(User, User.id == user_groups.c.UserId) \
+            .where(user_groups.c.GroupId == Group.Id, User.DeletedAt.is_(None)).scalar_subquery()
+        rows = self._rows(select(
+            Group.Id, Group.Name, Group.Description, members,
+            count(Customer, Customer.AssignedGroupId == Group.Id, Customer.DeletedAt.is_(None)),
+            count(Invoice, Invoice.AssignedGroupId == Group.Id),
+            invoice_value,
+            count(Invoice, Invoice.AssignedGroupId == Group.Id, Invoice.IsPaid.is_(True)),
+            count(Invoice, Invoice.AssignedGroupId == Group.Id, Invoice.IsPaid.is_(False)),
+            count(Contract, Contract.ResponsibleGroupId == Group.Id),
+            count(Task, Task.AssignedGroupId == Group.Id),
+            count(Task, Task.AssignedGroupId == Group.Id, Task.Completed.is_(True)),
+            count(Task, Task.AssignedGroupId == Group.Id, Task.Completed.is_(False)),
+            count(Meeting, Meeting.AssignedGroupId == Group.Id),
+        ).where(Group.Id == group_id))
+        return _record(GROUP_STATISTICS_FIELDS, rows[0]) if rows else None
+
+    def sales_report(self, date_from, date_to, group_id=None):
+        start, end = sales_range(date_from, date_to)
+        conditions = [Invoice.IssuedAt >= start, Invoice.IssuedAt < end, Customer.DeletedAt.is_(None)]
+        if group_id is not None:
+            conditions.append(Invoice.AssignedGroupId == group_id)
+
+        invoices = self._rows(select(
+            Invoice.Id, Invoice.Number, Invoice.IssuedAt, Invoice.TotalAmount, Invoice.IsPaid,
+            Customer.Name, Customer.Company, Group.Name,
+        ).join(Customer, Customer.Id == Invoice.CustomerId)
+            .outerjoin(Group, Group.Id == Invoice.AssignedGroupId)
+            .where(*conditions).order_by(Invoice.IssuedAt.desc(), Invoice.Id.desc()))
+        paid = self._paid_grosze(*conditions)
+
+        report = []
+        for row in invoices:
+            paid_grosze = paid.get(row[0], (0, 0))[0]
+            remaining = None if row[3] is None else from_grosze(to_grosze(row[3]) - paid_grosze)
+            report.append(_record(SALES_REPORT_FIELDS, (*row, from_grosze(paid_grosze), remaining)))
+        return report
+
+
+class DatabaseReportingBackend(ReportingBackend):
+    """Agregacja w widokach i procedurze składowanej MySQL - do aplikacji trafia tylko wynik"""
+
+    name = 'database'
+
+    def customer_summaries(self, group_id=None):
+        where = 'WHERE CustomerGroupId = :group_id' if group_id is not None else ''
+        rows = self._rows(text(f"""
+            SELECT CustomerId, CustomerName, CustomerEmail, CustomerCompany, TotalInvoices,
+                   TotalInvoiceValue, PaidInvoiceValue, UnpaidInvoiceValue, PaidInvoicesCount,
+                   UnpaidInvoicesCount, TotalContracts, TotalTasks
+            FROM v_customer_invoice_summary
+            {where}
+            ORDER BY CustomerId
+        """), {'group_id': group_id})
+        return [_record(CUSTOMER_SUMMARY_FIELDS, row) for row in rows]
+
+    def invoice_details(self, customer_id=None, group_id=None):
+        conditions = []
+        if customer_id is not None:
+            conditions.append('CustomerId = :customer_id')
+        if group_id is not None:
+            conditions.append('AssignedGroupId = :group_id')
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self._rows(text(f"""
+            SELECT InvoiceId, InvoiceNumber, IssuedAt, DueDate, TotalAmount, IsPaid, CreatedByUserId,
+                   AssignedGroupId, CustomerId, CustomerName, CustomerEmail, CustomerCompany, CustomerPhone,
+                   PaidAmount, RemainingAmount, PaymentsCount, PaymentStatus
+            FROM v_invoice_details
+            {where}
+            ORDER BY InvoiceId
+        """), {'customer_id': customer_id, 'group_id': group_id})
+        return [_record(INVOICE_DETAIL_FIELDS, row) for row in rows]
+
+    def group_statistics(self, group_id):
+        rows = self._rows(text("""
+            SELECT GroupId, GroupName, GroupDescription, TotalMembers, TotalCustomers, TotalInvoices,
+                   TotalInvoiceValue, PaidInvoicesCount, UnpaidInvoicesCount, TotalContracts, TotalTasks,
+                   CompletedTasksCount, PendingTasksCount, TotalMeetings
+            FROM v_group_statistics
+            WHERE GroupId = :group_id
+        """), {'group_id': group_id})
+        return _record(GROUP_STATISTICS_FIELDS, rows[0]) if rows else None
+
+    def sales_report(self, date_from, date_to, group_id=None):
+        sales_range(date_from, date_to)
+        rows = self._rows(text('CALL sp_generate_sales_report(:date_from, :date_to, :group_id)'),
+                          {'date_from': date_from, 'date_to': date_to, 'group_id': group_id})
+        return [_record(SALES_REPORT_FIELDS, row) for row in rows]
+
+
+BACKENDS = {backend.name: backend for backend in (PythonReportingBackend, DatabaseReportingBackend)}
+
+
+# ---------------------------------------------------------------------------
+# Wykrywanie i instalacja obiektów bazy
+# ---------------------------------------------------------------------------
+
+def detect_capabilities(connection):
+    """Czy baza ma widoki (w bieżącej wersji) i procedurę raportów - {'available', 'missing', 'reason'}"""
+    if connection.dialect.name != 'mysql':
+        return {'available': False, 'missing': [],
+                'reason': f'Widoki i procedury raportów są dostępne tylko na MySQL ({connection.dialect.name})'}
+
+    names = bindparam('names', expanding=True)
+    views = set(connection.execute(text(
+        'SELECT TABLE_NAME FROM information_schema.VIEWS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :names'
+    ).bindparams(names), {'names': list(REPORTING_VIEWS)}).scalars())
+    procedures = set(connection.execute(text(
+        'SELECT ROUTINE_NAME FROM information_schema.ROUTINES '
+        "WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_TYPE = 'PROCEDURE' AND ROUTINE_NAME IN :names"
+    ).bindparams(names), {'names': list(REPORTING_PROCEDURES)}).scalars())
+    missing = [name for name in REPORTING_VIEWS + REPORTING_PROCEDURES if name not in views | procedures]
+
+    view, column = VIEW_VERSION_COLUMN
+    if view in views and not connection.execute(text(
+        'SELECT COUNT(*) FROM information_schema.COLUMNS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :view AND COLUMN_NAME = :column'
+    ), {'view': view, 'column': column}).scalar():
+        missing.append(f'{view}.{column}')
+
+    if missing:
+        return {'available': False, 'missing': missing,
+                'reason': 'Brak widoków lub procedur raportów (albo stara wersja) - '
+                          'uruchom: flask --app app:create_app reporting install'}
+    return {'available': True, 'missing': [], 'reason': None}
+
+
+def select_backend(mode='auto', bind=None):
+    """Backend raportów dla trybu REPORTING_BACKEND (bind - połączenie, domyślnie sesja aplikacji)"""
+    if mode not in BACKEND_MODES:
+        raise ReportingError(f'Nieznany backend raportów: {mode} (dostępne: {", ".join(BACKEND_MODES)})')
+    if mode == 'python':
+        return PythonReportingBackend(bind, {'available': None, 'missing': [], 'reason': 'REPORTING_BACKEND=python'})
+
+    if bind is not None:
+        capabilities = detect_capabilities(bind)
+    else:
+        with db.engine.connect() as connection:
+            capabilities = detect_capabilities(connection)
+    if capabilities['available']:
+        return DatabaseReportingBackend(bind, capabilities)
+    if mode == 'database':
+        print(f"⚠️  Uwaga: Backend raportów 'database' niedostępny: {capabilities['reason']}")
+    return PythonReportingBackend(bind, capabilities)
+
+
+def script_statements(script):
+    """Instrukcje skryptu SQL klienta mysql (z obsługą DELIMITER), bez komentarzy przed instrukcją"""
+    delimiter, buffer = ';', []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split()[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).strip()[:-len(delimiter)].strip()
+            buffer = []
+            if statement:
+                yield statement
+
+
+def reporting_statements(script=None):
+    """Instrukcje database_enhancements.sql tworzące widoki i procedury raportów"""
+    if script is None:
+        script = SCRIPT_PATH.read_text(encoding='utf-8')
+    header = re.compile(r'(?:CREATE\s+OR\s+REPLACE\s+VIEW|(?:DROP|CREATE)\s+PROCEDURE(?:\s+IF\s+EXISTS)?)\s+(\w+)',
+                        re.IGNORECASE)
+    names = set(REPORTING_VIEWS + REPORTING_PROCEDURES)
+    return [statement for statement in script_statements(script)
+            if (match := header.match(statement)) and match.group(1) in names]
+
+
+def install_reporting_objects(connection):
+    """Tworzy (albo zastępuje) widoki i procedury raportów - tylko MySQL"""
+    if connection.dialect.name != 'mysql':
+        raise ReportingError('Widoki i procedury raportów są dostępne tylko na MySQL')
+    statements = reporting_statements()
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    return statements
+
+
+def reporting_backend():
+    """Backend raportów wybrany przy starcie aplikacji"""
+    return current_app.extensions['reporting']
+
+
+def init_reporting(app):
+    """Wybiera backend raportów (wykrywanie możliwości bazy) i rejestruje komendy CLI"""
+    mode = app.config.get('REPORTING_BACKEND', 'auto')
+    if mode not in BACKEND_MODES:
+        raise ReportingError(f'Nieznany backend raportów: {mode} (dostępne: {", ".join(BACKEND_MODES)})')
+    try:
+        with app.app_context():
+            backend = select_backend(mode)
+    except Exception as e:
+        print(f"⚠️  Uwaga: Nie udało się sprawdzić widoków raportów: {e}")
+        backend = PythonReportingBackend(capabilities={'available': False, 'missing': [], 'reason': str(e)})
+    app.extensions['reporting'] = backend
+    print(f"📊 Backend raportów: {backend.name}")
+
+    @app.cli.group('reporting')
+    def reporting_cli():
+        """Backend raportów (widoki i procedury bazy danych)"""
+
+    @reporting_cli.command('install')
+    def install_command():
+        """Tworzy widoki i procedury raportów z database_enhancements.sql (MySQL)"""
+        with db.engine.begin() as connection:
+            statements = install_reporting_objects(connection)
+        click.echo(f'Wykonane instrukcje: {len(statements)}')
+
+    @reporting_cli.command('status')
+    def status_command():
+        """Wypisuje wynik wykrywania widoków i procedur raportów"""
+        with db.engine.connect() as connection:
+            capabilities = detect_capabilities(connection)
+        click.echo(f"Dostępny backend bazodanowy: {'tak' if capabilities['available'] else 'nie'}")
+        if capabilities['reason']:
+            click.echo(capabilities['reason'])
+        for name in capabilities['missing']:
+            click.echo(f'  brak: {name}')
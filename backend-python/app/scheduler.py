@@ -0,0 +1,264 @@
+"""
+Harmonogram zadań w tle (raporty i eksporty generowane poza godzinami szczytu).
+
+Definicje zadań są przechowywane w tabeli ScheduledJobs (wyrażenie cron + typ zadania
++ parametry JSON). Zadania wykonuje:
+- wątek w procesie aplikacji (SCHEDULER_ENABLED=true), albo
+- osobny proces: `flask --app app:create_app scheduler run` (sidecar).
+
+Przed uruchomieniem zadanie jest blokowane warunkowym UPDATE, więc kilka workerów
+może działać równolegle bez podwójnego wykonania.
+"""
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import update, or_
+
+from app.database import db
+
+CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    # 7 to także niedziela - zamieniana na 0 po rozwinięciu pola
+    ('weekday', 0, 7),
+)
+
+
+class CronError(ValueError):
+    """Nieprawidłowe wyrażenie cron"""
+
+
+class CronExpression:
+    """
+    Wyrażenie cron w formacie: minuta godzina dzień_miesiąca miesiąc dzień_tygodnia.
+    Obsługuje: *, */n, a-b, a-b/n, listy a,b,c. Niedziela to 0 (lub 7).
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise CronError('Wyrażenie cron musi mieć 5 pól: minuta godzina dzień miesiąc dzień_tygodnia')
+
+        values = {}
+        for part, (name, minimum, maximum) in zip(parts, CRON_FIELDS):
+            values[name] = self._parse_field(part, minimum, maximum)
+        if 7 in values['weekday']:
+            values['weekday'] = (values['weekday'] - {7}) | {0}
+
+        self.minutes = sorted(values['minute'])
+        self.hours = sorted(values['hour'])
+        self.days = values['day']
+        self.months = values['month']
+        self.weekdays = values['weekday']
+        # Standardowa semantyka cron: gdy oba pola dnia są ograniczone, wystarczy zgodność jednego z nich
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, minimum, maximum):
+        result = set()
+        for item in field.split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                if not step_text.isdigit() or int(step_text) == 0:
+                    raise CronError(f'Nieprawidłowy krok: {step_text}')
+                step = int(step_text)
+
+            if item == '*':
+                start, end = minimum, maximum
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                if not (start_text.isdigit() and end_text.isdigit()):
+                    raise CronError(f'Nieprawidłowy zakres: {item}')
+                start, end = int(start_text), int(end_text)
+            elif item.isdigit():
+                start = end = int(item)
+                if step != 1:
+                    end = maximum
+            else:
+                raise CronError(f'Nieprawidłowa wartość: {item}')
+
+            if start < minimum or end > maximum or start > end:
+                raise CronError(f'Wartość poza zakresem {minimum}-{maximum}: {item}')
+            result.update(range(start, end + 1, step))
+        return result
+
+    def matches_day(self, moment):
+        if moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment):
+        """Zwraca najbliższy termin (z dokładnością do minuty) późniejszy niż moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Maksymalnie 5 lat naprzód (np. 29 lutego)
+        for _ in range(366 * 5):
+            if self.matches_day(candidate):
+                for hour in self.hours:
+                    if hour < candidate.hour:
+                        continue
+                    for minute in self.minutes:
+                        if hour == candidate.hour and minute < candidate.minute:
+                            continue
+                        return candidate.replace(hour=hour, minute=minute)
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+        raise CronError(f'Wyrażenie cron nigdy się nie wykona: {self.expression}')
+
+
+# ---------------------------------------------------------------------------
+# Rejestr typów zadań
+# ---------------------------------------------------------------------------
+
+JOB_TYPES = {}
+
+
+def register_job_type(name, description=''):
+    """
+    Dekorator rejestrujący typ zadania.
+    Funkcja przyjmuje (parametry, zadanie) i może zwrócić słownik z podsumowaniem.
+    """
+    def decorator(func):
+        JOB_TYPES[name] = {'handler': func, 'description': description}
+        return func
+    return decorator
+
+
+def get_job_types():
+    return [{'name': name, 'description': info['description']} for name, info in sorted(JOB_TYPES.items())]
+
+
+# ---------------------------------------------------------------------------
+# Wykonywanie zadań
+# ---------------------------------------------------------------------------
+
+def compute_next_run(cron, after=None):
+    return CronExpression(cron).next_after(after or datetime.now())
+
+
+def run_job(job):
+    """Wykonuje zadanie i zapisuje jego status (niezależnie od harmonogramu)"""
+    from app.models import ScheduledJob
+
+    job_id = job.Id
+    job_type = JOB_TYPES.get(job.JobType)
+    started = time.monotonic()
+    status, error, summary = 'success', None, None
+    try:
+        if not job_type:
+            raise ValueError(f'Nieznany typ zadania: {job.JobType}')
+        summary = job_type['handler'](job.get_parameters(), job)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        status, error = 'error', f'{e}\n{traceback.format_exc()}'
+
+    job = ScheduledJob.query.get(job_id)
+    now = datetime.now()
+    job.LastRunAt = now
+    job.LastStatus = status
+    job.LastError = error
+    job.LastDurationMs = int((time.monotonic() - started) * 1000)
+    try:
+        job.NextRunAt = compute_next_run(job.Cron, now)
+    except CronError:
+        job.NextRunAt = None
+        job.IsActive = False
+    job.LockedUntil = None
+    db.session.commit()
+    return {'status': status, 'error': error, 'summary': summary}
+
+
+def claim_job(job_id, now, lock_seconds):
+    """Blokuje zadanie dla bieżącego workera; zwraca False, jeśli inny worker już je wykonuje"""
+    from app.models import ScheduledJob
+
+    result = db.session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.Id == job_id)
+        .where(or_(ScheduledJob.LockedUntil.is_(None), ScheduledJob.LockedUntil < now))
+        .values(LockedUntil=now + timedelta(seconds=lock_seconds))
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_due_jobs(app, now=None):
+    """Uruchamia wszystkie zadania, których termin minął; zwraca liczbę wykonanych zadań"""
+    from app.models import ScheduledJob
+
+    now = now or datetime.now()
+    lock_seconds = app.config.get('SCHEDULER_LOCK_SECONDS', 3600)
+    due_ids = [job_id for (job_id,) in db.session.query(ScheduledJob.Id).filter(
+        ScheduledJob.IsActive.is_(True),
+        ScheduledJob.NextRunAt.isnot(None),
+        ScheduledJob.NextRunAt <= now
+    ).order_by(ScheduledJob.NextRunAt).all()]
+
+    executed = 0
+    for job_id in due_ids:
+        if not claim_job(job_id, now, lock_seconds):
+            continue
+        run_job(ScheduledJob.query.get(job_id))
+        executed += 1
+    return executed
+
+
+def scheduler_loop(app, stop_event=None):
+    """Pętla workera - sprawdza zadania co SCHEDULER_POLL_SECONDS sekund"""
+    poll_seconds = app.config.get('SCHEDULER_POLL_SECONDS', 60)
+    while not (stop_event and stop_event.is_set()):
+        with app.app_context():
+            try:
+                run_due_jobs(app)
+            except Exception as e:
+                print(f"⚠️  Błąd harmonogramu zadań: {e}")
+            finally:
+                db.session.remove()
+        if stop_event:
+            stop_event.wait(poll_seconds)
+        else:
+            time.sleep(poll_seconds)
+
+
+def start_scheduler_thread(app):
+    """Uruchamia harmonogram w wątku tła procesu aplikacji"""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=scheduler_loop, args=(app, stop_event),
+                              name='crm-scheduler', daemon=True)
+    thread.start()
+    app.extensions['scheduler'] = {'thread': thread, 'stop_event': stop_event}
+    return thread
+
+
+def init_scheduler(app):
+    """Rejestruje komendy CLI i opcjonalnie uruchamia wątek harmonogramu"""
+
+    @app.cli.group('scheduler')
+    def scheduler_cli():
+        """Harmonogram zadań w tle"""
+
+    @scheduler_cli.command('run')
+    def run_command():
+        """Uruchamia worker harmonogramu (tryb sidecar)"""
+        click.echo('Harmonogram zadań uruchomiony')
+        scheduler_loop(app)
+
+    @scheduler_cli.command('run-once')
+    def run_once_command():
+        """Wykonuje jednorazowo zadania, których termin minął"""
+        executed = run_due_jobs(app)
+        click.echo(f'Wykonano zadań: {executed}')
+
+    if app.config.get('SCHEDULER_ENABLED'):
+        start_scheduler_thread(app)
@@ -0,0 +1,327 @@
+"""
+Analityka zadań dla panelu administratora.
+
+Lista zadań jest filtrowana (użytkownik, grupa, status, okno terminów) i stronicowana kursorem
+(DueDate, Id) po indeksach (UserId|AssignedGroupId, Completed, DueDate), więc kolejne strony
+nie wymagają sortowania całej tabeli.
+
+Podsumowania obciążenia (liczba wszystkich i otwartych zadań na użytkownika i grupę) są czytane
+z tabeli TaskAggregates zamiast GROUP BY po całej tabeli Tasks. Agregaty są aktualizowane
+przyrostowo w tej samej transakcji co zapis zadania (zdarzenia mapperów; operacje zbiorcze
+wołają adjust_task_aggregates jawnie). Tabela jest budowana jednym INSERT ... SELECT przy
+pierwszym odczycie, a zadanie `rebuild_task_aggregates` koryguje ewentualne rozbieżności.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, case, delete, event, false, func, insert, literal, or_, select, true, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm.attributes import get_history
+
+from app.database import db
+from app.models import Customer, Setting, Task, TaskAggregate, User
+from app.scheduler import register_job_type
+
+BUILT_SETTING_KEY = 'TaskAggregatesBuiltAt'
+TASK_STATUSES = ('pending', 'completed', 'overdue')
+SCOPES = {'user': Task.UserId, 'group': Task.AssignedGroupId}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Agregaty zbudowane - po zbudowaniu znacznik nie jest usuwany, więc można go zapamiętać w procesie
+_built = False
+
+
+class TaskQueryError(ValueError):
+    """Nieprawidłowy filtr lub kursor listy zadań"""
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', ''))
+    except ValueError:
+        raise TaskQueryError(f'Nieprawidłowa data w parametrze {name}')
+
+
+def _parse_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise TaskQueryError(f'Parametr {name} musi być liczbą całkowitą')
+
+
+# --- Lista zadań -------------------------------------------------------------
+
+def task_conditions(args, now=None):
+    """Warunki WHERE z parametrów userId, groupId, status, dueFrom, dueTo"""
+    conditions = []
+    if args.get('userId'):
+        conditions.append(Task.UserId == _parse_int(args['userId'], 'userId'))
+    if args.get('groupId'):
+        conditions.append(Task.AssignedGroupId == _parse_int(args['groupId'], 'groupId'))
+
+    status = args.get('status')
+    if status:
+        if status not in TASK_STATUSES:
+            raise TaskQueryError(f"Nieznany status. Dozwolone: {', '.join(TASK_STATUSES)}")
+        # Równość zamiast IS NOT TRUE - zgodnie z indeksami (…, Completed, DueDate)
+        if status == 'completed':
+            conditions.append(Task.Completed == true())
+        else:
+            conditions.append(Task.Completed == false())
+        if status == 'overdue':
+            conditions.append(Task.DueDate < (now or datetime.now()))
+    if args.get('dueFrom'):
+        conditions.append(Task.DueDate >= _parse_date(args['dueFrom'], 'dueFrom'))
+    if args.get('dueTo'):
+        conditions.append(Task.DueDate < _parse_date(args['dueTo'], 'dueTo'))
+    return conditions
+
+
+def encode_cursor(due_date, task_id):
+    return f"{due_date.isoformat() if due_date else ''}_{task_id}"
+
+
+def parse_cursor(value):
+    """Kursor '<DueDate ISO lub pusty>_<Id>' -> (datetime lub None, id)"""
+    try:
+        due_date, task_id = value.rsplit('_', 1)
+        return (datetime.fromisoformat(due_date) if due_date else None), int(task_id)
+    except (AttributeError, ValueError):
+        raise TaskQueryError('Nieprawidłowy kursor stronicowania')
+
+
+def _after_cursor(cursor):
+    # Kolejność (DueDate, Id) rosnąco - zadania bez terminu są pierwsze (jak w MySQL i SQLite)
+    due_date, task_id = parse_cursor(cursor)
+    if due_date is None:
+        return or_(and_(Task.DueDate.is_(None), Task.Id > task_id), Task.DueDate.isnot(None))
+    return or_(Task.DueDate > due_date, and_(Task.DueDate == due_date, Task.Id > task_id))
+
+
+def task_page(args, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Strona zadań z nazwą użytkownika i klienta; zwraca (lista słowników, kursor następnej strony)"""
+    query = select(Task.Id, Task.Title, Task.Description, Task.DueDate, Task.Completed, Task.UserId,
+                   Task.AssignedGroupId, User.username, Customer.Name) \
+        .outerjoin(User, User.id == Task.UserId) \
+        .outerjoin(Customer, Customer.Id == Task.CustomerId) \
+        .where(*task_conditions(args))
+    if cursor:
+        query = query.where(_after_cursor(cursor))
+
+    rows = db.session.execute(query.order_by(Task.DueDate, Task.Id).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].DueDate, rows[-1].Id) if has_more else None
+
+    items = [{
+        'id': row.Id,
+        'title': row.Title,
+        'description': row.Description,
+        'dueDate': row.DueDate.isoformat() if row.DueDate else None,
+        'completed': bool(row.Completed),
+        'userId': row.UserId,
+        'assignedGroupId': row.AssignedGroupId,
+        'user': {'username': row.username or 'Unknown'},
+        'customer': {'name': row.Name} if row.Name else None,
+    } for row in rows]
+    return items, next_cursor
+
+
+# --- Agregaty ----------------------------------------------------------------
+
+def is_built(connection=None):
+    global _built
+    if not _built:
+        connection = connection or db.session.connection()
+        _built = connection.execute(
+            select(Setting.Id).where(Setting.Key == BUILT_SETTING_KEY)
+        ).first() is not None
+    return _built
+
+
+def _upsert(connection, scope_type, scope_id, total, pending):
+    table = TaskAggregate.__table__
+    now = datetime.utcnow()
+    dialect = connection.dialect.name
+    values = {'ScopeType': scope_type, 'ScopeId': scope_id, 'TotalTasks': total,
+              'PendingTasks': pending, 'UpdatedAt': now}
+    increments = {'TotalTasks': table.c.TotalTasks + total, 'PendingTasks': table.c.PendingTasks + pending,
+                  'UpdatedAt': now}
+
+    if dialect == 'mysql':
+        statement = mysql.insert(table).values(values)
+        connection.execute(statement.on_duplicate_key_update(**increments))
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(table).values(values)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['ScopeType', 'ScopeId'], set_=increments))
+    else:
+        updated = connection.execute(update(table).where(
+            table.c.ScopeType == scope_type, table.c.ScopeId == scope_id).values(increments)).rowcount
+        if not updated:
+            connection.execute(insert(table).values(values))
+
+
+def adjust_task_aggregates(connection, deltas):
+    """
+    Zmienia agregaty o delty {(typ, id): [wszystkie, otwarte]} - jedno UPSERT na klucz.
+    Przed zbudowaniem agregatów nic nie robi (budowa policzy wszystko od zera).
+    """
+    deltas = {key: value for key, value in deltas.items() if key[1] is not None and any(value)}
+    if not deltas or not is_built(connection):
+        return
+    for (scope_type, scope_id), (total, pending) in sorted(deltas.items()):
+        _upsert(connection, scope_type, scope_id, total, pending)
+
+
+def task_deltas(rows, total_sign, pending_of=lambda row: not row.Completed):
+    """
+    Delty agregatów dla wierszy zadań (atrybuty UserId, AssignedGroupId, Completed):
+    total_sign=+1/-1 dla dodania/usunięcia; pending_of - czy zadanie liczy się jako otwarte.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for row in rows:
+        pending = total_sign * int(bool(pending_of(row)))
+        for scope_type, scope_id in (('user', row.UserId), ('group', row.AssignedGroupId)):
+            deltas[(scope_type, scope_id)][0] += total_sign
+            deltas[(scope_type, scope_id)][1] += pending
+    return deltas
+
+
+class TaskState:
+    """Wartości kolumn zadania przed lub po zmianie"""
+
+    def __init__(self, user_id, group_id, completed):
+        self.UserId, self.AssignedGroupId, self.Completed = user_id, group_id, completed
+
+
+def _previous_state(target):
+    values = []
+    for attribute in ('UserId', 'AssignedGroupId', 'Completed'):
+        history = get_history(target, attribute)
+        values.append(history.deleted[0] if history.deleted else getattr(target, attribute))
+    return TaskState(*values)
+
+
+def _current_state(target):
+    return TaskState(target.UserId, target.AssignedGroupId, target.Completed)
+
+
+def merge_deltas(*delta_sets):
+    """Suma delt agregatów"""
+    merged = defaultdict(lambda: [0, 0])
+    for deltas in delta_sets:
+        for key, (total, pending) in deltas.items():
+            merged[key][0] += total
+            merged[key][1] += pending
+    return merged
+
+
+def _after_insert(mapper, connection, target):
+    adjust_task_aggregates(connection, task_deltas([_current_state(target)], 1))
+
+
+def _after_update(mapper, connection, target):
+    old, new = _previous_state(target), _current_state(target)
+    if (old.UserId, old.AssignedGroupId, bool(old.Completed)) == (new.UserId, new.AssignedGroupId, bool(new.Completed)):
+        return
+    adjust_task_aggregates(connection, merge_deltas(task_deltas([old], -1), task_deltas([new], 1)))
+
+
+def _after_delete(mapper, connection, target):
+    adjust_task_aggregates(connection, task_deltas([_previous_state(target)], -1))
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Poprzednia wartość jest potrzebna do delty także wtedy, gdy obiekt był wygaszony po commit
+for _attribute in (Task.UserId, Task.AssignedGroupId, Task.Completed):
+    event.listen(_attribute, 'set', _load_previous_value, active_history=True)
+
+event.listen(Task, 'after_insert', _after_insert)
+event.listen(Task, 'after_update', _after_update)
+event.listen(Task, 'after_delete', _after_delete)
+
+
+def rebuild_task_aggregates():
+    """Buduje agregaty od zera (INSERT ... SELECT z GROUP BY); zwraca liczbę wierszy agregatów"""
+    global _built
+    table = TaskAggregate.__table__
+    now = datetime.utcnow()
+    pending = func.sum(case((Task.Completed == true(), 0), else_=1))
+
+    db.session.execute(delete(table))
+    for scope_type, column in SCOPES.items():
+        source = select(literal(scope_type), column, func.count(Task.Id), pending, literal(now)) \
+            .where(column.isnot(None)).group_by(column)
+        db.session.execute(table.insert().from_select(
+            ['ScopeType', 'ScopeId', 'TotalTasks', 'PendingTasks', 'UpdatedAt'], source))
+
+    setting = Setting.query.filter_by(Key=BUILT_SETTING_KEY).first()
+    if not setting:
+        setting = Setting(Key=BUILT_SETTING_KEY)
+        db.session.add(setting)
+    setting.Value = now.isoformat()
+    db.session.commit()
+    _built = True
+    return db.session.query(func.count()).select_from(table).scalar()
+
+
+def ensure_task_aggregates():
+    if not is_built():
+        rebuild_task_aggregates()
+
+
+def workload(scope_type, limit=DEFAULT_PAGE_SIZE, offset=0, now=None):
+    """
+    Obciążenie użytkowników lub grup z agregatów (najwięcej otwartych zadań pierwsze).
+    Liczba zadań po terminie jest liczona tylko dla pozycji strony, po indeksie (…, Completed, DueDate).
+    """
+    ensure_task_aggregates()
+    column = SCOPES[scope_type]
+    if scope_type == 'user':
+        name_model, name_column, key_column = User, User.username, User.id
+    else:
+        from app.models import Group
+        name_model, name_column, key_column = Group, Group.Name, Group.Id
+
+    rows = db.session.execute(
+        select(TaskAggregate, name_column)
+        .outerjoin(name_model, key_column == TaskAggregate.ScopeId)
+        .where(TaskAggregate.ScopeType == scope_type)
+        .order_by(TaskAggregate.PendingTasks.desc(), TaskAggregate.ScopeId)
+        .limit(limit).offset(offset)
+    ).all()
+
+    scope_ids = [aggregate.ScopeId for aggregate, _ in rows]
+    overdue = dict(db.session.execute(
+        select(column, func.count(Task.Id))
+        .where(column.in_(scope_ids), Task.Completed == false(), Task.DueDate < (now or datetime.now()))
+        .group_by(column)
+    ).all()) if scope_ids else {}
+
+    return [{
+        f'{scope_type}Id': aggregate.ScopeId,
+        'name': name,
+        **aggregate.to_dict(),
+        'overdueTasks': overdue.get(aggregate.ScopeId, 0),
+    } for aggregate, name in rows]
+
+
+def task_totals():
+    """Liczba wszystkich i otwartych zadań - suma agregatów użytkowników"""
+    ensure_task_aggregates()
+    total, pending = db.session.query(
+        func.coalesce(func.sum(TaskAggregate.TotalTasks), 0),
+        func.coalesce(func.sum(TaskAggregate.PendingTasks), 0)
+    ).filter(TaskAggregate.ScopeType == 'user').one()
+    return int(total), int(pending)
+
+
+@register_job_type('rebuild_task_aggregates', 'Przebudowa agregatów zadań (obciążenie użytkowników i grup)')
+def rebuild_task_aggregates_job(params, job):
+    return {'rows': rebuild_task_aggregates()}
@@ -0,0 +1,126 @@
+"""
+Widoczność wierszy według członkostwa w grupach (klienci, faktury, kontrakty, spotkania).
+
+- Administrator widzi wszystkie wiersze.
+- Pozostali użytkownicy widzą wiersze przypisane do swoich grup (UserGroups) oraz wiersze
+  bez przypisanej grupy (wspólna pula).
+- Warunek jest dokładany do zapytań list w SQL (scope w run_list_query), więc baza czyta
+  i zwraca tylko wycinek użytkownika - po indeksach (AssignedGroupId/ResponsibleGroupId, ...).
+  Zapytania tekstowe (eksporty, raporty tagów) używają visibility_sql() z visibility_params().
+- Grupy użytkownika są wyznaczane raz na żądanie (request.environ), a między żądaniami trzymane
+  w pamięci procesu z wersjami tabel users, Roles i UserGroups (TableVersions) - zmiana
+  członkostwa lub roli unieważnia wpis także w innych procesach.
+"""
+import threading
+from collections import OrderedDict
+
+from flask import has_request_context, request
+from sqlalchemy import false, or_, select
+
+from app.database import db
+from app.http_cache import get_table_versions
+from app.middleware import get_current_user_id
+from app.models import Contract, Customer, Invoice, Meeting, Role, User
+from app.models.group import user_groups
+
+# Kolumna grupy decydująca o widoczności wierszy modelu
+GROUP_COLUMNS = {
+    Customer: Customer.AssignedGroupId,
+    Invoice: Invoice.AssignedGroupId,
+    Contract: Contract.ResponsibleGroupId,
+    Meeting: Meeting.AssignedGroupId,
+}
+
+# Tabele, od których zależy wynik resolve_group_ids
+VISIBILITY_TABLES = ('Roles', 'UserGroups', 'users')
+
+CACHE_SIZE = 1024
+ENVIRON_KEY = 'crm.visible_group_ids'
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _load(user_id):
+    """Zwraca None dla administratora, w przeciwnym razie krotkę Id grup użytkownika"""
+    role_name = db.session.execute(
+        select(Role.name).select_from(User).join(Role, Role.id == User.role_id).where(User.id == user_id)
+    ).scalar()
+    if role_name == 'Admin':
+        return None
+    return tuple(sorted(db.session.execute(
+        select(user_groups.c.GroupId).where(user_groups.c.UserId == user_id)
+    ).scalars()))
+
+
+def resolve_group_ids(user_id):
+    """Grupy widoczne dla użytkownika (None - bez ograniczeń), z pamięci procesu, jeśli aktualna"""
+    versions = tuple(get_table_versions(VISIBILITY_TABLES))
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry and entry[0] == versions:
+            _cache.move_to_end(user_id)
+            return entry[1]
+
+    group_ids = _load(user_id)
+    with _lock:
+        _cache[user_id] = (versions, group_ids)
+        _cache.move_to_end(user_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return group_ids
+
+
+def current_group_ids():
+    """Grupy zalogowanego użytkownika - wyznaczane raz na żądanie (także częściowe żądanie /api/batch)"""
+    user_id = get_current_user_id()
+    cached = request.environ.get(ENVIRON_KEY)
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+    group_ids = resolve_group_ids(user_id) if user_id else ()
+    request.environ[ENVIRON_KEY] = (user_id, group_ids)
+    return group_ids
+
+
+def visibility_scope(model, group_ids=False):
+    """
+    Warunek WHERE widoczności wierszy modelu dla bieżącego użytkownika
+    (None - administrator, bez warunku). group_ids pozwala podać grupy jawnie.
+    """
+    if group_ids is False:
+        group_ids = current_group_ids()
+    if group_ids is None:
+        return None
+    column = GROUP_COLUMNS[model]
+    return or_(column.in_(group_ids) if group_ids else false(), column.is_(None))
+
+
+def is_visible(obj):
+    """Czy pojedynczy wiersz jest widoczny dla bieżącego użytkownika"""
+    group_ids = current_group_ids()
+    if group_ids is None:
+        return True
+    group_id = getattr(obj, GROUP_COLUMNS[type(obj)].key)
+    return group_id is None or group_id in group_ids
+
+
+def is_group_visible(group_id):
+    """Czy dane grupy (szczegóły, przypisani klienci, statystyki) są widoczne dla bieżącego użytkownika"""
+    group_ids = current_group_ids()
+    return group_ids is None or group_id in group_ids
+
+
+def visibility_sql(column):
+    """
+    Warunek widoczności dla zapytań tekstowych (column - wyrażenie SQL kolumny grupy, np. c.AssignedGroupId).
+    Wymaga parametrów z visibility_params(); grupy są czytane z UserGroups w tym samym zapytaniu.
+    """
+    return (f'(:visible_all = 1 OR {column} IS NULL OR {column} IN '
+            f'(SELECT vug.GroupId FROM UserGroups vug WHERE vug.UserId = :visible_user_id))')
+
+
+def visibility_params():
+    """Parametry visibility_sql() dla bieżącego użytkownika (poza żądaniem, np. w harmonogramie - bez ograniczeń)"""
+    if not has_request_context() or current_group_ids() is None:
+        return {'visible_all': 1, 'visible_user_id': 0}
+    return {'visible_all': 0, 'visible_user_id': int(get_current_user_id() or 0)}
@@ -10,6 +10,13 @@ USE crm_project;
 -- 1. WIDOKI (VIEWS) - minimum 2-3 widoki
 -- ============================================
 
+-- Widoki i procedura sp_generate_sales_report są źródłem danych backendu raportów bazodanowego
+-- (app/reporting.py). Sumy są liczone podzapytaniami skorelowanymi zamiast złączeń z GROUP BY:
+-- złączenie kilku tabel podrzędnych mnożyło kwoty faktur przez liczbę kontraktów i zadań, a widok
+-- z GROUP BY jest materializowany w całości przed warunkiem WHERE zapytania (widok bez GROUP BY
+-- jest scalany z zapytaniem i filtrowany po indeksach). Klienci i użytkownicy usunięci (DeletedAt)
+-- są pomijani jak w zapytaniach aplikacji.
+
 -- Widok 1: Klienci z podsumowaniem faktur
 CREATE OR REPLACE VIEW v_customer_invoice_summary AS
 SELECT 
@@ -17,19 +24,17 @@ SELECT
     c.Name AS CustomerName,
     c.Email AS CustomerEmail,
     c.Company AS CustomerCompany,
-    COUNT(DISTINCT i.Id) AS TotalInvoices,
-    COALESCE(SUM(i.TotalAmount), 0) AS TotalInvoiceValue,
-    COALESCE(SUM(CASE WHEN i.IsPaid = 1 THEN i.TotalAmount ELSE 0 END), 0) AS PaidInvoiceValue,
-    COALESCE(SUM(CASE WHEN i.IsPaid = 0 THEN i.TotalAmount ELSE 0 END), 0) AS UnpaidInvoiceValue,
-    COUNT(DISTINCT CASE WHEN i.IsPaid = 1 THEN i.Id ELSE NULL END) AS PaidInvoicesCount,
-    COUNT(DISTINCT CASE WHEN i.IsPaid = 0 THEN i.Id ELSE NULL END) AS UnpaidInvoicesCount,
-    COUNT(DISTINCT ct.Id) AS TotalContracts,
-    COUNT(DISTINCT t.Id) AS TotalTasks
+    c.AssignedGroupId AS CustomerGroupId,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.CustomerId = c.Id) AS TotalInvoices,
+    (SELECT COALESCE(SUM(i.TotalAmount), 0) FROM Invoices i WHERE i.CustomerId = c.Id) AS TotalInvoiceValue,
+    (SELECT COALESCE(SUM(i.TotalAmount), 0) FROM Invoices i WHERE i.CustomerId = c.Id AND i.IsPaid = 1) AS PaidInvoiceValue,
+    (SELECT COALESCE(SUM(i.TotalAmount), 0) FROM Invoices i WHERE i.CustomerId = c.Id AND i.IsPaid = 0) AS UnpaidInvoiceValue,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.CustomerId = c.Id AND i.IsPaid = 1) AS PaidInvoicesCount,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.CustomerId = c.Id AND i.IsPaid = 0) AS UnpaidInvoicesCount,
+    (SELECT COUNT(*) FROM Contracts ct WHERE ct.CustomerId = c.Id) AS TotalContracts,
+    (SELECT COUNT(*) FROM Tasks t WHERE t.CustomerId = c.Id) AS TotalTasks
 FROM Customers c
-LEFT JOIN Invoices i ON c.Id = i.CustomerId
-LEFT JOIN Contracts ct ON c.Id = ct.CustomerId
-LEFT JOIN Tasks t ON c.Id = t.CustomerId
-GROUP BY c.Id, c.Name, c.Email, c.Company;
+WHERE c.DeletedAt IS NULL;
 
 -- Widok 2: Faktury z pełnymi danymi klienta i płatnościami
 CREATE OR REPLACE VIEW v_invoice_details AS
@@ -47,9 +52,9 @@ SELECT
     c.Email AS CustomerEmail,
     c.Company AS CustomerCompany,
     c.Phone AS CustomerPhone,
-    COALESCE(SUM(p.Amount), 0) AS PaidAmount,
-    (i.TotalAmount - COALESCE(SUM(p.Amount), 0)) AS RemainingAmount,
-    COUNT(DISTINCT p.Id) AS PaymentsCount,
+    (SELECT COALESCE(SUM(p.Amount), 0) FROM Payments p WHERE p.InvoiceId = i.Id) AS PaidAmount,
+    (i.TotalAmount - (SELECT COALESCE(SUM(p.Amount), 0) FROM Payments p WHERE p.InvoiceId = i.Id)) AS RemainingAmount,
+    (SELECT COUNT(*) FROM Payments p WHERE p.InvoiceId = i.Id) AS PaymentsCount,
     CASE 
         WHEN i.DueDate < CURDATE() AND i.IsPaid = 0 THEN 'Overdue'
         WHEN i.IsPaid = 1 THEN 'Paid'
@@ -57,35 +62,27 @@ SELECT
     END AS PaymentStatus
 FROM Invoices i
 INNER JOIN Customers c ON i.CustomerId = c.Id
-LEFT JOIN Payments p ON i.Id = p.InvoiceId
-GROUP BY i.Id, i.Number, i.IssuedAt, i.DueDate, i.TotalAmount, i.IsPaid, 
-         i.CreatedByUserId, i.AssignedGroupId, c.Id, c.Name, c.Email, c.Company, c.Phone;
+WHERE c.DeletedAt IS NULL;
 
--- Widok 3: Statystyki grup z podsumowaniem
+-- Widok 3: Statystyki grup z podsumowaniem (GROUPS jest słowem zastrzeżonym od MySQL 8.0.2)
 CREATE OR REPLACE VIEW v_group_statistics AS
 SELECT 
     g.Id AS GroupId,
     g.Name AS GroupName,
     g.Description AS GroupDescription,
-    COUNT(DISTINCT ug.UserId) AS TotalMembers,
-    COUNT(DISTINCT c.Id) AS TotalCustomers,
-    COUNT(DISTINCT i.Id) AS TotalInvoices,
-    COALESCE(SUM(i.TotalAmount), 0) AS TotalInvoiceValue,
-    COUNT(DISTINCT CASE WHEN i.IsPaid = 1 THEN i.Id ELSE NULL END) AS PaidInvoicesCount,
-    COUNT(DISTINCT CASE WHEN i.IsPaid = 0 THEN i.Id ELSE NULL END) AS UnpaidInvoicesCount,
-    COUNT(DISTINCT ct.Id) AS TotalContracts,
-    COUNT(DISTINCT t.Id) AS TotalTasks,
-    COUNT(DISTINCT CASE WHEN t.Completed = 1 THEN t.Id ELSE NULL END) AS CompletedTasksCount,
-    COUNT(DISTINCT CASE WHEN t.Completed = 0 THEN t.Id ELSE NULL END) AS PendingTasksCount,
-    COUNT(DISTINCT m.Id) AS TotalMeetings
-FROM Groups g
-LEFT JOIN UserGroups ug ON g.Id = ug.GroupId
-LEFT JOIN Customers c ON g.Id = c.AssignedGroupId
-LEFT JOIN Invoices i ON g.Id = i.AssignedGroupId
-LEFT JOIN Contracts ct ON g.Id = ct.ResponsibleGroupId
-LEFT JOIN Tasks t ON g.Id = t.AssignedGroupId
-LEFT JOIN Meetings m ON g.Id = m.AssignedGroupId
-GROUP BY g.Id, g.Name, g.Description;
+    (SELECT COUNT(*) FROM UserGroups ug INNER JOIN users u ON u.id = ug.UserId
+     WHERE ug.GroupId = g.Id AND u.DeletedAt IS NULL) AS TotalMembers,
+    (SELECT COUNT(*) FROM Customers c WHERE c.AssignedGroupId = g.Id AND c.DeletedAt IS NULL) AS TotalCustomers,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.AssignedGroupId = g.Id) AS TotalInvoices,
+    (SELECT COALESCE(SUM(i.TotalAmount), 0) FROM Invoices i WHERE i.AssignedGroupId = g.Id) AS TotalInvoiceValue,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.AssignedGroupId = g.Id AND i.IsPaid = 1) AS PaidInvoicesCount,
+    (SELECT COUNT(*) FROM Invoices i WHERE i.AssignedGroupId = g.Id AND i.IsPaid = 0) AS UnpaidInvoicesCount,
+    (SELECT COUNT(*) FROM Contracts ct WHERE ct.ResponsibleGroupId = g.Id) AS TotalContracts,
+    (SELECT COUNT(*) FROM Tasks t WHERE t.AssignedGroupId = g.Id) AS TotalTasks,
+    (SELECT COUNT(*) FROM Tasks t WHERE t.AssignedGroupId = g.Id AND t.Completed = 1) AS CompletedTasksCount,
+    (SELECT COUNT(*) FROM Tasks t WHERE t.AssignedGroupId = g.Id AND t.Completed = 0) AS PendingTasksCount,
+    (SELECT COUNT(*) FROM Meetings m WHERE m.AssignedGroupId = g.Id) AS TotalMeetings
+FROM `Groups` g;
 
 -- ============================================
 -- 2. PROCEDURY SKŁADOWANE (STORED PROCEDURES) - minimum 2-3 procedury
@@ -94,6 +91,7 @@ GROUP BY g.Id, g.Name, g.Description;
 DELIMITER //
 
 -- Procedura 1: Tworzenie faktury z automatycznym przeliczeniem kwot
+DROP PROCEDURE IF EXISTS sp_create_invoice //
 CREATE PROCEDURE sp_create_invoice(
     IN p_invoice_number VARCHAR(100),
     IN p_customer_id INT,
@@ -128,6 +126,7 @@ BEGIN
 END //
 
 -- Procedura 2: Aktualizacja statusu płatności faktury
+DROP PROCEDURE IF EXISTS sp_update_invoice_payment_status //
 CREATE PROCEDURE sp_update_invoice_payment_status(
     IN p_invoice_id INT
 )
@@ -162,12 +161,14 @@ BEGIN
 END //
 
 -- Procedura 3: Generowanie raportu sprzedażowego dla okresu
+DROP PROCEDURE IF EXISTS sp_generate_sales_report //
 CREATE PROCEDURE sp_generate_sales_report(
     IN p_date_from DATE,
     IN p_date_to DATE,
     IN p_group_id INT
 )
 BEGIN
+    -- Zakres dat obejmuje cały dzień p_date_to (BETWEEN na DATETIME kończył się o północy)
     SELECT 
         i.Id AS InvoiceId,
         i.Number AS InvoiceNumber,
@@ -177,16 +178,16 @@ BEGIN
         c.Name AS CustomerName,
         c.Company AS CustomerCompany,
         g.Name AS GroupName,
-        COALESCE(SUM(p.Amount), 0) AS PaidAmount,
-        (i.TotalAmount - COALESCE(SUM(p.Amount), 0)) AS RemainingAmount
+        (SELECT COALESCE(SUM(p.Amount), 0) FROM Payments p WHERE p.InvoiceId = i.Id) AS PaidAmount,
+        (i.TotalAmount - (SELECT COALESCE(SUM(p.Amount), 0) FROM Payments p WHERE p.InvoiceId = i.Id)) AS RemainingAmount
     FROM Invoices i
     INNER JOIN Customers c ON i.CustomerId = c.Id
-    LEFT JOIN Groups g ON i.AssignedGroupId = g.Id
-    LEFT JOIN Payments p ON i.Id = p.InvoiceId
-    WHERE i.IssuedAt BETWEEN p_date_from AND p_date_to
+    LEFT JOIN `Groups` g ON i.AssignedGroupId = g.Id
+    WHERE i.IssuedAt >= p_date_from
+      AND i.IssuedAt < p_date_to + INTERVAL 1 DAY
       AND (p_group_id IS NULL OR i.AssignedGroupId = p_group_id)
-    GROUP BY i.Id, i.Number, i.IssuedAt, i.TotalAmount, i.IsPaid, c.Name, c.Company, g.Name
-    ORDER BY i.IssuedAt DESC;
+      AND c.DeletedAt IS NULL
+    ORDER BY i.IssuedAt DESC, i.Id DESC;
 END //
 
 DELIMITER ;
@@ -198,6 +199,7 @@ DELIMITER ;
 DELIMITER //
 
 -- Funkcja 1: Obliczanie sumy faktury z podatkami
+DROP FUNCTION IF EXISTS fn_calculate_invoice_total //
 CREATE FUNCTION fn_calculate_invoice_total(
     p_net_amount DECIMAL(65, 30),
     p_tax_rate DECIMAL(5, 2)
@@ -212,6 +214,7 @@ BEGIN
 END //
 
 -- Funkcja 2: Formatowanie daty w stylu polskim
+DROP FUNCTION IF EXISTS fn_format_date_polish //
 CREATE FUNCTION fn_format_date_polish(
     p_date DATETIME
 )
@@ -226,6 +229,7 @@ BEGIN
 END //
 
 -- Funkcja 3: Sprawdzanie czy faktura jest przeterminowana
+DROP FUNCTION IF EXISTS fn_is_invoice_overdue //
 CREATE FUNCTION fn_is_invoice_overdue(
     p_invoice_id INT
 )
@@ -253,53 +257,11 @@ DELIMITER ;
 -- 4. INDEKSY (INDEXES) - na kluczowych kolumnach
 -- ============================================
 
--- Indeksy dla tabeli Customers
-CREATE INDEX idx_customers_email ON Customers(Email);
-CREATE INDEX idx_customers_company ON Customers(Company);
-CREATE INDEX idx_customers_created_at ON Customers(CreatedAt);
-CREATE INDEX idx_customers_assigned_group ON Customers(AssignedGroupId);
-CREATE INDEX idx_customers_assigned_user ON Customers(AssignedUserId);
-
--- Indeksy dla tabeli Invoices
-CREATE INDEX idx_invoices_customer_id ON Invoices(CustomerId);
-CREATE INDEX idx_invoices_issued_at ON Invoices(IssuedAt);
-CREATE INDEX idx_invoices_due_date ON Invoices(DueDate);
-CREATE INDEX idx_invoices_is_paid ON Invoices(IsPaid);
-CREATE INDEX idx_invoices_assigned_group ON Invoices(AssignedGroupId);
-CREATE INDEX idx_invoices_number ON Invoices(Number);
-
--- Indeksy dla tabeli Payments
-CREATE INDEX idx_payments_invoice_id ON Payments(InvoiceId);
-CREATE INDEX idx_payments_paid_at ON Payments(PaidAt);
-
--- Indeksy dla tabeli Contracts
-CREATE INDEX idx_contracts_customer_id ON Contracts(CustomerId);
-CREATE INDEX idx_contracts_signed_at ON Contracts(SignedAt);
-CREATE INDEX idx_contracts_start_date ON Contracts(StartDate);
-CREATE INDEX idx_contracts_end_date ON Contracts(EndDate);
-CREATE INDEX idx_contracts_responsible_group ON Contracts(ResponsibleGroupId);
-
--- Indeksy dla tabeli Tasks
-CREATE INDEX idx_tasks_user_id ON Tasks(UserId);
-CREATE INDEX idx_tasks_customer_id ON Tasks(CustomerId);
-CREATE INDEX idx_tasks_due_date ON Tasks(DueDate);
-CREATE INDEX idx_tasks_completed ON Tasks(Completed);
-CREATE INDEX idx_tasks_assigned_group ON Tasks(AssignedGroupId);
-
--- Indeksy dla tabeli Meetings
-CREATE INDEX idx_meetings_scheduled_at ON Meetings(ScheduledAt);
-CREATE INDEX idx_meetings_assigned_group ON Meetings(AssignedGroupId);
-
--- Indeksy dla tabeli Users
-CREATE INDEX idx_users_role_id ON users(role_id);
-
--- Indeksy dla tabeli LoginHistory
-CREATE INDEX idx_login_history_user_id ON LoginHistory(UserId);
-CREATE INDEX idx_login_history_login_time ON LoginHistory(LoginTime);
-
--- Indeksy dla tabeli SystemLogs
-CREATE INDEX idx_system_logs_timestamp ON SystemLogs(Timestamp);
-CREATE INDEX idx_system_logs_level ON SystemLogs(Level);
+-- Indeksy są zadeklarowane w modelach (app/models, __table_args__) i tworzone przez aplikację
+-- przy starcie (db.create_all / apply_schema_updates) na każdej bazie, także SQLite.
+-- Brakujące indeksy: flask --app app:create_app indexes missing
+-- Utworzenie brakujących: flask --app app:create_app indexes create
+-- Indeksy idx_* utworzone wcześniej tym skryptem są rozpoznawane po kolumnach i nie są duplikowane.
 
 -- ============================================
 -- KONIEC SKRYPTU
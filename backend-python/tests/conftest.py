@@ -9,6 +9,10 @@ from datetime import datetime, timedelta
 # Dodaj główny katalog do ścieżki
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Wątki harmonogramu przypomnień nie działają w tle testów (testy wywołują tick bezpośrednio)
+os.environ.setdefault('REMINDER_SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('REMINDER_RELAY_SECONDS', '0')
+
 from app import create_app
 from app.database import db
 from app.models import User, Role, Customer, Group, Invoice, Service
@@ -32,6 +36,7 @@ def app():
     test_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     test_app.config['WTF_CSRF_ENABLED'] = False
+    test_app.config['DELETION_RUN_ASYNC'] = False
 
     with test_app.app_context():
         db.create_all()
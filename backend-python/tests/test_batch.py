@@ -0,0 +1,71 @@
+"""
+Testy żądań zbiorczych (/api/batch)
+"""
+import json
+
+
+def post_batch(client, headers, payload):
+    return client.post('/api/batch', headers=headers, data=json.dumps(payload))
+
+
+class TestBatchEndpoint:
+    """Testy endpointu /api/batch"""
+
+    def test_batch_sequential(self, client, auth_headers_user):
+        """Test wykonania kilku żądań ze wspólną autoryzacją"""
+        response = post_batch(client, auth_headers_user, {'requests': [
+            {'id': 'counters', 'method': 'GET', 'path': '/api/me/counters'},
+            {'id': 'reminders', 'path': '/api/Reminders/?pending=true'},
+            {'id': 'missing', 'path': '/api/Reminders/999999'},
+        ]})
+
+        assert response.status_code == 200
+        responses = {item['id']: item for item in json.loads(response.data)['responses']}
+        assert responses['counters']['status'] == 200
+        assert 'pendingTasks' in responses['counters']['body']
+        assert 'ETag' in responses['counters']['headers']
+        assert isinstance(responses['reminders']['body'], list)
+        assert responses['missing']['status'] == 404
+
+    def test_batch_write_then_read(self, client, auth_headers_user):
+        """Test zapisu i odczytu w jednym batchu (kolejność zachowana)"""
+        response = post_batch(client, auth_headers_user, {'requests': [
+            {'id': 'create', 'method': 'POST', 'path': '/api/user/tasks', 'body': {'title': 'Z batcha'}},
+            {'id': 'list', 'method': 'GET', 'path': '/api/user/tasks'},
+        ]})
+
+        responses = json.loads(response.data)['responses']
+        assert responses[0]['status'] == 201
+        task_id = responses[0]['body']['id']
+        assert task_id in [task['id'] for task in responses[1]['body']]
+
+    def test_batch_concurrent_reads(self, client, auth_headers_user):
+        """Test równoległego wykonania odczytów"""
+        response = post_batch(client, auth_headers_user, {'concurrent': True, 'requests': [
+            {'path': '/api/me/counters'},
+            {'path': '/api/Notifications/unread-count'},
+            {'path': '/api/Reminders/'},
+        ]})
+
+        assert response.status_code == 200
+        responses = json.loads(response.data)['responses']
+        assert [item['id'] for item in responses] == ['0', '1', '2']
+        assert all(item['status'] == 200 for item in responses)
+
+    def test_batch_requires_auth(self, client):
+        """Test batcha bez tokenu - żądania częściowe nie omijają autoryzacji"""
+        response = client.post('/api/batch', data=json.dumps({'requests': [{'path': '/api/me/counters'}]}),
+                               content_type='application/json')
+
+        assert response.status_code == 401
+
+    def test_batch_validation(self, client, auth_headers_user):
+        """Test walidacji żądań częściowych"""
+        nested = post_batch(client, auth_headers_user, {'requests': [{'method': 'POST', 'path': '/api/batch'}]})
+        assert nested.status_code == 400
+
+        too_many = post_batch(client, auth_headers_user, {'requests': [{'path': '/api/me/counters'}] * 50})
+        assert too_many.status_code == 400
+
+        outside = post_batch(client, auth_headers_user, {'requests': [{'path': '/'}]})
+        assert outside.status_code == 400
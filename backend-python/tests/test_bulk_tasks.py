@@ -0,0 +1,142 @@
+"""
+Testy operacji zbiorczych na zadaniach (/api/user/tasks/bulk/...)
+"""
+import json
+import pytest
+from sqlalchemy import func, update
+from app.database import db
+from app.models import Activity, ChangeLog, Notification, Tag, Task, TableVersion
+from app.counters import get_counters
+from app.bulk_tasks import BulkTaskConflict, bulk_complete, bulk_delete, select_tasks
+
+
+def create_tasks(app, count, user_id=2, title='Zadanie zbiorcze'):
+    with app.app_context():
+        tasks = [Task(Title=f'{title} {index}', UserId=user_id, Completed=False) for index in range(count)]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return [task.Id for task in tasks]
+
+
+def post(client, headers, action, body):
+    return client.post(f'/api/user/tasks/bulk/{action}', headers=headers, data=json.dumps(body))
+
+
+class TestBulkTasks:
+    """Testy zbiorczego ukończenia, przekazania, tagowania i usuwania zadań"""
+
+    def test_complete_by_ids(self, app, client, auth_headers_user):
+        """Test ukończenia wielu zadań jednym żądaniem wraz z licznikami i aktywnościami"""
+        ids = create_tasks(app, 3)
+        with app.app_context():
+            pending_before = get_counters(2).PendingTasks
+            activities_before = Activity.query.count()
+
+        response = post(client, auth_headers_user, 'complete', {'ids': ids + [ids[0]]})
+
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'matched': 3, 'updated': 3}
+        with app.app_context():
+            assert Task.query.filter(Task.Id.in_(ids), Task.Completed.is_(True)).count() == 3
+            assert get_counters(2).PendingTasks == pending_before - 3
+            assert Activity.query.count() == activities_before + 3
+            logged = ChangeLog.query.filter(ChangeLog.EntityType == 'tasks', ChangeLog.EntityId.in_(ids)).all()
+            assert {entry.Operation for entry in logged} == {'upsert'}
+
+        # Ponowne wywołanie nie zmienia już niczego
+        response = post(client, auth_headers_user, 'complete', {'ids': ids})
+        assert json.loads(response.data)['updated'] == 0
+
+    def test_reassign_by_filter(self, app, client, auth_headers_user):
+        """Test przekazania zadań wybranych filtrem innemu użytkownikowi"""
+        with app.app_context():
+            tag = Tag(Name='Kampania zbiorcza')
+            db.session.add(tag)
+            db.session.commit()
+            tag_id = tag.Id
+        ids = create_tasks(app, 2, title='Kampania')
+        assert post(client, auth_headers_user, 'tags', {'ids': ids, 'add': [tag_id]}).status_code == 200
+        with app.app_context():
+            admin_pending = get_counters(1).PendingTasks
+            notifications_before = Notification.query.filter_by(UserId=1).count()
+
+        response = post(client, auth_headers_user, 'reassign', {'filter': {'tagId': tag_id}, 'userId': 1})
+
+        assert json.loads(response.data) == {'matched': 2, 'updated': 2}
+        with app.app_context():
+            assert {task.UserId for task in Task.query.filter(Task.Id.in_(ids))} == {1}
+            assert get_counters(1).PendingTasks == admin_pending + 2
+            assert Notification.query.filter_by(UserId=1).count() == notifications_before + 1
+            tombstones = ChangeLog.query.filter(ChangeLog.EntityId.in_(ids), ChangeLog.OwnerUserId == 2,
+                                                ChangeLog.Operation == 'delete').count()
+            assert tombstones == 2
+
+    def test_retag_and_delete(self, app, client, auth_headers_user):
+        """Test dodania i usunięcia tagów oraz zbiorczego usunięcia zadań"""
+        with app.app_context():
+            tags = [Tag(Name='Zbiorczy A'), Tag(Name='Zbiorczy B')]
+            db.session.add_all(tags)
+            db.session.commit()
+            tag_a, tag_b = tags[0].Id, tags[1].Id
+            version_before = TableVersion.query.get('TaskTags').Version
+        ids = create_tasks(app, 2)
+        with app.app_context():
+            last_entry = db.session.query(func.max(ChangeLog.Id)).scalar()
+
+        post(client, auth_headers_user, 'tags', {'ids': ids, 'add': [tag_a, tag_b]})
+        response = post(client, auth_headers_user, 'tags', {'ids': ids, 'add': [tag_a], 'remove': [tag_b]})
+
+        assert json.loads(response.data) == {'matched': 2, 'tagsAdded': 0, 'tagsRemoved': 2}
+        with app.app_context():
+            assert TableVersion.query.get('TaskTags').Version > version_before
+            # Zmiana tagów widoczna w synchronizacji - po wpisie na zadanie dla każdej zmiany
+            logged = ChangeLog.query.filter(ChangeLog.Id > last_entry, ChangeLog.EntityType == 'tasks').all()
+            assert sorted(entry.EntityId for entry in logged) == sorted(ids * 2)
+            assert {(entry.Operation, entry.OwnerUserId) for entry in logged} == {('upsert', 2)}
+            assert [tag.Id for tag in Task.query.get(ids[0]).tags] == [tag_a]
+            pending_before = get_counters(2).PendingTasks
+
+        response = post(client, auth_headers_user, 'delete', {'ids': ids})
+
+        assert json.loads(response.data) == {'matched': 2, 'deleted': 2}
+        with app.app_context():
+            assert Task.query.filter(Task.Id.in_(ids)).count() == 0
+            assert get_counters(2).PendingTasks == pending_before - 2
+
+    def test_other_users_tasks_untouched(self, app, client, auth_headers_user):
+        """Test pomijania zadań innych użytkowników"""
+        ids = create_tasks(app, 1, user_id=1)
+
+        response = post(client, auth_headers_user, 'delete', {'ids': ids})
+
+        assert json.loads(response.data)['matched'] == 0
+        with app.app_context():
+            assert Task.query.get(ids[0]) is not None
+
+    def test_validation(self, client, auth_headers_user):
+        """Test odrzucenia żądania bez wyboru zadań i z nieznanym filtrem"""
+        assert post(client, auth_headers_user, 'complete', {}).status_code == 400
+        assert post(client, auth_headers_user, 'complete', {'filter': {'unknown': 1}}).status_code == 400
+        assert post(client, auth_headers_user, 'reassign', {'ids': [1], 'userId': 999999}).status_code == 400
+        assert post(client, auth_headers_user, 'tags', {'ids': [1], 'add': [999999]}).status_code == 400
+
+    def test_changed_between_read_and_write(self, app):
+        """Test zadania zmienionego po odczycie - konflikt zamiast podwójnej korekty liczników"""
+        ids = create_tasks(app, 2)
+        with app.app_context():
+            pending_before = get_counters(2).PendingTasks
+            rows = select_tasks(2, ids)
+            # Zmiana, której nie widzą odczytane wiersze (np. równoległe żądanie bez blokady)
+            db.session.execute(update(Task).where(Task.Id == ids[0]).values(Completed=True))
+            with pytest.raises(BulkTaskConflict):
+                bulk_complete(2, rows)
+            db.session.rollback()
+
+            rows = select_tasks(2, ids)
+            db.session.execute(update(Task).where(Task.Id == ids[1]).values(UserId=1))
+            with pytest.raises(BulkTaskConflict):
+                bulk_delete(2, rows)
+            db.session.rollback()
+
+            assert get_counters(2).PendingTasks == pending_before
+            assert Task.query.filter(Task.Id.in_(ids), Task.Completed.is_(False)).count() == 2
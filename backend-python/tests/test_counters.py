@@ -0,0 +1,132 @@
+"""
+Testy liczników plakietek (/api/me/counters)
+"""
+import json
+from datetime import datetime, timedelta
+from app.database import db
+from app.models import Notification, User, UserCounter
+from app.counters import compute_counts, rebuild_counters, get_counters as get_user_counters
+from app.fanout import fan_out_notification
+
+
+def get_counters(client, headers):
+    response = client.get('/api/me/counters', headers=headers)
+    assert response.status_code == 200
+    return json.loads(response.data), response.headers['ETag']
+
+
+class TestCountersEndpoint:
+    """Testy endpointu liczników"""
+
+    def test_counters_etag(self, client, auth_headers_user):
+        """Test odpowiedzi 304 dla niezmienionych liczników"""
+        _, etag = get_counters(client, auth_headers_user)
+
+        response = client.get('/api/me/counters', headers={**auth_headers_user, 'If-None-Match': etag})
+
+        assert response.status_code == 304
+
+    def test_counters_require_auth(self, client):
+        """Test dostępu bez tokenu"""
+        response = client.get('/api/me/counters')
+
+        assert response.status_code == 401
+
+    def test_task_counter_incremental(self, client, auth_headers_user):
+        """Test aktualizacji licznika zadań przy tworzeniu i ukończeniu zadania"""
+        before, etag = get_counters(client, auth_headers_user)
+
+        response = client.post('/api/user/tasks', headers=auth_headers_user,
+                               data=json.dumps({'title': 'Licznik'}))
+        assert response.status_code == 201
+        task_id = json.loads(response.data)['id']
+
+        after, new_etag = get_counters(client, auth_headers_user)
+        assert after['pendingTasks'] == before['pendingTasks'] + 1
+        assert new_etag != etag
+
+        client.put(f'/api/user/tasks/{task_id}', headers=auth_headers_user,
+                   data=json.dumps({'completed': True}))
+        completed, _ = get_counters(client, auth_headers_user)
+        assert completed['pendingTasks'] == before['pendingTasks']
+
+    def test_message_counter(self, client, auth_headers_admin, auth_headers_user):
+        """Test licznika nieprzeczytanych wiadomości odbiorcy"""
+        before, _ = get_counters(client, auth_headers_user)
+
+        response = client.post('/api/Messages/', headers=auth_headers_admin,
+                               data=json.dumps({'subject': 'Test', 'body': 'Treść', 'recipientUserId': 2}))
+        assert response.status_code in [200, 201]
+        message_id = json.loads(response.data)['id']
+
+        after, _ = get_counters(client, auth_headers_user)
+        assert after['unreadMessages'] == before['unreadMessages'] + 1
+
+        client.put(f'/api/Messages/{message_id}/read', headers=auth_headers_user)
+        read, _ = get_counters(client, auth_headers_user)
+        assert read['unreadMessages'] == before['unreadMessages']
+
+    def test_notification_and_reminder_counters(self, app, client, auth_headers_user):
+        """Test liczników powiadomień i przypomnień zgodnych z pełnym przeliczeniem"""
+        get_counters(client, auth_headers_user)
+        with app.app_context():
+            db.session.add(Notification(Message='Licznik', UserId=2))
+            db.session.commit()
+
+        client.post('/api/Reminders/', headers=auth_headers_user,
+                    data=json.dumps({'note': 'Licznik', 'remindAt': (datetime.utcnow() + timedelta(days=2)).isoformat() + 'Z'}))
+
+        counters, _ = get_counters(client, auth_headers_user)
+        with app.app_context():
+            counts = compute_counts(2)
+        assert counters['unreadNotifications'] == counts['UnreadNotifications']
+        assert counters['pendingReminders'] == counts['PendingReminders']
+
+        response = client.get('/api/Notifications/unread-count', headers=auth_headers_user)
+        assert json.loads(response.data)['count'] == counts['UnreadNotifications']
+
+    def test_rebuild_counters(self, app, client, auth_headers_user):
+        """Test korekty rozjechanego licznika"""
+        get_counters(client, auth_headers_user)
+        with app.app_context():
+            counter = UserCounter.query.get(2)
+            counter.PendingTasks += 5
+            db.session.commit()
+
+            assert rebuild_counters() >= 1
+            assert UserCounter.query.get(2).PendingTasks == compute_counts(2)['PendingTasks']
+
+    def test_first_write_creates_counter_row(self, app):
+        """Test utworzenia wiersza licznika przy pierwszym zapisie - bez czekania na pierwszy odczyt"""
+        with app.app_context():
+            user = User(username='licznik_zapis', email='licznik_zapis@test.com', password_hash='x', role_id=2)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            assert db.session.get(UserCounter, user_id) is None
+
+            db.session.add_all([Notification(Message='Pierwsze', UserId=user_id),
+                                Notification(Message='Drugie', UserId=user_id)])
+            db.session.commit()
+            counter = db.session.get(UserCounter, user_id)
+            assert counter.UnreadNotifications == 2
+
+            # Odczyt nie nadpisuje wiersza utworzonego przez zapis
+            assert get_user_counters(user_id).UnreadNotifications == 2
+
+    def test_fanout_creates_missing_counter_rows(self, app):
+        """Test rozsyłania do odbiorców bez wiersza licznika"""
+        with app.app_context():
+            users = [User(username=f'licznik_fanout{i}', email=f'licznik_fanout{i}@test.com', password_hash='x',
+                          role_id=2) for i in range(2)]
+            db.session.add_all(users)
+            db.session.commit()
+            user_ids = [user.id for user in users]
+            get_user_counters(user_ids[0])
+
+            fan_out_notification('Licznik rozsyłania', user_ids=user_ids)
+            db.session.commit()
+            db.session.expire_all()
+            for user_id in user_ids:
+                assert db.session.get(UserCounter, user_id).UnreadNotifications == \
+                    compute_counts(user_id)['UnreadNotifications'] == 1
@@ -0,0 +1,142 @@
+"""
+Testy wykrywania i scalania duplikatów klientów (app/dedup.py, /api/Customers/duplicates)
+"""
+import json
+from app.database import db
+from app.models import Customer, CustomerDuplicate, CustomerMatchKey, Invoice, Note, Tag, Task
+from app.dedup import detect_duplicates, name_key, normalize_nip, normalize_phone
+
+
+def add_customer(**fields):
+    customer = Customer(**fields)
+    db.session.add(customer)
+    db.session.commit()
+    return customer.Id
+
+
+def keys_of(customer_id):
+    return {(key.KeyType, key.KeyValue) for key in CustomerMatchKey.query.filter_by(CustomerId=customer_id)}
+
+
+def pair(first, second):
+    return db.session.get(CustomerDuplicate, tuple(sorted((first, second))))
+
+
+class TestDedup:
+    """Testy kluczy blokujących, wykrywania par i scalania klientów"""
+
+    def test_normalized_keys(self):
+        """Test normalizacji NIP, telefonu i fonetycznego klucza nazwy"""
+        assert normalize_nip('PL 111-222-33-44') == normalize_nip('1112223344') == '1112223344'
+        assert normalize_nip('123') is None
+        assert normalize_phone('+48 600 100 200') == normalize_phone('600-100-200') == '600100200'
+        assert name_key('Kowalski Sp. z o.o.') == name_key('KOWALSKI sp.zoo')
+        assert name_key('Jan Kowalski') == name_key('Kovalski Jan')
+        assert name_key('Łódzka Hurtownia') == name_key('Lodzka hurtownia S.A.')
+
+    def test_keys_follow_orm_writes(self, app):
+        """Test odświeżania kluczy przy zapisie, zmianie i usunięciu klienta"""
+        with app.app_context():
+            customer_id = add_customer(Name='Dedup Klucze', Email=' Klucze@Example.com ', Phone='600 000 001')
+            assert keys_of(customer_id) == {('email', 'klucze@example.com'), ('phone', '600000001'),
+                                            ('name', name_key('Dedup Klucze'))}
+
+            customer = db.session.get(Customer, customer_id)
+            customer.NIP = '999-888-77-66'
+            db.session.commit()
+            assert ('nip', '9998887766') in keys_of(customer_id)
+
+            db.session.delete(customer)
+            db.session.commit()
+            assert keys_of(customer_id) == set()
+
+    def test_detect_full_and_incremental(self, app):
+        """Test wykrywania par w blokach - przebieg pełny i przyrostowy"""
+        with app.app_context():
+            alfa = add_customer(Name='Dedup Alfa Sp. z o.o.', NIP='111-222-33-44')
+            alfa_copy = add_customer(Name='DEDUP ALFA sp.zoo', NIP='PL1112223344')
+            other = add_customer(Name='Dedup Alfa Sp. z o.o.', NIP='555-666-77-88')
+            beta = add_customer(Name='Dedup Beta', Email='beta@example.com', Phone='+48 601 000 002')
+
+            metrics = detect_duplicates(full=True)
+            assert metrics['mode'] == 'full'
+            found = pair(alfa, alfa_copy)
+            assert found.Status == 'Open'
+            assert found.Score == 1.0
+            assert set(found.MatchedOn.split(',')) == {'nip', 'name'}
+            # Ta sama nazwa, ale różny NIP - poniżej progu
+            assert pair(alfa, other) is None
+
+            beta_copy = add_customer(Name='Zupełnie inna nazwa', Email='BETA@example.com', Phone='601000002')
+            metrics = detect_duplicates()
+            assert metrics['mode'] == 'incremental'
+            assert set(pair(beta, beta_copy).MatchedOn.split(',')) == {'email', 'phone'}
+
+    def test_list_dismiss_and_permissions(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test listy podejrzanych duplikatów, odrzucenia pary i braku uprawnień"""
+        with app.app_context():
+            first = add_customer(Name='Dedup Gamma', Email='gamma@example.com', Phone='602000003')
+            second = add_customer(Name='Dedup Gamma', Email='gamma@example.com', Phone='602000003')
+            detect_duplicates()
+
+        response = client.get('/api/Customers/duplicates?limit=500', headers=auth_headers_admin)
+        assert response.status_code == 200
+        item = next(item for item in json.loads(response.data) if item['customerId'] == first)
+        assert item['duplicateCustomerId'] == second
+        assert item['duplicate']['email'] == 'gamma@example.com'
+
+        response = client.post(f'/api/Customers/duplicates/{second}/{first}/dismiss', headers=auth_headers_admin)
+        assert response.status_code == 200
+        with app.app_context():
+            detect_duplicates(full=True)
+            assert pair(first, second).Status == 'Dismissed'
+        listed = json.loads(client.get('/api/Customers/duplicates?limit=500', headers=auth_headers_admin).data)
+        assert first not in {item['customerId'] for item in listed}
+
+        assert client.get('/api/Customers/duplicates', headers=auth_headers_user).status_code == 403
+        assert client.get('/api/Customers/duplicates?status=Other', headers=auth_headers_admin).status_code == 400
+
+    def test_merge_repoints_related_rows(self, app, client, auth_headers_admin):
+        """Test scalenia - przepięcie faktur, zadań, notatek i tagów oraz usunięcie klienta źródłowego"""
+        with app.app_context():
+            target = add_customer(Name='Dedup Delta')
+            source = add_customer(Name='Dedup Delta', Email='delta@example.com')
+            tag, shared_tag = Tag(Name='Dedup tag'), Tag(Name='Dedup wspólny')
+            db.session.add_all([tag, shared_tag])
+            target_customer, source_customer = db.session.get(Customer, target), db.session.get(Customer, source)
+            target_customer.tags.append(shared_tag)
+            source_customer.tags.extend([tag, shared_tag])
+            db.session.add_all([
+                Invoice(Number='DEDUP/1', CustomerId=source, TotalAmount=10),
+                Task(Title='Dedup zadanie', UserId=2, CustomerId=source),
+                Note(Content='Dedup notatka', CustomerId=source, UserId=1),
+            ])
+            db.session.commit()
+            detect_duplicates()
+            assert pair(target, source) is not None
+
+        response = client.post(f'/api/Customers/{target}/merge', headers=auth_headers_admin,
+                               data=json.dumps({'sourceIds': [source]}))
+
+        assert response.status_code == 200
+        result = json.loads(response.data)
+        assert result['moved']['invoices'] == 1
+        assert result['moved']['tasks'] == 1
+        assert result['moved']['notes'] == 1
+        assert result['moved']['tags'] == 1
+        assert result['customer']['email'] == 'delta@example.com'
+        with app.app_context():
+            assert db.session.get(Customer, source) is None
+            assert Invoice.query.filter_by(Number='DEDUP/1').one().CustomerId == target
+            assert {t.Name for t in db.session.get(Customer, target).tags} == {'Dedup tag', 'Dedup wspólny'}
+            assert pair(target, source) is None
+            assert keys_of(source) == set()
+
+    def test_merge_validation(self, client, auth_headers_admin):
+        """Test walidacji scalania"""
+        assert client.post('/api/Customers/1/merge', headers=auth_headers_admin,
+                           data=json.dumps({'sourceIds': [1]})).status_code == 400
+        assert client.post('/api/Customers/1/merge', headers=auth_headers_admin,
+                           data=json.dumps({'sourceIds': [987654]})).status_code == 400
+        assert client.post('/api/Customers/987654/merge', headers=auth_headers_admin,
+                           data=json.dumps({'sourceIds': [1]})).status_code == 404
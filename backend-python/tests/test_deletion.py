@@ -0,0 +1,192 @@
+"""
+Testy usuwania klientów i użytkowników w tle (app/deletion.py, /api/deletions)
+"""
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.database import db
+from app.models import (Activity, Contract, Customer, DeletionJob, Group, Invoice, InvoiceItem, Meeting, Message,
+                        LoginHistory, Note, Payment, Service, Tag, Task, User, UserCounter)
+from app.models.invoice import invoice_tags
+from app.counters import get_counters
+from app.deletion import run_deletion, schedule_deletion
+from app.log_storage import add_months, list_month_tables, month_start, month_suffix, query_logs, run_maintenance
+
+
+def add_customer_with_dependents(name):
+    customer = Customer(Name=name)
+    service = Service(Name=f'{name} usługa', Price=Decimal('10'))
+    tag = Tag(Name=f'{name} tag')
+    db.session.add_all([customer, service, tag])
+    db.session.flush()
+    invoices = [Invoice(Number=f'{name}/{i}', CustomerId=customer.Id, TotalAmount=10) for i in range(3)]
+    db.session.add_all(invoices)
+    db.session.flush()
+    invoices[0].tags.append(tag)
+    task = Task(Title=f'{name} zadanie', UserId=2, CustomerId=customer.Id)
+    db.session.add_all([
+        InvoiceItem(InvoiceId=invoices[0].Id, ServiceId=service.Id, Quantity=1, UnitPrice=Decimal('10')),
+        Payment(InvoiceId=invoices[0].Id, PaidAt=datetime(2030, 1, 1), Amount=Decimal('10')),
+        Note(Content=f'{name} notatka', CustomerId=customer.Id, UserId=1),
+        Meeting(Topic=f'{name} spotkanie', ScheduledAt=datetime(2031, 1, 1), CustomerId=customer.Id),
+        Contract(Title=f'{name} kontrakt', CustomerId=customer.Id),
+        Activity(Note=f'{name} aktywność', UserId=1, CustomerId=customer.Id),
+        task,
+    ])
+    db.session.commit()
+    return customer.Id, task.Id
+
+
+class TestDeletion:
+    """Testy ukrywania encji i usuwania zależności partiami"""
+
+    def test_customer_hidden_then_purged_in_batches(self, app, client, auth_headers_admin):
+        """Test ukrycia klienta od razu i usunięcia zależności partiami z postępem"""
+        with app.app_context():
+            customer_id, task_id = add_customer_with_dependents('Usuwanie A')
+            customer = db.session.get(Customer, customer_id)
+            job = schedule_deletion(customer, 1)
+            db.session.commit()
+            job_id = job.Id
+
+            # Ukryty w zapytaniach ORM jeszcze przed usunięciem zależności
+            assert db.session.get(Customer, customer_id) is None
+            assert Customer.query.filter_by(Name='Usuwanie A').count() == 0
+            assert Customer.query.filter_by(Name='Usuwanie A').execution_options(include_deleted=True).count() == 1
+
+        assert client.get(f'/api/Customers/{customer_id}', headers=auth_headers_admin).status_code == 404
+        listed = json.loads(client.get('/api/Customers/', headers=auth_headers_admin).data)
+        assert customer_id not in {item['id'] for item in listed}
+
+        with app.app_context():
+            job = run_deletion(job_id, batch_size=2)
+            assert job.Status == 'completed'
+            result = job.to_dict()
+            assert result['steps'] == {'notes': 1, 'meetings': 1, 'contracts': 1, 'invoices': 3,
+                                       'tasks': 1, 'activities': 1}
+            assert result['processedRows'] == result['totalRows'] == 9
+            assert result['progress'] == 100.0
+
+            assert Customer.query.filter_by(Id=customer_id).execution_options(include_deleted=True).count() == 0
+            assert Invoice.query.filter_by(CustomerId=customer_id).count() == 0
+            assert InvoiceItem.query.filter(InvoiceItem.invoice == None).count() == 0
+            assert Payment.query.filter(Payment.invoice == None).count() == 0
+            assert db.session.execute(invoice_tags.select()).all() == []
+            assert db.session.get(Task, task_id).CustomerId is None
+
+    def test_customer_hidden_in_text_queries(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test ukrycia klienta w zapytaniach tekstowych - eksporty, raporty grup i tagów, liczniki grupy"""
+        with app.app_context():
+            customer_id, _ = add_customer_with_dependents('Usuwanie tekstowe')
+            group = Group(Name='Grupa usuwania tekstowego')
+            db.session.add(group)
+            db.session.flush()
+            customer = db.session.get(Customer, customer_id)
+            customer.AssignedGroupId = group.Id
+            group_id = group.Id
+            tag_id = Tag.query.filter_by(Name='Usuwanie tekstowe tag').one().Id
+            schedule_deletion(customer, 1)
+            db.session.commit()
+
+        export = client.get('/api/reports/export-customers?format=csv&columns=id,name&live=true',
+                            headers=auth_headers_admin).data.decode('utf-8')
+        assert 'Usuwanie tekstowe' not in export
+        export = client.get('/api/reports/export-notes?format=csv&columns=content,customerName&live=true',
+                            headers=auth_headers_admin).data.decode('utf-8')
+        assert 'Usuwanie tekstowe notatka,\r\n' in export
+
+        assert json.loads(client.get(f'/api/reports/groups/{group_id}/customers', headers=auth_headers_admin).data) == []
+        assert json.loads(client.get(f'/api/reports/tags/{tag_id}/invoices', headers=auth_headers_admin).data) == []
+        group_data = json.loads(client.get(f'/api/Groups/{group_id}', headers=auth_headers_admin).data)
+        assert group_data['customerCount'] == 0
+
+        tasks = json.loads(client.get('/api/user/tasks', headers=auth_headers_user).data)
+        task = next(task for task in tasks if task['title'] == 'Usuwanie tekstowe zadanie')
+        assert task['customer'] is None
+        activities = json.loads(client.get('/api/Activities', headers=auth_headers_admin).data)
+        activity = next(item for item in activities if item['note'] == 'Usuwanie tekstowe aktywność')
+        assert activity['customerName'] == 'Brak klienta'
+
+    def test_delete_endpoint_and_progress(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test DELETE /api/Customers/<id> z zadaniem usuwania oraz odczytu postępu"""
+        with app.app_context():
+            customer_id, _ = add_customer_with_dependents('Usuwanie B')
+
+        response = client.delete(f'/api/Customers/{customer_id}', headers=auth_headers_admin)
+        assert response.status_code == 200
+        job = json.loads(response.data)['deletionJob']
+        assert job['entityType'] == 'customer'
+
+        response = client.get(f"/api/deletions/{job['id']}", headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert json.loads(response.data)['status'] == 'completed'
+        assert job['id'] in {item['id'] for item in
+                             json.loads(client.get('/api/deletions/?entityType=customer',
+                                                   headers=auth_headers_admin).data)}
+
+        assert client.delete(f'/api/Customers/{customer_id}', headers=auth_headers_admin).status_code == 404
+        assert client.get(f"/api/deletions/{job['id']}", headers=auth_headers_user).status_code == 403
+        assert client.get('/api/deletions/987654', headers=auth_headers_admin).status_code == 404
+        assert client.get('/api/deletions/?status=Other', headers=auth_headers_admin).status_code == 400
+
+    def test_user_deletion_adjusts_counters(self, app, client, auth_headers_admin):
+        """Test usunięcia użytkownika - wiadomości, zadania, członkostwa i liczniki odbiorców"""
+        with app.app_context():
+            user = User(username='usuwany', email='usuwany@test.com', password_hash='x', role_id=2)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            unread_before = get_counters(2).UnreadMessages
+            db.session.add_all([
+                Message(Subject='Do usunięcia', Body='treść', SenderUserId=user_id, RecipientUserId=2),
+                Message(Subject='Do usunięcia', Body='treść', SenderUserId=user_id, RecipientUserId=2),
+                Message(Subject='Odpowiedź', Body='treść', SenderUserId=2, RecipientUserId=user_id),
+                Task(Title='Zadanie usuwanego', UserId=user_id),
+            ])
+            db.session.commit()
+            assert get_counters(2).UnreadMessages == unread_before + 2
+
+        response = client.delete(f'/api/admin/users/{user_id}', headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert json.loads(response.data)['deletionJob']['entityType'] == 'user'
+
+        with app.app_context():
+            job = DeletionJob.query.filter_by(EntityType='user', EntityId=user_id).one()
+            assert job.Status == 'completed'
+            assert json.loads(job.StepCounts) == {'messages': 3, 'tasks': 1}
+            assert User.query.filter_by(id=user_id).execution_options(include_deleted=True).count() == 0
+            assert Message.query.filter_by(SenderUserId=user_id).count() == 0
+            assert Task.query.filter_by(UserId=user_id).count() == 0
+            db.session.expire_all()
+            assert db.session.get(UserCounter, 2).UnreadMessages == unread_before
+
+    def test_user_deletion_purges_login_history_month_tables(self, app, client, auth_headers_admin, tmp_path):
+        """Test usunięcia historii logowań użytkownika także z tabel miesięcznych logów"""
+        app.config['LOG_ARCHIVE_DIR'] = str(tmp_path)
+        with app.app_context():
+            user = User(username='logujacy', email='logujacy@test.com', password_hash='x', role_id=2)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            old_login = add_months(month_start(datetime.now()), -2) + timedelta(days=1)
+            db.session.add_all([LoginHistory(UserId=user_id, LoginTime=old_login),
+                                LoginHistory(UserId=user_id, LoginTime=datetime.now())])
+            db.session.commit()
+            run_maintenance()
+            suffix = month_suffix(old_login)
+            assert suffix in list_month_tables('LoginHistory')
+
+        try:
+            response = client.delete(f'/api/admin/users/{user_id}', headers=auth_headers_admin)
+            assert response.status_code == 200
+
+            with app.app_context():
+                job = DeletionJob.query.filter_by(EntityType='user', EntityId=user_id).order_by(DeletionJob.Id.desc()).first()
+                assert job.Status == 'completed'
+                counts = json.loads(job.StepCounts)
+                assert counts['loginHistory'] == 1
+                assert counts[f'loginHistory_{suffix}'] == 1
+                assert query_logs('LoginHistory', filters={'UserId': user_id}) == []
+        finally:
+            app.config['LOG_ARCHIVE_DIR'] = None
+
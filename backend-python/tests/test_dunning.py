@@ -0,0 +1,132 @@
+"""
+Testy wykrywania przeterminowanych faktur (zadanie overdue_invoices, /api/Invoices/overdue)
+"""
+import json
+import pytest
+from datetime import datetime, timedelta
+from app.database import db
+from app.models import ChangeLog, Group, Invoice, Notification, Setting, User
+from app.dunning import METRICS_KEY, WATERMARK_KEY, detect_overdue_invoices
+
+
+@pytest.fixture(autouse=True)
+def reset_watermark(app):
+    """Każdy test zaczyna bez znacznika poprzedniego przebiegu"""
+    with app.app_context():
+        Setting.query.filter(Setting.Key.in_([WATERMARK_KEY, METRICS_KEY])).delete(synchronize_session=False)
+        db.session.commit()
+    yield
+
+
+def add_invoice(number, due_date, **fields):
+    invoice = Invoice(Number=number, CustomerId=1, IssuedAt=datetime.now(), DueDate=due_date,
+                      IsPaid=fields.pop('IsPaid', False), TotalAmount=100, **fields)
+    db.session.add(invoice)
+    db.session.commit()
+    return invoice.Id
+
+
+class TestDunning:
+    """Testy zadania windykacyjnego"""
+
+    def test_first_run_marks_without_notifications(self, app):
+        """Test pierwszego przebiegu - oznaczenie zaległości bez powiadomień i zapis znacznika"""
+        with app.app_context():
+            invoice_id = add_invoice('DUN/STARE', datetime.now() + timedelta(days=500))
+            run_at = datetime.now() + timedelta(days=501)
+
+            metrics = detect_overdue_invoices(now=run_at)
+
+            invoice = db.session.get(Invoice, invoice_id)
+            assert invoice.Status == 'Overdue'
+            assert invoice.OverdueSince == invoice.DueDate
+            assert metrics['checkedFrom'] is None
+            assert metrics['notifications'] == 0
+            assert metrics['newlyOverdue'] >= 1
+            assert Notification.query.filter_by(Message='Faktura DUN/STARE jest przeterminowana').count() == 0
+            assert Setting.query.filter_by(Key=WATERMARK_KEY).one().Value == run_at.isoformat()
+
+    def test_window_notifies_group_and_creator(self, app):
+        """Test kolejnego przebiegu - tylko faktury z okna, powiadomienia grupy i wystawiającego"""
+        with app.app_context():
+            group = Group(Name='Grupa windykacji')
+            group.members.append(User.query.get(2))
+            # Usunięty członek grupy (DeletedAt) nie dostaje powiadomień
+            group.members.append(User(username='usuniety_windykacja', email='usuniety_windykacja@test.com',
+                                      password_hash='x', role_id=2, DeletedAt=datetime.now()))
+            db.session.add(group)
+            db.session.commit()
+
+            base = datetime.now() + timedelta(days=700)
+            detect_overdue_invoices(now=base)
+            group_invoice = add_invoice('DUN/GRUPA', base + timedelta(days=1), AssignedGroupId=group.Id)
+            own_invoice = add_invoice('DUN/WLASNA', base + timedelta(days=2), CreatedByUserId=1)
+            paid_invoice = add_invoice('DUN/OPLACONA', base + timedelta(days=1), IsPaid=True)
+            later_invoice = add_invoice('DUN/POZNIEJ', base + timedelta(days=10), AssignedGroupId=group.Id)
+            last_change = db.session.query(db.func.max(ChangeLog.Id)).scalar() or 0
+
+            metrics = detect_overdue_invoices(now=base + timedelta(days=3))
+
+            assert metrics['checkedFrom'] == base.isoformat()
+            assert db.session.get(Invoice, group_invoice).Status == 'Overdue'
+            assert db.session.get(Invoice, own_invoice).Status == 'Overdue'
+            assert db.session.get(Invoice, paid_invoice).Status == 'Paid'
+            assert db.session.get(Invoice, later_invoice).Status == 'Pending'
+            assert [n.UserId for n in Notification.query.filter_by(
+                Message='Faktura DUN/GRUPA jest przeterminowana')] == [2]
+            assert [n.UserId for n in Notification.query.filter_by(
+                Message='Faktura DUN/WLASNA jest przeterminowana')] == [1]
+            logged = {entry.EntityId for entry in ChangeLog.query.filter(
+                ChangeLog.Id > last_change, ChangeLog.EntityType == 'invoices')}
+            assert {group_invoice, own_invoice} <= logged
+
+            # Ponowny przebieg w tym samym oknie nie powiadamia drugi raz
+            detect_overdue_invoices(now=base + timedelta(days=3))
+            assert Notification.query.filter_by(Message='Faktura DUN/GRUPA jest przeterminowana').count() == 1
+
+    def test_status_follows_payment(self, app):
+        """Test przeliczenia statusu przy zapisie faktury przez ORM"""
+        with app.app_context():
+            invoice_id = add_invoice('DUN/PLATNOSC', datetime.now() - timedelta(days=3))
+            invoice = db.session.get(Invoice, invoice_id)
+            assert invoice.Status == 'Overdue'
+
+            invoice.IsPaid = True
+            db.session.commit()
+
+            assert invoice.Status == 'Paid'
+            assert invoice.OverdueSince is None
+
+    def test_backfill_missing_status(self, app):
+        """Test uzupełnienia statusu faktur zapisanych z pominięciem ORM"""
+        with app.app_context():
+            invoice_id = add_invoice('DUN/BEZ-STATUSU', datetime.now() - timedelta(days=1))
+            db.session.execute(db.update(Invoice).where(Invoice.Id == invoice_id)
+                               .values(Status=None, OverdueSince=None))
+            db.session.commit()
+
+            metrics = detect_overdue_invoices(notify=False)
+
+            assert metrics['backfilled'] >= 1
+            assert db.session.get(Invoice, invoice_id).Status == 'Overdue'
+
+    def test_overdue_endpoints(self, app, client, auth_headers_admin):
+        """Test listy przeterminowanych faktur i metryk ostatniego przebiegu"""
+        with app.app_context():
+            invoice_id = add_invoice('DUN/LISTA', datetime.now() - timedelta(days=5))
+
+        assert client.get('/api/Invoices/overdue/metrics', headers=auth_headers_admin).status_code == 404
+
+        response = client.get('/api/Invoices/overdue?limit=1000', headers=auth_headers_admin)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert invoice_id in [item['id'] for item in data]
+        assert {item['status'] for item in data} == {'Overdue'}
+        due_dates = [item['dueDate'] for item in data]
+        assert due_dates == sorted(due_dates)
+
+        with app.app_context():
+            detect_overdue_invoices()
+        response = client.get('/api/Invoices/overdue/metrics', headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert json.loads(response.data)['totalOverdue'] >= 1
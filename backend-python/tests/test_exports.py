@@ -0,0 +1,182 @@
+"""
+Testy dla endpointów eksportu (/api/reports/export-*)
+"""
+import csv
+import io
+import zipfile
+from datetime import datetime
+import pytest
+from app.database import db
+from app.models import Customer, Group, Invoice
+
+EXPORT_ENDPOINTS = ['meetings', 'tasks', 'notes', 'customers', 'invoices', 'payments', 'contracts']
+
+
+class TestExportEndpoints:
+    """Testy eksportu opartego o rejestr schematów (app/export_schema.py)"""
+
+    @pytest.mark.parametrize('entity', EXPORT_ENDPOINTS)
+    @pytest.mark.parametrize('format_type', ['csv', 'xlsx', 'pdf'])
+    def test_export_all_formats(self, client, auth_headers_admin, entity, format_type):
+        """Test eksportu każdej encji w każdym formacie"""
+        response = client.get(f'/api/reports/export-{entity}?format={format_type}',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert 'attachment' in response.headers['Content-Disposition']
+
+    def test_export_customers_csv_columns(self, client, auth_headers_admin):
+        """Test wyboru kolumn - nagłówki w kolejności z parametru columns"""
+        response = client.get('/api/reports/export-customers?format=csv&columns=name,email,tags',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))
+        assert rows[0] == ['Nazwa', 'Email', 'Tagi']
+        assert any(row[0] == 'Test Customer' for row in rows[1:])
+
+    def test_export_invoice_group_is_invoice_group(self, app, client, auth_headers_admin):
+        """Test kolumny grupy faktury - grupa samej faktury (kolumna widoczności), nie grupa klienta"""
+        with app.app_context():
+            customer_group, invoice_group = Group(Name='Eksport - grupa klienta'), Group(Name='Eksport - grupa faktury')
+            db.session.add_all([customer_group, invoice_group])
+            db.session.flush()
+            customer = Customer(Name='Eksport grupy faktury', AssignedGroupId=customer_group.Id)
+            db.session.add(customer)
+            db.session.flush()
+            db.session.add(Invoice(Number='EKS/GRUPA/1', CustomerId=customer.Id, TotalAmount=10,
+                                   AssignedGroupId=invoice_group.Id))
+            db.session.commit()
+
+        response = client.get('/api/reports/export-invoices?format=csv&columns=number,assignedGroup&live=true',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))
+        assert ['EKS/GRUPA/1', 'Eksport - grupa faktury'] in rows
+
+    def test_export_unknown_columns_ignored(self, client, auth_headers_admin):
+        """Test pomijania nieznanych kolumn"""
+        response = client.get('/api/reports/export-customers?format=csv&columns=name,unknown',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))
+        assert rows[0] == ['Nazwa']
+
+    def test_export_xlsx_numeric_cells(self, client, auth_headers_admin):
+        """Test typowanych komórek XLSX - ID zapisane jako liczba, nie tekst"""
+        response = client.get('/api/reports/export-customers?format=xlsx&columns=id,name',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        # Komórki liczbowe nie mają atrybutu t="s" (shared string)
+        assert '<c r="A2"><v>' in sheet
+
+    def test_export_unsupported_format(self, client, auth_headers_admin):
+        """Test nieobsługiwanego formatu eksportu"""
+        response = client.get('/api/reports/export-payments?format=doc',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+
+class TestIncrementalAndColumnarExport:
+    """Testy eksportu przyrostowego (?since=) i formatów Parquet/Arrow"""
+
+    def test_since_id_returns_newer_rows(self, client, auth_headers_admin):
+        """Test eksportu przyrostowego po ID (?sinceId=) z kursorem następnej paczki"""
+        response = client.get('/api/reports/export-customers?format=csv&columns=id,name&sinceId=0',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))[1:]
+        ids = [int(row[0]) for row in rows]
+        assert ids == sorted(ids)
+        assert response.headers['X-Export-Next-Since-Id'] == str(max(ids))
+
+        response = client.get(f'/api/reports/export-customers?format=csv&columns=id&sinceId={max(ids)}',
+                              headers=auth_headers_admin)
+        assert len(list(csv.reader(io.StringIO(response.data.decode('utf-8'))))) == 1
+        assert response.headers['X-Export-Next-Since-Id'] == str(max(ids))
+
+    def test_since_timestamp(self, client, auth_headers_admin):
+        """Test eksportu przyrostowego po dacie modyfikacji"""
+        response = client.get('/api/reports/export-payments?format=csv&since=2000-01-01T00:00:00Z',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert 'X-Export-Next-Since' in response.headers
+
+    def test_since_cursor_keeps_rows_with_same_timestamp(self, app, client, auth_headers_admin):
+        """Test kursora (data modyfikacji, ID) - wiersze z tą samą datą nie są gubione na granicy paczek"""
+        modified = datetime(2099, 1, 1, 12, 0, 0)
+        with app.app_context():
+            customers = [Customer(Name=f'Eksport przyrostowy {index}') for index in range(3)]
+            db.session.add_all(customers)
+            db.session.flush()
+            for customer in customers:
+                customer.UpdatedAt = modified
+            db.session.commit()
+            ids = sorted(customer.Id for customer in customers)
+
+        try:
+            response = client.get(f'/api/reports/export-customers?format=csv&columns=id'
+                                  f'&since=2099-01-01T12:00:00_{ids[0]}', headers=auth_headers_admin)
+            assert response.status_code == 200
+            rows = list(csv.reader(io.StringIO(response.data.decode('utf-8'))))[1:]
+            assert [int(row[0]) for row in rows] == ids[1:]
+            next_since = response.headers['X-Export-Next-Since']
+            assert next_since == f'2099-01-01T12:00:00_{ids[-1]}'
+
+            response = client.get(f'/api/reports/export-customers?format=csv&columns=id&since={next_since}',
+                                  headers=auth_headers_admin)
+            assert len(list(csv.reader(io.StringIO(response.data.decode('utf-8'))))) == 1
+            assert response.headers['X-Export-Next-Since'] == next_since
+        finally:
+            with app.app_context():
+                Customer.query.filter(Customer.Id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+
+    @pytest.mark.parametrize('since', ['wczoraj', '2024', '2024-01-01T00:00:00_x'])
+    def test_since_invalid(self, client, auth_headers_admin, since):
+        """Test nieprawidłowej wartości since (sama liczba nie jest traktowana jako ID)"""
+        response = client.get(f'/api/reports/export-invoices?format=csv&since={since}',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+    def test_since_not_supported(self, client, auth_headers_admin):
+        """Test eksportu bez kolumny modyfikacji - tylko sinceId"""
+        response = client.get('/api/reports/export-tasks?format=csv&since=2024-01-01',
+                              headers=auth_headers_admin)
+        assert response.status_code == 400
+
+        response = client.get('/api/reports/export-tasks?format=csv&sinceId=0', headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert 'X-Export-Next-Since-Id' in response.headers
+
+    def test_parquet_export(self, client, auth_headers_admin):
+        """Test eksportu Parquet z typami dziesiętnymi i datami"""
+        pq = pytest.importorskip('pyarrow.parquet')
+
+        response = client.get('/api/reports/export-invoices?format=parquet&columns=id,totalAmount,issuedAt',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        table = pq.read_table(io.BytesIO(response.data))
+        assert str(table.schema.field('totalAmount').type) == 'decimal128(18, 2)'
+        assert str(table.schema.field('issuedAt').type).startswith('timestamp')
+
+    def test_arrow_export(self, client, auth_headers_admin):
+        """Test eksportu strumienia Arrow IPC"""
+        pa = pytest.importorskip('pyarrow')
+
+        response = client.get('/api/reports/export-payments?format=arrow',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        table = pa.ipc.open_stream(io.BytesIO(response.data)).read_all()
+        assert table.column_names == ['id', 'invoiceNumber', 'customerName', 'amount', 'paidAt']
@@ -0,0 +1,87 @@
+"""
+Testy rozsyłania powiadomień do grup i ról (/api/Notifications/broadcast)
+"""
+import json
+from datetime import datetime
+from app.database import db
+from app.models import ChangeLog, Group, Notification, User
+from app.counters import get_counters
+from app.fanout import fan_out_notification
+from app.push import hub
+
+
+def broadcast(client, headers, body):
+    return client.post('/api/Notifications/broadcast', headers=headers, data=json.dumps(body))
+
+
+class TestFanOut:
+    """Testy rozsyłania powiadomień"""
+
+    def test_group_broadcast(self, app, client, auth_headers_admin):
+        """Test powiadomienia członków grupy z licznikami, dziennikiem i push"""
+        with app.app_context():
+            group = Group(Name='Grupa rozsyłania')
+            group.members.append(User.query.get(2))
+            db.session.add(group)
+            db.session.commit()
+            group_id = group.Id
+            unread_before = get_counters(2).UnreadNotifications
+
+        subscription = hub.subscribe(2)
+        try:
+            response = broadcast(client, auth_headers_admin, {'message': 'Spotkanie grupy', 'groupIds': [group_id]})
+        finally:
+            hub.unsubscribe(2, subscription)
+
+        assert response.status_code == 201
+        assert json.loads(response.data) == {'recipients': 1}
+        event_name, data = subscription.get_nowait()
+        assert (event_name, data['message']) == ('notification', 'Spotkanie grupy')
+        with app.app_context():
+            notification = Notification.query.filter_by(Message='Spotkanie grupy').one()
+            assert notification.UserId == 2
+            assert get_counters(2).UnreadNotifications == unread_before + 1
+            assert ChangeLog.query.filter_by(EntityType='notifications', EntityId=notification.Id,
+                                             OwnerUserId=2).count() == 1
+
+    def test_overlapping_selectors_deduplicated(self, app):
+        """Test jednego powiadomienia dla użytkownika pasującego do kilku warunków"""
+        with app.app_context():
+            count = fan_out_notification('Wszyscy administratorzy', role_names=['Admin'], user_ids=[1])
+            db.session.commit()
+
+            assert count == 1
+            assert Notification.query.filter_by(Message='Wszyscy administratorzy').count() == 1
+
+    def test_all_users(self, app):
+        """Test rozesłania do wszystkich użytkowników z wykluczeniem nadawcy"""
+        with app.app_context():
+            total = User.query.count()
+            count = fan_out_notification('Do wszystkich', all_users=True, exclude_user_id=1)
+            db.session.commit()
+
+            assert count == total - 1
+            assert Notification.query.filter_by(Message='Do wszystkich', UserId=1).count() == 0
+
+    def test_soft_deleted_users_skipped(self, app):
+        """Test pominięcia użytkowników oznaczonych jako usunięci (grupa i wszyscy)"""
+        with app.app_context():
+            deleted = User(username='usuniety_odbiorca', email='usuniety_odbiorca@test.com', password_hash='x',
+                           role_id=2, DeletedAt=datetime.now())
+            group = Group(Name='Grupa z usuniętym')
+            group.members.append(deleted)
+            db.session.add(group)
+            db.session.commit()
+            deleted_id = deleted.id
+
+            fan_out_notification('Do grupy z usuniętym', group_ids=[group.Id])
+            fan_out_notification('Do wszystkich poza usuniętymi', all_users=True)
+            db.session.commit()
+
+            assert Notification.query.filter_by(UserId=deleted_id).count() == 0
+
+    def test_validation_and_permissions(self, client, auth_headers_admin, auth_headers_user):
+        """Test odrzucenia żądania bez odbiorców i bez uprawnień"""
+        assert broadcast(client, auth_headers_admin, {'message': 'Bez odbiorców'}).status_code == 400
+        assert broadcast(client, auth_headers_admin, {'groupIds': [1]}).status_code == 400
+        assert broadcast(client, auth_headers_user, {'message': 'x', 'all': True}).status_code == 403
@@ -0,0 +1,76 @@
+"""
+Testy warunkowego cache'owania odpowiedzi (ETag / If-None-Match)
+"""
+import json
+from app.database import db
+from app.models import Customer, Tag, TableVersion
+from app.http_cache import response_cache
+
+
+class TestHttpCache:
+    """Testy cache'owania danych słownikowych"""
+
+    def test_etag_and_not_modified(self, client, auth_headers_user):
+        """Test odpowiedzi 304 dla niezmienionej listy usług"""
+        response = client.get('/api/Services/', headers=auth_headers_user)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert 'max-age=60' in response.headers['Cache-Control']
+
+        response = client.get('/api/Services/', headers={**auth_headers_user, 'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+
+    def test_write_changes_etag(self, client, auth_headers_user):
+        """Test zmiany ETag i unieważnienia pamięci po zapisie"""
+        first = client.get('/api/Services/', headers=auth_headers_user)
+        cached = client.get('/api/Services/', headers=auth_headers_user)
+        assert cached.headers['X-Cache'] == 'HIT'
+
+        response = client.post('/api/Services/', headers=auth_headers_user,
+                               data=json.dumps({'name': 'Nowa usługa', 'price': 10}))
+        assert response.status_code == 201
+
+        after = client.get('/api/Services/', headers=auth_headers_user)
+        assert after.headers['ETag'] != first.headers['ETag']
+        assert after.headers['X-Cache'] == 'MISS'
+        assert 'Nowa usługa' in [service['name'] for service in json.loads(after.data)]
+
+    def test_association_table_invalidates_tags(self, app, client, auth_headers_user):
+        """Test unieważnienia listy tagów po przypisaniu tagu do klienta (tabela CustomerTags)"""
+        with app.app_context():
+            tag = Tag(Name='Cache tag', Color='#ffffff')
+            db.session.add(tag)
+            db.session.commit()
+            tag_id = tag.Id
+
+        before = client.get('/api/Tags/', headers=auth_headers_user)
+        with app.app_context():
+            version_before = TableVersion.query.get('CustomerTags').Version
+            customer = Customer.query.first()
+            customer.tags.append(Tag.query.get(tag_id))
+            db.session.commit()
+            assert TableVersion.query.get('CustomerTags').Version == version_before + 1
+
+        after = client.get('/api/Tags/', headers=auth_headers_user)
+        assert after.headers['ETag'] != before.headers['ETag']
+        tag_data = next(tag for tag in json.loads(after.data) if tag['id'] == tag_id)
+        assert tag_data['customerCount'] == 1
+
+    def test_roles_cache_varies_by_user(self, client, auth_headers_admin, auth_headers_user):
+        """Test, że odpowiedź administratora nie jest serwowana innemu użytkownikowi"""
+        admin_response = client.get('/api/admin/Roles', headers=auth_headers_admin)
+        assert admin_response.status_code == 200
+
+        user_response = client.get('/api/admin/Roles', headers={**auth_headers_user,
+                                                                'If-None-Match': admin_response.headers['ETag']})
+        assert user_response.status_code == 403
+
+    def test_error_responses_not_cached(self, client, auth_headers_user):
+        """Test braku cache'owania odpowiedzi z błędem"""
+        response_cache.clear()
+        response = client.get('/api/Services/999999', headers=auth_headers_user)
+
+        assert response.status_code == 404
+        assert len(response_cache) == 0
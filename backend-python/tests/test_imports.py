@@ -0,0 +1,215 @@
+"""
+Testy masowego importu CSV (/api/imports)
+"""
+import io
+import json
+import pytest
+from sqlalchemy import event
+from app.database import db
+from app.models import ChangeLog, Customer, Group, Invoice, ImportJob, Service, Tag
+
+
+@pytest.fixture(autouse=True)
+def inline_imports(app, tmp_path):
+    """Import wykonywany od razu w żądaniu, pliki w katalogu tymczasowym"""
+    previous = app.config.get('IMPORT_RUN_ASYNC'), app.config.get('IMPORT_DIR')
+    app.config['IMPORT_RUN_ASYNC'] = False
+    app.config['IMPORT_DIR'] = str(tmp_path)
+    yield
+    app.config['IMPORT_RUN_ASYNC'], app.config['IMPORT_DIR'] = previous
+
+
+def upload(client, headers, entity_type, content, filename='import.csv', **fields):
+    data = {'entityType': entity_type, 'file': (io.BytesIO(content.encode('utf-8')), filename)}
+    data.update({key: str(value) for key, value in fields.items()})
+    return client.post('/api/imports/', headers={'Authorization': headers['Authorization']},
+                       data=data, content_type='multipart/form-data')
+
+
+class TestImports:
+    """Testy importu klientów, usług i faktur"""
+
+    def test_customers_import_with_lookups(self, app, client, auth_headers_admin):
+        """Test importu klientów z opiekunem, grupą i tagami oraz raportem błędów"""
+        with app.app_context():
+            db.session.add_all([Group(Name='Oddział Import'), Tag(Name='Import VIP'), Tag(Name='Import B2B')])
+            db.session.commit()
+            last_change = db.session.query(db.func.max(ChangeLog.Id)).scalar() or 0
+
+        content = (
+            'nazwa;email;telefon;opiekun;grupa;tagi\n'
+            'Import Alfa;alfa@example.com;500100200;user;Oddział Import;Import VIP|Import B2B\n'
+            'Import Beta;beta@example.com;;;;\n'
+            ';bez-nazwy@example.com;;;;\n'
+            'Import Gamma;zly-email;;nieznany;Brak grupy;Brak tagu\n'
+        )
+        response = upload(client, auth_headers_admin, 'customers', content, batchSize=2)
+
+        assert response.status_code == 202
+        job = json.loads(response.data)
+        assert job['status'] == 'completed'
+        assert job['totalRows'] == 4
+        assert job['processedRows'] == 4
+        assert job['insertedRows'] == 2
+        assert job['errorRows'] == 2
+
+        with app.app_context():
+            alfa = Customer.query.filter_by(Name='Import Alfa').one()
+            assert alfa.RepresentativeUserId == 2
+            assert alfa.AssignedGroupId == Group.query.filter_by(Name='Oddział Import').one().Id
+            assert sorted(tag.Name for tag in alfa.tags) == ['Import B2B', 'Import VIP']
+            assert Customer.query.filter_by(Name='Import Beta').one().Phone is None
+            # Zapis masowy trafia do dziennika synchronizacji
+            logged = {entry.EntityId for entry in ChangeLog.query.filter(
+                ChangeLog.Id > last_change, ChangeLog.EntityType == 'customers').all()}
+            assert alfa.Id in logged
+
+        report = client.get(f"/api/imports/{job['id']}/errors", headers=auth_headers_admin)
+        assert report.status_code == 200
+        lines = report.data.decode('utf-8-sig').strip().splitlines()
+        assert lines[0].startswith('row,error,nazwa')
+        assert lines[1].startswith('4,brak nazwy')
+        assert 'nieznany opiekun: nieznany' in lines[2]
+        assert 'nieznany tag: Brak tagu' in lines[2]
+
+    def test_customers_import_single_insert_with_tags(self, app, client, auth_headers_admin):
+        """Test zapisu klientów z tagami jednym INSERT (executemany) - także przy powtórzonych danych"""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            db.session.add_all([Tag(Name='Import Jeden'), Tag(Name='Import Dwa')])
+            db.session.commit()
+            engine = db.engine
+
+        content = (
+            'nazwa;email;tagi\n'
+            'Import Bliźniak;blizniak@example.com;Import Jeden\n'
+            'Import Bez tagów;;\n'
+            'Import Bliźniak;blizniak@example.com;Import Dwa\n'
+        )
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            job = json.loads(upload(client, auth_headers_admin, 'customers', content).data)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        assert job['insertedRows'] == 3
+        assert len([statement for statement in statements if statement.startswith('INSERT INTO "Customers"')]) == 1
+        with app.app_context():
+            twins = Customer.query.filter_by(Name='Import Bliźniak').order_by(Customer.Id).all()
+            assert [[tag.Name for tag in customer.tags] for customer in twins] == [['Import Jeden'], ['Import Dwa']]
+
+    def test_customers_import_ignores_concurrent_rows(self, app, client, auth_headers_admin):
+        """Test pominięcia klienta o tym samym kluczu dodanego równolegle (tagi i dziennik tylko dla importu)"""
+        inserted = []
+
+        def concurrent_insert(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO "Customers"') and not inserted:
+                inserted.append(True)
+                cursor.execute('INSERT INTO "Customers" (Name, Email, CreatedAt) VALUES (?, ?, ?)',
+                               ('Import Równoległy', 'rownolegly@example.com', '2000-01-01 00:00:00'))
+
+        with app.app_context():
+            db.session.add(Tag(Name='Import Równoległy tag'))
+            db.session.commit()
+            last_change = db.session.query(db.func.max(ChangeLog.Id)).scalar() or 0
+            engine = db.engine
+
+        content = 'nazwa;email;tagi\nImport Równoległy;rownolegly@example.com;Import Równoległy tag\n'
+        event.listen(engine, 'after_cursor_execute', concurrent_insert)
+        try:
+            job = json.loads(upload(client, auth_headers_admin, 'customers', content).data)
+        finally:
+            event.remove(engine, 'after_cursor_execute', concurrent_insert)
+
+        assert job['insertedRows'] == 1
+        with app.app_context():
+            imported, concurrent = Customer.query.filter_by(Name='Import Równoległy').order_by(Customer.Id).all()
+            assert concurrent.Id > imported.Id
+            assert [tag.Name for tag in imported.tags] == ['Import Równoległy tag']
+            assert concurrent.tags == []
+            logged = {entry.EntityId for entry in ChangeLog.query.filter(
+                ChangeLog.Id > last_change, ChangeLog.EntityType == 'customers')}
+            assert imported.Id in logged and concurrent.Id not in logged
+
+    def test_services_import_bumps_cache_version(self, app, client, auth_headers_admin):
+        """Test importu usług - stawka VAT w procentach i nowy ETag listy usług"""
+        before = client.get('/api/Services/', headers=auth_headers_admin).headers['ETag']
+
+        response = upload(client, auth_headers_admin, 'services',
+                          'name,price,taxRate\nImport usługa,"1 200,50",8%\nZła cena,abc,\n')
+
+        job = json.loads(response.data)
+        assert (job['insertedRows'], job['errorRows']) == (1, 1)
+        with app.app_context():
+            service = Service.query.filter_by(Name='Import usługa').one()
+            assert float(service.Price) == 1200.5
+            assert float(service.TaxRate) == 0.08
+        assert client.get('/api/Services/', headers=auth_headers_admin).headers['ETag'] != before
+
+    def test_invoices_import_groups_items(self, app, client, auth_headers_admin):
+        """Test importu faktur - kolejne wiersze o tym samym numerze to pozycje jednej faktury"""
+        with app.app_context():
+            customer = Customer(Name='Klient faktur importu', NIP='1112223344')
+            service = Service(Name='Usługa faktur importu', Price=100, TaxRate=0.23)
+            db.session.add_all([customer, service])
+            db.session.commit()
+            customer_id = customer.Id
+
+        content = (
+            'number,customerNip,issuedAt,service,quantity,unitPrice\n'
+            'IMP/1,1112223344,2026-01-10,Usługa faktur importu,2,\n'
+            'IMP/1,1112223344,2026-01-10,Usługa faktur importu,1,50\n'
+            'IMP/2,1112223344,2026-01-11,Nieznana usługa,1,\n'
+            'IMP/2,1112223344,2026-01-11,Usługa faktur importu,1,\n'
+        )
+        job = json.loads(upload(client, auth_headers_admin, 'invoices', content).data)
+
+        assert job['status'] == 'completed'
+        assert (job['insertedRows'], job['errorRows']) == (2, 2)
+        with app.app_context():
+            invoice = Invoice.query.filter_by(Number='IMP/1').one()
+            assert invoice.CustomerId == customer_id
+            assert invoice.DueDate.day == 24
+            assert len(invoice.invoice_items) == 2
+            assert float(invoice.TotalAmount) == pytest.approx(307.5)
+            assert Invoice.query.filter_by(Number='IMP/2').count() == 0
+
+        # Ponowny import tych samych numerów jest odrzucany
+        job = json.loads(upload(client, auth_headers_admin, 'invoices', content).data)
+        assert job['insertedRows'] == 0
+
+    def test_dry_run_and_missing_columns(self, app, client, auth_headers_admin):
+        """Test walidacji bez zapisu i pliku bez wymaganych kolumn"""
+        job = json.loads(upload(client, auth_headers_admin, 'services',
+                                'name,price\nUsługa próbna importu,10\n', dryRun='true').data)
+        assert job['status'] == 'completed'
+        assert (job['processedRows'], job['insertedRows'], job['errorRows']) == (1, 0, 0)
+        with app.app_context():
+            assert Service.query.filter_by(Name='Usługa próbna importu').count() == 0
+
+        job = json.loads(upload(client, auth_headers_admin, 'services', 'nazwa\nBez ceny\n').data)
+        assert job['status'] == 'failed'
+        assert 'price' in job['error']
+
+    def test_validation_and_permissions(self, client, auth_headers_admin, auth_headers_user):
+        """Test odrzucenia nieobsługiwanego formatu, typu i braku uprawnień"""
+        assert upload(client, auth_headers_admin, 'customers', 'x', filename='dane.txt').status_code == 400
+        assert upload(client, auth_headers_admin, 'unknown', 'name\nA\n').status_code == 400
+        assert upload(client, auth_headers_user, 'customers', 'name\nA\n').status_code == 403
+
+    def test_status_endpoint(self, app, client, auth_headers_admin):
+        """Test odczytu statusu importu"""
+        job_id = json.loads(upload(client, auth_headers_admin, 'customers', 'name\nImport Delta\n').data)['id']
+
+        response = client.get(f'/api/imports/{job_id}', headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['progress'] == 100.0
+        assert data['hasErrorReport'] is False
+        with app.app_context():
+            assert ImportJob.query.get(job_id).FinishedAt is not None
@@ -0,0 +1,151 @@
+"""
+Testy dla parametrów ?fields=, ?filter[...]= i ?sort= na endpointach listujących
+"""
+import json
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+from app.database import db
+from app.models import Customer, Invoice
+from app.controllers.customers import CUSTOMER_LIST_SPEC
+from app.list_query import DEFAULT_LIST_LIMIT, MAX_LIST_LIMIT, parse_list_params
+
+
+class TestListQueryParameters:
+    """Testy wspólnej warstwy zapytań list (app/list_query.py)"""
+
+    def test_sparse_fieldset_customers(self, client, auth_headers_admin):
+        """Test zwracania tylko wybranych pól klienta"""
+        response = client.get('/api/Customers/?fields=id,name',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) > 0
+        for item in data:
+            assert set(item.keys()) == {'id', 'name'}
+
+    def test_sparse_fieldset_with_relations(self, client, auth_headers_admin):
+        """Test ładowania relacji (opiekun, tagi) tylko na żądanie"""
+        response = client.get('/api/Customers/?fields=name,representative,customerTags',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        for item in data:
+            assert set(item.keys()) == {'name', 'representative', 'customerTags'}
+            assert isinstance(item['customerTags'], list)
+
+    def test_filter_equality(self, client, auth_headers_admin):
+        """Test filtra równościowego"""
+        response = client.get('/api/Customers/?filter[name]=Test Customer&fields=id,name',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) >= 1
+        assert all(item['name'] == 'Test Customer' for item in data)
+
+    def test_filter_operator_like(self, client, auth_headers_admin):
+        """Test filtra z operatorem like"""
+        response = client.get('/api/Customers/?filter[name][like]=test',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert all('test' in item['name'].lower() for item in data)
+        # Bez ?fields= zwracane są pełne obiekty
+        assert all('customerTags' in item for item in data)
+
+    def test_sort_ascending(self, client, auth_headers_admin):
+        """Test sortowania rosnąco"""
+        response = client.get('/api/Customers/?sort=id&fields=id',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        ids = [item['id'] for item in json.loads(response.data)]
+        assert ids == sorted(ids)
+
+    def test_invoice_computed_fields(self, client, auth_headers_admin):
+        """Test pól wyliczanych faktury (status, kwota netto)"""
+        response = client.get('/api/Invoices/?fields=id,status,netAmount,customerName',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        for item in json.loads(response.data):
+            assert item['status'] in ('Paid', 'Pending', 'Overdue')
+            assert set(item.keys()) == {'id', 'status', 'netAmount', 'customerName'}
+
+    def test_full_objects_in_single_query(self, app, client, auth_headers_admin):
+        """Test pełnych obiektów - filtr i sortowanie po kolumnie dołączonej tabeli w jednym zapytaniu"""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            customer = Customer.query.filter_by(Name='Test Customer').first()
+            db.session.add(Invoice(Number='LISTA/1', CustomerId=customer.Id, TotalAmount=10))
+            db.session.commit()
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            response = client.get('/api/Invoices/?filter[customerName][like]=test&sort=customerName',
+                                  headers=auth_headers_admin)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert 'LISTA/1' in {item['number'] for item in data}
+        invoice_queries = [statement for statement in statements if 'FROM "Invoices"' in statement]
+        assert len(invoice_queries) == 1
+
+    def test_unknown_field_returns_400(self, client, auth_headers_admin):
+        """Test nieznanego pola w ?fields="""
+        response = client.get('/api/Customers/?fields=id,password',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+    def test_invalid_filter_value_returns_400(self, client, auth_headers_admin):
+        """Test nieprawidłowej wartości filtra"""
+        response = client.get('/api/Invoices/?filter[id][gt]=abc',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+    def test_unknown_sort_field_returns_400(self, client, auth_headers_admin):
+        """Test sortowania po nieznanym polu"""
+        response = client.get('/api/Payments/?sort=-secret',
+                              headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+    def test_pagination_with_cursor(self, app, client, auth_headers_admin):
+        """Test stronicowania listy (?limit=, ?cursor= z nagłówka X-Next-Cursor) w obu trybach odpowiedzi"""
+        with app.app_context():
+            db.session.add_all([Customer(Name=f'Strona listy {index}') for index in range(5)])
+            db.session.commit()
+
+        for fields in ('&fields=id,name', ''):
+            url = '/api/Customers/?filter[name][like]=Strona listy&limit=2' + fields
+            names, pages = [], 0
+            while url:
+                response = client.get(url, headers=auth_headers_admin)
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert len(data) <= 2
+                names.extend(item['name'] for item in data)
+                pages += 1
+                cursor = response.headers.get('X-Next-Cursor')
+                url = f'/api/Customers/?filter[name][like]=Strona listy&limit=2{fields}&cursor={cursor}' if cursor else None
+            assert pages == 3
+            assert names == [f'Strona listy {index}' for index in reversed(range(5))]
+
+    def test_limit_is_capped(self, client, auth_headers_admin):
+        """Test domyślnego i maksymalnego limitu oraz błędnego kursora"""
+        assert parse_list_params(CUSTOMER_LIST_SPEC, MultiDict()).limit == DEFAULT_LIST_LIMIT
+        assert parse_list_params(CUSTOMER_LIST_SPEC, MultiDict({'limit': '100000'})).limit == MAX_LIST_LIMIT
+        assert client.get('/api/Customers/?cursor=abc', headers=auth_headers_admin).status_code == 400
+        assert client.get('/api/Customers/?limit=0', headers=auth_headers_admin).status_code == 400
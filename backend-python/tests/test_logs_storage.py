@@ -0,0 +1,172 @@
+"""
+Testy miesięcznych partycji logów, retencji i archiwizacji
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import inspect
+from app.database import db
+from app.models import LoginHistory, SystemLog
+from app.log_storage import (add_months, archive_rows, month_start, month_suffix, list_month_tables,
+                             month_table, query_logs, query_recent_logs, run_maintenance)
+
+
+@pytest.fixture
+def archive_dir(app, tmp_path):
+    """Katalog archiwum logów na czas testu"""
+    previous = app.config.get('LOG_ARCHIVE_DIR')
+    app.config['LOG_ARCHIVE_DIR'] = str(tmp_path)
+    yield tmp_path
+    app.config['LOG_ARCHIVE_DIR'] = previous
+
+
+class TestLogStorage:
+    """Testy rotacji tabel miesięcznych (wariant SQLite)"""
+
+    def test_month_helpers(self):
+        """Test operacji na miesiącach"""
+        assert add_months(datetime(2024, 11, 20), 3) == datetime(2025, 2, 1)
+        assert add_months(datetime(2024, 1, 5), -1) == datetime(2023, 12, 1)
+        assert month_suffix(datetime(2024, 5, 31)) == '202405'
+
+    def test_maintenance_rotates_and_archives(self, app, archive_dir):
+        """Test przeniesienia starszych logów do tabel miesięcznych i archiwizacji wygasłych"""
+        with app.app_context():
+            now = datetime.now()
+            recent_month = add_months(month_start(now), -2) + timedelta(days=3)
+            expired_month = add_months(month_start(now), -30) + timedelta(days=3)
+            db.session.add_all([
+                SystemLog(Level='Info', Message='Bieżący wpis', Source='test', Timestamp=now),
+                SystemLog(Level='Warning', Message='Wpis sprzed dwóch miesięcy', Source='test',
+                          Timestamp=recent_month),
+                SystemLog(Level='Error', Message='Wpis wygasły', Source='test', Timestamp=expired_month),
+            ])
+            db.session.commit()
+
+            summary = run_maintenance(now)['SystemLogs']
+
+            assert summary['moved'][month_suffix(recent_month)] >= 1
+            assert [item['month'] for item in summary['expired']] == [month_suffix(expired_month)]
+
+            suffixes = list_month_tables('SystemLogs')
+            assert month_suffix(recent_month) in suffixes
+            assert month_suffix(expired_month) not in suffixes
+            assert SystemLog.query.filter(SystemLog.Timestamp < month_start(now)).count() == 0
+
+            archive_path = os.path.join(archive_dir, f'SystemLogs_{month_suffix(expired_month)}.jsonl.gz')
+            with gzip.open(archive_path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+            assert any(row['Message'] == 'Wpis wygasły' for row in rows)
+
+    def test_range_query_reads_month_tables(self, app, archive_dir):
+        """Test zapytania z zakresem dat obejmującego tabelę miesięczną i główną"""
+        with app.app_context():
+            now = datetime.now()
+            old_timestamp = add_months(month_start(now), -3) + timedelta(days=1)
+            db.session.add(SystemLog(Level='Info', Message='Stary wpis zakresu', Source='test',
+                                     Timestamp=old_timestamp))
+            db.session.commit()
+            run_maintenance(now)
+
+            assert f'SystemLogs_{month_suffix(old_timestamp)}' in inspect(db.engine).get_table_names()
+
+            rows = query_logs('SystemLogs', date_from=month_start(old_timestamp), date_to=now + timedelta(days=1))
+            messages = [row['Message'] for row in rows]
+            assert 'Stary wpis zakresu' in messages
+            timestamps = [row['Timestamp'] for row in rows]
+            assert timestamps == sorted(timestamps, reverse=True)
+
+            rows = query_logs('SystemLogs', date_from=month_start(now))
+            assert 'Stary wpis zakresu' not in [row['Message'] for row in rows]
+
+    def test_archive_rerun_does_not_duplicate(self, app, archive_dir):
+        """Test ponownej archiwizacji miesiąca - bez duplikatów, z dopisaniem nowych wierszy"""
+        with app.app_context():
+            old_timestamp = add_months(month_start(datetime.now()), -4) + timedelta(days=2)
+            db.session.add(SystemLog(Level='Info', Message='Wpis archiwum', Source='test', Timestamp=old_timestamp))
+            db.session.commit()
+            run_maintenance()
+            suffix = month_suffix(old_timestamp)
+            table = month_table('SystemLogs', suffix)
+
+            def archive():
+                result = db.session.execute(db.select(table).execution_options(stream_results=True))
+                return archive_rows('SystemLogs', suffix, result)
+
+            path, count = archive()
+            # Ponowienie po przerwanej konserwacji (tabela nie została usunięta)
+            archive()
+            db.session.execute(table.insert().values(Id=10 ** 6, Level='Info', Message='Późny wpis',
+                                                     Source='test', Timestamp=old_timestamp))
+            db.session.commit()
+            archive()
+
+            with gzip.open(path, 'rt', encoding='utf-8') as stored:
+                ids = [json.loads(line)['Id'] for line in stored]
+            assert len(ids) == len(set(ids)) == count + 1
+            assert not os.path.exists(f'{path}.tmp')
+
+    def test_recent_logs_widen_window(self, app, archive_dir):
+        """Test najnowszych logów - starsze miesiące czytane tylko, gdy brakuje wierszy"""
+        with app.app_context():
+            now = datetime.now()
+            old_login = add_months(month_start(now), -3) + timedelta(days=1)
+            db.session.add_all([LoginHistory(UserId=1, LoginTime=now),
+                                LoginHistory(UserId=1, LoginTime=old_login)])
+            db.session.commit()
+            run_maintenance(now)
+
+            rows = query_recent_logs('LoginHistory', filters={'UserId': 1}, limit=1, now=now)
+            assert len(rows) == 1 and rows[0]['LoginTime'] >= month_start(now)
+
+            rows = query_recent_logs('LoginHistory', filters={'UserId': 1}, limit=1000, now=now)
+            assert old_login in [row['LoginTime'] for row in rows]
+
+
+class TestLogsEndpoints:
+    """Testy endpointów /api/Logs z zakresem dat"""
+
+    def test_get_logs_with_range(self, client, auth_headers_admin):
+        """Test filtrowania logów po zakresie dat i poziomie"""
+        today = datetime.now().date().isoformat()
+        response = client.get(f'/api/Logs?from={today}&to={today}&level=Info', headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert all(log['level'] == 'Info' for log in json.loads(response.data))
+
+    def test_get_logs_invalid_range(self, client, auth_headers_admin):
+        """Test nieprawidłowej daty"""
+        response = client.get('/api/Logs?from=wczoraj', headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
+    def test_export_logs_with_range(self, client, auth_headers_admin):
+        """Test eksportu logów z zakresem dat"""
+        today = datetime.now().date().isoformat()
+        response = client.get(f'/api/Logs/export?from={today}', headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.data[:2] == b'PK'
+
+    def test_login_history_endpoint(self, client, auth_headers_user):
+        """Test historii logowań z profilu (wiersze z zapytania po tabelach logów)"""
+        response = client.get('/api/Profile/login-history', headers=auth_headers_user)
+
+        assert response.status_code == 200
+        assert isinstance(json.loads(response.data), list)
+
+    def test_maintenance_requires_admin(self, client, auth_headers_user):
+        """Test dostępu zwykłego użytkownika do konserwacji logów"""
+        response = client.post('/api/Logs/maintenance', headers=auth_headers_user)
+
+        assert response.status_code == 403
+
+    def test_maintenance_endpoint(self, client, auth_headers_admin, archive_dir):
+        """Test uruchomienia konserwacji przez administratora"""
+        response = client.post('/api/Logs/maintenance', headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert set(data) == {'SystemLogs', 'LoginHistory'}
@@ -0,0 +1,137 @@
+"""
+Testy skrzynki wiadomości - stronicowanie, wątki i zbiorcze oznaczanie (/api/Messages)
+"""
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.database import db
+from app.models import Message
+from app.counters import get_counters
+from app.messaging import message_page
+
+
+def send(client, headers, body):
+    return client.post('/api/Messages/', headers=headers, data=json.dumps(body))
+
+
+class TestMessaging:
+    """Testy wątków i stronicowania wiadomości"""
+
+    def test_inbox_keyset_pagination(self, app, client, auth_headers_user):
+        """Test stronicowania kursorem - kolejne strony bez powtórzeń i luk"""
+        with app.app_context():
+            sent_at = datetime.utcnow() + timedelta(days=3650)
+            db.session.execute(insert(Message.__table__), [
+                # Dwie wiadomości z tym samym SentAt - kolejność rozstrzyga Id
+                {'Subject': f'Strona {index}', 'Body': 'Treść', 'SenderUserId': 1, 'RecipientUserId': 2,
+                 'SentAt': sent_at - timedelta(minutes=index // 2), 'IsRead': True}
+                for index in range(7)
+            ])
+            db.session.commit()
+            expected = [message.Id for message in Message.query.filter(Message.Subject.like('Strona %'))
+                        .order_by(Message.SentAt.desc(), Message.Id.desc())]
+
+        seen, cursor = [], None
+        while True:
+            url = '/api/Messages/inbox?limit=3' + (f'&cursor={cursor}' if cursor else '')
+            response = client.get(url, headers=auth_headers_user)
+            assert response.status_code == 200
+            page = json.loads(response.data)
+            assert len(page) <= 3
+            seen.extend(item['id'] for item in page if item['subject'].startswith('Strona '))
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor or len(seen) == len(expected):
+                break
+
+        assert seen == expected
+        item = page[0]
+        assert (item['senderUsername'], item['recipientUsername']) == ('admin', 'user')
+
+    def test_pagination_without_sent_at(self, app):
+        """Test kursora wiadomości bez SentAt (kolumna dopuszcza NULL) - w obu kierunkach"""
+        with app.app_context():
+            db.session.execute(insert(Message.__table__), [
+                {'Subject': f'Bez daty {index}', 'Body': 'Treść', 'SenderUserId': 1, 'RecipientUserId': 2,
+                 'SentAt': None if index % 2 else datetime(2031, 1, 1) + timedelta(minutes=index), 'IsRead': True}
+                for index in range(5)
+            ])
+            db.session.commit()
+            condition = Message.Subject.like('Bez daty %')
+
+            for newest_first in (True, False):
+                seen, cursor = [], None
+                while True:
+                    items, cursor = message_page(condition, limit=2, cursor=cursor, newest_first=newest_first)
+                    seen.extend(item['subject'] for item in items)
+                    if not cursor:
+                        break
+                assert sorted(seen) == [f'Bez daty {index}' for index in range(5)]
+
+    def test_cursor_header_exposed_to_browsers(self, client, auth_headers_user):
+        """Test CORS - przeglądarka może odczytać nagłówek X-Next-Cursor"""
+        headers = dict(auth_headers_user, Origin='http://localhost:5173')
+        response = client.get('/api/Messages/inbox?limit=1', headers=headers)
+        assert 'X-Next-Cursor' in response.headers.get('Access-Control-Expose-Headers', '')
+
+    def test_invalid_cursor(self, client, auth_headers_user):
+        """Test odrzucenia nieprawidłowego kursora"""
+        response = client.get('/api/Messages/inbox?cursor=zly', headers=auth_headers_user)
+        assert response.status_code == 400
+
+    def test_reply_thread_and_bulk_read(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test odpowiedzi w wątku, odczytu wątku i zbiorczego oznaczenia jako przeczytane"""
+        first = json.loads(send(client, auth_headers_admin, {
+            'recipientUserId': 2, 'subject': 'Wątek testowy', 'body': 'Pierwsza'}).data)
+        reply = json.loads(send(client, auth_headers_user, {
+            'recipientUserId': 1, 'replyToId': first['id'], 'body': 'Odpowiedź'}).data)
+        second = json.loads(send(client, auth_headers_admin, {
+            'recipientUserId': 2, 'replyToId': reply['id'], 'body': 'Druga'}).data)
+
+        assert reply['subject'] == 'Re: Wątek testowy'
+        assert second['subject'] == 'Re: Wątek testowy'
+        assert {reply['threadId'], second['threadId']} == {first['id']}
+        assert second['parentMessageId'] == reply['id']
+
+        response = client.get(f"/api/Messages/threads/{first['id']}", headers=auth_headers_user)
+        assert response.status_code == 200
+        assert [item['id'] for item in json.loads(response.data)] == [first['id'], reply['id'], second['id']]
+
+        unread = json.loads(client.get('/api/Messages/inbox?unread=true&limit=200', headers=auth_headers_user).data)
+        assert {first['id'], second['id']} <= {item['id'] for item in unread}
+
+        with app.app_context():
+            unread_before = get_counters(2).UnreadMessages
+        response = client.put('/api/Messages/read', headers=auth_headers_user,
+                              data=json.dumps({'threadId': first['id']}))
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'updated': 2}
+        with app.app_context():
+            assert get_counters(2).UnreadMessages == unread_before - 2
+            # Wiadomość wysłana przez użytkownika nie jest oznaczana jego odczytem
+            assert db.session.get(Message, reply['id']).IsRead is False
+
+    def test_thread_access_and_validation(self, client, auth_headers_admin, auth_headers_user):
+        """Test braku dostępu do cudzego wątku i walidacji zbiorczego odczytu"""
+        first = json.loads(send(client, auth_headers_admin, {
+            'recipientUserId': 1, 'subject': 'Notatka własna', 'body': 'Tylko admin'}).data)
+
+        assert client.get(f"/api/Messages/threads/{first['id']}", headers=auth_headers_user).status_code == 404
+        assert send(client, auth_headers_user, {'recipientUserId': 1, 'replyToId': first['id'],
+                                                'body': 'X'}).status_code == 404
+        assert client.put('/api/Messages/read', headers=auth_headers_user,
+                          data=json.dumps({})).status_code == 400
+        assert client.put('/api/Messages/read', headers=auth_headers_user,
+                          data=json.dumps({'ids': ['a']})).status_code == 400
+
+    def test_mark_all_read(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test oznaczenia wszystkich wiadomości jako przeczytane"""
+        send(client, auth_headers_admin, {'recipientUserId': 2, 'subject': 'Wszystkie', 'body': 'B'})
+
+        response = client.put('/api/Messages/read', headers=auth_headers_user, data=json.dumps({'all': True}))
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['updated'] >= 1
+        unread = json.loads(client.get('/api/Messages/inbox?unread=true', headers=auth_headers_user).data)
+        assert unread == []
+        with app.app_context():
+            assert get_counters(2).UnreadMessages == 0
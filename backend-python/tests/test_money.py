@@ -0,0 +1,90 @@
+"""
+Testy kwot pieniężnych (app/money.py) - typ Money, arytmetyka w groszach i sumy raportów
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select
+from app.database import db
+from app.models import Customer, Group, Invoice, Payment, Service
+from app.money import (GROSZE_SQL, MoneyVector, apply_rate, from_grosze, grosze, line_amounts,
+                       split_gross, to_grosze)
+from app.controllers.reports import build_group_pdf
+
+
+class TestMoney:
+    """Testy przechowywania, arytmetyki i agregacji kwot"""
+
+    def test_grosze_arithmetic(self):
+        """Test konwersji na grosze i zaokrągleń połówkowych"""
+        assert to_grosze(Decimal('12.345')) == 1235
+        assert to_grosze('0.1') + to_grosze(0.2) == to_grosze('0.3') == 30
+        assert to_grosze(-1.005) == -101
+        assert from_grosze(1235) == Decimal('12.35')
+        assert apply_rate(1001, Decimal('0.230000000000000000000000000000')) == 230
+        assert line_amounts(Decimal('19.99'), 3, Decimal('0.23')) == (5997, 1379, 7376)
+        net, tax = split_gross(12300)
+        assert (net, tax) == (10000, 2300)
+        assert sum(split_gross(9999)) == 9999
+
+    def test_money_column_round_trip(self, app):
+        """Test zapisu i odczytu kolumny Money - Decimal z dwoma miejscami, suma w SQL w groszach"""
+        with app.app_context():
+            customer = Customer(Name='Kwoty klient')
+            db.session.add(customer)
+            db.session.flush()
+            invoice = Invoice(Number='KWOTY/1', CustomerId=customer.Id, TotalAmount=Decimal('100.005'))
+            db.session.add(invoice)
+            db.session.flush()
+            db.session.add_all([Payment(InvoiceId=invoice.Id, PaidAt=datetime(2030, 1, 1),
+                                        Amount=amount) for amount in ('33.33', '33.33', '33.34')])
+            db.session.commit()
+            invoice_id = invoice.Id
+            db.session.expire_all()
+
+            stored = db.session.get(Invoice, invoice_id).TotalAmount
+            assert stored == Decimal('100.01') and stored.as_tuple().exponent == -2
+            paid = db.session.execute(select(grosze(Payment.Amount)).where(Payment.InvoiceId == invoice_id)).scalars()
+            assert MoneyVector.from_grosze(paid).total() == 10000
+
+    def test_invoice_items_add_up(self, client, auth_headers_admin, app):
+        """Test faktury z pozycjami - kwota faktury równa sumie pozycji co do grosza"""
+        with app.app_context():
+            customer = Customer(Name='Kwoty pozycje')
+            service = Service(Name='Kwoty usługa', Price=Decimal('0.07'), TaxRate=Decimal('0.23'))
+            db.session.add_all([customer, service])
+            db.session.commit()
+            customer_id, service_id = customer.Id, service.Id
+
+        response = client.post('/api/Invoices/', headers=auth_headers_admin, data=json.dumps({
+            'customerId': customer_id, 'invoiceNumber': 'KWOTY/2',
+            'items': [{'serviceId': service_id, 'quantity': 3}, {'serviceId': service_id, 'quantity': 7}]
+        }))
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['totalAmount'] == 0.86  # 0.21 + 0.05 VAT + 0.49 + 0.11 VAT
+        assert round(data['netAmount'] + data['taxAmount'], 2) == data['totalAmount']
+        with app.app_context():
+            invoice = db.session.get(Invoice, data['id'])
+            assert sum(item.GrossAmount for item in invoice.invoice_items) == invoice.TotalAmount
+
+    def test_report_totals_from_grosze_column(self, app):
+        """Test sum raportu grupy liczonych na kolumnie groszy z SQL"""
+        with app.app_context():
+            group = Group(Name='Kwoty grupa')
+            db.session.add(group)
+            db.session.flush()
+            customer = Customer(Name='Kwoty raport', AssignedGroupId=group.Id)
+            db.session.add(customer)
+            db.session.flush()
+            db.session.add_all([Invoice(Number=f'KWOTY/R{i}', CustomerId=customer.Id, TotalAmount=Decimal('0.10'),
+                                        IsPaid=i % 2 == 0) for i in range(3)])
+            db.session.commit()
+
+            rows = db.session.execute(db.text(
+                f"SELECT {GROSZE_SQL.format(column='TotalAmount')}, IsPaid FROM Invoices WHERE CustomerId = :id"
+            ), {'id': customer.Id}).all()
+            vector = MoneyVector.from_grosze(row[0] for row in rows)
+            assert vector.total_decimal() == Decimal('0.30')
+            assert vector.total(mask=(row[1] for row in rows)) == 20
+            assert build_group_pdf(group.Id) is not None
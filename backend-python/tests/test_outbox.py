@@ -0,0 +1,86 @@
+"""
+Testy outboxa skutków ubocznych (powiadomienia, aktywności, logi w jednej transakcji)
+"""
+import json
+from sqlalchemy import event
+from app.database import db
+from app.models import Activity, ChangeLog, Notification, SystemLog
+from app.outbox import add_notification, add_system_log
+from app.counters import get_counters
+from app.push import hub
+
+
+class TestOutbox:
+    """Testy zapisu skutków ubocznych przy commit"""
+
+    def test_create_task_single_commit(self, app, client, auth_headers_user):
+        """Test utworzenia zadania z powiadomieniem, aktywnością i logiem w jednym commit"""
+        with app.app_context():
+            unread_before = get_counters(2).UnreadNotifications
+            activities_before = Activity.query.count()
+
+        commits = []
+        session_class = db.session.session_factory.class_
+        listener = lambda session: commits.append(session)
+        event.listen(session_class, 'after_commit', listener)
+        subscription = hub.subscribe(2)
+        try:
+            response = client.post('/api/user/tasks', headers=auth_headers_user,
+                                   data=json.dumps({'title': 'Zadanie z outboxa'}))
+        finally:
+            event.remove(session_class, 'after_commit', listener)
+            hub.unsubscribe(2, subscription)
+
+        assert response.status_code == 201
+        assert len(commits) == 1
+        event_name, data = subscription.get_nowait()
+        assert event_name == 'notification'
+        assert data['message'] == 'Utworzono nowe zadanie: Zadanie z outboxa'
+
+        with app.app_context():
+            notification = Notification.query.get(data['id'])
+            assert notification.UserId == 2
+            assert get_counters(2).UnreadNotifications == unread_before + 1
+            assert Activity.query.count() == activities_before + 1
+            assert SystemLog.query.filter_by(Message='Zadanie zostało utworzone').count() >= 1
+            assert ChangeLog.query.filter_by(EntityType='notifications', EntityId=notification.Id,
+                                             OwnerUserId=2).count() == 1
+
+    def test_rollback_discards_side_effects(self, app):
+        """Test odrzucenia zarejestrowanych skutków przy rollback"""
+        with app.app_context():
+            add_notification(2, 'Powiadomienie wycofane')
+            add_system_log('Information', 'Log wycofany', 'tests')
+            db.session.rollback()
+            db.session.commit()
+
+            assert Notification.query.filter_by(Message='Powiadomienie wycofane').count() == 0
+            assert SystemLog.query.filter_by(Message='Log wycofany').count() == 0
+
+    def test_multi_row_notifications(self, app):
+        """Test zapisu wielu powiadomień jednym INSERT i poprawnych liczników odbiorców"""
+        with app.app_context():
+            before = {user_id: get_counters(user_id).UnreadNotifications for user_id in (1, 2)}
+            last_change = db.session.query(db.func.max(ChangeLog.Id)).scalar() or 0
+            add_notification(1, 'Masowe 1')
+            add_notification(2, 'Masowe 2')
+            add_notification(2, 'Masowe 2')
+            db.session.commit()
+
+            assert get_counters(1).UnreadNotifications == before[1] + 1
+            assert get_counters(2).UnreadNotifications == before[2] + 2
+            # Dziennik obejmuje dokładnie wiersze tego zapisu
+            created = {(n.Id, n.UserId) for n in Notification.query.filter(Notification.Message.like('Masowe %'))}
+            logged = {(entry.EntityId, entry.OwnerUserId) for entry in ChangeLog.query.filter(
+                ChangeLog.Id > last_change, ChangeLog.EntityType == 'notifications')}
+            assert logged == created and len(created) == 3
+
+    def test_send_message_notifies_recipient(self, app, client, auth_headers_user):
+        """Test powiadomienia odbiorcy wiadomości zapisanego razem z wiadomością"""
+        response = client.post('/api/Messages/', headers=auth_headers_user,
+                               data=json.dumps({'recipientUserId': 1, 'subject': 'Outbox', 'body': 'Treść'}))
+
+        assert response.status_code == 201
+        with app.app_context():
+            assert Notification.query.filter(Notification.UserId == 1,
+                                             Notification.Message.like('%: Outbox')).count() == 1
@@ -0,0 +1,70 @@
+"""
+Testy strumieniowych tabel PDF (app/pdf_tables.py)
+"""
+from reportlab.platypus import Paragraph, Table
+
+from app import pdf_tables
+from app.pdf_tables import (FlowableStream, TableLayout, build_table_pdf, column_parts,
+                            measure_column_widths, table_flowables)
+
+
+def rows(count, pulled=None):
+    for index in range(count):
+        if pulled is not None:
+            pulled.append(index)
+        yield [str(index), f'Klient {index}', 'kontakt@example.com']
+
+
+class TestPdfTables:
+    """Testy silnika tabel PDF"""
+
+    def test_rows_consumed_lazily_in_chunks(self):
+        """Test pobierania wierszy fragmentami - bez materializacji całego wyniku"""
+        pulled = []
+        tables = table_flowables(rows(1000, pulled), ['Id', 'Nazwa', 'Email'], 'Helvetica', chunk_rows=40)
+
+        first = next(tables)
+
+        assert isinstance(first, Table)
+        assert len(first._cellvalues) == 41
+        assert len(pulled) == pdf_tables.MEASURE_SAMPLE_ROWS
+        assert sum(1 for _ in tables) == 24
+
+    def test_flowable_stream_lookahead(self):
+        """Test leniwej kolejki elementów - generator czytany tylko na bieżąco"""
+        pulled = []
+        stream = FlowableStream(rows(100, pulled))
+
+        assert len(pulled) == FlowableStream.LOOKAHEAD
+        del stream[0]
+        assert stream[0][0] == '1'
+        assert len(pulled) == FlowableStream.LOOKAHEAD + 1
+
+    def test_plain_strings_and_wrapped_cells(self):
+        """Test zwykłych napisów dla krótkich komórek i Paragraph tylko dla zbyt długich"""
+        layout = TableLayout(['Id', 'Opis'], 'Helvetica', col_widths=[50, 100])
+
+        cells = layout.row_cells(['1', 'bardzo długi opis, który nie zmieści się w wąskiej kolumnie tabeli'])
+
+        assert cells[0] == '1'
+        assert isinstance(cells[1], Paragraph)
+
+    def test_column_widths_cached(self):
+        """Test zapamiętania zmierzonych szerokości kolumn"""
+        headers = ['Test szerokości A', 'Test szerokości B']
+        first = measure_column_widths(headers, [['krótki', 'znacznie dłuższy tekst kolumny']], 'Helvetica', 9)
+        second = measure_column_widths(headers, [], 'Helvetica', 9)
+
+        assert second is first
+        assert first[1] > first[0]
+        assert abs(sum(first) - pdf_tables.PAGE_WIDTH) < 0.01
+
+    def test_wide_table_single_pass(self):
+        """Test tabeli z wieloma kolumnami - części kolumn z jednego przebiegu po danych"""
+        headers = [f'Kolumna {index}' for index in range(10)]
+        data = ([str(row)] * 10 for row in range(100))
+
+        assert [list(part) for part in column_parts(10)] == [list(range(5)), list(range(5, 10))]
+        buffer = build_table_pdf(data, headers, 'Szeroki raport', 'Helvetica')
+
+        assert buffer.getvalue().startswith(b'%PDF')
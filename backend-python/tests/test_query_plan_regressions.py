@@ -0,0 +1,184 @@
+"""
+Testy regresji planów gorących zapytań SQL kontrolerów (hot_query w app/controllers).
+
+Zapytania są wykonywane przez EXPLAIN (MySQL) / EXPLAIN QUERY PLAN (SQLite) na osobnej bazie
+ze skalowanym zbiorem danych i porównywane z wzorcami w tests/query_plan_baselines/<dialekt>.json:
+pogorszenie dostępu do tabeli (np. indeks → pełny skan), nowy skan, wzrost szacowanej liczby
+wierszy albo sortowanie poza indeksem kończy test błędem.
+
+- PLAN_TEST_DATABASE_URL - pusta baza do testu (domyślnie plik SQLite); tabele są tworzone i usuwane
+- UPDATE_PLAN_BASELINES=1 - zapisuje bieżące plany jako wzorce (po świadomej zmianie zapytania lub indeksów)
+- PLAN_DATASET_SCALE - mnożnik zbioru danych przy zapisie wzorców (domyślnie 1; test używa skali ze wzorca)
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.database import db
+from app.query_plans import HOT_QUERIES, compare_plans, hot_query_plans
+
+BASELINE_DIR = Path(__file__).with_name('query_plan_baselines')
+UPDATE_BASELINES = os.environ.get('UPDATE_PLAN_BASELINES') == '1'
+CONTROLLERS = ('reports', 'dashboard', 'groups', 'admin', 'user_tasks')
+
+
+def baseline_path(dialect):
+    return BASELINE_DIR / f'{dialect}.json'
+
+
+def load_baseline(dialect):
+    path = baseline_path(dialect)
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def seed_dataset(connection, scale):
+    """Skalowany zbiór danych: ~100 tys. wierszy na jednostkę skali, stałe ziarno losowania"""
+    tables = db.metadata.tables
+    generator = random.Random(2024)
+    start = datetime(2030, 1, 1)
+    users, groups, tags = 200 * scale, 20, 20
+    customers, invoices, tasks = 5000 * scale, 15000 * scale, 15000 * scale
+    contracts, meetings = 3000 * scale, 3000 * scale
+
+    def insert(name, rows):
+        rows = list(rows)
+        for offset in range(0, len(rows), 5000):
+            connection.execute(tables[name].insert(), rows[offset:offset + 5000])
+
+    def moment(days=365):
+        return start + timedelta(minutes=generator.randrange(days * 24 * 60))
+
+    insert('roles', [{'id': 1, 'name': 'Admin'}, {'id': 2, 'name': 'User'}])
+    insert('users', ({'id': i, 'username': f'plan{i}', 'email': f'plan{i}@test.pl', 'password_hash': 'x',
+                      'role_id': 1 if i == 1 else 2} for i in range(1, users + 1)))
+    insert('Groups', ({'Id': i, 'Name': f'Grupa {i}'} for i in range(1, groups + 1)))
+    insert('UserGroups', ({'UserId': i, 'GroupId': group} for i in range(1, users + 1)
+                          for group in {i % groups + 1, (i * 7) % groups + 1}))
+    insert('Tags', ({'Id': i, 'Name': f'Tag {i}'} for i in range(1, tags + 1)))
+    insert('Customers', ({'Id': i, 'Name': f'Klient {i}', 'Email': f'klient{i}@test.pl', 'Company': f'Firma {i % 900}',
+                          'CreatedAt': moment(), 'AssignedGroupId': i % groups + 1,
+                          'AssignedUserId': i % users + 1} for i in range(1, customers + 1)))
+    insert('CustomerTags', ({'CustomerId': i, 'TagId': i % tags + 1} for i in range(1, customers + 1)))
+    insert('Invoices', ({'Id': i, 'Number': f'FV/{i}', 'CustomerId': generator.randint(1, customers),
+                         'IssuedAt': moment(), 'DueDate': moment(400), 'IsPaid': i % 3 != 0,
+                         'TotalAmount': Decimal(generator.randint(100, 1_000_000)).scaleb(-2),
+                         'AssignedGroupId': i % groups + 1, 'Status': 'Paid' if i % 3 else 'Pending'}
+                        for i in range(1, invoices + 1)))
+    insert('InvoiceTags', ({'InvoiceId': i, 'TagId': i % tags + 1} for i in range(1, invoices + 1, 3)))
+    insert('Payments', ({'InvoiceId': i, 'PaidAt': moment(), 'Amount': Decimal('100.00')}
+                        for i in range(1, invoices + 1, 2)))
+    insert('Tasks', ({'Id': i, 'Title': f'Zadanie {i}', 'UserId': i % users + 1,
+                      'CustomerId': generator.randint(1, customers), 'AssignedGroupId': i % groups + 1,
+                      'DueDate': moment(), 'Completed': i % 4 == 0} for i in range(1, tasks + 1)))
+    insert('TaskTags', ({'TaskId': i, 'TagId': i % tags + 1} for i in range(1, tasks + 1, 3)))
+    insert('Contracts', ({'Id': i, 'Title': f'Kontrakt {i}', 'CustomerId': generator.randint(1, customers),
+                          'StartDate': moment(), 'EndDate': moment(800), 'NetAmount': Decimal('1000.00'),
+                          'ResponsibleGroupId': i % groups + 1} for i in range(1, contracts + 1)))
+    insert('ContractTags', ({'ContractId': i, 'TagId': i % tags + 1} for i in range(1, contracts + 1)))
+    insert('Meetings', ({'Id': i, 'Topic': f'Spotkanie {i}', 'ScheduledAt': moment(),
+                         'CustomerId': generator.randint(1, customers), 'AssignedGroupId': i % groups + 1}
+                        for i in range(1, meetings + 1)))
+    insert('MeetingTags', ({'MeetingId': i, 'TagId': i % tags + 1} for i in range(1, meetings + 1)))
+    insert('Reminders', ({'Note': 'Przypomnienie', 'RemindAt': moment(), 'UserId': i % users + 1}
+                         for i in range(3000 * scale)))
+    insert('Messages', ({'Subject': 'Temat', 'Body': 'Treść', 'SenderUserId': i % users + 1,
+                         'RecipientUserId': (i * 13) % users + 1, 'SentAt': moment(), 'IsRead': i % 2 == 0}
+                        for i in range(10000 * scale)))
+    insert('Notes', ({'Content': 'Notatka', 'CustomerId': generator.randint(1, customers), 'UserId': i % users + 1}
+                     for i in range(5000 * scale)))
+    insert('LoginHistory', ({'UserId': i % users + 1, 'LoginTime': moment(), 'IpAddress': '127.0.0.1'}
+                            for i in range(10000 * scale)))
+    insert('SystemLogs', ({'Level': 'INFO', 'Message': 'Log', 'Timestamp': moment()} for i in range(5000 * scale)))
+
+    # Statystyki dla planisty - plany jak na produkcyjnej bazie, nie na pustych tabelach
+    if connection.dialect.name == 'mysql':
+        for table in db.metadata.sorted_tables:
+            connection.exec_driver_sql(f'ANALYZE TABLE `{table.name}`')
+    else:
+        connection.exec_driver_sql('ANALYZE')
+
+
+@pytest.fixture(scope='module')
+def plan_engine(app, tmp_path_factory):
+    """Osobna baza ze skalowanym zbiorem danych (aplikacja - rejestracja zapytań kontrolerów)"""
+    url = os.environ.get('PLAN_TEST_DATABASE_URL') or \
+        f"sqlite:///{tmp_path_factory.mktemp('query_plans') / 'plans.db'}"
+    engine = create_engine(url)
+    baseline = load_baseline(engine.dialect.name)
+    scale = int(os.environ.get('PLAN_DATASET_SCALE', 1)) if UPDATE_BASELINES or not baseline else baseline['scale']
+
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        seed_dataset(connection, scale)
+    engine.info = {'scale': scale}
+    try:
+        yield engine
+    finally:
+        db.metadata.drop_all(engine)
+        engine.dispose()
+
+
+class TestQueryPlanRegressions:
+    """Testy planów zapytań kontrolerów względem zapisanych wzorców"""
+
+    def test_controllers_register_hot_queries(self, app):
+        """Test rejestracji surowych zapytań SQL wszystkich kontrolerów z przykładowymi parametrami"""
+        prefixes = {name.split('.')[0] for name in HOT_QUERIES}
+        assert set(CONTROLLERS) <= prefixes
+        for hot in HOT_QUERIES.values():
+            assert 'NOW()' not in hot.sql.upper()
+
+    def test_plans_match_baselines(self, plan_engine):
+        """Test planów wszystkich gorących zapytań - żaden nie może być gorszy niż wzorzec"""
+        dialect = plan_engine.dialect.name
+        with plan_engine.connect() as connection:
+            current = hot_query_plans(connection)
+
+        if UPDATE_BASELINES:
+            BASELINE_DIR.mkdir(exist_ok=True)
+            with open(baseline_path(dialect), 'w', encoding='utf-8') as baseline_file:
+                json.dump({'scale': plan_engine.info['scale'], 'queries': current}, baseline_file,
+                          ensure_ascii=False, indent=2, sort_keys=True)
+                baseline_file.write('\n')
+            pytest.skip(f'Zapisano wzorce planów: {baseline_path(dialect)}')
+
+        baseline = load_baseline(dialect)
+        if baseline is None:
+            pytest.skip(f'Brak wzorców planów dla {dialect} - uruchom z UPDATE_PLAN_BASELINES=1')
+
+        assert sorted(current) == sorted(baseline['queries']), \
+            'Zmienił się zestaw gorących zapytań - zaktualizuj wzorce (UPDATE_PLAN_BASELINES=1)'
+        regressions = {name: compare_plans(baseline['queries'][name], plan) for name, plan in current.items()}
+        regressions = {name: found for name, found in regressions.items() if found}
+        assert not regressions, 'Pogorszone plany zapytań:\n' + '\n'.join(
+            f'  {name}: {"; ".join(found)}' for name, found in sorted(regressions.items()))
+
+    def test_degraded_plan_is_detected(self, plan_engine):
+        """Test wykrycia pogorszenia - bez indeksu ix_Tasks_CustomerId zadania grupy czytają całą tabelę"""
+        index = next(item for item in db.metadata.tables['Tasks'].indexes if item.name == 'ix_Tasks_CustomerId')
+        with plan_engine.connect() as connection:
+            before = hot_query_plans(connection)['reports.group_tasks']
+
+        index.drop(bind=plan_engine)
+        # Nowe połączenia - pysqlite trzyma skompilowane EXPLAIN w pamięci podręcznej połączenia
+        plan_engine.dispose()
+        try:
+            with plan_engine.connect() as connection:
+                after = hot_query_plans(connection)['reports.group_tasks']
+        finally:
+            index.create(bind=plan_engine)
+            plan_engine.dispose()
+
+        assert compare_plans(before, before) == []
+        regressions = compare_plans(before, after)
+        assert regressions and any('Tasks' in regression for regression in regressions)
@@ -0,0 +1,94 @@
+"""
+Testy indeksów zadeklarowanych w modelach i doradcy indeksów (app/query_plans.py, /api/admin/index-advisor)
+"""
+import json
+from app.database import db
+from app.models import Tag
+from app.query_plans import (QueryCapture, advise, create_missing_indexes, explain, missing_indexes,
+                             normalize_sql, query_capture)
+
+
+class TestQueryPlans:
+    """Testy indeksów, planów zapytań i propozycji indeksów"""
+
+    def test_declared_indexes_created_without_duplicates(self, app):
+        """Test tworzenia brakujących indeksów - indeks o tych samych kolumnach pod inną nazwą wystarcza"""
+        with app.app_context():
+            assert missing_indexes() == []
+
+            db.session.execute(db.text('DROP INDEX ix_Notes_CustomerId'))
+            db.session.execute(db.text('CREATE INDEX idx_notes_customer_id ON Notes (CustomerId)'))
+            db.session.commit()
+            assert missing_indexes() == []
+
+            db.session.execute(db.text('DROP INDEX idx_notes_customer_id'))
+            db.session.commit()
+            assert [index.name for index in missing_indexes()] == ['ix_Notes_CustomerId']
+            assert create_missing_indexes() == ['ix_Notes_CustomerId']
+            assert missing_indexes() == []
+
+    def test_explain_access_types(self, app):
+        """Test sprowadzenia planu SQLite do wspólnej postaci (indeks, klucz główny, pełny skan)"""
+        with app.app_context(), db.engine.connect() as connection:
+            by_email = explain(connection, 'SELECT Id FROM Customers WHERE Email = ?', ('a@b.pl',))
+            assert [(step.table, step.access, step.index) for step in by_email] == \
+                [('Customers', 'index', 'ix_Customers_Email')]
+
+            by_tag = explain(connection, 'SELECT c.Id FROM Customers c JOIN CustomerTags ct '
+                                         'ON ct.CustomerId = c.Id WHERE ct.TagId = ?', (1,))
+            assert {(step.table, step.access) for step in by_tag} == \
+                {('CustomerTags', 'index'), ('Customers', 'primary_key')}
+
+            assert explain(connection, 'SELECT Id FROM Tags WHERE Name = ?', ('x',))[0].access == 'full_scan'
+
+    def test_advisor_suggests_missing_index(self, app):
+        """Test raportu pełnego skanu z propozycją indeksu na kolumnach warunku WHERE"""
+        with app.app_context():
+            db.session.add_all([Tag(Name=f'Plan tag {i}') for i in range(5)])
+            db.session.commit()
+
+            report = advise([{'statement': 'SELECT t.Id FROM Tags t WHERE t.Name = ? ORDER BY t.Id',
+                              'parameters': ['Plan tag 1'], 'calls': 3, 'totalMs': 1.5}], min_rows=5)
+            scan = report[0]['fullScans'][0]
+            assert (scan['table'], scan['alias']) == ('Tags', 't')
+            assert scan['suggestion']['columns'] == ['Name']
+            assert scan['suggestion']['sql'] == 'CREATE INDEX "ix_Tags_Name" ON "Tags" ("Name")'
+            assert report[0]['calls'] == 3
+
+            # Mała tabela - pełny skan nie jest raportowany
+            assert advise([{'sql': 'SELECT Id FROM Tags WHERE Name = ?', 'parameters': ['x']}],
+                          min_rows=10 ** 6)[0]['fullScans'] == []
+
+            # Indeks zadeklarowany w modelu, usunięty z bazy
+            db.session.execute(db.text('DROP INDEX ix_Payments_PaidAt'))
+            db.session.commit()
+            report = advise([{'sql': 'SELECT SUM(Amount) FROM Payments WHERE PaidAt >= ?',
+                              'parameters': ['2030-01-01']}], min_rows=0)
+            assert report[0]['fullScans'][0]['suggestion']['declaredIndex'] == 'ix_Payments_PaidAt'
+            create_missing_indexes()
+
+    def test_capture_and_admin_endpoints(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test przechwytywania zapytań oraz endpointów eksportu i doradcy"""
+        capture = QueryCapture(size=2)
+        capture.record('SELECT * FROM A WHERE Id IN (?, ?)', (1, 2), 5.0)
+        capture.record('SELECT  *  FROM A WHERE Id IN (?, ?, ?)', (1, 2, 3), 1.0)
+        capture.record('SELECT * FROM B', (), 0.5)
+        capture.record('SELECT * FROM C', (), 2.0)
+        assert [(entry['sql'], entry['calls']) for entry in capture.top()] == \
+            [('SELECT * FROM A WHERE Id IN (...)', 2), ('SELECT * FROM C', 1)]
+        assert normalize_sql('SELECT 1\n  FROM x') == 'SELECT 1 FROM x'
+
+        query_capture.clear()
+        assert client.get('/api/Customers/', headers=auth_headers_admin).status_code == 200
+        captured = json.loads(client.get('/api/admin/query-capture', headers=auth_headers_admin).data)
+        assert any('FROM "Customers"' in entry['sql'] and entry['calls'] >= 1 for entry in captured)
+
+        response = client.get('/api/admin/index-advisor?minRows=0', headers=auth_headers_admin)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['missingIndexes'] == []
+        assert data['queries'] and all('plan' in item or 'error' in item for item in data['queries'])
+
+        assert client.get('/api/admin/index-advisor', headers=auth_headers_user).status_code == 403
+        assert client.delete('/api/admin/query-capture', headers=auth_headers_admin).status_code == 200
+        assert len(query_capture) <= 2  # tylko zapytania uwierzytelnienia tego żądania
@@ -0,0 +1,152 @@
+"""
+Testy harmonogramu przypomnień i kanału push
+"""
+import json
+from datetime import datetime, timedelta
+from app.database import db
+from app.models import Reminder, Notification
+from app.push import PushHub, hub
+from app.reminder_scheduler import ReminderRelay, ReminderScheduler, fire_reminder
+
+
+class TestReminderScheduler:
+    """Testy kopca przypomnień"""
+
+    def test_fires_due_reminder_once(self, app):
+        """Test wysłania zaległego przypomnienia dokładnie raz"""
+        with app.app_context():
+            now = datetime.utcnow()
+            reminder = Reminder(Note='Zadzwoń do klienta', RemindAt=now - timedelta(minutes=1), UserId=2)
+            db.session.add(reminder)
+            db.session.commit()
+
+            subscription = hub.subscribe(2)
+            try:
+                scheduler = ReminderScheduler()
+                assert scheduler.tick(now) >= 1
+                assert scheduler.tick(now) == 0
+
+                event, data = subscription.get_nowait()
+                assert event == 'notification'
+                assert 'Zadzwoń do klienta' in data['message']
+            finally:
+                hub.unsubscribe(2, subscription)
+
+            assert Reminder.query.get(reminder.Id).FiredAt is not None
+            assert Notification.query.filter_by(UserId=2, Message='Przypomnienie: Zadzwoń do klienta').count() == 1
+
+            # Drugi harmonogram (inny proces) nie wyśle przypomnienia ponownie
+            assert ReminderScheduler().tick(now) == 0
+
+    def test_rescheduled_reminder_uses_new_time(self, app):
+        """Test przesunięcia przypomnienia - stary wpis w kopcu jest pomijany"""
+        with app.app_context():
+            now = datetime.utcnow()
+            reminder = Reminder(Note='Przesunięte', RemindAt=now + timedelta(minutes=5), UserId=2)
+            db.session.add(reminder)
+            db.session.commit()
+
+            scheduler = ReminderScheduler()
+            scheduler.load_window(now)
+            scheduler.schedule(reminder.Id, now + timedelta(minutes=30))
+
+            assert reminder.Id not in scheduler.pop_due(now + timedelta(minutes=10))
+            assert reminder.Id in scheduler.pop_due(now + timedelta(minutes=31))
+
+    def test_cancel_and_outside_window(self, app):
+        """Test anulowania i przypomnień poza oknem"""
+        with app.app_context():
+            now = datetime.utcnow()
+            scheduler = ReminderScheduler(window_seconds=600)
+            scheduler.load_window(now)
+            scheduler.schedule(1001, now + timedelta(minutes=1))
+            scheduler.schedule(1002, now + timedelta(hours=2))
+            scheduler.cancel(1001)
+
+            due = scheduler.pop_due(now + timedelta(hours=3))
+            assert 1001 not in due and 1002 not in due
+            assert scheduler.seconds_until_next(now) <= 600
+
+    def test_relay_publishes_reminders_fired_elsewhere(self, app):
+        """Test przekazania przypomnienia wysłanego w innym procesie (sidecar) do kanału push"""
+        with app.app_context():
+            now = datetime.utcnow()
+            relay = ReminderRelay()
+            assert relay.tick(now) == 0
+
+            reminder = Reminder(Note='Z procesu sidecar', RemindAt=now, UserId=2)
+            db.session.add(reminder)
+            db.session.commit()
+            subscription = hub.subscribe(2)
+            try:
+                # Publikacja w innym procesie nie trafia do kolejek tego procesu
+                hub.unsubscribe(2, subscription)
+                assert fire_reminder(reminder.Id, now + timedelta(seconds=1)) is not None
+                subscription = hub.subscribe(2)
+
+                assert relay.tick(now + timedelta(seconds=5)) == 1
+                assert relay.tick(now + timedelta(seconds=10)) == 0
+
+                event, data = subscription.get_nowait()
+                assert event == 'notification'
+                assert data['message'] == 'Przypomnienie: Z procesu sidecar'
+                assert subscription.empty()
+            finally:
+                hub.unsubscribe(2, subscription)
+
+
+class TestPushHub:
+    """Testy rejestru subskrypcji push"""
+
+    def test_publish_to_subscribers(self):
+        """Test dostarczenia zdarzenia tylko do subskrybentów użytkownika"""
+        push_hub = PushHub()
+        first = push_hub.subscribe(1)
+        other = push_hub.subscribe(2)
+
+        assert push_hub.publish(1, 'notification', {'id': 5}) == 1
+        assert first.get_nowait() == ('notification', {'id': 5})
+        assert other.empty()
+
+        push_hub.unsubscribe(1, first)
+        assert push_hub.subscriber_count(1) == 0
+        assert push_hub.publish(1, 'notification', {'id': 6}) == 0
+
+
+class TestRemindersEndpoints:
+    """Testy endpointów przypomnień współpracujących z harmonogramem"""
+
+    def test_pending_filter(self, app, client, auth_headers_user):
+        """Test filtra ?pending=true"""
+        response = client.post('/api/Reminders/', headers=auth_headers_user,
+                               data=json.dumps({'note': 'Jutro', 'remindAt': (datetime.utcnow() + timedelta(days=1)).isoformat() + 'Z'}))
+        assert response.status_code == 201
+        created = json.loads(response.data)
+        assert created['fired_at'] is None
+
+        response = client.get('/api/Reminders/?pending=true', headers=auth_headers_user)
+        reminders = json.loads(response.data)
+        assert created['id'] in [reminder['id'] for reminder in reminders]
+        assert all(reminder['fired_at'] is None for reminder in reminders)
+
+    def test_reschedule_resets_fired(self, app, client, auth_headers_user):
+        """Test zmiany terminu wysłanego przypomnienia"""
+        with app.app_context():
+            reminder = Reminder(Note='Wysłane', RemindAt=datetime.utcnow() - timedelta(hours=1),
+                                FiredAt=datetime.utcnow(), UserId=2)
+            db.session.add(reminder)
+            db.session.commit()
+            reminder_id = reminder.Id
+
+        new_time = (datetime.utcnow() + timedelta(hours=1)).isoformat() + 'Z'
+        response = client.put(f'/api/Reminders/{reminder_id}', headers=auth_headers_user,
+                              data=json.dumps({'remindAt': new_time}))
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['fired_at'] is None
+
+    def test_stream_requires_auth(self, client):
+        """Test strumienia powiadomień bez tokenu"""
+        response = client.get('/api/Notifications/stream')
+
+        assert response.status_code == 401
@@ -0,0 +1,123 @@
+"""
+Testy harmonogramu zadań i serwowania wygenerowanych raportów
+"""
+import json
+from datetime import datetime
+import pytest
+from app.scheduler import CronExpression, CronError
+
+
+class TestCronExpression:
+    """Testy parsera wyrażeń cron"""
+
+    def test_next_run_daily(self):
+        """Test codziennego zadania o 2:30"""
+        cron = CronExpression('30 2 * * *')
+        assert cron.next_after(datetime(2024, 5, 10, 12, 0)) == datetime(2024, 5, 11, 2, 30)
+        assert cron.next_after(datetime(2024, 5, 10, 1, 0)) == datetime(2024, 5, 10, 2, 30)
+
+    def test_next_run_weekday(self):
+        """Test zadania w poniedziałki (1) o 5:00"""
+        cron = CronExpression('0 5 * * 1')
+        # 2024-05-10 to piątek
+        assert cron.next_after(datetime(2024, 5, 10, 12, 0)) == datetime(2024, 5, 13, 5, 0)
+
+    def test_sunday_as_seven(self):
+        """Test niedzieli zapisanej jako 7 - w zakresach, listach i krokach"""
+        assert CronExpression('0 5 * * 1-7').weekdays == set(range(7))
+        assert CronExpression('0 5 * * 5,7').weekdays == {5, 0}
+        assert CronExpression('0 5 * * 7').weekdays == CronExpression('0 5 * * 0').weekdays == {0}
+        assert CronExpression('0 5 * * 1-7/2').weekdays == {1, 3, 5, 0}
+        assert CronExpression('0 5 * * */7').weekdays == {0}
+        # 2024-05-10 to piątek, 2024-05-12 to niedziela
+        assert CronExpression('0 5 * * 7').next_after(datetime(2024, 5, 10, 12, 0)) == datetime(2024, 5, 12, 5, 0)
+
+    def test_next_run_step(self):
+        """Test kroku */15"""
+        cron = CronExpression('*/15 * * * *')
+        assert cron.next_after(datetime(2024, 5, 10, 12, 7)) == datetime(2024, 5, 10, 12, 15)
+        assert cron.next_after(datetime(2024, 5, 10, 12, 45)) == datetime(2024, 5, 10, 13, 0)
+
+    @pytest.mark.parametrize('expression', ['* * *', '61 * * * *', 'a * * * *', '*/0 * * * *', '0 5 * * 8'])
+    def test_invalid_expression(self, expression):
+        """Test nieprawidłowych wyrażeń"""
+        with pytest.raises(CronError):
+            CronExpression(expression)
+
+
+class TestSchedulesEndpoints:
+    """Testy dla endpointów /api/admin/schedules"""
+
+    def test_get_job_types(self, client, auth_headers_admin):
+        """Test listy typów zadań"""
+        response = client.get('/api/admin/schedules/job-types', headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        names = [job_type['name'] for job_type in json.loads(response.data)]
+        assert {'group_pdf', 'tag_pdf', 'export'} <= set(names)
+
+    def test_schedules_require_admin(self, client, auth_headers_user):
+        """Test dostępu zwykłego użytkownika"""
+        response = client.get('/api/admin/schedules/', headers=auth_headers_user)
+
+        assert response.status_code == 403
+        assert client.get('/api/admin/schedules/').status_code == 401
+
+    def test_create_schedule_invalid_cron(self, client, auth_headers_admin):
+        """Test walidacji wyrażenia cron"""
+        response = client.post('/api/admin/schedules/',
+                               headers=auth_headers_admin,
+                               data=json.dumps({'name': 'Zły', 'jobType': 'export', 'cron': 'co noc'}),
+                               content_type='application/json')
+
+        assert response.status_code == 400
+
+    def test_scheduled_export_served_as_artifact(self, app, client, auth_headers_admin, tmp_path):
+        """Test pre-generowania eksportu i serwowania artefaktu z nagłówkiem świeżości"""
+        app.config['REPORT_ARTIFACTS_DIR'] = str(tmp_path)
+
+        response = client.post('/api/admin/schedules/',
+                               headers=auth_headers_admin,
+                               data=json.dumps({
+                                   'name': 'Nocny eksport klientów',
+                                   'jobType': 'export',
+                                   'cron': '0 2 * * *',
+                                   'parameters': {'entity': 'customers', 'format': 'csv'}
+                               }),
+                               content_type='application/json')
+        assert response.status_code == 201
+        job = json.loads(response.data)
+        assert job['nextRunAt'] is not None
+
+        response = client.post(f"/api/admin/schedules/{job['id']}/run", headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert json.loads(response.data)['job']['lastStatus'] == 'success'
+
+        response = client.get('/api/reports/export-customers?format=csv', headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert response.headers['X-Report-Source'] == 'artifact'
+        assert 'X-Report-Generated-At' in response.headers
+        assert 'Last-Modified' in response.headers
+
+        # ?live=true wymusza generowanie na żywo
+        response = client.get('/api/reports/export-customers?format=csv&live=true', headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert response.headers['X-Report-Source'] == 'live'
+
+    def test_run_due_jobs(self, app, client, auth_headers_admin, tmp_path):
+        """Test wykonania zadań, których termin minął"""
+        from app.database import db
+        from app.models import ScheduledJob
+        from app.scheduler import run_due_jobs
+
+        app.config['REPORT_ARTIFACTS_DIR'] = str(tmp_path)
+        job = ScheduledJob(Name='Eksport płatności', JobType='export', Cron='0 3 * * *',
+                           Parameters=json.dumps({'entity': 'payments', 'format': 'xlsx'}),
+                           IsActive=True, NextRunAt=datetime(2000, 1, 1))
+        db.session.add(job)
+        db.session.commit()
+
+        assert run_due_jobs(app) >= 1
+        db.session.refresh(job)
+        assert job.LastStatus == 'success'
+        assert job.NextRunAt > datetime.now()
@@ -0,0 +1,168 @@
+"""
+Testy synchronizacji przyrostowej (/api/sync)
+"""
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from app.database import db
+from app.models import ChangeLog, Customer, Task
+from app.change_tracking import _next_commit_sequence, prune_changelog
+
+
+def sync(client, headers, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    return client.get(f'/api/sync?{query}', headers=headers)
+
+
+class TestSyncEndpoint:
+    """Testy endpointu /api/sync"""
+
+    def test_full_sync(self, client, auth_headers_user):
+        """Test pełnej synchronizacji bez kursora"""
+        response = sync(client, auth_headers_user, types='customers,tasks')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['full'] is True
+        assert set(data['changes']) == {'customers', 'tasks'}
+        assert all(task['userId'] == 2 for task in data['changes']['tasks']['upserts'])
+
+    def test_full_sync_pages(self, app, client, auth_headers_user):
+        """Test stronicowania pełnej synchronizacji po (typ, Id) - bez pominięć i powtórzeń"""
+        with app.app_context():
+            db.session.add_all([Task(Title=f'Strona pełnej synchronizacji {index}', UserId=2) for index in range(3)])
+            db.session.commit()
+
+        everything = json.loads(sync(client, auth_headers_user, types='customers,tasks', limit=2000).data)
+        assert everything['hasMore'] is False
+        expected = {name: [item['id'] for item in everything['changes'][name]['upserts']]
+                    for name in ('customers', 'tasks')}
+
+        collected = {'customers': [], 'tasks': []}
+        params = {'types': 'customers,tasks', 'limit': 2}
+        pages = 0
+        while True:
+            data = json.loads(sync(client, auth_headers_user, **params).data)
+            pages += 1
+            assert data['full'] is True
+            assert data['cursor'] == everything['cursor']
+            for name in collected:
+                assert len(data['changes'][name]['upserts']) <= 2
+                collected[name].extend(item['id'] for item in data['changes'][name]['upserts'])
+            if not data['hasMore']:
+                break
+            params['snapshot'] = data['snapshotCursor']
+        assert collected == expected
+        assert pages > 1
+
+        response = sync(client, auth_headers_user, types='customers', snapshot=f"{everything['cursor']}_tasks_1")
+        assert response.status_code == 400
+
+    def test_changes_since_cursor(self, app, client, auth_headers_user):
+        """Test zwracania tylko zmian po kursorze, z nagrobkami usuniętych encji"""
+        cursor = json.loads(sync(client, auth_headers_user, types='customers').data)['cursor']
+
+        with app.app_context():
+            updated = Customer(Name='Synchronizowany klient')
+            removed = Customer(Name='Usunięty klient')
+            db.session.add_all([updated, removed])
+            db.session.commit()
+            updated.Phone = '500600700'
+            db.session.delete(removed)
+            db.session.commit()
+            updated_id, removed_id = updated.Id, removed.Id
+
+        data = json.loads(sync(client, auth_headers_user, since=cursor, types='customers').data)
+        changes = data['changes']['customers']
+
+        assert [customer['id'] for customer in changes['upserts']] == [updated_id]
+        assert changes['upserts'][0]['phone'] == '500600700'
+        assert changes['deletes'] == [removed_id]
+        assert data['cursor'] != cursor
+
+        # Kolejne wywołanie z nowym kursorem nie zwraca nic
+        data = json.loads(sync(client, auth_headers_user, since=data['cursor'], types='customers').data)
+        assert data['changes']['customers'] == {'upserts': [], 'deletes': []}
+
+    def test_pagination(self, app, client, auth_headers_user):
+        """Test stronicowania zmian"""
+        cursor = json.loads(sync(client, auth_headers_user, types='tasks').data)['cursor']
+        with app.app_context():
+            for index in range(3):
+                db.session.add(Task(Title=f'Zadanie sync {index}', UserId=2, Completed=False))
+            db.session.commit()
+
+        first = json.loads(sync(client, auth_headers_user, since=cursor, types='tasks', limit=2).data)
+        assert first['hasMore'] is True
+        assert len(first['changes']['tasks']['upserts']) == 2
+
+        second = json.loads(sync(client, auth_headers_user, since=first['cursor'], types='tasks', limit=2).data)
+        assert second['hasMore'] is False
+        assert len(second['changes']['tasks']['upserts']) == 1
+
+    def test_other_users_tasks_hidden(self, app, client, auth_headers_user):
+        """Test izolacji zadań innych użytkowników"""
+        cursor = json.loads(sync(client, auth_headers_user, types='tasks').data)['cursor']
+        with app.app_context():
+            db.session.add(Task(Title='Zadanie admina', UserId=1, Completed=False))
+            db.session.commit()
+
+        data = json.loads(sync(client, auth_headers_user, since=cursor, types='tasks').data)
+        assert data['changes']['tasks']['upserts'] == []
+
+    def test_invalid_type(self, client, auth_headers_user):
+        """Test nieznanego typu encji"""
+        response = sync(client, auth_headers_user, types='unknown')
+
+        assert response.status_code == 400
+
+    def test_commit_order_cursor(self, app, client, auth_headers_user):
+        """Test wpisu z niższym Id zatwierdzonego po wyższym - długa transakcja nie jest pomijana"""
+        with app.app_context():
+            slow = Task(Title='Długa transakcja', UserId=2, Completed=False)
+            db.session.add(slow)
+            db.session.commit()
+            slow_id = slow.Id
+        cursor = json.loads(sync(client, auth_headers_user, types='tasks').data)['cursor']
+
+        with app.app_context():
+            # Wpis długiej transakcji - Id nadane teraz, numer zatwierdzenia dopiero przy commit
+            pending_id = db.session.execute(insert(ChangeLog.__table__).values(
+                EntityType='tasks', EntityId=slow_id, Operation='upsert', OwnerUserId=2,
+                ChangedAt=datetime.utcnow(), TxnToken='dluga'
+            )).inserted_primary_key[0]
+            db.session.commit()
+            fast = Task(Title='Szybka transakcja', UserId=2, Completed=False)
+            db.session.add(fast)
+            db.session.commit()
+            fast_id = fast.Id
+
+        data = json.loads(sync(client, auth_headers_user, since=cursor, types='tasks').data)
+        assert [task['id'] for task in data['changes']['tasks']['upserts']] == [fast_id]
+
+        with app.app_context():
+            commit_seq = _next_commit_sequence(db.session.connection())
+            db.session.execute(update(ChangeLog.__table__).where(ChangeLog.Id == pending_id)
+                               .values(CommitSeq=commit_seq))
+            db.session.commit()
+
+        data = json.loads(sync(client, auth_headers_user, since=data['cursor'], types='tasks').data)
+        assert [task['id'] for task in data['changes']['tasks']['upserts']] == [slow_id]
+
+    def test_invalid_cursor(self, client, auth_headers_user):
+        """Test nieprawidłowego kursora"""
+        assert sync(client, auth_headers_user, since='abc').status_code == 400
+
+    def test_expired_cursor(self, app, client, auth_headers_user):
+        """Test kursora starszego niż usunięte wpisy dziennika i kursora w starym formacie (samo Id)"""
+        with app.app_context():
+            db.session.add(ChangeLog(EntityType='customers', EntityId=1, Operation='upsert', CommitSeq=1,
+                                     ChangedAt=datetime.utcnow() - timedelta(days=90)))
+            db.session.commit()
+            assert prune_changelog(30) >= 1
+
+        response = sync(client, auth_headers_user, since='0_0')
+
+        assert response.status_code == 410
+        assert json.loads(response.data)['fullSyncRequired'] is True
+        assert sync(client, auth_headers_user, since=0).status_code == 410
@@ -0,0 +1,124 @@
+"""
+Testy analityki zadań administratora (/api/admin/tasks, /api/admin/tasks/workload)
+"""
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.database import db
+from app.models import Group, Task, TaskAggregate
+from app.task_analytics import rebuild_task_aggregates
+
+
+def aggregate(scope_type, scope_id):
+    row = db.session.get(TaskAggregate, (scope_type, scope_id))
+    return (row.TotalTasks, row.PendingTasks) if row else (0, 0)
+
+
+def actual(column, scope_id):
+    total = Task.query.filter(column == scope_id).count()
+    pending = Task.query.filter(column == scope_id, Task.Completed.isnot(True)).count()
+    return total, pending
+
+
+class TestTaskAnalytics:
+    """Testy listy zadań i agregatów obciążenia"""
+
+    def test_aggregates_follow_orm_writes(self, app):
+        """Test przyrostowej aktualizacji agregatów przy zapisie, zmianie i usunięciu zadania"""
+        with app.app_context():
+            rebuild_task_aggregates()
+            group = Group(Name='Grupa analityki')
+            db.session.add(group)
+            db.session.commit()
+            group_id = group.Id
+
+            task = Task(Title='Analityka 1', UserId=2, AssignedGroupId=group_id, Completed=False)
+            db.session.add(task)
+            db.session.commit()
+            assert aggregate('group', group_id) == (1, 1)
+
+            task.Completed = True
+            db.session.commit()
+            assert aggregate('group', group_id) == (1, 0)
+
+            task.UserId = 1
+            db.session.commit()
+            db.session.delete(task)
+            db.session.commit()
+
+            assert aggregate('group', group_id) == (0, 0)
+            assert aggregate('user', 1) == actual(Task.UserId, 1)
+            assert aggregate('user', 2) == actual(Task.UserId, 2)
+
+    def test_bulk_operations_keep_aggregates(self, app, client, auth_headers_user):
+        """Test agregatów po operacjach zbiorczych (pominięte zdarzenia mapperów)"""
+        with app.app_context():
+            rebuild_task_aggregates()
+            tasks = [Task(Title=f'Analityka zbiorcza {index}', UserId=2, Completed=False) for index in range(4)]
+            db.session.add_all(tasks)
+            db.session.commit()
+            ids = [task.Id for task in tasks]
+
+        client.post('/api/user/tasks/bulk/complete', headers=auth_headers_user, data=json.dumps({'ids': ids[:2]}))
+        client.post('/api/user/tasks/bulk/reassign', headers=auth_headers_user,
+                    data=json.dumps({'ids': ids[2:3], 'userId': 1}))
+        client.post('/api/user/tasks/bulk/delete', headers=auth_headers_user, data=json.dumps({'ids': ids[3:]}))
+
+        with app.app_context():
+            assert aggregate('user', 1) == actual(Task.UserId, 1)
+            assert aggregate('user', 2) == actual(Task.UserId, 2)
+
+    def test_task_list_filters_and_cursor(self, app, client, auth_headers_admin):
+        """Test filtrów listy zadań i stronicowania kursorem (DueDate, Id)"""
+        base = datetime(2031, 3, 1)
+        with app.app_context():
+            group = Group(Name='Grupa listy zadań')
+            db.session.add(group)
+            db.session.commit()
+            group_id = group.Id
+            db.session.add_all([Task(Title=f'Lista {index}', UserId=2, AssignedGroupId=group_id,
+                                     DueDate=base + timedelta(days=index // 2), Completed=index == 4)
+                                for index in range(5)])
+            db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            url = f'/api/admin/tasks?groupId={group_id}&status=pending&limit=2' + (f'&cursor={cursor}' if cursor else '')
+            response = client.get(url, headers=auth_headers_admin)
+            assert response.status_code == 200
+            seen.extend(json.loads(response.data))
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+
+        assert [item['title'] for item in seen] == ['Lista 0', 'Lista 1', 'Lista 2', 'Lista 3']
+        assert seen[0]['user'] == {'username': 'user'}
+
+        response = client.get(f'/api/admin/tasks?groupId={group_id}&dueFrom=2031-03-02&dueTo=2031-03-03',
+                              headers=auth_headers_admin)
+        assert [item['title'] for item in json.loads(response.data)] == ['Lista 2', 'Lista 3']
+
+    def test_workload_and_dashboard(self, app, client, auth_headers_admin):
+        """Test podsumowania obciążenia użytkowników i grup z agregatów"""
+        with app.app_context():
+            rebuild_task_aggregates()
+            expected = actual(Task.UserId, 2)
+            total_tasks = db.session.query(func.count(Task.Id)).scalar()
+
+        response = client.get('/api/admin/tasks/workload?by=user', headers=auth_headers_admin)
+        assert response.status_code == 200
+        user_row = next(item for item in json.loads(response.data) if item['userId'] == 2)
+        assert (user_row['totalTasks'], user_row['pendingTasks']) == expected
+        assert user_row['name'] == 'user'
+        assert 'overdueTasks' in user_row
+
+        assert client.get('/api/admin/tasks/workload?by=group', headers=auth_headers_admin).status_code == 200
+        dashboard = json.loads(client.get('/api/admin/dashboard', headers=auth_headers_admin).data)
+        assert dashboard['tasksCount'] == total_tasks
+
+    def test_validation_and_permissions(self, client, auth_headers_admin, auth_headers_user):
+        """Test nieprawidłowych filtrów i braku uprawnień"""
+        assert client.get('/api/admin/tasks?status=unknown', headers=auth_headers_admin).status_code == 400
+        assert client.get('/api/admin/tasks?cursor=zly', headers=auth_headers_admin).status_code == 400
+        assert client.get('/api/admin/tasks/workload?by=role', headers=auth_headers_admin).status_code == 400
+        assert client.get('/api/admin/tasks', headers=auth_headers_user).status_code == 403
@@ -0,0 +1,154 @@
+"""
+Testy widoczności wierszy według członkostwa w grupach (app/visibility.py)
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from app.database import db
+from app.http_cache import bump_table_version
+from app.models import Contract, Customer, Group, Invoice, Meeting, Tag
+from app.models.group import user_groups
+
+
+def ids(response):
+    assert response.status_code == 200
+    return {item['id'] for item in json.loads(response.data)}
+
+
+class TestVisibility:
+    """Testy zawężania list do grup użytkownika"""
+
+    def test_lists_scoped_to_user_groups(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test list klientów, faktur, kontraktów i spotkań - własne grupy i wspólna pula"""
+        with app.app_context():
+            own, other = Group(Name='Widoczność - własna'), Group(Name='Widoczność - obca')
+            db.session.add_all([own, other])
+            db.session.flush()
+            db.session.execute(user_groups.insert().values(UserId=2, GroupId=own.Id))
+            # Jak w kontrolerze grup - zmiana członkostwa unieważnia zapamiętane grupy użytkownika
+            bump_table_version('UserGroups')
+
+            customers = {key: Customer(Name=f'Widoczność {key}', AssignedGroupId=group_id)
+                         for key, group_id in (('own', own.Id), ('other', other.Id), ('shared', None))}
+            db.session.add_all(customers.values())
+            db.session.flush()
+            invoices = {key: Invoice(Number=f'WID/{key}', CustomerId=customer.Id, TotalAmount=10,
+                                     AssignedGroupId=customer.AssignedGroupId)
+                        for key, customer in customers.items()}
+            contracts = {key: Contract(Title=f'Widoczność {key}', CustomerId=customer.Id,
+                                       ResponsibleGroupId=customer.AssignedGroupId)
+                         for key, customer in customers.items()}
+            meetings = {key: Meeting(Topic=f'Widoczność {key}', ScheduledAt=datetime(2031, 1, 1),
+                                     CustomerId=customer.Id, AssignedGroupId=customer.AssignedGroupId)
+                        for key, customer in customers.items()}
+            for rows in (invoices, contracts, meetings):
+                db.session.add_all(rows.values())
+            db.session.commit()
+            expected = {name: {key: row.Id for key, row in rows.items()}
+                        for name, rows in (('Customers', customers), ('Invoices', invoices),
+                                           ('Contracts', contracts), ('Meetings', meetings))}
+
+        for name, rows in expected.items():
+            visible = ids(client.get(f'/api/{name}/', headers=auth_headers_user))
+            assert {rows['own'], rows['shared']} <= visible
+            assert rows['other'] not in visible
+            assert set(rows.values()) <= ids(client.get(f'/api/{name}/', headers=auth_headers_admin))
+
+            response = client.get(f"/api/{name}/{rows['other']}", headers=auth_headers_user)
+            assert response.status_code == 404
+            assert client.get(f"/api/{name}/{rows['own']}", headers=auth_headers_user).status_code == 200
+
+        # Wybrane pola (SELECT kolumn) również zawężone
+        visible = ids(client.get('/api/Customers/?fields=id,name', headers=auth_headers_user))
+        assert expected['Customers']['other'] not in visible
+
+    def test_single_rows_and_groups_scoped(self, app, client, auth_headers_admin, auth_headers_user, user_token):
+        """Test szczegółów i statystyk grupy oraz zmiany, usunięcia i PDF faktury spoza grup użytkownika"""
+        with app.app_context():
+            own, other = Group(Name='Widoczność szczegółów - własna'), Group(Name='Widoczność szczegółów - obca')
+            db.session.add_all([own, other])
+            db.session.flush()
+            db.session.execute(user_groups.insert().values(UserId=2, GroupId=own.Id))
+            bump_table_version('UserGroups')
+            customer = Customer(Name='Widoczność szczegółów obca', AssignedGroupId=other.Id)
+            db.session.add(customer)
+            db.session.flush()
+            invoice = Invoice(Number='WID/szczegóły', CustomerId=customer.Id, TotalAmount=10,
+                              AssignedGroupId=other.Id)
+            db.session.add(invoice)
+            db.session.commit()
+            own_id, other_id, invoice_id = own.Id, other.Id, invoice.Id
+
+        for url in (f'/api/Groups/{other_id}', f'/api/Groups/{other_id}/statistics'):
+            assert client.get(url, headers=auth_headers_user).status_code == 403
+            assert client.get(url, headers=auth_headers_admin).status_code == 200
+        assert client.get(f'/api/Groups/{own_id}', headers=auth_headers_user).status_code == 200
+        assert client.get(f'/api/Groups/{own_id}/statistics', headers=auth_headers_user).status_code == 200
+
+        invoice_url = f'/api/Invoices/{invoice_id}'
+        assert client.get(f'{invoice_url}/pdf?token={user_token}').status_code == 404
+        assert client.put(invoice_url, json={'isPaid': True}, headers=auth_headers_user).status_code == 404
+        assert client.delete(invoice_url, headers=auth_headers_user).status_code == 404
+        assert client.get(invoice_url, headers=auth_headers_admin).status_code == 200
+
+    def test_membership_change_refreshes_cache(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test unieważnienia zapamiętanych grup po dodaniu i usunięciu członka grupy"""
+        with app.app_context():
+            group = Group(Name='Widoczność - dołączana')
+            db.session.add(group)
+            db.session.flush()
+            customer = Customer(Name='Widoczność dołączana', AssignedGroupId=group.Id)
+            db.session.add(customer)
+            db.session.commit()
+            group_id, customer_id = group.Id, customer.Id
+
+        assert customer_id not in ids(client.get('/api/Customers/', headers=auth_headers_user))
+
+        client.post(f'/api/Groups/{group_id}/members/2', headers=auth_headers_admin)
+        assert customer_id in ids(client.get('/api/Customers/', headers=auth_headers_user))
+
+        client.delete(f'/api/Groups/{group_id}/members/2', headers=auth_headers_admin)
+        assert customer_id not in ids(client.get('/api/Customers/', headers=auth_headers_user))
+
+    def test_text_queries_and_sync_scoped(self, app, client, auth_headers_admin, auth_headers_user):
+        """Test eksportów, raportów tagów i grup, synchronizacji oraz zmian klienta spoza grup użytkownika"""
+        with app.app_context():
+            own, other = Group(Name='Widoczność tekstowa - własna'), Group(Name='Widoczność tekstowa - obca')
+            tag = Tag(Name='Widoczność tekstowa')
+            db.session.add_all([own, other, tag])
+            db.session.flush()
+            db.session.execute(user_groups.insert().values(UserId=2, GroupId=own.Id))
+            bump_table_version('UserGroups')
+            customers = {key: Customer(Name=f'Widoczność tekstowa {key}', AssignedGroupId=group_id)
+                         for key, group_id in (('own', own.Id), ('other', other.Id))}
+            db.session.add_all(customers.values())
+            db.session.flush()
+            for customer in customers.values():
+                customer.tags.append(tag)
+            db.session.commit()
+            customer_ids = {key: customer.Id for key, customer in customers.items()}
+            own_id, other_id, tag_id = own.Id, other.Id, tag.Id
+
+        response = client.get('/api/reports/export-customers?format=csv&columns=id', headers=auth_headers_user)
+        assert response.headers['X-Report-Source'] == 'live'
+        exported = {int(row[0]) for row in list(csv.reader(io.StringIO(response.data.decode('utf-8'))))[1:]}
+        assert customer_ids['own'] in exported and customer_ids['other'] not in exported
+
+        tagged = ids(client.get(f'/api/reports/tags/{tag_id}/customers', headers=auth_headers_user))
+        assert tagged == {customer_ids['own']}
+        assert ids(client.get(f'/api/reports/tags/{tag_id}/customers', headers=auth_headers_admin)) == \
+            set(customer_ids.values())
+
+        assert client.get(f'/api/reports/groups/{other_id}/customers', headers=auth_headers_user).status_code == 403
+        assert client.get(f'/api/reports/groups/{other_id}/pdf', headers=auth_headers_user).status_code == 403
+        assert client.get(f'/api/reports/groups/{own_id}/customers', headers=auth_headers_user).status_code == 200
+
+        snapshot = json.loads(client.get('/api/sync?types=customers', headers=auth_headers_user).data)
+        synced = {item['id'] for item in snapshot['changes']['customers']['upserts']}
+        assert customer_ids['own'] in synced and customer_ids['other'] not in synced
+
+        other_url = f"/api/Customers/{customer_ids['other']}"
+        assert client.put(other_url, json={'name': 'Przejęty'}, headers=auth_headers_user).status_code == 404
+        assert client.delete(other_url, headers=auth_headers_user).status_code == 404
+        assert client.get(other_url, headers=auth_headers_admin).status_code == 200
@@ -66,8 +66,9 @@ export default function TabLayout() {
   const fetchUnreadCount = useCallback(async () => {
     if (!token) return;
     try {
-      const response = await api.get(`/Notifications/unread-count`);
-      setUnreadCount(response.data.count || 0);
+      // Liczniki plakietek utrzymywane po stronie serwera (jedno lekkie zapytanie)
+      const response = await api.get(`/me/counters`);
+      setUnreadCount(response.data.unreadNotifications || 0);
     } catch (err) {
       console.error("Błąd pobierania liczby nieprzeczytanych powiadomień:", err);
     }
@@ -8,6 +8,7 @@ import UserCircleIcon from '@heroicons/react/24/solid/UserCircleIcon';
 import CheckCircleIcon from '@heroicons/react/24/solid/CheckCircleIcon';
 import { ClipboardDocumentListIcon, CalendarDaysIcon, DocumentDuplicateIcon, ChatBubbleLeftRightIcon, Cog6ToothIcon, BellIcon } from "@heroicons/react/24/solid";
 import api from '../services/api';
+import { subscribeNotifications } from '../services/notificationStream';
 import { formatDistanceToNow } from 'date-fns';
 import { pl } from 'date-fns/locale';
 import { parseBackendDate } from '../utils/dateUtils';
@@ -19,13 +20,6 @@ interface Notification {
     isRead: boolean;
 }
 
-interface Reminder {
-    id: number;
-    note: string;
-    remind_at: string;
-    user_id: number;
-}
-
 export default function Layout() {
     const { user, logout } = useAuth();
     const navigate = useNavigate();
@@ -35,35 +29,8 @@ export default function Layout() {
     const [newNotificationToast, setNewNotificationToast] = useState<Notification | null>(null);
     const navRef = useRef<HTMLDivElement>(null);
     const notificationsRef = useRef<HTMLDivElement>(null);
-    const [reminders, setReminders] = useState<Reminder[]>([]);
-    const [activeReminder, setActiveReminder] = useState<Reminder | null>(null);
-    const [shownReminders, setShownReminders] = useState<number[]>(() => {
-        const stored = localStorage.getItem('shownReminders');
-        return stored ? JSON.parse(stored) : [];
-    });
-    const [lastCheckedDate, setLastCheckedDate] = useState<string>(() => {
-        return localStorage.getItem('lastCheckedDate') || '';
-    });
     const [clock, setClock] = useState<string>("");
 
-    useEffect(() => {
-        localStorage.setItem('shownReminders', JSON.stringify(shownReminders));
-    }, [shownReminders]);
-
-    useEffect(() => {
-        if (lastCheckedDate) {
-            localStorage.setItem('lastCheckedDate', lastCheckedDate);
-        }
-    }, [lastCheckedDate]);
-
-    const resetShownRemindersIfNewDay = useCallback(() => {
-        const today = new Date().toDateString();
-        if (lastCheckedDate !== today) {
-            setShownReminders([]);
-            setLastCheckedDate(today);
-        }
-    }, [lastCheckedDate]);
-
     useEffect(() => {
         const updateClock = () => {
             const now = new Date();
@@ -119,99 +86,45 @@ export default function Layout() {
     };
 
     useEffect(() => {
-        const fetchReminders = async () => {
-            try {
-                const response = await api.get('/Reminders/');
-                const data = response.data.$values || response.data;
-                setReminders(data);
-                setShownReminders([]);
-            } catch (error) {
-                console.error('Błąd pobierania przypomnień:', error);
-            }
-        };
-        fetchReminders();
-        const interval = setInterval(fetchReminders, 2 * 60 * 1000);
-        return () => clearInterval(interval);
-    }, []);
-
-    useEffect(() => {
-        if (reminders.length > 0) {
-            resetShownRemindersIfNewDay();
-
-            const now = new Date();
-            const currentMinute = now.getMinutes();
-            const currentHour = now.getHours();
-            const currentDate = now.toDateString();
-
-            const found = reminders.find(r => {
-                if (shownReminders.includes(r.id)) {
-                    return false;
-                }
-
-                const reminderDate = parseBackendDate(r.remind_at);
-                const reminderMinute = reminderDate.getMinutes();
-                const reminderHour = reminderDate.getHours();
-                const reminderDateStr = reminderDate.toDateString();
-
-                // Sprawdź czy to dokładnie ta sama minuta (bez sekund)
-                return reminderDateStr === currentDate &&
-                    reminderHour === currentHour &&
-                    reminderMinute === currentMinute;
-            });
-
-            if (found) {
-                setActiveReminder(found);
-                setShownReminders(prev => [...prev, found.id]);
+        fetchNotifications();
+        // Nowe powiadomienia (także przypomnienia z harmonogramu) przychodzą strumieniem.
+        // Gdy strumień nie działa, lista jest odświeżana co 30 s (nowe powiadomienie pokazuje toast);
+        // przy działającym strumieniu rzadko - dla zdarzeń opublikowanych przez inne procesy backendu
+        let streamConnected = false;
+        let lastRefresh = Date.now();
+        const interval = setInterval(() => {
+            if (streamConnected && Date.now() - lastRefresh < 5 * 60 * 1000) {
+                return;
             }
-        }
-    }, [reminders, shownReminders, resetShownRemindersIfNewDay]);
-
-    useEffect(() => {
-        const checkReminders = () => {
-            resetShownRemindersIfNewDay();
-
-            const now = new Date();
-            const currentMinute = now.getMinutes();
-            const currentHour = now.getHours();
-            const currentDate = now.toDateString();
-
-            if (reminders.length === 0) {
+            lastRefresh = Date.now();
+            fetchNotifications();
+        }, 30000);
+        const unsubscribe = subscribeNotifications(notification => {
+            if (notification.isRead) {
                 return;
             }
-
-            const found = reminders.find(r => {
-                if (shownReminders.includes(r.id)) {
-                    return false;
+            setNotifications(prevNotifications => {
+                if (prevNotifications.some(prev => prev.id === notification.id)) {
+                    return prevNotifications;
                 }
-
-                const reminderDate = parseBackendDate(r.remind_at);
-                const reminderMinute = reminderDate.getMinutes();
-                const reminderHour = reminderDate.getHours();
-                const reminderDateStr = reminderDate.toDateString();
-
-                const dateMatches = reminderDateStr === currentDate;
-                const hourMatches = reminderHour === currentHour;
-                const minuteMatches = reminderMinute === currentMinute;
-
-                return dateMatches && hourMatches && minuteMatches;
+                setNewNotificationToast(notification);
+                setTimeout(() => {
+                    setNewNotificationToast(null);
+                }, 5000);
+                return [notification, ...prevNotifications];
             });
-
-            if (found) {
-                setActiveReminder(found);
-                setShownReminders(prev => [...prev, found.id]);
+        }, connected => {
+            // Po ponownym połączeniu lista nadrabia powiadomienia z czasu przerwy
+            if (connected && lastRefresh < Date.now() - 30000) {
+                lastRefresh = Date.now();
+                fetchNotifications();
             }
+            streamConnected = connected;
+        });
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
         };
-
-        checkReminders();
-        const interval = setInterval(checkReminders, 60 * 1000);
-
-        return () => clearInterval(interval);
-    }, [reminders, shownReminders]);
-
-    useEffect(() => {
-        fetchNotifications();
-        const interval = setInterval(fetchNotifications, 30000);
-        return () => clearInterval(interval);
     }, []);
 
     useEffect(() => {
@@ -382,16 +295,6 @@ export default function Layout() {
                     <Outlet context={{ fetchNotifications }} />
                 </main>
             </div>
-            {activeReminder && (
-                <div className="fixed top-4 right-4 bg-blue-700 text-white p-4 rounded-lg shadow-lg z-50 animate-fade-in">
-                    <strong>⏰ Przypomnienie!</strong>
-                    <div className="mt-2">{activeReminder.note}</div>
-                    <button className="mt-3 bg-white text-blue-700 px-3 py-1 rounded" onClick={() => setActiveReminder(null)}>
-                        Zamknij
-                    </button>
-                </div>
-            )}
-
             {/* Notification toast */}
             {newNotificationToast && (
                 <div className="fixed top-20 right-4 bg-green-700 text-white p-4 rounded-lg shadow-lg z-50 animate-fade-in max-w-sm">
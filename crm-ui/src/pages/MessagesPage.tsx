@@ -34,6 +34,10 @@ export function MessagesPage() {
     const [sentMessages, setSentMessages] = useState<Message[]>([]);
     const [users, setUsers] = useState<User[]>([]);
     const [loading, setLoading] = useState(true);
+    const [inboxCursor, setInboxCursor] = useState<string | null>(null);
+    const [sentCursor, setSentCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [unreadCount, setUnreadCount] = useState(0);
     const [activeTab, setActiveTab] = useState('inbox'); // 'inbox' or 'sent'
     const [showNewMessageModal, setShowNewMessageModal] = useState(false);
     const [newMessage, setNewMessage] = useState<CreateMessageDto>({
@@ -44,14 +48,26 @@ export function MessagesPage() {
     const { openModal, openToast } = useModal();
     const { fetchNotifications: globalFetchNotifications } = useOutletContext<{ fetchNotifications: () => void }>();
 
+    // Listy są stronicowane kursorem - kolejna strona w nagłówku X-Next-Cursor (brak = koniec listy)
+    const fetchPage = async (folder: 'inbox' | 'sent', cursor?: string | null) => {
+        const res = await api.get(`/Messages/${folder}`, { params: cursor ? { cursor } : {} });
+        return { items: (res.data || []) as Message[], next: (res.headers['x-next-cursor'] as string) || null };
+    };
+
     const fetchMessages = async () => {
         setLoading(true);
         try {
-            const inboxRes = await api.get('/Messages/inbox');
-            setInboxMessages(inboxRes.data || []);
+            const inbox = await fetchPage('inbox');
+            setInboxMessages(inbox.items);
+            setInboxCursor(inbox.next);
+
+            const sent = await fetchPage('sent');
+            setSentMessages(sent.items);
+            setSentCursor(sent.next);
 
-            const sentRes = await api.get('/Messages/sent');
-            setSentMessages(sentRes.data || []);
+            // Liczba nieprzeczytanych z licznika serwera - lista może mieć jeszcze niepobrane strony
+            const counters = await api.get('/me/counters');
+            setUnreadCount(counters.data?.unreadMessages ?? 0);
         } catch (err: any) {
             openModal({ type: 'error', title: 'Błąd', message: err.response?.data?.message || 'Nie udało się pobrać wiadomości.' });
         } finally {
@@ -59,6 +75,27 @@ export function MessagesPage() {
         }
     };
 
+    const loadMoreMessages = async () => {
+        const folder = activeTab === 'inbox' ? 'inbox' : 'sent';
+        const cursor = folder === 'inbox' ? inboxCursor : sentCursor;
+        if (!cursor) return;
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(folder, cursor);
+            if (folder === 'inbox') {
+                setInboxMessages(prev => [...prev, ...page.items]);
+                setInboxCursor(page.next);
+            } else {
+                setSentMessages(prev => [...prev, ...page.items]);
+                setSentCursor(page.next);
+            }
+        } catch (err: any) {
+            openModal({ type: 'error', title: 'Błąd', message: err.response?.data?.message || 'Nie udało się pobrać starszych wiadomości.' });
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const fetchUsers = async () => {
         try {
             const res = await api.get('/admin/users');
@@ -124,6 +161,7 @@ export function MessagesPage() {
     }
 
     const messagesToDisplay = activeTab === 'inbox' ? inboxMessages : sentMessages;
+    const hasMoreMessages = Boolean(activeTab === 'inbox' ? inboxCursor : sentCursor);
 
     return (
         <div className="p-6 text-white">
@@ -134,13 +172,13 @@ export function MessagesPage() {
                     onClick={() => setActiveTab('inbox')}
                     className={`px-4 py-2 rounded-lg font-semibold ${activeTab === 'inbox' ? 'bg-blue-600 text-white' : 'bg-gray-700 text-gray-300 hover:bg-gray-600'}`}
                 >
-                    Odebrane ({inboxMessages.filter(m => !m.isRead).length})
+                    Odebrane ({unreadCount})
                 </button>
                 <button
                     onClick={() => setActiveTab('sent')}
                     className={`px-4 py-2 rounded-lg font-semibold ${activeTab === 'sent' ? 'bg-blue-600 text-white' : 'bg-gray-700 text-gray-300 hover:bg-gray-600'}`}
                 >
-                    Wysłane ({sentMessages.length})
+                    Wysłane ({sentMessages.length}{sentCursor ? '+' : ''})
                 </button>
                 <button
                     onClick={() => setShowNewMessageModal(true)}
@@ -187,6 +225,17 @@ export function MessagesPage() {
                         ))}
                     </ul>
                 )}
+                {hasMoreMessages && (
+                    <div className="mt-4 flex justify-center">
+                        <button
+                            onClick={loadMoreMessages}
+                            disabled={loadingMore}
+                            className="px-4 py-2 rounded-lg font-semibold bg-gray-700 text-gray-300 hover:bg-gray-600 disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Ładowanie...' : 'Pokaż starsze wiadomości'}
+                        </button>
+                    </div>
+                )}
             </div>
 
             {/* New Message Modal */}
@@ -0,0 +1,97 @@
+import api from './api';
+
+export interface StreamNotification {
+    id: number;
+    message: string;
+    createdAt: string;
+    isRead: boolean;
+    userId: number;
+}
+
+const RECONNECT_DELAY_MS = 5000;
+
+/**
+ * Subskrypcja strumienia powiadomień (Server-Sent Events, GET /Notifications/stream).
+ * EventSource nie wysyła nagłówka Authorization, więc strumień jest czytany przez fetch.
+ * Po zerwaniu połączenia subskrypcja wznawia się po RECONNECT_DELAY_MS; onStatus informuje
+ * o otwarciu i zerwaniu strumienia (np. by częściej odświeżać listę, gdy strumień nie działa).
+ * Zwraca funkcję kończącą subskrypcję.
+ */
+export function subscribeNotifications(
+    onNotification: (notification: StreamNotification) => void,
+    onStatus?: (connected: boolean) => void
+): () => void {
+    let controller: AbortController | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const handleEvent = (block: string) => {
+        let event = 'message';
+        const dataLines: string[] = [];
+        for (const line of block.split('\n')) {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        }
+        if (event === 'notification' && dataLines.length > 0) {
+            try {
+                onNotification(JSON.parse(dataLines.join('\n')));
+            } catch (err) {
+                console.error('Nieprawidłowe zdarzenie powiadomienia:', err);
+            }
+        }
+    };
+
+    const connect = async () => {
+        controller = new AbortController();
+        try {
+            const token = localStorage.getItem('token');
+            const response = await fetch(`${api.defaults.baseURL}/Notifications/stream`, {
+                headers: token ? { Authorization: `Bearer ${token}` } : {},
+                signal: controller.signal
+            });
+            if (!response.ok || !response.body) {
+                throw new Error(`Strumień powiadomień: HTTP ${response.status}`);
+            }
+
+            onStatus?.(true);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+                let separator = buffer.indexOf('\n\n');
+                while (separator !== -1) {
+                    handleEvent(buffer.slice(0, separator));
+                    buffer = buffer.slice(separator + 2);
+                    separator = buffer.indexOf('\n\n');
+                }
+            }
+        } catch (err) {
+            if (closed) {
+                return;
+            }
+            console.error('Błąd strumienia powiadomień:', err);
+        }
+        if (!closed) {
+            onStatus?.(false);
+            reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+        }
+    };
+
+    connect();
+
+    return () => {
+        closed = true;
+        if (reconnectTimer) {
+            clearTimeout(reconnectTimer);
+        }
+        controller?.abort();
+    };
+}